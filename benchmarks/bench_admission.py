@@ -0,0 +1,101 @@
+"""
+准入控制基准
+2000 个执行在 1 秒内均匀到达（约为后端处理能力的 3 倍）；每个执行调用一次共享后端工具，
+后端同时服务超过 8 个调用时耗时按比例增长。对比关闭 / 开启准入控制时被放行执行的耗时分位与拒绝数
+
+运行：python -m benchmarks.bench_admission
+"""
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+
+from src.core.models import ExecutionPlan, PlanStep
+from src.core.protocols import AgentOutput, EngineResult, ToolExecutionResult
+from src.core.types import AgentRole
+from src.engine.admission import AdmissionConfig
+from src.engine.execution_engine import EngineConfig, EngineServices
+from src.engine.session_runtime import SessionRuntime
+from src.registry.component_registry import ComponentRegistry
+from src.tools.base_tool import BaseToolImpl
+from src.tools.limits import ToolLimits, ToolLimitsConfig
+from src.tools.runtime import ToolRuntimeConfig
+from tests.helpers import FakeAgent
+
+
+EXECUTIONS = 2000
+ARRIVAL_SECONDS = 1.0
+BACKEND_CAPACITY = 8
+BASE_LATENCY = 0.005
+
+
+class Backend(BaseToolImpl):
+    name = "backend"
+    version = "1.0.0"
+    timeout_ms = 60_000
+
+    def __init__(self) -> None:
+        self.running = 0
+
+    async def execute(self, input_data: Dict[str, Any]) -> ToolExecutionResult:
+        self.running += 1
+        try:
+            await asyncio.sleep(BASE_LATENCY * max(1.0, self.running / BACKEND_CAPACITY))
+        finally:
+            self.running -= 1
+        return await super().execute(input_data)
+
+    def compute(self, input_data: Dict[str, Any]) -> Any:
+        return "ok"
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * q), len(ordered) - 1)] if ordered else 0.0
+
+
+async def run(admission: Optional[AdmissionConfig]) -> None:
+    plan = ExecutionPlan(goal="bench", steps=[
+        PlanStep(id="call", description="", tool_name="backend", input_schema={})
+    ])
+    components = ComponentRegistry()
+    components.register_agent(FakeAgent(
+        AgentRole.PLANNER, [AgentOutput(success=True, data=plan, role=AgentRole.PLANNER)]
+    ))
+    components.register_tool(Backend())
+    config = EngineConfig()
+    runtime_config = ToolRuntimeConfig(
+        limits=ToolLimitsConfig(default=ToolLimits(max_concurrency=EXECUTIONS))
+    )
+    services = EngineServices.create(
+        config, components, runtime_config=runtime_config, admission_config=admission
+    )
+    runtime = SessionRuntime(components, config, services)
+
+    async def arrive(index: int) -> EngineResult:
+        await asyncio.sleep(index * ARRIVAL_SECONDS / EXECUTIONS)
+        _, result = await runtime.submit(f"goal-{index}")
+        return result
+
+    results = await asyncio.gather(*(arrive(i) for i in range(EXECUTIONS)))
+    latencies: List[float] = [r.total_latency_ms or 0 for r in results if r.success]
+    rejected = sum(
+        1 for r in results if r.errors and r.errors[0].code == "ADMISSION_REJECTED"
+    )
+    label = "admission" if admission is not None else "no limit "
+    print(
+        f"{label}: admitted {len(latencies):4d} | rejected {rejected:4d} | "
+        f"p50 {percentile(latencies, 0.5):6.0f} ms | p99 {percentile(latencies, 0.99):6.0f} ms"
+    )
+
+
+async def main() -> None:
+    started = time.perf_counter()
+    await run(None)
+    await run(AdmissionConfig(
+        enabled=True, max_concurrent=64, initial_limit=8, max_queue=64, queue_timeout_ms=50
+    ))
+    print(f"total {time.perf_counter() - started:.1f} s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
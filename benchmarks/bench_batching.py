@@ -0,0 +1,65 @@
+"""
+工具调用合并基准
+模拟按次计费的远程模型：每次调用固定 5 ms 往返，每个输入再加 0.1 ms；工具并发上限 8。
+500 个并发调用：逐个调用与开启调用合并（窗口 2 ms，批量上限 32）对比。
+
+运行：python -m benchmarks.bench_batching
+"""
+import asyncio
+import time
+from typing import Any, Dict, List
+
+from src.core.protocols import ToolExecutionResult
+from src.tools.base_tool import BaseToolImpl
+from src.tools.batching import BatchingConfig
+from src.tools.limits import ToolLimits, ToolLimitsConfig
+from src.tools.runtime import ToolRuntime, ToolRuntimeConfig
+
+
+CALLS = 500
+ROUND_TRIP = 0.005
+PER_ITEM = 0.0001
+
+
+class RemoteEmbedding(BaseToolImpl):
+    name = "embed"
+    version = "1.0.0"
+    max_batch_size = 32
+
+    async def execute(self, input_data: Dict[str, Any]) -> ToolExecutionResult:
+        await asyncio.sleep(ROUND_TRIP + PER_ITEM)
+        return ToolExecutionResult(success=True, output={"vector": [len(input_data["text"])]})
+
+    async def execute_batch(self, inputs: List[Dict[str, Any]]) -> List[ToolExecutionResult]:
+        await asyncio.sleep(ROUND_TRIP + PER_ITEM * len(inputs))
+        return [
+            ToolExecutionResult(success=True, output={"vector": [len(data["text"])]})
+            for data in inputs
+        ]
+
+
+async def run(label: str, batching: BatchingConfig) -> None:
+    runtime = ToolRuntime(config=ToolRuntimeConfig(
+        limits=ToolLimitsConfig(default=ToolLimits(max_concurrency=8)),
+        batching=batching,
+    ))
+    tool = RemoteEmbedding()
+    started = time.perf_counter()
+    results = await asyncio.gather(*(
+        runtime.invoke(tool, {"text": f"document {i}"}) for i in range(CALLS)
+    ))
+    elapsed = time.perf_counter() - started
+    assert all(result.success for result in results)
+    stats = runtime.coalescer.stats()
+    print(f"{label:18s}: {elapsed * 1e3:7.1f} ms  batches={stats['batches']:3d}  "
+          f"mean size={stats['mean_batch_size']:.1f}")
+    runtime.shutdown()
+
+
+async def main() -> None:
+    await run("one call per input", BatchingConfig())
+    await run("coalesced", BatchingConfig(enabled=True, window_ms=2, max_batch_size=32))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,58 @@
+"""
+计算器工具基准
+1. 同一表达式反复计算：每次解析、校验、编译与使用 LRU 缓存的编译结果对比
+2. 同一表达式在 10 万组绑定上求值：逐行调用与批量模式（安装 NumPy 时向量化）对比
+
+运行：python -m benchmarks.bench_calculator
+"""
+import random
+import time
+
+from src.tools.builtin import calculator_tool
+from src.tools.builtin.calculator_tool import CompiledExpression, ExpressionCompiler
+
+
+SOURCE = "price * quantity * (1 - discount) + (shipping if quantity < 10 else 0)"
+CALLS = 20_000
+ROWS = 100_000
+
+
+def main() -> None:
+    bindings = {"price": 19.9, "quantity": 3, "discount": 0.1, "shipping": 5.0}
+
+    started = time.perf_counter()
+    for _ in range(CALLS):
+        CompiledExpression(SOURCE).evaluate(bindings)
+    uncached = (time.perf_counter() - started) / CALLS
+
+    compiler = ExpressionCompiler()
+    started = time.perf_counter()
+    for _ in range(CALLS):
+        compiler.compile(SOURCE).evaluate(bindings)
+    cached = (time.perf_counter() - started) / CALLS
+    print(f"parse per call: {uncached * 1e6:7.2f} us / call")
+    print(f"lru cached    : {cached * 1e6:7.2f} us / call  ({uncached / cached:.1f}x)")
+
+    rng = random.Random(1)
+    columns = {
+        "price": [rng.uniform(1, 100) for _ in range(ROWS)],
+        "quantity": [float(rng.randint(1, 20)) for _ in range(ROWS)],
+    }
+    expression = compiler.compile(SOURCE)
+    scalars = {"discount": 0.1, "shipping": 5.0}
+
+    started = time.perf_counter()
+    for price, quantity in zip(columns["price"], columns["quantity"]):
+        expression.evaluate({"price": price, "quantity": quantity, **scalars})
+    rows = time.perf_counter() - started
+
+    started = time.perf_counter()
+    expression.evaluate_batch(columns, scalars)
+    batch = time.perf_counter() - started
+    mode = "numpy" if calculator_tool.HAS_NUMPY else "row fallback"
+    print(f"per-row calls : {rows * 1e3:7.1f} ms / {ROWS} rows")
+    print(f"batch ({mode}): {batch * 1e3:7.1f} ms / {ROWS} rows  ({rows / batch:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
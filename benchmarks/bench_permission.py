@@ -0,0 +1,87 @@
+"""
+权限检查基准
+200 个工具、每个工具带角色覆盖项，对比：
+每次检查时按配置解析角色列表、预编译矩阵查找的单次检查耗时；
+并在读者持续检查的同时反复 reload()，确认读路径无需加锁
+
+运行：python -m benchmarks.bench_permission
+"""
+import random
+import threading
+import time
+from typing import Any, List, Tuple
+
+from src.core.interfaces import BaseTool
+from src.core.types import AgentRole, PermissionLevel
+from src.policy.permission import PermissionConfig, PermissionSystem, ToolPermission
+from tests.helpers import FakeTool
+
+
+TOOLS = 200
+CHECKS = 200_000
+
+
+def build(rng: random.Random) -> Tuple[PermissionConfig, List[BaseTool]]:
+    levels = list(PermissionLevel)
+    roles = [r.value for r in AgentRole]
+    tools: List[BaseTool] = [
+        FakeTool(name=f"t{i}", permission_level=rng.choice(levels)) for i in range(TOOLS)
+    ]
+    overrides = {
+        f"t{i}": ToolPermission(allow=rng.sample(roles, 2), deny=rng.sample(roles, 1))
+        for i in range(0, TOOLS, 3)
+    }
+    return PermissionConfig(tools=overrides), tools
+
+
+def parse_per_check(config: PermissionConfig, role: AgentRole, tool: BaseTool) -> bool:
+    """不使用矩阵：每次检查时解析配置中的角色列表"""
+    override = config.tools.get(tool.name)
+    allowed = config.levels.get(tool.permission_level, [])
+    if override is not None and override.allow is not None:
+        allowed = override.allow
+    if "*" not in allowed and role.value not in allowed:
+        return False
+    return override is None or role.value not in override.deny
+
+
+def measure(label: str, check: Any, pairs: List[Tuple[AgentRole, BaseTool]]) -> None:
+    started = time.perf_counter()
+    for role, tool in pairs:
+        check(role, tool)
+    elapsed = time.perf_counter() - started
+    print(f"{label:16s}: {elapsed / len(pairs) * 1e9:6.0f} ns / check")
+
+
+def main() -> None:
+    rng = random.Random(7)
+    config, tools = build(rng)
+    roles = list(AgentRole)
+    pairs = [(rng.choice(roles), rng.choice(tools)) for _ in range(CHECKS)]
+    system = PermissionSystem(config, tools)
+
+    measure("parse per check", lambda r, t: parse_per_check(config, r, t), pairs)
+    measure("matrix", system.matrix.allows, pairs)
+    measure("system.check", system.check, pairs)
+
+    stop = threading.Event()
+    reloads = 0
+
+    def reloader() -> None:
+        nonlocal reloads
+        while not stop.is_set():
+            system.reload(config)
+            reloads += 1
+
+    thread = threading.Thread(target=reloader)
+    thread.start()
+    try:
+        measure("check + reload", system.check, pairs)
+    finally:
+        stop.set()
+        thread.join()
+    print(f"reloads during checks: {reloads}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+增量重规划基准
+100 步计划中第 42 步失败，重规划只修正该步骤（工具耗时 5ms）：
+对比整体重规划（全部重新执行）与增量重规划（沿用已完成结果）的重规划轮次耗时与执行步骤数
+
+运行：python -m benchmarks.bench_plan_diff
+"""
+import asyncio
+import time
+from typing import Any, Dict
+
+from src.core.models import ExecutionPlan, PlanStep
+from src.core.protocols import AgentOutput, ToolExecutionResult
+from src.core.types import AgentRole
+from src.engine.execution_engine import ExecutionEngine
+from src.registry.component_registry import ComponentRegistry
+from src.tools.base_tool import BaseToolImpl
+from tests.helpers import FakeAgent
+
+
+STEPS = 100
+BROKEN = 42
+
+
+class SlowTool(BaseToolImpl):
+    name = "noop"
+    version = "1.0.0"
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def execute(self, input_data: Dict[str, Any]) -> ToolExecutionResult:
+        self.calls += 1
+        await asyncio.sleep(0.005)
+        return await super().execute(input_data)
+
+    def compute(self, input_data: Dict[str, Any]) -> Any:
+        if input_data["fail"]:
+            raise ValueError("bad input")
+        return input_data["n"]
+
+
+def build_plan(broken: bool, revision: int) -> ExecutionPlan:
+    return ExecutionPlan(goal="bench", steps=[
+        PlanStep(
+            id=f"s{i}" if revision == 0 or i == BROKEN else f"s{i}-r{revision}",
+            description="",
+            tool_name="noop",
+            input_schema={"n": i, "fail": broken and i == BROKEN},
+            dependencies=[],
+        )
+        for i in range(STEPS)
+    ])
+
+
+async def run(incremental: bool) -> None:
+    # 整体重规划时新计划改写步骤 ID，使所有步骤都被视为新增
+    planner = FakeAgent(AgentRole.PLANNER, [
+        AgentOutput(success=True, data=build_plan(True, 0), role=AgentRole.PLANNER),
+        AgentOutput(
+            success=True, data=build_plan(False, 0 if incremental else 1), role=AgentRole.PLANNER
+        ),
+    ])
+    tool = SlowTool()
+    components = ComponentRegistry()
+    components.register_agent(planner)
+    components.register_tool(tool)
+    engine = ExecutionEngine(components)
+
+    started = time.perf_counter()
+    result = await engine.start("goal")
+    elapsed = time.perf_counter() - started
+    assert result.success
+    print(
+        f"{'incremental' if incremental else 'full       '}: {tool.calls:4d} tool calls | "
+        f"{elapsed * 1000:7.1f} ms"
+    )
+
+
+async def main() -> None:
+    await run(incremental=False)
+    await run(incremental=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
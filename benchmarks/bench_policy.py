@@ -0,0 +1,92 @@
+"""
+策略规则引擎基准
+500 条规则（均匀分布在各生命周期状态与触发事件上），对比：
+逐条线性扫描全部规则、按 (状态, 事件) 索引求值、索引 + 记忆化（重复输入）的单次求值耗时
+
+运行：python -m benchmarks.bench_policy
+"""
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+from src.core.models import ExecutionContext, GlobalState
+from src.core.protocols import AgentOutput, PolicyDecision
+from src.core.types import AgentRole, LifecycleState
+from src.engine.state_machine import TriggerEvent
+from src.policy.rules import PolicyFacts, RuleEngine
+
+
+RULES = 500
+EVALUATIONS = 20_000
+
+
+def build_rules(rng: random.Random) -> List[Dict[str, Any]]:
+    states = [s.value for s in LifecycleState]
+    events = [e.value for e in TriggerEvent]
+    return [
+        {
+            "id": f"r{i}",
+            "states": [rng.choice(states)],
+            "events": [rng.choice(events)],
+            "priority": rng.randrange(100),
+            "when": [
+                {"field": "state.iteration_count", "op": ">=", "value": rng.randrange(2, 10)},
+                {"field": "output.confidence", "op": "<", "value": rng.random()},
+            ],
+            "decision": {"allow": False, "reason": f"r{i}"},
+        }
+        for i in range(RULES)
+    ]
+
+
+def build_facts(rng: random.Random, count: int) -> List[PolicyFacts]:
+    context = ExecutionContext()
+    return [
+        PolicyFacts(
+            GlobalState(
+                original_goal="goal",
+                lifecycle_state=rng.choice(list(LifecycleState)),
+                iteration_count=rng.randrange(4),
+                trace_id="t",
+            ),
+            context,
+            AgentOutput(success=True, confidence=rng.choice((0.5, 0.9)), role=AgentRole.REVIEWER),
+            None,
+            rng.choice(list(TriggerEvent)).value,
+        )
+        for _ in range(count)
+    ]
+
+
+def linear_scan(engine: RuleEngine, facts: PolicyFacts) -> Optional[PolicyDecision]:
+    """不使用索引：逐条检查状态、事件与条件"""
+    state = facts.global_state.lifecycle_state
+    for rule in engine.rules:
+        if rule.applies_to(state, facts.event) and rule.predicate(facts):
+            return rule.decision
+    return None
+
+
+def measure(label: str, evaluate: Any, facts: List[PolicyFacts]) -> None:
+    started = time.perf_counter()
+    for item in facts:
+        evaluate(item)
+    elapsed = time.perf_counter() - started
+    print(f"{label:16s}: {elapsed / len(facts) * 1e6:6.2f} us / evaluation")
+
+
+def main() -> None:
+    rng = random.Random(7)
+    rules = build_rules(rng)
+    distinct = build_facts(rng, EVALUATIONS)
+    repeated = [rng.choice(distinct[:200]) for _ in range(EVALUATIONS)]
+
+    engine = RuleEngine(rules)
+    measure("linear scan", lambda f: linear_scan(engine, f), distinct)
+    measure("indexed", RuleEngine(rules, memo_size=1).evaluate, distinct)
+    engine = RuleEngine(rules)
+    measure("indexed + memo", engine.evaluate, repeated)
+
+
+if __name__ == "__main__":
+    main()
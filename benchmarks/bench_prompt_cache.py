@@ -0,0 +1,95 @@
+"""
+提示缓存基准
+模拟 200 ms 的模型调用，五类 Agent 各自的提示约 8 KB（系统说明 + 计划上下文）：
+1. 3 轮重规划中发出相同提示：无缓存与开启提示缓存的总耗时、模型调用次数对比
+2. 命中一次缓存的开销（提示规范化与哈希）
+
+运行：python -m benchmarks.bench_prompt_cache
+"""
+import asyncio
+import time
+from typing import Any, List, Optional
+
+from src.agents.base_agent import (
+    AgentConfig, BaseAgentImpl, ChatMessage, LLMRequest, LLMResponse, PromptCache,
+    PromptCacheConfig,
+)
+from src.core.models import ExecutionContext, GlobalState, StepContext
+from src.core.types import AgentRole, LifecycleState
+
+
+LATENCY = 0.2
+ITERATIONS = 3
+SYSTEM = "You are one agent of a multi-agent planning system. " * 100
+CONTEXT = "Step s{0}: fetch and summarise the quarterly report section {0}.\n" * 60
+
+
+class SimulatedLLM:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def complete(self, request: LLMRequest) -> LLMResponse:
+        self.calls += 1
+        await asyncio.sleep(LATENCY)
+        return LLMResponse(content="ok")
+
+
+def agent_for(agent_role: AgentRole, client: SimulatedLLM, cache: PromptCache) -> BaseAgentImpl:
+    class Agent(BaseAgentImpl):
+        name = agent_role.value.lower()
+        role = agent_role
+
+        def build_messages(
+            self,
+            global_state: GlobalState,
+            execution_context: ExecutionContext,
+            step_context: Optional[StepContext] = None,
+        ) -> List[ChatMessage]:
+            return [
+                ChatMessage(role="system", content=SYSTEM),
+                ChatMessage(role="user", content=f"{self.role.value}\n{CONTEXT}"),
+            ]
+
+    return Agent(client, AgentConfig(), cache)
+
+
+async def replan_loop(enabled: bool) -> Any:
+    client = SimulatedLLM()
+    cache = PromptCache(PromptCacheConfig(enabled=enabled))
+    agents = [agent_for(role, client, cache) for role in AgentRole]
+    started = time.perf_counter()
+    for iteration in range(ITERATIONS):
+        state = GlobalState(
+            original_goal="quarterly summary",
+            lifecycle_state=LifecycleState.PLAN_GENERATION,
+            iteration_count=iteration,
+            trace_id="bench",
+        )
+        for agent in agents:
+            await agent.run(state, ExecutionContext())
+    return time.perf_counter() - started, client.calls, cache
+
+
+async def main() -> None:
+    for enabled in (False, True):
+        elapsed, calls, cache = await replan_loop(enabled)
+        label = "prompt cache" if enabled else "no cache"
+        print(f"{label:12s}: {elapsed * 1e3:7.1f} ms  model calls={calls}")
+
+    agent = agent_for(AgentRole.PLANNER, SimulatedLLM(), cache)
+    state = GlobalState(
+        original_goal="quarterly summary",
+        lifecycle_state=LifecycleState.PLAN_GENERATION,
+        trace_id="bench",
+    )
+    context = ExecutionContext()
+    rounds = 2000
+    started = time.perf_counter()
+    for _ in range(rounds):
+        await agent.run(state, context)
+    per_hit = (time.perf_counter() - started) / rounds
+    print(f"cache hit   : {per_hit * 1e6:7.1f} us per run ({len(SYSTEM) + len(CONTEXT)} chars)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
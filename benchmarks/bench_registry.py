@@ -0,0 +1,74 @@
+"""
+工具注册中心冷启动基准
+在临时目录生成 N 个工具模块与对应清单，对比：
+启动时逐个导入并实例化（原注册方式）与只登记清单声明、首次 get() 时再导入的启动耗时
+
+运行：python -m benchmarks.bench_registry
+"""
+import importlib
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from src.registry.tool_registry import ToolRegistry
+
+
+SIZES = (50, 200, 800)
+
+MODULE = """
+from src.tools.base_tool import BaseToolImpl
+
+
+class Tool(BaseToolImpl):
+    name = "{name}"
+    version = "1.0.0"
+
+    def compute(self, input_data):
+        return input_data
+"""
+
+
+def generate(root: Path, prefix: str, count: int) -> Path:
+    lines = ["tools:"]
+    for index in range(count):
+        name = f"{prefix}_{index}"
+        (root / f"{name}.py").write_text(MODULE.format(name=name), encoding="utf-8")
+        lines.append(f'  - {{name: {name}, target: "{name}:Tool"}}')
+    manifest = root / f"{prefix}.yaml"
+    manifest.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return manifest
+
+
+def eager(prefix: str, count: int) -> float:
+    started = time.perf_counter()
+    registry = ToolRegistry()
+    for index in range(count):
+        registry.register(importlib.import_module(f"{prefix}_{index}").Tool())
+    return time.perf_counter() - started
+
+
+def lazy(manifest: Path) -> float:
+    started = time.perf_counter()
+    ToolRegistry().discover(manifest, entry_point_group=None)
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        sys.path.insert(0, tmp)
+        for count in SIZES:
+            # 两组互不相同的模块，避免 sys.modules 缓存影响对比
+            generate(root, f"eager{count}", count)
+            eager_cost = eager(f"eager{count}", count)
+            lazy_cost = lazy(generate(root, f"lazy{count}", count))
+            print(
+                f"{count:4d} tools  eager import: {eager_cost * 1e3:8.2f} ms   "
+                f"lazy discover: {lazy_cost * 1e3:7.2f} ms"
+            )
+        sys.path.remove(tmp)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+执行日志恢复基准
+固定 100 个在途执行，历史已结束执行数量从 0 增长到 20000，
+统计重启时扫描并加载全部在途执行的耗时
+
+运行：python -m benchmarks.bench_resume
+"""
+import asyncio
+import tempfile
+import time
+
+from src.core.models import GlobalState
+from src.core.types import LifecycleState
+from src.infrastructure.journal.jsonl_journal import JsonlJournal
+
+
+IN_FLIGHT = 100
+
+
+async def populate(journal: JsonlJournal, count: int, finished: bool) -> None:
+    for _ in range(count):
+        state = GlobalState(
+            original_goal="goal", lifecycle_state=LifecycleState.STEP_EXECUTION, trace_id="t"
+        )
+        execution_id = str(state.execution_id)
+        await journal.record_transition(state, None, {}, reset_steps=True)
+        for index in range(5):
+            await journal.record_step_completed(execution_id, f"s{index}", {"value": index})
+        if finished:
+            await journal.finish(execution_id)
+
+
+async def recover(journal: JsonlJournal) -> float:
+    started = time.perf_counter()
+    entries = [await journal.load(e) for e in await journal.in_flight()]
+    elapsed = time.perf_counter() - started
+    assert len(entries) == IN_FLIGHT
+    return elapsed
+
+
+async def main() -> None:
+    for history in (0, 2000, 20000):
+        with tempfile.TemporaryDirectory() as root:
+            journal = JsonlJournal(root)
+            await populate(journal, history, finished=True)
+            await populate(journal, IN_FLIGHT, finished=False)
+            elapsed = await recover(journal)
+        print(f"history {history:6d} finished | recover {IN_FLIGHT} in-flight: "
+              f"{elapsed * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
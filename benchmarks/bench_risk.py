@@ -0,0 +1,60 @@
+"""
+风险评估基准
+执行累积 N 条步骤结果后，对比：
+每次评估时重新扫描错误列表（连续失败、窗口内失败数）与增量计数器评估的单次耗时
+
+运行：python -m benchmarks.bench_risk
+"""
+import random
+import time
+from typing import List, Tuple
+
+from src.policy.risk_control import RiskController
+
+
+HISTORY = (100, 1_000, 10_000)
+ASSESSMENTS = 2_000
+WINDOW_SECONDS = 300.0
+
+
+def rescan(history: List[Tuple[float, bool]], now: float) -> Tuple[int, int]:
+    """不使用增量结构：从错误历史计算连续失败数与窗口内失败数"""
+    consecutive = 0
+    for _, success in reversed(history):
+        if success:
+            break
+        consecutive += 1
+    failures = sum(1 for at, success in history if not success and now - at < WINDOW_SECONDS)
+    return consecutive, failures
+
+
+def main() -> None:
+    rng = random.Random(7)
+    for size in HISTORY:
+        now = 0.0
+        risk = RiskController(clock=lambda: now)
+        history: List[Tuple[float, bool]] = []
+        for _ in range(size):
+            now += 0.5
+            success = rng.random() > 0.2
+            history.append((now, success))
+            risk.record_step("t", f"tool{rng.randrange(8)}", success)
+
+        started = time.perf_counter()
+        for _ in range(ASSESSMENTS):
+            rescan(history, now)
+        scanned = (time.perf_counter() - started) / ASSESSMENTS
+
+        started = time.perf_counter()
+        for _ in range(ASSESSMENTS):
+            risk.assess("t")
+        incremental = (time.perf_counter() - started) / ASSESSMENTS
+
+        print(
+            f"history {size:6d}: rescan {scanned * 1e6:8.1f} us, "
+            f"incremental {incremental * 1e6:5.1f} us"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+本地 BM25 检索基准
+生成 Zipf 分布词频的合成语料并构建索引，测量：
+打开索引的耗时，以及 1～4 个查询词的 top-10 查询延迟（MaxScore 剪枝与穷举打分对比）
+
+运行：python -m benchmarks.bench_search [文档数，默认 200000]
+"""
+import random
+import statistics
+import sys
+import tempfile
+import time
+from heapq import nlargest
+from itertools import accumulate
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+from src.tools.builtin.search_tool import SearchIndex, build_index, tokenize
+
+
+VOCABULARY = 50_000
+QUERIES = 200
+
+
+def corpus(count: int, rng: random.Random) -> Iterator[Dict[str, str]]:
+    words = [f"w{i}" for i in range(VOCABULARY)]
+    weights = list(accumulate(1 / (rank + 1) for rank in range(VOCABULARY)))
+    for number in range(count):
+        text = " ".join(rng.choices(words, cum_weights=weights, k=rng.randint(20, 120)))
+        yield {"id": f"doc-{number}", "title": "", "text": text}
+
+
+def exhaustive(index: SearchIndex, query: str, top_k: int) -> List[Tuple[int, float]]:
+    """不剪枝：完整遍历所有查询词的倒排"""
+    scores: Dict[int, float] = {}
+    for term in dict.fromkeys(tokenize(query)):
+        cursor = index._cursor(term)
+        while cursor is not None and cursor.doc < 1 << 32:
+            scores[cursor.doc] = scores.get(cursor.doc, 0.0) + cursor.score()
+            cursor.next()
+    return nlargest(top_k, scores.items(), key=lambda item: (item[1], -item[0]))
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.idx"
+        started = time.perf_counter()
+        build_index(corpus(count, rng), path)
+        print(f"build  : {time.perf_counter() - started:8.1f} s for {count} documents, "
+              f"{path.stat().st_size / 2**20:.0f} MiB")
+
+        started = time.perf_counter()
+        index = SearchIndex(path)
+        print(f"open   : {(time.perf_counter() - started) * 1e3:8.3f} ms")
+
+        # 查询词在前 5000 个词中均匀抽取：包含高频词与中频词
+        queries = [
+            " ".join(f"w{rng.randrange(5000)}" for _ in range(rng.randint(1, 4)))
+            for _ in range(QUERIES)
+        ]
+        for name, search in (("maxscore", index.search), ("exhaustive", None)):
+            latencies = []
+            for query in queries:
+                started = time.perf_counter()
+                if search is None:
+                    exhaustive(index, query, 10)
+                else:
+                    search(query, 10)
+                latencies.append(time.perf_counter() - started)
+            latencies.sort()
+            print(f"{name:10s}: p50 {statistics.median(latencies) * 1e3:7.2f} ms   "
+                  f"p95 {latencies[int(len(latencies) * 0.95)] * 1e3:7.2f} ms")
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+SessionRuntime 基准
+单个事件循环上并发执行 N 个会话（每个会话 3 步计划，工具耗时 1ms），
+统计会话吞吐与每个活跃会话的内存开销
+
+运行：python -m benchmarks.bench_session_runtime
+"""
+import asyncio
+import time
+import tracemalloc
+from typing import Any, Dict, Optional
+
+from src.core.interfaces import BaseAgent, BaseTool
+from src.core.models import ExecutionContext, ExecutionPlan, GlobalState, PlanStep, StepContext
+from src.core.protocols import AgentOutput, ToolExecutionResult
+from src.core.types import AgentRole, PermissionLevel
+from src.engine.session_runtime import SessionRuntime
+from src.registry.component_registry import ComponentRegistry
+
+
+PLAN = ExecutionPlan(goal="bench", steps=[
+    PlanStep(id="a", description="", tool_name="sleep", input_schema={}),
+    PlanStep(id="b", description="", tool_name="sleep", input_schema={}),
+    PlanStep(id="c", description="", tool_name="sleep", input_schema={}, dependencies=["a", "b"]),
+])
+
+
+class Planner(BaseAgent):
+    name = "planner"
+    role = AgentRole.PLANNER
+
+    async def run(
+        self,
+        global_state: GlobalState,
+        execution_context: ExecutionContext,
+        step_context: Optional[StepContext] = None,
+    ) -> AgentOutput:
+        return AgentOutput(success=True, data=PLAN, role=AgentRole.PLANNER)
+
+    def validate_output(self, output: AgentOutput) -> bool:
+        return True
+
+
+class SleepTool(BaseTool):
+    name = "sleep"
+    version = "1.0.0"
+    input_schema: Dict[str, Any] = {}
+    output_schema: Dict[str, Any] = {}
+    timeout_ms = 1000
+    permission_level = PermissionLevel.PUBLIC
+    has_side_effect = False
+
+    async def execute(self, input_data: Dict[str, Any]) -> ToolExecutionResult:
+        await asyncio.sleep(0.001)
+        return ToolExecutionResult(success=True, output="ok")
+
+
+def build_runtime() -> SessionRuntime:
+    components = ComponentRegistry()
+    components.register_agent(Planner())
+    components.register_tool(SleepTool())
+    return SessionRuntime(components)
+
+
+async def throughput(sessions: int) -> float:
+    runtime = build_runtime()
+    started = time.perf_counter()
+    await runtime.run_many([f"goal-{i}" for i in range(sessions)])
+    elapsed = time.perf_counter() - started
+    assert runtime.stats().completed == sessions
+    return sessions / elapsed
+
+
+async def overhead(sessions: int) -> float:
+    """所有会话同时处于活跃状态时的平均内存占用（字节）"""
+    runtime = build_runtime()
+    await runtime.run_many(["warmup"])
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(sessions):
+        engine = runtime.get_session(runtime.create_session())
+        engine.initialize(f"goal-{i}")
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / sessions
+
+
+async def main() -> None:
+    for sessions in (100, 1000, 5000):
+        rate = await throughput(sessions)
+        print(f"{sessions:5d} concurrent sessions : {rate:9.0f} sessions/s")
+    print(f"per-session overhead       : {await overhead(2000) / 1024:9.2f} KiB")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
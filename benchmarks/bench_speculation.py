@@ -0,0 +1,55 @@
+"""
+推测执行基准
+20 步线性计划，工具耗时 10ms，逐步审查耗时 20ms：
+对比逐步审查（下游等待上游审查通过）与推测执行（审查期间提前启动下游）的总耗时
+
+运行：python -m benchmarks.bench_speculation
+"""
+import asyncio
+import time
+from typing import Optional
+
+from src.core.models import ExecutionContext, ExecutionPlan, PlanStep
+from src.core.protocols import StructuredError, ToolExecutionResult
+from src.engine.batch_manager import BatchManager
+
+
+STEPS = 20
+
+
+def build_plan() -> ExecutionPlan:
+    return ExecutionPlan(goal="bench", steps=[
+        PlanStep(
+            id=f"s{i}",
+            description="",
+            tool_name="noop",
+            input_schema={},
+            dependencies=[f"s{i - 1}"] if i else [],
+        )
+        for i in range(STEPS)
+    ])
+
+
+async def runner(step: PlanStep) -> ToolExecutionResult:
+    await asyncio.sleep(0.01)
+    return ToolExecutionResult(success=True, output=step.id)
+
+
+async def reviewer(step: PlanStep, result: ToolExecutionResult) -> Optional[StructuredError]:
+    await asyncio.sleep(0.02)
+    return None
+
+
+async def main() -> None:
+    plan = build_plan()
+    manager = BatchManager()
+    for label, speculate in (("step review", None), ("speculative", lambda step: True)):
+        started = time.perf_counter()
+        batch = await manager.run(plan, runner, ExecutionContext(), reviewer, speculate)
+        elapsed = time.perf_counter() - started
+        assert batch.success
+        print(f"{label:12s}: {elapsed * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,53 @@
+"""
+StateMachine 微基准
+对比预编译转移表与逐条扫描规则列表的单次转移开销
+
+运行：python -m benchmarks.bench_state_machine
+"""
+import timeit
+
+from src.core.models import ExecutionContext, GlobalState
+from src.core.protocols import AgentOutput
+from src.core.types import AgentRole, LifecycleState, StepStatus
+from src.engine.state_machine import GuardContext, TriggerEvent, build_default_state_machine
+
+
+def _naive_resolve(transitions, state, trigger, context):
+    """未编译的参照实现：每次线性扫描并排序候选规则"""
+    candidates = [t for t in transitions if t.source == state and t.trigger == trigger]
+    for t in sorted(candidates, key=lambda t: -t.priority):
+        if t.guard is None or t.guard(context):
+            return t.target
+    return None
+
+
+def main() -> None:
+    machine = build_default_state_machine()
+    transitions = machine.transitions
+    context = GuardContext(
+        GlobalState(
+            original_goal="bench", lifecycle_state=LifecycleState.STEP_REVIEW, trace_id="b"
+        ),
+        ExecutionContext(active_steps={f"s{i}": StepStatus.COMPLETED for i in range(20)}),
+        AgentOutput(success=True, confidence=0.9, role=AgentRole.REVIEWER),
+    )
+    cases = [
+        ("INIT/START (unguarded)", LifecycleState.INIT, TriggerEvent.START),
+        (
+            "STEP_REVIEW/STEP_REVIEWED (4 guards)",
+            LifecycleState.STEP_REVIEW,
+            TriggerEvent.STEP_REVIEWED,
+        ),
+    ]
+    number = 200_000
+    print(f"{'case':<40}{'compiled ns/op':>16}{'naive ns/op':>14}")
+    for label, state, trigger in cases:
+        compiled = timeit.timeit(lambda: machine.resolve(state, trigger, context), number=number)
+        naive = timeit.timeit(
+            lambda: _naive_resolve(transitions, state, trigger, context), number=number // 10
+        )
+        print(f"{label:<40}{compiled / number * 1e9:>16.0f}{naive / (number // 10) * 1e9:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+流式执行基准
+20 步线性计划，工具耗时 20ms：对比 start() 返回结果的耗时与 start_stream() 产出首个步骤结果的耗时
+
+运行：python -m benchmarks.bench_stream
+"""
+import asyncio
+import time
+
+from src.core.models import ExecutionPlan, PlanStep
+from src.core.protocols import AgentOutput
+from src.core.types import AgentRole
+from src.engine.events import StepCompletedEvent
+from src.engine.execution_engine import ExecutionEngine
+from src.registry.component_registry import ComponentRegistry
+from tests.helpers import FakeAgent, FakeTool
+
+
+STEPS = 20
+
+
+def build_engine() -> ExecutionEngine:
+    plan = ExecutionPlan(goal="bench", steps=[
+        PlanStep(
+            id=f"s{i}",
+            description="",
+            tool_name="slow",
+            input_schema={"i": i},
+            dependencies=[f"s{i - 1}"] if i else [],
+        )
+        for i in range(STEPS)
+    ])
+    components = ComponentRegistry()
+    components.register_agent(FakeAgent(
+        AgentRole.PLANNER, [AgentOutput(success=True, data=plan, role=AgentRole.PLANNER)]
+    ))
+    components.register_tool(FakeTool(name="slow", delays=[0.02]))
+    return ExecutionEngine(components)
+
+
+async def main() -> None:
+    started = time.perf_counter()
+    result = await build_engine().start("goal")
+    assert result.success
+    print(f"start()       : result after {(time.perf_counter() - started) * 1000:7.1f} ms")
+
+    started = time.perf_counter()
+    first_step = None
+    async for event in build_engine().start_stream("goal"):
+        if first_step is None and isinstance(event, StepCompletedEvent):
+            first_step = time.perf_counter() - started
+    total = time.perf_counter() - started
+    print(f"start_stream(): first step after {(first_step or 0) * 1000:7.1f} ms | "
+          f"result after {total * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,70 @@
+"""
+工具结果缓存基准
+200 个并发调用方各执行 5 次只读搜索（查询取自 20 个热点，工具耗时 10ms），
+对比关闭 / 开启缓存时的实际工具调用次数、总耗时与命中率
+
+运行：python -m benchmarks.bench_tool_cache
+"""
+import asyncio
+import random
+import time
+from typing import Any, Dict
+
+from src.core.protocols import ToolExecutionResult
+from src.tools.base_tool import BaseToolImpl
+from src.tools.cache import CacheConfig
+from src.tools.limits import ToolLimits, ToolLimitsConfig
+from src.tools.runtime import ToolRuntime, ToolRuntimeConfig
+
+
+CALLERS = 200
+CALLS_PER_CALLER = 5
+QUERIES = 20
+
+
+class SlowSearch(BaseToolImpl):
+    name = "search"
+    version = "1.0.0"
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def execute(self, input_data: Dict[str, Any]) -> ToolExecutionResult:
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return await super().execute(input_data)
+
+    def compute(self, input_data: Dict[str, Any]) -> Any:
+        return {"hits": [input_data["q"]]}
+
+
+async def run(enabled: bool) -> None:
+    config = ToolRuntimeConfig(
+        limits=ToolLimitsConfig(default=ToolLimits(max_concurrency=32)),
+        cache=CacheConfig(enabled=enabled),
+    )
+    runtime = ToolRuntime(config=config)
+    tool = SlowSearch()
+    rng = random.Random(3)
+
+    async def caller() -> None:
+        for _ in range(CALLS_PER_CALLER):
+            await runtime.invoke(tool, {"q": f"query-{rng.randrange(QUERIES)}"})
+
+    started = time.perf_counter()
+    await asyncio.gather(*(caller() for _ in range(CALLERS)))
+    elapsed = time.perf_counter() - started
+    stats = runtime.cache.stats()
+    print(
+        f"cache {'on ' if enabled else 'off'}: {tool.calls:5d} tool calls | "
+        f"{elapsed * 1000:7.1f} ms | hit rate {stats['hit_rate']:.2%}"
+    )
+
+
+async def main() -> None:
+    await run(enabled=False)
+    await run(enabled=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
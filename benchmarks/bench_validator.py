@@ -0,0 +1,118 @@
+"""
+工具输入校验基准
+典型的嵌套 input_schema，对比：
+每次调用时递归解释 schema 字典与预编译校验函数的单次校验耗时（输入均合法）
+
+运行：python -m benchmarks.bench_validator
+"""
+import re
+import time
+from typing import Any, Dict, List
+
+from src.tools.validator import ToolValidator
+from tests.helpers import FakeTool
+
+
+CALLS = 50_000
+
+SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "query": {"type": "string", "minLength": 1, "maxLength": 256},
+        "limit": {"type": "integer", "minimum": 1, "maximum": 100},
+        "lang": {"enum": ["en", "zh", "ja"]},
+        "filters": {
+            "type": "array",
+            "maxItems": 8,
+            "items": {
+                "type": "object",
+                "properties": {
+                    "field": {"type": "string", "pattern": "^[a-z_]+$"},
+                    "value": {"type": ["string", "number"]},
+                },
+                "required": ["field", "value"],
+                "additionalProperties": False,
+            },
+        },
+    },
+    "required": ["query"],
+    "additionalProperties": False,
+}
+
+INPUT = {
+    "query": "distributed tracing",
+    "limit": 20,
+    "lang": "en",
+    "filters": [{"field": "year", "value": 2024}, {"field": "source", "value": "docs"}],
+}
+
+_TYPES = {
+    "object": lambda v: isinstance(v, dict),
+    "array": lambda v: isinstance(v, list),
+    "string": lambda v: isinstance(v, str),
+    "integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+}
+
+
+def interpret(schema: Dict[str, Any], value: Any, path: str, errors: List[str]) -> None:
+    """不做编译：每次调用都遍历 schema 字典"""
+    if "enum" in schema and value not in schema["enum"]:
+        errors.append(path)
+    if "type" in schema:
+        kinds = schema["type"] if isinstance(schema["type"], list) else [schema["type"]]
+        if not any(_TYPES[kind](value) for kind in kinds):
+            errors.append(path)
+            return
+    if isinstance(value, dict):
+        for key in schema.get("required", []):
+            if key not in value:
+                errors.append(path)
+        properties = schema.get("properties", {})
+        for key, item in value.items():
+            if key in properties:
+                interpret(properties[key], item, f"{path}.{key}", errors)
+            elif schema.get("additionalProperties") is False:
+                errors.append(path)
+    elif isinstance(value, list):
+        if len(value) > schema.get("maxItems", len(value)):
+            errors.append(path)
+        for index, item in enumerate(value):
+            interpret(schema.get("items", {}), item, f"{path}[{index}]", errors)
+    elif isinstance(value, str):
+        if not schema.get("minLength", 0) <= len(value) <= schema.get("maxLength", len(value)):
+            errors.append(path)
+        if "pattern" in schema and re.search(schema["pattern"], value) is None:
+            errors.append(path)
+    elif isinstance(value, (int, float)):
+        if not schema.get("minimum", value) <= value <= schema.get("maximum", value):
+            errors.append(path)
+
+
+class SchemaTool(FakeTool):
+    @property
+    def input_schema(self) -> Dict[str, Any]:
+        return SCHEMA
+
+
+def main() -> None:
+    started = time.perf_counter()
+    for _ in range(CALLS):
+        errors: List[str] = []
+        interpret(SCHEMA, INPUT, "$", errors)
+        assert not errors
+    interpreted = (time.perf_counter() - started) / CALLS
+
+    validator = ToolValidator()
+    tool = SchemaTool(name="search")
+    started = time.perf_counter()
+    for _ in range(CALLS):
+        assert validator.check(tool, INPUT) is None
+    compiled = (time.perf_counter() - started) / CALLS
+
+    print(f"interpreted: {interpreted * 1e6:6.2f} us / call")
+    print(f"compiled   : {compiled * 1e6:6.2f} us / call  ({interpreted / compiled:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
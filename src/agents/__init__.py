@@ -0,0 +1,21 @@
+from .base_agent import (
+    AgentConfig,
+    BaseAgentImpl,
+    ChatMessage,
+    LLMClient,
+    LLMRequest,
+    LLMResponse,
+    PromptCache,
+    PromptCacheConfig,
+)
+
+__all__ = [
+    "AgentConfig",
+    "BaseAgentImpl",
+    "ChatMessage",
+    "LLMClient",
+    "LLMRequest",
+    "LLMResponse",
+    "PromptCache",
+    "PromptCacheConfig",
+]
@@ -0,0 +1,438 @@
+"""
+Agent 通用骨架
+来源：《PROJECT_PLAN.md》4.1
+
+- 认知 Agent 由 build_messages()（构造提示）与 parse_response()（解析模型回复）组成，
+  模型调用经 LLMClient 完成，底层模型可替换（Ollama / OpenAI / Claude），接口不变
+- 模型调用经 PromptCache：
+    精确匹配 - 键为 (角色, 模型, 规范化提示 + 采样参数 + Agent 声明的相关状态切片) 的哈希，
+               TTL 过期 + 条目数上限的 LRU 淘汰；并发的相同调用只执行一次（single-flight）
+    前缀共享 - 记录近期发送过的消息前缀，请求携带与之前请求共享的前缀消息数（cached_prefix），
+               客户端据此设置服务端提示缓存断点（如 cache_control），未命中的请求只为新增部分付费
+- 相关状态切片由 cache_scope() 声明，不含 iteration_count / trace_id 等每次执行都不同的字段，
+  因此重规划与重试发出的相同提示直接命中缓存；解析失败的回复从缓存中移除
+"""
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import (
+    Any, Awaitable, Callable, Dict, List, Literal, Optional, Protocol, Tuple, Union,
+)
+
+from pydantic import BaseModel, Field
+
+from src.core.interfaces import BaseAgent
+from src.core.models import ExecutionContext, GlobalState, StepContext
+from src.core.protocols import AgentOutput, StructuredError
+from src.core.types import AgentRole
+
+
+PromptKey = Tuple[str, str, str]   # (角色, 模型, 摘要)
+PromptSource = Literal["hit", "coalesced", "miss", "bypass"]
+
+
+# ==============================================================================
+# 模型调用协议
+# ==============================================================================
+
+class ChatMessage(BaseModel):
+    """对话消息"""
+    role: Literal["system", "user", "assistant"]
+    content: str
+
+
+class LLMRequest(BaseModel):
+    """模型调用请求"""
+    model: str
+    messages: List[ChatMessage]
+    temperature: float = 0.0
+    max_tokens: Optional[int] = None
+    cached_prefix: int = 0    # 与近期请求共享的前缀消息数，客户端可据此设置提示缓存断点
+
+
+class LLMResponse(BaseModel):
+    """模型回复"""
+    content: str
+    model: str = ""
+    usage: Dict[str, int] = {}
+
+
+class LLMClient(Protocol):
+    """模型客户端，由具体部署提供（OpenAI / Anthropic / 本地模型）"""
+
+    async def complete(self, request: LLMRequest) -> LLMResponse:
+        ...
+
+
+# ==============================================================================
+# 配置模型
+# ==============================================================================
+
+class PromptCacheConfig(BaseModel):
+    """提示缓存配置，对应 agents.prompt_cache 段"""
+    enabled: bool = True
+    max_entries: int = Field(default=512, ge=1)
+    ttl_seconds: float = Field(default=600, gt=0)
+    ttl_overrides: Dict[str, float] = {}                 # 角色级 TTL 覆盖（键为 AgentRole 值）
+    max_prefixes: int = Field(default=4096, ge=1)
+    prefix_ttl_seconds: float = Field(default=300, gt=0)  # 应不超过服务端提示缓存的保留时长
+
+
+class AgentConfig(BaseModel):
+    """Agent 配置，对应 configs/default.yaml 的 agents 段"""
+    model: str = "default"
+    temperature: float = Field(default=0.0, ge=0)
+    max_tokens: Optional[int] = Field(default=None, ge=1)
+    prompt_cache: PromptCacheConfig = PromptCacheConfig()
+
+    @classmethod
+    def from_yaml(cls, path: Union[str, Path]) -> "AgentConfig":
+        """从 YAML 文件读取 agents 段"""
+        import yaml
+
+        with open(path, "r", encoding="utf-8") as f:
+            data = yaml.safe_load(f) or {}
+        return cls(**(data.get("agents") or {}))
+
+
+# ==============================================================================
+# 提示缓存
+# ==============================================================================
+
+def canonical_text(text: str) -> str:
+    """规范化提示文本：统一换行符，去除行尾空白与首尾空行"""
+    lines = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip("\n")
+
+
+def prefix_digests(messages: List[ChatMessage]) -> List[str]:
+    """逐条消息的链式哈希：第 i 项标识前 i + 1 条消息组成的前缀"""
+    digests: List[str] = []
+    current = hashlib.sha256()
+    for message in messages:
+        current.update(message.role.encode("utf-8") + b"\x00")
+        current.update(canonical_text(message.content).encode("utf-8") + b"\x00")
+        digests.append(current.copy().hexdigest())
+    return digests
+
+
+@dataclass
+class _Entry:
+    response: LLMResponse
+    expires_at: float
+
+
+class _Flight:
+    """进行中的模型调用及其等待者数量"""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: "asyncio.Task[LLMResponse]"):
+        self.task = task
+        self.waiters = 0
+
+
+class PromptCache:
+    """模型调用缓存，可由同一部署中的所有 Agent 共享"""
+
+    def __init__(
+        self,
+        config: Optional[PromptCacheConfig] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.config = config or PromptCacheConfig()
+        self._clock = clock
+        self._entries: "OrderedDict[PromptKey, _Entry]" = OrderedDict()
+        self._flights: Dict[PromptKey, _Flight] = {}
+        self._prefixes: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self.hits = 0
+        self.coalesced = 0
+        self.misses = 0
+        self.evictions = 0
+        self.prefix_hits = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def key(
+        self,
+        role: AgentRole,
+        request: LLMRequest,
+        scope: Dict[str, Any],
+        digests: Optional[List[str]] = None,
+    ) -> PromptKey:
+        """
+        计算缓存键
+
+        Args:
+            role: Agent 角色
+            request: 模型调用请求（cached_prefix 不参与）
+            scope: Agent 声明的相关状态切片
+            digests: 已计算的 prefix_digests(request.messages)
+
+        Returns:
+            PromptKey: (角色, 模型, 摘要)
+        """
+        if digests is None:
+            digests = prefix_digests(request.messages)
+        payload = json.dumps(
+            {
+                "prompt": digests[-1] if digests else "",
+                "temperature": request.temperature,
+                "max_tokens": request.max_tokens,
+                "scope": scope,
+            },
+            sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str,
+        )
+        return role.value, request.model, hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def complete(
+        self,
+        role: AgentRole,
+        request: LLMRequest,
+        scope: Dict[str, Any],
+        execute: Callable[[LLMRequest], Awaitable[LLMResponse]],
+    ) -> Tuple[LLMResponse, PromptSource, PromptKey]:
+        """
+        经缓存执行模型调用
+
+        Args:
+            role: Agent 角色
+            request: 模型调用请求
+            scope: Agent 声明的相关状态切片
+            execute: 缓存未命中时执行实际调用；请求的 cached_prefix 已按前缀记录填好
+
+        Returns:
+            Tuple[LLMResponse, PromptSource, PromptKey]: 回复、来源与缓存键
+        """
+        digests = prefix_digests(request.messages)
+        key = self.key(role, request, scope, digests)
+        if not self.config.enabled:
+            return await execute(request), "bypass", key
+
+        cached = self._lookup(key)
+        if cached is not None:
+            self.hits += 1
+            return cached, "hit", key
+
+        flight = self._flights.get(key)
+        source: PromptSource = "coalesced"
+        if flight is None:
+            source = "miss"
+            self.misses += 1
+            shared = self._shared_prefix(request.model, digests)
+            if shared:
+                self.prefix_hits += 1
+            prepared = request.model_copy(update={"cached_prefix": shared})
+            flight = self._flights[key] = _Flight(asyncio.ensure_future(execute(prepared)))
+            flight.task.add_done_callback(
+                lambda task: self._landed(key, request.model, digests, task)
+            )
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task), source, key
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # 所有等待者都已放弃，不再需要该回复；立即移除，之后的调用不会加入已取消的任务
+                flight.task.cancel()
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+
+    def _lookup(self, key: PromptKey) -> Optional[LLMResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= self._clock():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry.response
+
+    def _shared_prefix(self, model: str, digests: List[str]) -> int:
+        """与近期请求共享的最长前缀消息数"""
+        now = self._clock()
+        for length in range(len(digests), 0, -1):
+            expires_at = self._prefixes.get((model, digests[length - 1]))
+            if expires_at is not None and expires_at > now:
+                return length
+        return 0
+
+    def _landed(
+        self,
+        key: PromptKey,
+        model: str,
+        digests: List[str],
+        task: "asyncio.Task[LLMResponse]",
+    ) -> None:
+        """调用完成：移除进行中记录，缓存成功回复并记录其消息前缀"""
+        if self._flights.get(key) is not None and self._flights[key].task is task:
+            del self._flights[key]
+        if task.cancelled() or task.exception() is not None:
+            return
+        now = self._clock()
+        ttl = self.config.ttl_overrides.get(key[0], self.config.ttl_seconds)
+        self._entries[key] = _Entry(task.result(), now + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.config.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+        for digest in digests:
+            self._prefixes[(model, digest)] = now + self.config.prefix_ttl_seconds
+            self._prefixes.move_to_end((model, digest))
+        while len(self._prefixes) > self.config.max_prefixes:
+            self._prefixes.popitem(last=False)
+
+    def discard(self, key: PromptKey) -> None:
+        """移除单个条目（如回复无法解析）"""
+        self._entries.pop(key, None)
+
+    def invalidate(self, role: Optional[AgentRole] = None) -> None:
+        """清除指定角色（默认全部）的缓存条目"""
+        if role is None:
+            self._entries.clear()
+            return
+        for key in [k for k in self._entries if k[0] == role.value]:
+            del self._entries[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """命中率等统计"""
+        lookups = self.hits + self.coalesced + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "coalesced": self.coalesced,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "prefix_hits": self.prefix_hits,
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+        }
+
+
+# ==============================================================================
+# Agent 骨架
+# ==============================================================================
+
+class BaseAgentImpl(BaseAgent):
+    """
+    认知 Agent 通用骨架
+    子类以类属性声明 name / role，实现 build_messages() 与 parse_response()，
+    并按需覆盖 cache_scope() 声明提示之外仍影响输出的状态切片。
+    """
+    role: AgentRole
+
+    def __init__(
+        self,
+        client: LLMClient,
+        config: Optional[AgentConfig] = None,
+        cache: Optional[PromptCache] = None,
+    ):
+        """
+        Args:
+            client: 模型客户端
+            config: Agent 配置
+            cache: 提示缓存，多个 Agent 应共享同一实例；默认按 config.prompt_cache 创建
+        """
+        self.client = client
+        self.config = config or AgentConfig()
+        self.cache = cache if cache is not None else PromptCache(self.config.prompt_cache)
+
+    def build_messages(
+        self,
+        global_state: GlobalState,
+        execution_context: ExecutionContext,
+        step_context: Optional[StepContext] = None,
+    ) -> List[ChatMessage]:
+        """
+        构造提示消息；不变的内容（系统提示、角色说明）应排在前面以共享前缀
+
+        Returns:
+            List[ChatMessage]: 发送给模型的消息
+        """
+        raise NotImplementedError(f"Agent {self.name} does not implement build_messages()")
+
+    def parse_response(
+        self,
+        response: LLMResponse,
+        global_state: GlobalState,
+        execution_context: ExecutionContext,
+        step_context: Optional[StepContext] = None,
+    ) -> AgentOutput:
+        """
+        将模型回复解析为 AgentOutput，默认原样返回回复文本；无法解析时抛出异常
+
+        Returns:
+            AgentOutput: 认知任务输出
+        """
+        return AgentOutput(success=True, data=response.content, role=self.role)
+
+    def cache_scope(
+        self,
+        global_state: GlobalState,
+        execution_context: ExecutionContext,
+        step_context: Optional[StepContext] = None,
+    ) -> Dict[str, Any]:
+        """
+        提示之外影响输出的状态切片，参与缓存键；默认为目标与当前步骤
+
+        Returns:
+            Dict[str, Any]: 可 JSON 序列化的状态切片
+        """
+        return {
+            "goal": global_state.original_goal,
+            "step_id": step_context.step_id if step_context is not None else None,
+        }
+
+    async def run(
+        self,
+        global_state: GlobalState,
+        execution_context: ExecutionContext,
+        step_context: Optional[StepContext] = None,
+    ) -> AgentOutput:
+        """构造提示 → 经缓存调用模型 → 解析回复；调用或解析失败时返回失败输出"""
+        request = LLMRequest(
+            model=self.config.model,
+            messages=self.build_messages(global_state, execution_context, step_context),
+            temperature=self.config.temperature,
+            max_tokens=self.config.max_tokens,
+        )
+        scope = self.cache_scope(global_state, execution_context, step_context)
+        try:
+            response, _, key = await self.cache.complete(
+                self.role, request, scope, self.client.complete
+            )
+        except Exception as e:
+            return self._failure(
+                "LLM_CALL_FAILED", f"{type(e).__name__}: {e}", retryable=True
+            )
+        try:
+            return self.parse_response(response, global_state, execution_context, step_context)
+        except Exception as e:
+            self.cache.discard(key)
+            return self._failure("INVALID_LLM_RESPONSE", f"{type(e).__name__}: {e}")
+
+    def validate_output(self, output: AgentOutput) -> bool:
+        return output.role == self.role
+
+    def _failure(self, code: str, detail: str, retryable: bool = False) -> AgentOutput:
+        return AgentOutput(
+            success=False,
+            confidence=0.0,
+            role=self.role,
+            errors=[StructuredError(
+                code=code,
+                message=f"Agent {self.name}: {detail}",
+                severity="WARNING",
+                retryable=retryable,
+                suggested_action="RETRY" if retryable else "REPLAN",
+                metadata={"agent": self.name, "model": self.config.model},
+            )],
+        )
@@ -1 +1,61 @@
-"""执行引擎模块"""
\ No newline at end of file
+from .admission import AdmissionConfig, AdmissionController
+from .batch_manager import BatchManager, BatchResult
+from .config_manager import ConfigManager, ConfigSnapshot, SystemSettings, load_snapshot
+from .distributed import DistributedConfig, StepDispatcher, StepWorker
+from .events import (
+    EngineEvent,
+    ResultEvent,
+    ReviewVerdictEvent,
+    StateTransitionEvent,
+    StepCompletedEvent,
+)
+from .execution_engine import EngineConfig, EngineServices, ExecutionEngine
+from .plan_diff import PlanDiff, apply_plan_diff, diff_plans
+from .retry import RetryBudget, RetryConfig, RetryPolicy, RetryScheduler
+from .state_machine import (
+    GuardContext,
+    StateMachine,
+    StateMachineValidationError,
+    Transition,
+    TriggerEvent,
+    build_default_state_machine,
+)
+from .session_runtime import FairScheduler, FairSchedulerConfig, SessionRuntime
+
+__all__ = [
+    "AdmissionConfig",
+    "AdmissionController",
+    "BatchManager",
+    "BatchResult",
+    "ConfigManager",
+    "ConfigSnapshot",
+    "SystemSettings",
+    "load_snapshot",
+    "DistributedConfig",
+    "StepDispatcher",
+    "StepWorker",
+    "EngineConfig",
+    "EngineServices",
+    "ExecutionEngine",
+    "EngineEvent",
+    "ResultEvent",
+    "ReviewVerdictEvent",
+    "StateTransitionEvent",
+    "StepCompletedEvent",
+    "FairScheduler",
+    "FairSchedulerConfig",
+    "SessionRuntime",
+    "PlanDiff",
+    "apply_plan_diff",
+    "diff_plans",
+    "RetryBudget",
+    "RetryConfig",
+    "RetryPolicy",
+    "RetryScheduler",
+    "GuardContext",
+    "StateMachine",
+    "StateMachineValidationError",
+    "Transition",
+    "TriggerEvent",
+    "build_default_state_machine",
+]
@@ -0,0 +1,216 @@
+"""
+准入控制与过载卸载
+位于 ExecutionEngine.start() 之前，限制同时运行的执行数：
+- 并发上限：同时运行的执行数不超过当前限额（限额不超过 max_concurrent）
+- 有界等待队列：队列已满或排队超时的请求立即拒绝，返回带 retry_after_ms 提示的结构化错误
+- 自适应限额（AIMD）：执行耗时的短期均值明显高于长期均值时按比例收缩限额，
+  限额被用满且耗时正常时每轮加性增长，使被放行请求的耗时在过载时保持平稳
+"""
+import asyncio
+import math
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Deque, Dict, Literal, Optional, Union
+
+from pydantic import BaseModel, Field, model_validator
+
+from src.core.protocols import EngineResult, StructuredError
+
+
+RejectReason = Literal["queue_full", "queue_timeout"]
+
+
+class AdmissionConfig(BaseModel):
+    """准入控制配置，对应 configs/default.yaml 的 admission 段"""
+    enabled: bool = False
+    max_concurrent: int = Field(default=64, ge=1)        # 同时运行的执行数硬上限
+    initial_limit: int = Field(default=16, ge=1)         # 自适应限额的初始值
+    min_limit: int = Field(default=1, ge=1)              # 自适应限额下限
+    max_queue: int = Field(default=256, ge=0)            # 等待队列长度上限
+    queue_timeout_ms: int = Field(default=5000, ge=0)    # 排队超过该时长即拒绝
+    adaptive: bool = True                                # 关闭时限额固定为 max_concurrent
+    latency_tolerance: float = Field(default=2.0, gt=1)  # 短期 / 长期耗时超过该比值视为拥塞
+    backoff: float = Field(default=0.9, gt=0, lt=1)      # 拥塞时限额的收缩系数
+
+    @model_validator(mode="after")
+    def _check_limits(self) -> "AdmissionConfig":
+        if not self.min_limit <= self.initial_limit <= self.max_concurrent:
+            raise ValueError("Require min_limit <= initial_limit <= max_concurrent")
+        return self
+
+    @classmethod
+    def from_yaml(cls, path: Union[str, Path]) -> "AdmissionConfig":
+        """从 YAML 文件读取 admission 段"""
+        import yaml
+
+        with open(path, "r", encoding="utf-8") as f:
+            data = yaml.safe_load(f) or {}
+        return cls(**(data.get("admission") or {}))
+
+
+class AdmissionController:
+    """
+    执行准入控制器
+    所有会话共享一个实例；run() 在获得运行名额后执行工作，否则直接返回拒绝结果
+    """
+
+    # 短期 / 长期耗时的指数平滑系数
+    SHORT_SMOOTHING = 0.5
+    LONG_SMOOTHING = 0.05
+
+    def __init__(
+        self,
+        config: Optional[AdmissionConfig] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.config = config or AdmissionConfig()
+        self._clock = clock
+        self.limit = float(
+            self.config.initial_limit if self.config.adaptive else self.config.max_concurrent
+        )
+        self.in_flight = 0
+        self._queue: Deque["asyncio.Future[None]"] = deque()
+        self._short_latency: Optional[float] = None
+        self._long_latency: Optional[float] = None
+        self._last_decrease = 0.0
+        self.admitted = 0
+        self.rejected: Dict[RejectReason, int] = {"queue_full": 0, "queue_timeout": 0}
+
+    async def run(
+        self,
+        work: Callable[[], Awaitable[EngineResult]],
+        trace_id: str,
+    ) -> EngineResult:
+        """
+        在准入控制下执行一次工作
+
+        Args:
+            work: 获得运行名额后执行的协程工厂
+            trace_id: 拒绝时写入 EngineResult 的追踪 ID
+
+        Returns:
+            EngineResult: 工作结果；被拒绝时为 ADMISSION_REJECTED 错误
+        """
+        arrived = self._clock()
+        reason = await self._acquire()
+        if reason is not None:
+            return self._rejection(reason, trace_id, arrived)
+
+        self.admitted += 1
+        saturated = self.in_flight >= int(self.limit)
+        started = self._clock()
+        try:
+            return await work()
+        finally:
+            self.in_flight -= 1
+            self._observe(self._clock() - started, saturated)
+            self._dispatch()
+
+    async def _acquire(self) -> Optional[RejectReason]:
+        """获得运行名额；返回 None 表示已放行，否则为拒绝原因"""
+        if self.in_flight < int(self.limit) and not self._queue:
+            self.in_flight += 1
+            return None
+        if len(self._queue) >= self.config.max_queue:
+            self.rejected["queue_full"] += 1
+            return "queue_full"
+
+        future: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        self._queue.append(future)
+        try:
+            await asyncio.wait_for(
+                asyncio.shield(future), timeout=self.config.queue_timeout_ms / 1000
+            )
+        except asyncio.TimeoutError:
+            if future.done() and not future.cancelled():
+                # 超时与放行同时发生：已获得名额，继续执行
+                return None
+            self._leave(future)
+            self.rejected["queue_timeout"] += 1
+            return "queue_timeout"
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # 已被放行但调用方取消：归还名额
+                self.in_flight -= 1
+                self._dispatch()
+            self._leave(future)
+            raise
+        return None
+
+    def _leave(self, future: "asyncio.Future[None]") -> None:
+        """等待者超时或取消时立即移出队列，队列长度始终等于仍在等待的请求数"""
+        future.cancel()
+        try:
+            self._queue.remove(future)
+        except ValueError:
+            pass    # 已被 _dispatch() 取出
+
+    def _dispatch(self) -> None:
+        """按到达顺序放行等待者，直到用满当前限额"""
+        while self._queue and self.in_flight < int(self.limit):
+            future = self._queue.popleft()
+            if future.done():
+                continue
+            self.in_flight += 1
+            future.set_result(None)
+
+    def _observe(self, latency: float, saturated: bool) -> None:
+        """用一次执行耗时更新自适应限额"""
+        if self._short_latency is None or self._long_latency is None:
+            self._short_latency = self._long_latency = latency
+        else:
+            self._short_latency += self.SHORT_SMOOTHING * (latency - self._short_latency)
+            self._long_latency += self.LONG_SMOOTHING * (latency - self._long_latency)
+        if not self.config.adaptive:
+            return
+
+        config = self.config
+        now = self._clock()
+        if self._short_latency > self._long_latency * config.latency_tolerance:
+            # 每个耗时周期最多收缩一次，避免同一拥塞期内的样本连续收缩
+            if now - self._last_decrease >= self._short_latency:
+                self.limit = max(float(config.min_limit), self.limit * config.backoff)
+                self._last_decrease = now
+        elif saturated:
+            self.limit = min(float(config.max_concurrent), self.limit + 1.0 / self.limit)
+
+    def retry_after_ms(self) -> int:
+        """预计排到名额所需的时间：排在前面的轮数 × 平均执行耗时"""
+        latency = self._long_latency if self._long_latency is not None else 0.1
+        rounds = math.ceil((len(self._queue) + 1) / max(int(self.limit), 1))
+        return max(int(rounds * latency * 1000), 1)
+
+    def _rejection(self, reason: RejectReason, trace_id: str, arrived: float) -> EngineResult:
+        retry_after_ms = self.retry_after_ms()
+        return EngineResult(
+            success=False,
+            final_output=None,
+            trace_id=trace_id,
+            errors=[StructuredError(
+                code="ADMISSION_REJECTED",
+                message=f"Execution rejected by admission control ({reason}), "
+                        f"retry after {retry_after_ms} ms",
+                severity="WARNING",
+                retryable=True,
+                suggested_action="RETRY",
+                metadata={
+                    "reason": reason,
+                    "retry_after_ms": retry_after_ms,
+                    "limit": int(self.limit),
+                    "in_flight": self.in_flight,
+                    "queued": len(self._queue),
+                },
+            )],
+            total_latency_ms=int((self._clock() - arrived) * 1000),
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """当前限额、运行数、排队数与拒绝计数"""
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "queued": len(self._queue),
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+        }
@@ -0,0 +1,467 @@
+"""
+并行批次管理
+基于 PlanStep.dependencies 构建 DAG 并调度执行
+
+- validate(): 校验步骤 ID 唯一、依赖存在、无环
+- run(): 就绪队列调度，依赖完成即启动，无层级屏障；全局并发上限控制
+- 就绪队列按关键路径长度（bottom level）降序出队，缩短宽计划的总耗时
+- 可选逐步审查：步骤执行后经 step_reviewer 审查，通过后下游才视为依赖满足；
+  推测模式下低风险、无副作用的下游步骤在上游审查期间提前启动，上游被否决时丢弃其结果
+"""
+import asyncio
+import heapq
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from src.core.models import ExecutionContext, ExecutionPlan, PlanStep
+from src.core.protocols import StructuredError, ToolExecutionResult
+from src.core.types import StepStatus
+
+
+StepRunner = Callable[[PlanStep], Awaitable[ToolExecutionResult]]
+CostEstimator = Callable[[PlanStep], float]
+# 审查通过返回 None，否决时返回 StructuredError
+StepReviewer = Callable[[PlanStep, ToolExecutionResult], Awaitable[Optional[StructuredError]]]
+SpeculationPredicate = Callable[[PlanStep], bool]
+# 逐步审查时步骤最终确认（审查通过且上游均已确认）后调用
+StepAcceptor = Callable[[PlanStep, ToolExecutionResult], Awaitable[None]]
+
+_MISSING = object()
+_FINISHED_UNSUCCESSFULLY = frozenset({StepStatus.FAILED, StepStatus.SKIPPED})
+
+
+@dataclass
+class BatchResult:
+    """一次批次调度的汇总结果"""
+    batch_id: str
+    results: Dict[str, ToolExecutionResult] = field(default_factory=dict)
+    errors: List[StructuredError] = field(default_factory=list)
+    makespan_ms: int = 0
+    speculative: List[str] = field(default_factory=list)   # 推测启动的步骤
+    discarded: List[str] = field(default_factory=list)     # 因上游否决或失败被丢弃的推测结果
+
+    @property
+    def success(self) -> bool:
+        """所有步骤均执行成功且无校验错误"""
+        return not self.errors and all(r.success for r in self.results.values())
+
+
+class BatchManager:
+    """
+    DAG 调度器
+    - 已在 execution_context.active_steps 中标记为 COMPLETED 的步骤视为已满足，不会重复执行
+    - 步骤失败时其所有下游步骤被标记为 SKIPPED，互不依赖的分支继续执行
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        cost_estimator: Optional[CostEstimator] = None,
+    ):
+        """
+        初始化调度器
+
+        Args:
+            max_concurrency: 全局并发上限
+            cost_estimator: 步骤耗时估计，用于计算关键路径；默认每步代价为 1
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be >= 1")
+        self.max_concurrency = max_concurrency
+        self._cost_estimator = cost_estimator or (lambda step: 1.0)
+
+    def validate(self, plan: ExecutionPlan) -> List[StructuredError]:
+        """
+        校验计划结构
+
+        Returns:
+            List[StructuredError]: 校验错误列表，为空表示合法
+        """
+        errors: List[StructuredError] = []
+        ids: Set[str] = set()
+        for step in plan.steps:
+            if step.id in ids:
+                errors.append(
+                    self._plan_error("DUPLICATE_STEP_ID", f"Duplicate step id: {step.id}")
+                )
+            ids.add(step.id)
+
+        for step in plan.steps:
+            for dep in step.dependencies:
+                if dep not in ids:
+                    errors.append(self._plan_error(
+                        "UNKNOWN_DEPENDENCY",
+                        f"Step {step.id} depends on unknown step {dep}",
+                    ))
+                elif dep == step.id:
+                    errors.append(
+                        self._plan_error("SELF_DEPENDENCY", f"Step {step.id} depends on itself")
+                    )
+        if errors:
+            return errors
+
+        order = self._topological_order(plan)
+        if len(order) != len(plan.steps):
+            cyclic = sorted(set(ids) - set(order))
+            errors.append(self._plan_error(
+                "DEPENDENCY_CYCLE",
+                f"Dependency cycle detected among steps: {', '.join(cyclic)}",
+                {"steps": cyclic},
+            ))
+        return errors
+
+    def critical_path_priorities(self, plan: ExecutionPlan) -> Dict[str, float]:
+        """
+        计算每个步骤到出口的最长路径代价（含自身），即 bottom level
+
+        要求计划已通过 validate()。
+        """
+        steps = {step.id: step for step in plan.steps}
+        dependents = self._dependents(plan)
+        priorities: Dict[str, float] = {}
+        for step_id in reversed(self._topological_order(plan)):
+            downstream = max((priorities[d] for d in dependents[step_id]), default=0.0)
+            priorities[step_id] = self._cost_estimator(steps[step_id]) + downstream
+        return priorities
+
+    async def run(
+        self,
+        plan: ExecutionPlan,
+        step_runner: StepRunner,
+        execution_context: ExecutionContext,
+        step_reviewer: Optional[StepReviewer] = None,
+        speculate: Optional[SpeculationPredicate] = None,
+        on_accept: Optional[StepAcceptor] = None,
+    ) -> BatchResult:
+        """
+        调度执行计划中所有未完成的步骤
+
+        Args:
+            plan: 执行计划
+            step_runner: 单步执行函数
+            execution_context: 执行上下文，调度过程中原地更新 active_steps / intermediate_results
+            step_reviewer: 逐步审查函数；为 None 时步骤执行成功即完成
+            speculate: 判断步骤能否在上游审查期间推测执行；仅在提供 step_reviewer 时生效
+            on_accept: 步骤最终确认后的回调；仅在提供 step_reviewer 时生效，
+                被否决或被撤销的推测步骤不会触发
+
+        Returns:
+            BatchResult: 批次结果
+        """
+        batch_id = f"batch_{uuid.uuid4().hex[:12]}"
+        execution_context.current_batch_id = batch_id
+        batch = BatchResult(batch_id=batch_id)
+        started = time.perf_counter()
+
+        batch.errors = self.validate(plan)
+        if batch.errors:
+            return batch
+        if step_reviewer is not None:
+            await self._run_reviewed(
+                plan, step_runner, execution_context, batch, step_reviewer, speculate, on_accept
+            )
+            batch.makespan_ms = int((time.perf_counter() - started) * 1000)
+            return batch
+
+        steps = {step.id: step for step in plan.steps}
+        dependents = self._dependents(plan)
+        priorities = self.critical_path_priorities(plan)
+        active_steps = execution_context.active_steps
+
+        done: Set[str] = {
+            step_id for step_id in steps if active_steps.get(step_id) == StepStatus.COMPLETED
+        }
+        waiting: Dict[str, int] = {}
+        ready: List[Tuple[float, int, str]] = []
+        for index, step in enumerate(plan.steps):
+            if step.id in done:
+                continue
+            active_steps[step.id] = StepStatus.PENDING
+            waiting[step.id] = sum(1 for dep in set(step.dependencies) if dep not in done)
+            if waiting[step.id] == 0:
+                heapq.heappush(ready, (-priorities[step.id], index, step.id))
+        order_index = {step.id: index for index, step in enumerate(plan.steps)}
+
+        running: Dict["asyncio.Task[ToolExecutionResult]", str] = {}
+        try:
+            while ready or running:
+                while ready and len(running) < self.max_concurrency:
+                    _, _, step_id = heapq.heappop(ready)
+                    active_steps[step_id] = StepStatus.RUNNING
+                    task = asyncio.ensure_future(self._run_step(step_runner, steps[step_id]))
+                    running[task] = step_id
+
+                finished, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in finished:
+                    step_id = running.pop(task)
+                    result = task.result()
+                    batch.results[step_id] = result
+                    if result.success:
+                        active_steps[step_id] = StepStatus.COMPLETED
+                        execution_context.intermediate_results[step_id] = result.output
+                        for child in dependents[step_id]:
+                            waiting[child] -= 1
+                            if waiting[child] or active_steps.get(child) != StepStatus.PENDING:
+                                continue
+                            heapq.heappush(ready, (-priorities[child], order_index[child], child))
+                    else:
+                        active_steps[step_id] = StepStatus.FAILED
+                        self._skip_downstream(step_id, dependents, active_steps)
+        finally:
+            for task in running:
+                task.cancel()
+
+        batch.makespan_ms = int((time.perf_counter() - started) * 1000)
+        return batch
+
+    async def _run_reviewed(
+        self,
+        plan: ExecutionPlan,
+        step_runner: StepRunner,
+        execution_context: ExecutionContext,
+        batch: BatchResult,
+        step_reviewer: StepReviewer,
+        speculate: Optional[SpeculationPredicate],
+        on_accept: Optional[StepAcceptor] = None,
+    ) -> None:
+        """
+        逐步审查调度
+        - 步骤执行成功后输出立即写入 intermediate_results（推测下游可读取），并启动审查
+        - 步骤审查通过且所有上游均已确认时才标记为 COMPLETED
+        - 步骤失败或被否决时，撤销其自身与全部下游的推测输出（恢复写入前的值），
+          取消仍在运行的下游任务，并将下游标记为 SKIPPED
+        """
+        steps = {step.id: step for step in plan.steps}
+        dependents = self._dependents(plan)
+        priorities = self.critical_path_priorities(plan)
+        order_index = {step.id: index for index, step in enumerate(plan.steps)}
+        active_steps = execution_context.active_steps
+        outputs = execution_context.intermediate_results
+
+        accepted: Set[str] = {
+            step_id for step_id in steps if active_steps.get(step_id) == StepStatus.COMPLETED
+        }
+        pending = sorted(
+            (step_id for step_id in steps if step_id not in accepted),
+            key=lambda step_id: (-priorities[step_id], order_index[step_id]),
+        )
+        for step_id in pending:
+            active_steps[step_id] = StepStatus.PENDING
+        provisional: Set[str] = set()      # 执行成功、尚未确认
+        approved: Set[str] = set()         # 自身审查通过、等待上游确认
+        previous: Dict[str, Any] = {}      # 推测写入前的 intermediate_results 值
+        # 运行中的任务 → (步骤 ID, 是否为审查任务)
+        tasks: Dict["asyncio.Task[Any]", Tuple[str, bool]] = {}
+        abandoned: List["asyncio.Task[Any]"] = []
+
+        def launch_mode(step_id: str) -> Optional[bool]:
+            """None 表示不可启动；否则返回是否为推测启动"""
+            deps = steps[step_id].dependencies
+            if all(dep in accepted for dep in deps):
+                return False
+            if speculate is not None and all(d in accepted or d in provisional for d in deps):
+                return True if speculate(steps[step_id]) else None
+            return None
+
+        def accept_ready(step_id: str) -> List[str]:
+            """确认审查已通过且上游均已确认的步骤，并级联检查下游；返回新确认的步骤"""
+            confirmed: List[str] = []
+            stack = [step_id]
+            while stack:
+                current = stack.pop()
+                if current not in approved:
+                    continue
+                if not all(dep in accepted for dep in steps[current].dependencies):
+                    continue
+                approved.discard(current)
+                provisional.discard(current)
+                previous.pop(current, None)
+                accepted.add(current)
+                active_steps[current] = StepStatus.COMPLETED
+                confirmed.append(current)
+                stack.extend(dependents[current])
+            return confirmed
+
+        def discard(step_id: str, result: ToolExecutionResult) -> None:
+            """步骤失败或被否决：撤销其自身及下游的推测结果"""
+            batch.results[step_id] = result
+            stack, seen = [step_id], set()
+            while stack:
+                current = stack.pop()
+                if current in seen or current in accepted:
+                    continue
+                seen.add(current)
+                if current != step_id and active_steps.get(current) in _FINISHED_UNSUCCESSFULLY:
+                    continue
+                stack.extend(dependents[current])
+                for task, (owner, _) in list(tasks.items()):
+                    if owner == current:
+                        task.cancel()
+                        abandoned.append(task)
+                        del tasks[task]
+                if current in previous:
+                    value = previous.pop(current)
+                    if value is _MISSING:
+                        outputs.pop(current, None)
+                    else:
+                        outputs[current] = value
+                if current in pending:
+                    pending.remove(current)
+                elif current != step_id:
+                    batch.discarded.append(current)
+                    batch.results.pop(current, None)
+                provisional.discard(current)
+                approved.discard(current)
+                active_steps[current] = (
+                    StepStatus.FAILED if current == step_id else StepStatus.SKIPPED
+                )
+
+        try:
+            while True:
+                for step_id in list(pending):
+                    executing = sum(1 for _, is_review in tasks.values() if not is_review)
+                    if executing >= self.max_concurrency:
+                        break
+                    mode = launch_mode(step_id)
+                    if mode is None:
+                        continue
+                    pending.remove(step_id)
+                    if mode:
+                        batch.speculative.append(step_id)
+                    active_steps[step_id] = StepStatus.RUNNING
+                    task = asyncio.ensure_future(self._run_step(step_runner, steps[step_id]))
+                    tasks[task] = (step_id, False)
+                if not tasks:
+                    break
+
+                finished, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in finished:
+                    if task not in tasks:
+                        # 同一轮中已被 discard() 取消
+                        continue
+                    step_id, is_review = tasks.pop(task)
+                    if not is_review:
+                        result = task.result()
+                        if not result.success:
+                            discard(step_id, result)
+                            continue
+                        batch.results[step_id] = result
+                        previous[step_id] = outputs.get(step_id, _MISSING)
+                        outputs[step_id] = result.output
+                        provisional.add(step_id)
+                        review = asyncio.ensure_future(
+                            self._review_step(step_reviewer, steps[step_id], result)
+                        )
+                        tasks[review] = (step_id, True)
+                    else:
+                        error = task.result()
+                        if error is not None:
+                            vetoed = batch.results[step_id].model_copy(
+                                update={"success": False, "error": error}
+                            )
+                            discard(step_id, vetoed)
+                            continue
+                        approved.add(step_id)
+                        for confirmed_id in accept_ready(step_id):
+                            if on_accept is not None:
+                                await on_accept(steps[confirmed_id], batch.results[confirmed_id])
+        finally:
+            for task in tasks:
+                task.cancel()
+                abandoned.append(task)
+            if abandoned:
+                await asyncio.gather(*abandoned, return_exceptions=True)
+
+    @staticmethod
+    async def _review_step(
+        step_reviewer: StepReviewer,
+        step: PlanStep,
+        result: ToolExecutionResult,
+    ) -> Optional[StructuredError]:
+        """执行单步审查，将异常封装为否决"""
+        try:
+            return await step_reviewer(step, result)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            return StructuredError(
+                code="STEP_REVIEW_EXCEPTION",
+                message=f"Review of step {step.id} raised {type(e).__name__}: {e}",
+                severity="WARNING",
+                suggested_action="REPLAN",
+                metadata={"step_id": step.id},
+            )
+
+    @staticmethod
+    async def _run_step(step_runner: StepRunner, step: PlanStep) -> ToolExecutionResult:
+        """执行单步，将异常封装为 StructuredError"""
+        try:
+            return await step_runner(step)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            return ToolExecutionResult(
+                success=False,
+                error=StructuredError(
+                    code="STEP_EXCEPTION",
+                    message=f"Step {step.id} raised {type(e).__name__}: {e}",
+                    severity="WARNING",
+                    suggested_action="REPLAN",
+                    metadata={"step_id": step.id},
+                ),
+            )
+
+    @staticmethod
+    def _skip_downstream(
+        step_id: str,
+        dependents: Dict[str, List[str]],
+        active_steps: Dict[str, StepStatus],
+    ) -> None:
+        """将失败步骤的所有下游标记为 SKIPPED"""
+        stack = list(dependents[step_id])
+        while stack:
+            child = stack.pop()
+            if active_steps.get(child) == StepStatus.PENDING:
+                active_steps[child] = StepStatus.SKIPPED
+                stack.extend(dependents[child])
+
+    @staticmethod
+    def _dependents(plan: ExecutionPlan) -> Dict[str, List[str]]:
+        """反向邻接表：step_id -> 直接下游步骤"""
+        dependents: Dict[str, List[str]] = {step.id: [] for step in plan.steps}
+        for step in plan.steps:
+            for dep in dict.fromkeys(step.dependencies):
+                dependents[dep].append(step.id)
+        return dependents
+
+    @classmethod
+    def _topological_order(cls, plan: ExecutionPlan) -> List[str]:
+        """Kahn 拓扑排序；存在环时返回的序列短于步骤数"""
+        dependents = cls._dependents(plan)
+        indegree = {step.id: len(set(step.dependencies)) for step in plan.steps}
+        queue = [step_id for step_id, degree in indegree.items() if degree == 0]
+        order: List[str] = []
+        while queue:
+            step_id = queue.pop()
+            order.append(step_id)
+            for child in dependents[step_id]:
+                indegree[child] -= 1
+                if indegree[child] == 0:
+                    queue.append(child)
+        return order
+
+    @staticmethod
+    def _plan_error(
+        code: str,
+        message: str,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> StructuredError:
+        return StructuredError(
+            code=code,
+            message=message,
+            severity="CRITICAL",
+            suggested_action="REPLAN",
+            metadata=metadata or {},
+        )
@@ -0,0 +1,261 @@
+"""
+配置管理与热更新
+来源：configs/default.yaml、configs/policies.yaml、configs/permissions.yaml
+
+- 三个文件校验为类型化模型：default.yaml 由 SystemSettings（pydantic-settings）校验，
+  可用 MAS_<段>__<字段> 形式的环境变量覆盖；policies.yaml 编译为 RuleEngine；
+  permissions.yaml 校验为 PermissionConfig 并试编译权限矩阵
+- 后台任务轮询文件的修改时间与大小，变化时在线程池中读取、校验并编译新配置（不占用事件循环），
+  成功后以单次引用赋值发布新的 ConfigSnapshot；校验失败时保留旧配置并记录 last_error
+- 每个快照带有由文件内容计算的版本号，引擎写入每条追踪事件；内容未变的修改不会发布新版本
+- 订阅者在发布时收到新快照，bind_policy() 使运行中的 DefaultPolicy 无需重启即切换到新规则
+"""
+import asyncio
+import hashlib
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from pydantic_settings import BaseSettings, PydanticBaseSettingsSource, SettingsConfigDict
+
+from src.agents.base_agent import AgentConfig
+from src.core.protocols import StructuredError
+from src.policy.base_policy import DefaultPolicy
+from src.policy.permission import PermissionConfig, PermissionMatrix
+from src.policy.risk_control import RiskConfig
+from src.policy.rules import RuleEngine
+from src.tools.runtime import ToolRuntimeConfig
+from .admission import AdmissionConfig
+from .distributed import DistributedConfig
+from .execution_engine import EngineConfig
+from .retry import RetryConfig
+from .session_runtime import FairSchedulerConfig
+
+
+CONFIG_FILES = ("default.yaml", "policies.yaml", "permissions.yaml")
+
+Listener = Callable[["ConfigSnapshot"], None]
+_Fingerprint = Tuple[Optional[Tuple[int, int]], ...]
+
+
+class SystemSettings(BaseSettings):
+    """configs/default.yaml 的完整模型；环境变量优先于文件"""
+    model_config = SettingsConfigDict(
+        env_prefix="MAS_", env_nested_delimiter="__", extra="forbid"
+    )
+
+    engine: EngineConfig = EngineConfig()
+    agents: AgentConfig = AgentConfig()
+    tool_runtime: ToolRuntimeConfig = ToolRuntimeConfig()
+    retry: RetryConfig = RetryConfig()
+    admission: AdmissionConfig = AdmissionConfig()
+    distributed: DistributedConfig = DistributedConfig()
+    sessions: FairSchedulerConfig = FairSchedulerConfig()
+    risk: RiskConfig = RiskConfig()
+
+    @classmethod
+    def settings_customise_sources(
+        cls,
+        settings_cls: type[BaseSettings],
+        init_settings: PydanticBaseSettingsSource,
+        env_settings: PydanticBaseSettingsSource,
+        dotenv_settings: PydanticBaseSettingsSource,
+        file_secret_settings: PydanticBaseSettingsSource,
+    ) -> Tuple[PydanticBaseSettingsSource, ...]:
+        # 文件内容以初始化参数传入，环境变量排在其前以覆盖文件
+        return env_settings, init_settings
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """一次加载得到的完整配置，发布后不再修改"""
+    version: str
+    loaded_at: float
+    settings: SystemSettings
+    rules: RuleEngine
+    permissions: PermissionConfig
+
+
+def _read_yaml(path: Path) -> Tuple[bytes, Dict[str, Any]]:
+    import yaml
+
+    if not path.exists():
+        return b"", {}
+    raw = path.read_bytes()
+    data = yaml.safe_load(raw) or {}
+    if not isinstance(data, dict):
+        raise ValueError(f"{path.name} must contain a mapping")
+    return raw, data
+
+
+def load_snapshot(config_dir: Union[str, Path]) -> ConfigSnapshot:
+    """
+    读取并校验配置目录中的三个文件
+
+    Args:
+        config_dir: 配置目录
+
+    Returns:
+        ConfigSnapshot: 校验、编译完成的配置
+
+    Raises:
+        OSError: 文件读取失败
+        ValueError: 格式或校验错误（含 pydantic ValidationError、PolicyRuleError）
+    """
+    directory = Path(config_dir)
+    digest = hashlib.sha256()
+    documents: List[Dict[str, Any]] = []
+    for name in CONFIG_FILES:
+        raw, data = _read_yaml(directory / name)
+        digest.update(name.encode() + b"\0" + raw + b"\0")
+        documents.append(data)
+    defaults, policies, permissions_data = documents
+
+    settings = SystemSettings(**defaults)
+    permissions = PermissionConfig(**permissions_data)
+    PermissionMatrix(permissions)
+    return ConfigSnapshot(
+        version=digest.hexdigest()[:12],
+        loaded_at=time.time(),
+        settings=settings,
+        rules=RuleEngine(policies.get("rules") or []),
+        permissions=permissions,
+    )
+
+
+# ==============================================================================
+# 配置管理器
+# ==============================================================================
+
+class ConfigManager:
+    """
+    配置管理器
+    current 总是指向一个完整的快照；读取方无需加锁，也不会看到新旧配置混合的状态
+    """
+
+    def __init__(self, config_dir: Union[str, Path], poll_interval_seconds: float = 2.0):
+        """
+        同步加载初始配置
+
+        Args:
+            config_dir: 配置目录
+            poll_interval_seconds: 文件轮询间隔
+
+        Raises:
+            OSError: 初始配置读取失败
+            ValueError: 初始配置校验失败
+        """
+        self.config_dir = Path(config_dir)
+        self.poll_interval_seconds = poll_interval_seconds
+        self._fingerprint = self._stat()
+        self._current = load_snapshot(self.config_dir)
+        self._listeners: List[Listener] = []
+        self._task: Optional["asyncio.Task[None]"] = None
+        self.last_error: Optional[StructuredError] = None
+        self.reloads = 0
+
+    @property
+    def current(self) -> ConfigSnapshot:
+        """当前生效的配置快照"""
+        return self._current
+
+    @property
+    def version(self) -> str:
+        return self._current.version
+
+    def subscribe(self, listener: Listener) -> None:
+        """注册发布回调，回调在事件循环中同步执行，应只做引用替换"""
+        self._listeners.append(listener)
+
+    def bind_policy(self, policy: DefaultPolicy) -> None:
+        """使策略立即采用当前配置，并在之后每次发布时热更新"""
+
+        def apply(snapshot: ConfigSnapshot) -> None:
+            policy.reload(snapshot.rules, snapshot.permissions, snapshot.settings.risk)
+
+        apply(self._current)
+        self.subscribe(apply)
+
+    def _stat(self) -> _Fingerprint:
+        fingerprint: List[Optional[Tuple[int, int]]] = []
+        for name in CONFIG_FILES:
+            try:
+                stat = os.stat(self.config_dir / name)
+            except FileNotFoundError:
+                fingerprint.append(None)
+            else:
+                fingerprint.append((stat.st_mtime_ns, stat.st_size))
+        return tuple(fingerprint)
+
+    async def reload(self) -> bool:
+        """
+        在线程池中重新加载配置并发布
+
+        Returns:
+            bool: 是否发布了新版本；校验失败或内容未变时为 False
+        """
+        fingerprint = self._stat()
+        try:
+            snapshot = await asyncio.to_thread(load_snapshot, self.config_dir)
+        except Exception as e:
+            self._fingerprint = fingerprint   # 同一份错误配置不再重复加载
+            self.last_error = StructuredError(
+                code="CONFIG_INVALID",
+                message=f"Config reload failed, keeping version {self.version}: {e}",
+                severity="WARNING",
+                metadata={"config_dir": str(self.config_dir)},
+            )
+            return False
+        self._fingerprint = fingerprint
+        self.last_error = None
+        if snapshot.version == self._current.version:
+            return False
+        self._publish(snapshot)
+        return True
+
+    def _publish(self, snapshot: ConfigSnapshot) -> None:
+        # 单次引用赋值，之后通知订阅者
+        self._current = snapshot
+        self.reloads += 1
+        for listener in self._listeners:
+            try:
+                listener(snapshot)
+            except Exception as e:
+                self.last_error = StructuredError(
+                    code="CONFIG_LISTENER_FAILED",
+                    message=f"Config listener failed on version {snapshot.version}: {e}",
+                    severity="WARNING",
+                )
+
+    async def reload_if_changed(self) -> bool:
+        """文件的修改时间或大小变化时重新加载，返回是否发布了新版本"""
+        if self._stat() == self._fingerprint:
+            return False
+        return await self.reload()
+
+    async def watch(self, stop: Optional[asyncio.Event] = None) -> None:
+        """轮询配置文件直到 stop 被设置或任务被取消"""
+        stop = stop or asyncio.Event()
+        while not stop.is_set():
+            await self.reload_if_changed()
+            try:
+                await asyncio.wait_for(stop.wait(), self.poll_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> None:
+        """在当前事件循环中启动后台轮询"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.watch())
+
+    async def close(self) -> None:
+        """停止后台轮询"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
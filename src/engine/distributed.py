@@ -0,0 +1,320 @@
+"""
+分布式步骤执行
+- StepDispatcher：引擎侧，将就绪步骤（含 StepExecutor 生成的工具输入）发布到代理并等待结果，
+  接口与 ToolRuntime.invoke 相同形式，由 ExecutionEngine 在工具调用处按工具选择本地或远程执行
+- StepWorker：工作进程侧，从代理租用任务，经本地 ToolRuntime 执行已注册的 BaseTool 并回传结果，
+  执行期间按心跳间隔续租；租约丢失（任务已被重新投递）时放弃本次执行
+
+投递语义为至少一次：默认只远程执行无副作用的工具。
+
+工作进程入口：
+    python -m src.engine.distributed --broker ./data/broker.sqlite3 --factory pkg.module:build
+其中 build() 返回注册了工具的 ComponentRegistry；也可用 --manifest configs/tools.yaml 只登记工具声明，
+工具模块在第一次执行到该工具时才导入，工作进程的启动耗时与工具数量无关。
+"""
+import argparse
+import asyncio
+import importlib
+import signal
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+from pydantic import BaseModel, Field
+
+from src.core.interfaces import BaseTool
+from src.core.models import PlanStep
+from src.core.protocols import StructuredError, ToolExecutionResult
+from src.infrastructure.broker.base_broker import BaseBroker, StepTask
+from src.infrastructure.broker.sqlite_broker import SqliteBroker
+from src.registry.component_registry import ComponentRegistry
+from src.tools.deadline import remaining_ms
+from src.tools.runtime import ToolRuntime
+
+
+class DistributedConfig(BaseModel):
+    """分布式执行配置，对应 configs/default.yaml 的 distributed 段"""
+    enabled: bool = False
+    broker_path: str = "./data/broker.sqlite3"
+    tools: List[str] = []                               # 远程执行的工具，空表示全部
+    remote_side_effects: bool = False                   # 是否远程执行有副作用的工具
+    lease_seconds: float = Field(default=30.0, gt=0)
+    heartbeat_seconds: float = Field(default=10.0, gt=0)
+    max_deliveries: int = Field(default=3, ge=1)
+    poll_interval_ms: int = Field(default=20, ge=1)
+    queue_timeout_ms: int = Field(default=30_000, ge=0)  # 工具超时之外允许的排队时长
+    worker_concurrency: int = Field(default=8, ge=1)     # 单个工作进程同时执行的任务数
+
+    @classmethod
+    def from_yaml(cls, path: Union[str, Path]) -> "DistributedConfig":
+        """从 YAML 文件读取 distributed 段"""
+        import yaml
+
+        with open(path, "r", encoding="utf-8") as f:
+            data = yaml.safe_load(f) or {}
+        return cls(**(data.get("distributed") or {}))
+
+
+# ==============================================================================
+# 引擎侧
+# ==============================================================================
+
+class StepDispatcher:
+    """
+    远程步骤分发器
+    所有等待中的任务共用一个轮询循环，每轮用一次批量查询取回全部已完成结果
+    """
+
+    def __init__(self, broker: BaseBroker, config: Optional[DistributedConfig] = None):
+        self.broker = broker
+        self.config = config or DistributedConfig()
+        self._remote_tools = set(self.config.tools)
+        self._waiting: Dict[str, "asyncio.Future[ToolExecutionResult]"] = {}
+        self._poller: Optional["asyncio.Task[None]"] = None
+
+    @classmethod
+    def create(cls, config: DistributedConfig) -> "StepDispatcher":
+        """按配置创建使用 SqliteBroker 的分发器"""
+        broker = SqliteBroker(config.broker_path, max_deliveries=config.max_deliveries)
+        return cls(broker, config)
+
+    def handles(self, tool: BaseTool) -> bool:
+        """工具调用是否远程执行"""
+        if tool.has_side_effect and not self.config.remote_side_effects:
+            return False
+        return not self._remote_tools or tool.name in self._remote_tools
+
+    async def invoke(
+        self,
+        tool: BaseTool,
+        input_data: Dict[str, Any],
+        trace_id: str = "",
+        step: Optional[PlanStep] = None,
+        timeout_ms: Optional[int] = None,
+    ) -> ToolExecutionResult:
+        """
+        发布步骤并等待工作进程回传结果
+
+        Args:
+            tool: 目标工具（仅用于确定工具名与超时）
+            input_data: 工具输入
+            trace_id: 追踪 ID
+            step: 所属计划步骤，默认按工具名构造
+            timeout_ms: 步骤级超时覆盖
+
+        Returns:
+            ToolExecutionResult: 远程执行结果；等待超时返回可重试的 REMOTE_STEP_TIMEOUT
+        """
+        step = step or PlanStep(
+            id=uuid.uuid4().hex, description="", tool_name=tool.name, input_schema={}
+        )
+        task = StepTask(
+            task_id=uuid.uuid4().hex, step=step, tool_input=input_data, trace_id=trace_id
+        )
+        wait_ms = float((timeout_ms or tool.timeout_ms) + self.config.queue_timeout_ms)
+        outer_ms = remaining_ms()
+        if outer_ms is not None:
+            # 不超出外层（步骤 / 执行）剩余的截止时间
+            wait_ms = min(wait_ms, outer_ms)
+        started = time.perf_counter()
+
+        future: "asyncio.Future[ToolExecutionResult]" = (
+            asyncio.get_running_loop().create_future()
+        )
+        self._waiting[task.task_id] = future
+        try:
+            await self.broker.publish(task)
+            self._ensure_poller()
+            return await asyncio.wait_for(asyncio.shield(future), timeout=wait_ms / 1000)
+        except asyncio.TimeoutError:
+            return ToolExecutionResult(
+                success=False,
+                error=StructuredError(
+                    code="REMOTE_STEP_TIMEOUT",
+                    message=f"No worker returned a result for step {step.id} "
+                            f"within {wait_ms:.0f} ms",
+                    severity="WARNING",
+                    retryable=True,
+                    suggested_action="RETRY",
+                    metadata={"task_id": task.task_id, "tool": tool.name},
+                ),
+                latency_ms=int((time.perf_counter() - started) * 1000),
+            )
+        finally:
+            if self._waiting.pop(task.task_id, None) is not None and not future.done():
+                # 放弃等待：撤回任务，避免在无人等待时继续执行
+                future.cancel()
+                await self.broker.remove([task.task_id])
+
+    def _ensure_poller(self) -> None:
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.ensure_future(self._poll())
+
+    async def _poll(self) -> None:
+        """轮询已完成结果，直到没有等待中的任务"""
+        interval = self.config.poll_interval_ms / 1000
+        while self._waiting:
+            await asyncio.sleep(interval)
+            try:
+                results = await self.broker.results(list(self._waiting))
+            except Exception:
+                # 代理暂时不可用（如写锁争用）：下一轮重试，等待方各自受超时约束
+                continue
+            if not results:
+                continue
+            try:
+                # 先删除再交付结果，调用方拿到结果时代理中已不再保留该任务
+                await self.broker.remove(list(results))
+            except Exception:
+                # 残留记录不影响正确性
+                pass
+            for task_id, result in results.items():
+                future = self._waiting.pop(task_id, None)
+                if future is not None and not future.done():
+                    future.set_result(result)
+
+
+# ==============================================================================
+# 工作进程侧
+# ==============================================================================
+
+class StepWorker:
+    """从代理租用并执行步骤任务的工作进程"""
+
+    def __init__(
+        self,
+        broker: BaseBroker,
+        components: ComponentRegistry,
+        runtime: Optional[ToolRuntime] = None,
+        config: Optional[DistributedConfig] = None,
+        worker_id: Optional[str] = None,
+    ):
+        """
+        Args:
+            broker: 步骤任务代理
+            components: 注册了可执行工具的组件
+            runtime: 执行工具的本地运行时
+            config: 分布式执行配置
+            worker_id: 工作进程 ID，默认自动生成
+        """
+        self.broker = broker
+        self.components = components
+        self.runtime = runtime or ToolRuntime(tracer=components.tracer)
+        self.config = config or DistributedConfig()
+        self.worker_id = worker_id or uuid.uuid4().hex
+        self.completed = 0
+        self.lost = 0
+
+    @property
+    def tool_names(self) -> Sequence[str]:
+        return list(self.components.tools.list_tools())
+
+    async def run_once(self) -> bool:
+        """
+        租用并执行一个任务
+
+        Returns:
+            bool: 是否取到任务
+        """
+        config = self.config
+        task = await self.broker.lease(self.worker_id, self.tool_names, config.lease_seconds)
+        if task is None:
+            return False
+
+        tool = self.components.tools.get(task.step.tool_name)
+        if tool is None:
+            await self.broker.complete(task.task_id, self.worker_id, ToolExecutionResult(
+                success=False,
+                error=StructuredError(
+                    code="TOOL_NOT_FOUND",
+                    message=f"Tool {task.step.tool_name} is not registered on worker",
+                    severity="WARNING",
+                    suggested_action="REPLAN",
+                ),
+            ))
+            return True
+
+        execution = asyncio.ensure_future(self.runtime.invoke(
+            tool, task.tool_input, task.trace_id, task.step.id, task.step.timeout_ms
+        ))
+        while True:
+            done, _ = await asyncio.wait({execution}, timeout=config.heartbeat_seconds)
+            if done:
+                break
+            if not await self.broker.heartbeat(task.task_id, self.worker_id, config.lease_seconds):
+                # 租约已丢失，任务已重新投递给其他工作进程
+                execution.cancel()
+                self.lost += 1
+                return True
+
+        if await self.broker.complete(task.task_id, self.worker_id, execution.result()):
+            self.completed += 1
+        else:
+            self.lost += 1
+        return True
+
+    async def run(self, stop: Optional[asyncio.Event] = None) -> None:
+        """按 worker_concurrency 并发执行任务，直到 stop 被设置"""
+        stop = stop or asyncio.Event()
+        interval = self.config.poll_interval_ms / 1000
+
+        async def loop() -> None:
+            while not stop.is_set():
+                if not await self.run_once():
+                    try:
+                        await asyncio.wait_for(stop.wait(), timeout=interval)
+                    except asyncio.TimeoutError:
+                        pass
+
+        await asyncio.gather(*(loop() for _ in range(self.config.worker_concurrency)))
+
+
+def _load_components(args: argparse.Namespace) -> ComponentRegistry:
+    """由 --factory 构建组件，并登记 --manifest 中的工具声明（工具在首次执行时才导入）"""
+    if args.factory:
+        module_name, _, attr = args.factory.partition(":")
+        factory: Callable[[], ComponentRegistry] = getattr(
+            importlib.import_module(module_name), attr
+        )
+        components = factory()
+    else:
+        components = ComponentRegistry()
+    if args.manifest:
+        components.tools.discover(args.manifest, entry_point_group=None)
+    return components
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    config = DistributedConfig.from_yaml(args.config) if args.config else DistributedConfig()
+    update: Dict[str, Any] = {"broker_path": args.broker or config.broker_path}
+    if args.concurrency:
+        update["worker_concurrency"] = args.concurrency
+    config = config.model_copy(update=update)
+
+    broker = SqliteBroker(config.broker_path, max_deliveries=config.max_deliveries)
+    worker = StepWorker(broker, _load_components(args), config=config)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await worker.run(stop)
+    worker.runtime.shutdown()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """工作进程入口"""
+    parser = argparse.ArgumentParser(description="Distributed step worker")
+    parser.add_argument("--factory", help="module:callable returning registry")
+    parser.add_argument("--manifest", help="tool manifest YAML, tools are imported lazily")
+    parser.add_argument("--broker", help="SQLite broker path")
+    parser.add_argument("--config", help="YAML config with a distributed section")
+    parser.add_argument("--concurrency", type=int, help="concurrent tasks per worker")
+    args = parser.parse_args(argv)
+    if not args.factory and not args.manifest:
+        parser.error("at least one of --factory and --manifest is required")
+    asyncio.run(_serve(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+引擎流式事件
+ExecutionEngine.start_stream() 按发生顺序产出以下事件，type 字段用于区分：
+- state_transition：生命周期状态转移
+- step_completed：单个步骤执行完成（开启逐步审查时，结果以随后的 review_verdict 为准）
+- review_verdict：逐步审查、批次审查或全局审查的结论
+- result：最终 EngineResult，总是最后一个事件
+"""
+from typing import Any, Literal, Optional, Union
+
+from pydantic import BaseModel
+
+from src.core.protocols import EngineResult, StructuredError
+from src.core.types import LifecycleState
+
+
+class StateTransitionEvent(BaseModel):
+    """状态转移"""
+    type: Literal["state_transition"] = "state_transition"
+    trace_id: str
+    from_state: Optional[LifecycleState]
+    to_state: LifecycleState
+    trigger: Optional[str] = None
+
+
+class StepCompletedEvent(BaseModel):
+    """步骤执行完成"""
+    type: Literal["step_completed"] = "step_completed"
+    trace_id: str
+    step_id: str
+    success: bool
+    output: Optional[Any] = None
+    error: Optional[StructuredError] = None
+    latency_ms: Optional[int] = None
+
+
+class ReviewVerdictEvent(BaseModel):
+    """审查结论"""
+    type: Literal["review_verdict"] = "review_verdict"
+    trace_id: str
+    scope: Literal["STEP", "BATCH", "GLOBAL"]
+    approved: bool
+    step_id: Optional[str] = None       # scope 为 STEP 时填写
+    confidence: Optional[float] = None
+
+
+class ResultEvent(BaseModel):
+    """最终结果"""
+    type: Literal["result"] = "result"
+    result: EngineResult
+
+
+EngineEvent = Union[StateTransitionEvent, StepCompletedEvent, ReviewVerdictEvent, ResultEvent]
@@ -0,0 +1,1020 @@
+"""
+执行引擎
+来源：《关键接口抽象框架.md》v2.0 / 《流程图.md》
+
+- 唯一允许修改 GlobalState.lifecycle_state 的组件，所有状态转移经过 transition()
+- 状态转移由 StateMachine 规则驱动：Current State + Trigger Event + Guard Condition → Next State
+- 每个 ExecutionEngine 实例只持有一次执行的 GlobalState / ExecutionContext，
+  共享组件（ComponentRegistry）与引擎服务（EngineServices）按引用注入，可在多个会话间复用
+"""
+import asyncio
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import (
+    Any, AsyncIterator, Awaitable, Callable, Dict, List, Literal, Optional, Protocol, Tuple,
+    TypeVar, Union,
+)
+
+from pydantic import BaseModel, Field
+
+from src.core.interfaces import BaseAgent, BaseExecutionEngine, BasePolicy, BaseTool
+from src.core.models import ExecutionContext, ExecutionPlan, GlobalState, PlanStep, StepContext
+from src.core.protocols import AgentOutput, EngineResult, StructuredError, ToolExecutionResult
+from src.core.types import (
+    AgentRole, LifecycleState, MemoryScope, PermissionLevel, StepStatus, TraceEventType,
+)
+from src.policy.base_policy import PolicyBase
+from src.registry.component_registry import ComponentRegistry
+from src.tools.deadline import deadline_scope
+from src.tools.runtime import ToolRuntime, ToolRuntimeConfig
+from .admission import AdmissionConfig, AdmissionController
+from .batch_manager import BatchManager, BatchResult
+from .distributed import DistributedConfig, StepDispatcher
+from .events import (
+    EngineEvent,
+    ResultEvent,
+    ReviewVerdictEvent,
+    StateTransitionEvent,
+    StepCompletedEvent,
+)
+from .plan_diff import apply_plan_diff, diff_plans
+from .retry import RetryConfig, RetryScheduler
+from .state_machine import (
+    GuardContext,
+    StateMachine,
+    TriggerEvent,
+    agent_approved,
+    build_default_state_machine,
+)
+
+
+T = TypeVar("T")
+WorkKind = Literal["agent", "tool"]
+
+
+# ==============================================================================
+# 配置与共享服务
+# ==============================================================================
+
+class EngineConfig(BaseModel):
+    """引擎配置，对应 configs/default.yaml 的 engine 段"""
+    confidence_threshold: float = Field(default=0.7, ge=0, le=1)
+    max_iterations: int = Field(default=3, ge=1)
+    max_step_concurrency: int = Field(default=8, ge=1)
+    step_review: bool = False             # 每个步骤执行后由 Reviewer 逐步审查
+    speculative_execution: bool = False   # 逐步审查期间推测执行低风险、无副作用的下游步骤
+
+    @classmethod
+    def from_yaml(cls, path: Union[str, Path]) -> "EngineConfig":
+        """从 YAML 文件读取 engine 段"""
+        import yaml
+
+        with open(path, "r", encoding="utf-8") as f:
+            data = yaml.safe_load(f) or {}
+        return cls(**(data.get("engine") or {}))
+
+
+@dataclass
+class EngineServices:
+    """
+    引擎内部的无会话状态服务
+    状态机、调度器、工具运行时、重试调度器与准入控制器均不持有单次执行的数据，可在所有会话间共享
+    """
+    state_machine: StateMachine
+    batch_manager: BatchManager
+    tool_runtime: ToolRuntime
+    retry_scheduler: RetryScheduler
+    admission: Optional[AdmissionController] = None
+    dispatcher: Optional[StepDispatcher] = None
+    config: Optional["ConfigSource"] = None
+
+    @classmethod
+    def create(
+        cls,
+        config: Optional[EngineConfig] = None,
+        components: Optional[ComponentRegistry] = None,
+        runtime_config: Optional[ToolRuntimeConfig] = None,
+        retry_config: Optional[RetryConfig] = None,
+        admission_config: Optional[AdmissionConfig] = None,
+        distributed_config: Optional[DistributedConfig] = None,
+        config_source: Optional["ConfigSource"] = None,
+    ) -> "EngineServices":
+        """
+        按配置构建默认服务
+        admission_config 未开启时不做准入控制；distributed_config 未开启时所有步骤在本进程执行；
+        提供 config_source 时每条追踪事件带上其当前配置版本
+        """
+        config = config or EngineConfig()
+        tracer = components.tracer if components is not None else None
+        admission = None
+        if admission_config is not None and admission_config.enabled:
+            admission = AdmissionController(admission_config)
+        dispatcher = None
+        if distributed_config is not None and distributed_config.enabled:
+            dispatcher = StepDispatcher.create(distributed_config)
+        return cls(
+            state_machine=build_default_state_machine(
+                config.confidence_threshold, config.max_iterations
+            ),
+            batch_manager=BatchManager(config.max_step_concurrency),
+            tool_runtime=ToolRuntime(tracer=tracer, config=runtime_config),
+            retry_scheduler=RetryScheduler(retry_config),
+            admission=admission,
+            dispatcher=dispatcher,
+            config=config_source,
+        )
+
+
+class ConfigSource(Protocol):
+    """热更新配置来源（如 ConfigManager），引擎只读取其当前版本号"""
+
+    @property
+    def version(self) -> str:
+        ...
+
+
+class WorkGate(Protocol):
+    """Agent / 工具调用的准入闸门，由会话运行时注入以实现跨会话公平调度"""
+
+    async def run(self, kind: WorkKind, work: Callable[[], Awaitable[T]]) -> T:
+        ...
+
+
+class _DirectGate:
+    """默认闸门：直接执行"""
+
+    async def run(self, kind: WorkKind, work: Callable[[], Awaitable[T]]) -> T:
+        return await work()
+
+
+# ==============================================================================
+# 执行引擎
+# ==============================================================================
+
+# 引擎在 ExecutionContext.intermediate_results 中使用的保留键
+STRUCTURED_GOAL_KEY = "_structured_goal"
+HUMAN_FEEDBACK_KEY = "_human_feedback"
+PENDING_APPROVAL_KEY = "_pending_approval"   # 等待人工确认的策略规则 ID
+APPROVED_RULES_KEY = "_approved_rules"       # 已获人工确认的策略规则 ID，规则据此不再重复要求确认
+PLAN_DIFF_KEY = "_plan_diff"
+
+_Outcome = Tuple[TriggerEvent, Optional[AgentOutput], Optional[ToolExecutionResult]]
+
+
+class ExecutionEngine(BaseExecutionEngine):
+    """
+    执行引擎
+    - start() 初始化 GlobalState 并驱动状态机直到终端状态或 WAIT_HUMAN
+    - transition() 执行当前状态的动作，经 Policy 评估后由 StateMachine 计算下一状态
+    """
+
+    def __init__(
+        self,
+        components: Optional[ComponentRegistry] = None,
+        services: Optional[EngineServices] = None,
+        config: Optional[EngineConfig] = None,
+        gate: Optional[WorkGate] = None,
+    ):
+        """
+        Args:
+            components: 共享组件，默认创建空注册中心
+            services: 共享引擎服务，默认按 config 创建
+            config: 引擎配置
+            gate: Agent / 工具调用准入闸门
+        """
+        self.config = config or EngineConfig()
+        self.components = components or ComponentRegistry()
+        self.services = services or EngineServices.create(self.config, self.components)
+        self._gate: WorkGate = gate or _DirectGate()
+
+        self._state: Optional[GlobalState] = None
+        self._context = ExecutionContext()
+        self._snapshots: Dict[str, str] = {}
+        self._errors: List[StructuredError] = []
+        self._last_batch: Optional[BatchResult] = None
+        self._started_at = 0.0
+        self._events: "Optional[asyncio.Queue[EngineEvent]]" = None
+
+    # ------------------------------------------------------------------
+    # 组件注入
+    # ------------------------------------------------------------------
+
+    def register_agent(self, agent: BaseAgent) -> None:
+        self.components.register_agent(agent)
+
+    def register_tool(self, tool: BaseTool) -> None:
+        self.components.register_tool(tool)
+
+    def set_policy(self, policy: BasePolicy) -> None:
+        self.components.set_policy(policy)
+
+    # ------------------------------------------------------------------
+    # 状态访问
+    # ------------------------------------------------------------------
+
+    def initialize(self, user_input: str, trace_id: Optional[str] = None) -> GlobalState:
+        """创建初始 GlobalState（INIT 状态）与空的 ExecutionContext"""
+        self._state = GlobalState(
+            original_goal=user_input,
+            lifecycle_state=self.services.state_machine.initial_state,
+            trace_id=trace_id or uuid.uuid4().hex,
+        )
+        self._context = ExecutionContext()
+        self._snapshots = {}
+        self._errors = []
+        self._last_batch = None
+        self._started_at = time.perf_counter()
+        return self._state
+
+    def get_state(self) -> GlobalState:
+        """当前 GlobalState（只读）"""
+        if self._state is None:
+            raise RuntimeError("Engine has not been initialized")
+        return self._state
+
+    def get_context(self) -> ExecutionContext:
+        """当前 ExecutionContext"""
+        return self._context
+
+    @property
+    def trace_id(self) -> str:
+        return self._state.trace_id if self._state is not None else ""
+
+    @property
+    def is_finished(self) -> bool:
+        return self._state is not None and self.services.state_machine.is_terminal(
+            self._state.lifecycle_state
+        )
+
+    @property
+    def is_waiting_human(self) -> bool:
+        return self._state is not None and self._state.lifecycle_state == LifecycleState.WAIT_HUMAN
+
+    # ------------------------------------------------------------------
+    # 生命周期
+    # ------------------------------------------------------------------
+
+    async def start(self, user_input: str) -> EngineResult:
+        """
+        启动任务，驱动状态机直到终端状态或等待人工介入
+        配置了准入控制时先获得运行名额；被拒绝时直接返回 ADMISSION_REJECTED 结果，不产生任何追踪
+        """
+        state = self.initialize(user_input)
+        admission = self.services.admission
+        if admission is None:
+            return await self._launch()
+        return await admission.run(self._launch, state.trace_id)
+
+    async def _launch(self) -> EngineResult:
+        state = self.get_state()
+        await self._trace(TraceEventType.STATE_TRANSITION, {
+            "from": None,
+            "to": state.lifecycle_state.value,
+            "trigger": None,
+        })
+        await self._emit(StateTransitionEvent(
+            trace_id=state.trace_id, from_state=None, to_state=state.lifecycle_state
+        ))
+        return await self.run()
+
+    async def start_stream(self, user_input: str, buffer: int = 16) -> AsyncIterator[EngineEvent]:
+        """
+        以异步迭代器形式启动任务，按发生顺序产出状态转移、步骤完成、审查结论事件，最后产出 ResultEvent
+
+        事件缓冲区有界：消费者跟不上时引擎在下一次产出事件处暂停，而不是无限堆积输出。
+        消费者提前结束迭代（aclose，如 contextlib.aclosing）时取消执行。
+
+        Args:
+            user_input: 用户输入
+            buffer: 事件缓冲区容量
+        """
+        events: "asyncio.Queue[EngineEvent]" = asyncio.Queue(maxsize=buffer)
+        self._events = events
+
+        async def produce() -> None:
+            try:
+                result = await self.start(user_input)
+            except Exception as e:
+                result = EngineResult(
+                    success=False,
+                    final_output=None,
+                    trace_id=self.trace_id,
+                    errors=[StructuredError(
+                        code="ENGINE_EXCEPTION",
+                        message=f"Engine raised {type(e).__name__}: {e}",
+                        severity="CRITICAL",
+                        suggested_action="HALT",
+                    )],
+                )
+            finally:
+                self._events = None
+            await events.put(ResultEvent(result=result))
+
+        producer = asyncio.ensure_future(produce())
+        try:
+            while True:
+                event = await events.get()
+                yield event
+                if isinstance(event, ResultEvent):
+                    return
+        finally:
+            if not producer.done():
+                producer.cancel()
+                await asyncio.gather(producer, return_exceptions=True)
+
+    async def _emit(self, event: EngineEvent) -> None:
+        """流式执行时写入事件缓冲区，缓冲区已满时等待消费者"""
+        if self._events is not None:
+            await self._events.put(event)
+
+    async def run(self) -> EngineResult:
+        """从当前状态继续驱动状态机"""
+        while not self.is_finished and not self.is_waiting_human:
+            await self.transition()
+        return self.result()
+
+    def result(self) -> EngineResult:
+        """根据当前状态构建 EngineResult"""
+        state = self.get_state()
+        errors = list(self._errors)
+        if state.lifecycle_state == LifecycleState.WAIT_HUMAN:
+            errors.append(StructuredError(
+                code="WAITING_HUMAN",
+                message="Execution is waiting for human feedback",
+                severity="INFO",
+                suggested_action="HALT",
+            ))
+        plan = self._context.current_plan
+        final_output = None
+        if state.lifecycle_state == LifecycleState.COMPLETED and plan is not None:
+            final_output = {
+                step.id: self._context.intermediate_results.get(step.id) for step in plan.steps
+            }
+        return EngineResult(
+            success=state.lifecycle_state == LifecycleState.COMPLETED,
+            final_output=final_output,
+            trace_id=state.trace_id,
+            errors=errors,
+            total_latency_ms=int((time.perf_counter() - self._started_at) * 1000),
+        )
+
+    async def transition(self) -> None:
+        """
+        驱动状态机流转一步
+        这是唯一修改 GlobalState.lifecycle_state 的地方。
+        """
+        state = self.get_state()
+        machine = self.services.state_machine
+        if machine.is_terminal(state.lifecycle_state):
+            raise RuntimeError(
+                f"Cannot transition from terminal state {state.lifecycle_state.value}"
+            )
+
+        trigger, agent_output, tool_result = await self._dispatch(state.lifecycle_state)
+
+        guard_context = GuardContext(state, self._context, agent_output, tool_result)
+        target = machine.resolve(state.lifecycle_state, trigger, guard_context)
+
+        decision = None
+        policy = self.components.policy
+        if policy is not None and target is not None:
+            if isinstance(policy, PolicyBase):
+                decision = policy.evaluate_event(
+                    state, self._context, trigger.value, target, agent_output, tool_result
+                )
+            else:
+                decision = policy.evaluate_transition(
+                    state, self._context, agent_output, tool_result
+                )
+            await self._trace(TraceEventType.POLICY_EVALUATION, {
+                "state": state.lifecycle_state.value,
+                "proposed": target.value,
+                "allow": decision.allow,
+                "reason": decision.reason,
+                "risk_level": decision.risk_level.value,
+            })
+            if not decision.allow:
+                target = LifecycleState.WAIT_HUMAN if decision.require_human_approval else None
+                rule_id = getattr(decision, "rule_id", None)
+                if target is not None and rule_id is not None:
+                    self._context.intermediate_results[PENDING_APPROVAL_KEY] = rule_id
+                trigger = TriggerEvent.FATAL_ERROR
+                self._errors.append(StructuredError(
+                    code="POLICY_DENIED",
+                    message=decision.reason or "Transition denied by policy",
+                    severity="CRITICAL",
+                    suggested_action="HALT",
+                ))
+            elif decision.next_state and decision.next_state != target.value:
+                override = LifecycleState(decision.next_state)
+                if machine.can_transition(state.lifecycle_state, override):
+                    target = override
+
+        if target is None:
+            if trigger != TriggerEvent.FATAL_ERROR:
+                self._errors.append(StructuredError(
+                    code="NO_TRANSITION",
+                    message=f"No transition from {state.lifecycle_state.value} on {trigger.value}",
+                    severity="CRITICAL",
+                    suggested_action="HALT",
+                ))
+            trigger = TriggerEvent.FATAL_ERROR
+            target = machine.resolve(state.lifecycle_state, trigger, guard_context)
+            if target is None:
+                target = LifecycleState.FAILED
+
+        await self._apply(target, trigger)
+
+    async def _apply(self, target: LifecycleState, trigger: Optional[TriggerEvent]) -> None:
+        """创建新的 GlobalState 实例，记录状态转移并写入执行日志"""
+        state = self.get_state()
+        update: Dict[str, Any] = {"lifecycle_state": target}
+        if target == LifecycleState.REPLAN:
+            update["iteration_count"] = state.iteration_count + 1
+        self._state = state.model_copy(update=update)
+        await self._trace(TraceEventType.STATE_TRANSITION, {
+            "from": state.lifecycle_state.value,
+            "to": target.value,
+            "trigger": trigger.value if trigger is not None else None,
+            "iteration": self._state.iteration_count,
+        })
+        await self._emit(StateTransitionEvent(
+            trace_id=state.trace_id,
+            from_state=state.lifecycle_state,
+            to_state=target,
+            trigger=trigger.value if trigger is not None else None,
+        ))
+        if target == LifecycleState.WAIT_HUMAN:
+            await self._snapshot("human_wait")
+            await self._trace(TraceEventType.HUMAN_INTERACTION, {"reason": "review_required"})
+
+        journal = self.components.journal
+        if journal is None:
+            return
+        if self.services.state_machine.is_terminal(target):
+            await journal.finish(str(self._state.execution_id))
+        else:
+            await journal.record_transition(
+                self._state,
+                self._context.snapshot_id,
+                dict(self._snapshots),
+                reset_steps=target == LifecycleState.EXECUTION_PREPARE,
+            )
+
+    async def submit_human_feedback(self, feedback: str, approved: bool = True) -> None:
+        """
+        处理 WAIT_HUMAN 状态后的用户输入，并继续驱动执行
+
+        Args:
+            feedback: 人工反馈内容
+            approved: False 表示人工否决，执行进入 FAILED
+        """
+        if not self.is_waiting_human:
+            raise RuntimeError("Engine is not waiting for human feedback")
+        results = self._context.intermediate_results
+        results[HUMAN_FEEDBACK_KEY] = feedback
+        rule_id = results.pop(PENDING_APPROVAL_KEY, None)
+        if approved and rule_id is not None:
+            # 确认只对触发本次等待的规则生效，其他要求人工确认的规则照常求值
+            results[APPROVED_RULES_KEY] = [*results.get(APPROVED_RULES_KEY, []), rule_id]
+        await self._trace(TraceEventType.HUMAN_INTERACTION, {
+            "feedback": feedback,
+            "approved": approved,
+        })
+        trigger = TriggerEvent.HUMAN_FEEDBACK if approved else TriggerEvent.HUMAN_REJECTED
+        target = self.services.state_machine.resolve(
+            LifecycleState.WAIT_HUMAN, trigger, GuardContext(self.get_state(), self._context)
+        )
+        await self._apply(target or LifecycleState.FAILED, trigger)
+        await self.run()
+
+    async def resume(self, execution_id: str) -> EngineResult:
+        """
+        从执行日志与快照恢复一个未结束的执行并继续驱动
+
+        - 恢复最近一次转移关联的快照，并重放其后已完成步骤的输出，已完成步骤不会重新执行
+        - 已开始但未确认完成的有副作用步骤无法判断是否生效，此时进入 WAIT_HUMAN 等待人工确认
+
+        Args:
+            execution_id: 待恢复的执行 ID
+
+        Returns:
+            EngineResult: 恢复后的执行结果；无法恢复时返回 RESUME_FAILED
+        """
+        journal = self.components.journal
+        manager = self.components.snapshot_manager
+        self._started_at = time.perf_counter()
+        try:
+            entry = await journal.load(execution_id) if journal is not None else None
+            if entry is None:
+                raise LookupError(f"No in-flight execution {execution_id} in journal")
+            context = ExecutionContext()
+            if entry.snapshot_id is not None:
+                if manager is None:
+                    raise LookupError("Snapshot manager is not configured")
+                context = await manager.restore_snapshot(entry.snapshot_id)
+                context.snapshot_id = entry.snapshot_id
+        except Exception as e:
+            return EngineResult(
+                success=False,
+                final_output=None,
+                trace_id=self.trace_id,
+                errors=[StructuredError(
+                    code="RESUME_FAILED",
+                    message=f"Cannot resume execution {execution_id}: {e}",
+                    severity="CRITICAL",
+                    suggested_action="HALT",
+                    metadata={"execution_id": execution_id},
+                )],
+            )
+
+        self._state = entry.state
+        self._context = context
+        self._snapshots = dict(entry.snapshots)
+        self._errors = []
+        self._last_batch = None
+        plan = context.current_plan
+        if plan is not None and entry.state.lifecycle_state != LifecycleState.EXECUTION_PREPARE:
+            snapshot_steps = context.active_steps
+            context.active_steps = {
+                step.id: StepStatus.COMPLETED
+                if snapshot_steps.get(step.id) == StepStatus.COMPLETED else StepStatus.PENDING
+                for step in plan.steps
+            }
+            for step_id, output in entry.completed_steps.items():
+                context.active_steps[step_id] = StepStatus.COMPLETED
+                context.intermediate_results[step_id] = output
+        await self._trace(TraceEventType.SNAPSHOT_RESTORED, {
+            "snapshot_id": entry.snapshot_id,
+            "resumed_state": entry.state.lifecycle_state.value,
+            "completed_steps": list(entry.completed_steps),
+        })
+
+        unconfirmed = [s for s in entry.started_steps if s not in entry.completed_steps]
+        if unconfirmed and entry.state.lifecycle_state == LifecycleState.STEP_EXECUTION:
+            self._errors.append(StructuredError(
+                code="SIDE_EFFECT_UNCONFIRMED",
+                message="Side-effecting steps were interrupted and may have been applied",
+                severity="WARNING",
+                suggested_action="HALT",
+                metadata={"steps": unconfirmed},
+            ))
+            await self._apply(LifecycleState.WAIT_HUMAN, None)
+        return await self.run()
+
+    async def rollback(self, scope: Literal["LOCAL", "GLOBAL"]) -> None:
+        """
+        回滚 ExecutionContext
+        LOCAL 恢复到执行准备阶段的快照，GLOBAL 恢复到计划生成前的快照
+        """
+        label = "exec" if scope == "LOCAL" else "plan"
+        snapshot_id = self._snapshots.get(label) or self._snapshots.get("plan")
+        manager = self.components.snapshot_manager
+        if manager is None or snapshot_id is None:
+            return
+        self._context = await manager.restore_snapshot(snapshot_id)
+        self._context.snapshot_id = snapshot_id
+        await self._trace(TraceEventType.SNAPSHOT_RESTORED, {
+            "snapshot_id": snapshot_id,
+            "scope": scope,
+        })
+
+    # ------------------------------------------------------------------
+    # 状态动作
+    # ------------------------------------------------------------------
+
+    async def _dispatch(self, state: LifecycleState) -> _Outcome:
+        """执行当前状态对应的动作，返回触发事件"""
+        handler = self._handlers.get(state)
+        if handler is None:
+            return TriggerEvent.FATAL_ERROR, None, None
+        return await handler(self)
+
+    async def _on_init(self) -> _Outcome:
+        return TriggerEvent.START, None, None
+
+    async def _on_context_build(self) -> _Outcome:
+        output = await self._run_agent(AgentRole.CONTEXT_BUILDER)
+        if output is not None:
+            if not output.success:
+                return TriggerEvent.FATAL_ERROR, output, None
+            self._context.intermediate_results[STRUCTURED_GOAL_KEY] = output.data
+        return TriggerEvent.CONTEXT_READY, output, None
+
+    async def _on_plan_generation(self) -> _Outcome:
+        await self._snapshot("plan")
+        output = await self._run_agent(AgentRole.PLANNER)
+        if output is None or not output.success:
+            self._error("PLAN_GENERATION_FAILED", "Planner did not produce a plan", output)
+            return TriggerEvent.FATAL_ERROR, output, None
+        try:
+            plan = output.data if isinstance(output.data, ExecutionPlan) else (
+                ExecutionPlan.model_validate(output.data)
+            )
+        except Exception as e:
+            self._error("INVALID_PLAN", f"Planner output is not an ExecutionPlan: {e}", output)
+            return TriggerEvent.FATAL_ERROR, output, None
+        self._prepare_steps(plan)
+        self._context.current_plan = plan
+        return TriggerEvent.PLAN_READY, output, None
+
+    def _prepare_steps(self, plan: ExecutionPlan) -> None:
+        """
+        LOCAL 重规划时与旧计划做增量比较，沿用未受影响的已完成步骤；
+        否则清空旧计划的步骤状态与输出
+        """
+        context = self._context
+        previous = context.current_plan
+        if previous is not None and context.replan_scope == "LOCAL":
+            diff = diff_plans(previous, plan)
+            reused = apply_plan_diff(context, plan, diff)
+            context.intermediate_results[PLAN_DIFF_KEY] = {
+                "added": diff.added,
+                "removed": diff.removed,
+                "changed": diff.changed,
+                "reused": reused,
+            }
+            return
+        for step_id in context.active_steps:
+            context.intermediate_results.pop(step_id, None)
+        context.active_steps = {}
+        context.intermediate_results.pop(PLAN_DIFF_KEY, None)
+
+    async def _on_plan_check(self) -> _Outcome:
+        plan = self._context.current_plan
+        structural = self.services.batch_manager.validate(plan) if plan is not None else []
+        if structural:
+            self._errors.extend(structural)
+            output = AgentOutput(
+                success=False, confidence=0.0, errors=structural, role=AgentRole.PLAN_CRITIC
+            )
+            return TriggerEvent.PLAN_REVIEWED, output, None
+
+        critic_output = await self._run_agent(AgentRole.PLAN_CRITIC)
+        if critic_output is None:
+            critic_output = AgentOutput(success=True, confidence=1.0, role=AgentRole.PLAN_CRITIC)
+        if critic_output.success and self.components.memory is not None and plan is not None:
+            await self.components.memory.store(
+                f"plan:{self.get_state().execution_id}",
+                {"goal": plan.goal, "steps": len(plan.steps)},
+                MemoryScope.SESSION,
+            )
+        return TriggerEvent.PLAN_REVIEWED, critic_output, None
+
+    async def _on_execution_prepare(self) -> _Outcome:
+        plan = self._context.current_plan
+        if plan is not None:
+            # 增量重规划沿用的步骤保持 COMPLETED
+            active_steps = self._context.active_steps
+            self._context.active_steps = {
+                step.id: StepStatus.COMPLETED
+                if active_steps.get(step.id) == StepStatus.COMPLETED else StepStatus.PENDING
+                for step in plan.steps
+            }
+        self._context.replan_scope = None
+        await self._snapshot("exec")
+        return TriggerEvent.EXECUTION_READY, None, None
+
+    async def _on_step_execution(self) -> _Outcome:
+        plan = self._context.current_plan
+        if plan is None:
+            return TriggerEvent.FATAL_ERROR, None, None
+        reviewer = self._review_step if self.config.step_review else None
+        speculate = self._can_speculate if self.config.speculative_execution else None
+        batch = await self.services.batch_manager.run(
+            plan, self._run_step, self._context, reviewer, speculate, self._journal_accepted
+        )
+        self._last_batch = batch
+        self._errors.extend(batch.errors)
+        for step_id, result in batch.results.items():
+            if not result.success and result.error is not None:
+                self._context.errors.append(f"{step_id}: {result.error.code}")
+        return TriggerEvent.BATCH_COMPLETED, None, None
+
+    async def _on_step_review(self) -> _Outcome:
+        batch = self._last_batch
+        step_errors = [
+            r.error for r in (batch.results.values() if batch else []) if r.error is not None
+        ]
+        output = await self._run_agent(AgentRole.REVIEWER)
+        if output is None:
+            output = AgentOutput(success=True, confidence=1.0, role=AgentRole.REVIEWER)
+        if batch is not None and not batch.success:
+            output = output.model_copy(update={
+                "success": False,
+                "errors": list(output.errors) + step_errors + list(batch.errors),
+            })
+        await self._emit_verdict("BATCH", output)
+        return TriggerEvent.STEP_REVIEWED, output, None
+
+    async def _on_global_review(self) -> _Outcome:
+        output = await self._run_agent(AgentRole.REVIEWER)
+        if output is None:
+            output = AgentOutput(success=True, confidence=1.0, role=AgentRole.REVIEWER)
+        if output.success and self.components.memory is not None:
+            await self.components.memory.store(
+                f"case:{self.get_state().execution_id}",
+                {"goal": self.get_state().original_goal, "result": "success"},
+                MemoryScope.GLOBAL,
+            )
+        await self._emit_verdict("GLOBAL", output)
+        return TriggerEvent.GLOBAL_REVIEWED, output, None
+
+    async def _emit_verdict(self, scope: Literal["BATCH", "GLOBAL"], output: AgentOutput) -> None:
+        """按状态机的审查通过条件产出审查结论事件"""
+        if self._events is None:
+            return
+        approve = agent_approved(self.config.confidence_threshold)
+        await self._emit(ReviewVerdictEvent(
+            trace_id=self.trace_id,
+            scope=scope,
+            approved=approve(GuardContext(self.get_state(), self._context, output)),
+            confidence=output.confidence,
+        ))
+
+    async def _on_rollback(self) -> _Outcome:
+        await self.rollback("LOCAL")
+        self._context.replan_scope = "GLOBAL"
+        return TriggerEvent.ROLLBACK_DONE, None, None
+
+    async def _on_replan(self) -> _Outcome:
+        if self._context.replan_scope is None:
+            self._context.replan_scope = "LOCAL" if self._last_batch is not None else "GLOBAL"
+        if self.components.memory is not None:
+            await self.components.memory.record_failure_pattern({
+                "goal": self.get_state().original_goal,
+                "scope": self._context.replan_scope,
+                "errors": list(self._context.errors),
+            })
+        return TriggerEvent.REPLAN_READY, None, None
+
+    _handlers: Dict[LifecycleState, Callable[["ExecutionEngine"], Awaitable[_Outcome]]] = {
+        LifecycleState.INIT: _on_init,
+        LifecycleState.CONTEXT_BUILD: _on_context_build,
+        LifecycleState.PLAN_GENERATION: _on_plan_generation,
+        LifecycleState.PLAN_CHECK: _on_plan_check,
+        LifecycleState.EXECUTION_PREPARE: _on_execution_prepare,
+        LifecycleState.STEP_EXECUTION: _on_step_execution,
+        LifecycleState.STEP_REVIEW: _on_step_review,
+        LifecycleState.GLOBAL_REVIEW: _on_global_review,
+        LifecycleState.ROLLBACK: _on_rollback,
+        LifecycleState.REPLAN: _on_replan,
+    }
+
+    # ------------------------------------------------------------------
+    # 步骤执行
+    # ------------------------------------------------------------------
+
+    async def _run_step(self, step: PlanStep) -> ToolExecutionResult:
+        """
+        执行单个计划步骤
+        配置了执行日志时记录有副作用步骤的开始与所有步骤的完成（开启逐步审查时在步骤最终确认后记录，
+        见 _journal_accepted）；流式执行时产出步骤完成事件
+        """
+        journal = self.components.journal
+        state = self.get_state()
+        if journal is not None:
+            tool = self.components.tools.get(step.tool_name)
+            if tool is not None and tool.has_side_effect:
+                await journal.record_step_started(str(state.execution_id), step.id)
+        result = await self._execute_step(step)
+        if journal is not None and result.success and not self.config.step_review:
+            await journal.record_step_completed(str(state.execution_id), step.id, result.output)
+        policy = self.components.policy
+        if isinstance(policy, PolicyBase):
+            policy.record_step(state.trace_id, step, result)
+        await self._emit(StepCompletedEvent(
+            trace_id=state.trace_id,
+            step_id=step.id,
+            success=result.success,
+            output=result.output,
+            error=result.error,
+            latency_ms=result.latency_ms,
+        ))
+        return result
+
+    async def _execute_step(self, step: PlanStep) -> ToolExecutionResult:
+        """
+        执行单个计划步骤
+        StepExecutor 生成参数 → 权限校验 → 工具调用（含重试） → StepExecutor 解析结果
+
+        step.timeout_ms 约束包括重试与退避在内的整个工具调用过程：每次尝试的截止时间取工具超时与
+        剩余时间的较小值（远程执行同样受剩余时间约束），超出时返回可重试的 STEP_TIMEOUT
+        """
+        tool = self.components.tools.get(step.tool_name)
+        if tool is None:
+            return self._step_failure(
+                "TOOL_NOT_FOUND", f"Tool {step.tool_name} is not registered", step, "REPLAN"
+            )
+
+        step_context = StepContext(step_id=step.id, tool_input=None, tool_output=None)
+        tool_input: Dict[str, Any] = dict(step.input_schema)
+        executor_output = await self._run_agent(AgentRole.STEP_EXECUTOR, step_context)
+        if executor_output is not None:
+            if not executor_output.success or not isinstance(executor_output.data, dict):
+                return ToolExecutionResult(
+                    success=False,
+                    error=executor_output.errors[0] if executor_output.errors else StructuredError(
+                        code="INVALID_TOOL_INPUT",
+                        message=f"StepExecutor produced no tool input for step {step.id}",
+                        severity="WARNING",
+                        suggested_action="REPLAN",
+                    ),
+                )
+            tool_input = executor_output.data
+
+        policy = self.components.policy
+        if policy is not None and not policy.check_tool_permission(AgentRole.STEP_EXECUTOR, tool):
+            return self._step_failure(
+                "PERMISSION_DENIED", f"Tool {tool.name} is not permitted", step, "HALT"
+            )
+
+        trace_id = self.get_state().trace_id
+        dispatcher = self.services.dispatcher
+
+        async def invoke() -> ToolExecutionResult:
+            if dispatcher is not None and dispatcher.handles(tool):
+                return await dispatcher.invoke(tool, tool_input, trace_id, step, step.timeout_ms)
+            return await self.services.tool_runtime.invoke(
+                tool, tool_input, trace_id, step.id, step.timeout_ms
+            )
+
+        async def attempt() -> ToolExecutionResult:
+            # 每次尝试单独占用闸门槽位，退避等待期间不占用
+            return await self._gate.run("tool", invoke)
+
+        with deadline_scope(step.timeout_ms) as deadline:
+            try:
+                async with asyncio.timeout_at(deadline):
+                    result = await self.services.retry_scheduler.call(tool.name, attempt)
+            except TimeoutError:
+                return ToolExecutionResult(
+                    success=False,
+                    error=StructuredError(
+                        code="STEP_TIMEOUT",
+                        message=f"Step {step.id} exceeded its deadline of {step.timeout_ms} ms",
+                        severity="WARNING",
+                        retryable=True,
+                        suggested_action="RETRY",
+                        metadata={
+                            "step_id": step.id,
+                            "tool": step.tool_name,
+                            "timeout_ms": step.timeout_ms,
+                        },
+                    ),
+                )
+        if not result.success or executor_output is None:
+            return result
+
+        parse_context = StepContext(
+            step_id=step.id, tool_input=tool_input, tool_output=result.output
+        )
+        parsed = await self._run_agent(AgentRole.STEP_EXECUTOR, parse_context)
+        if parsed is None or not parsed.success:
+            return result
+        return result.model_copy(update={"output": parsed.data})
+
+    async def _journal_accepted(self, step: PlanStep, result: ToolExecutionResult) -> None:
+        """逐步审查通过且上游均已确认后才记录步骤完成，被否决或撤销的步骤恢复后会重新执行"""
+        journal = self.components.journal
+        if journal is not None:
+            await journal.record_step_completed(
+                str(self.get_state().execution_id), step.id, result.output
+            )
+
+    async def _review_step(
+        self,
+        step: PlanStep,
+        result: ToolExecutionResult,
+    ) -> Optional[StructuredError]:
+        """逐步审查：Reviewer 未注册时直接通过，未通过或置信度不足时返回否决错误"""
+        step_context = StepContext(step_id=step.id, tool_output=result.output)
+        output = await self._run_agent(AgentRole.REVIEWER, step_context)
+        if output is None:
+            return None
+        approved = output.success and output.confidence >= self.config.confidence_threshold
+        await self._emit(ReviewVerdictEvent(
+            trace_id=self.trace_id,
+            scope="STEP",
+            approved=approved,
+            step_id=step.id,
+            confidence=output.confidence,
+        ))
+        if approved:
+            return None
+        return StructuredError(
+            code="STEP_REJECTED",
+            message=f"Reviewer rejected step {step.id}",
+            severity="WARNING",
+            suggested_action="REPLAN",
+            metadata={"step_id": step.id, "confidence": output.confidence},
+        )
+
+    def _can_speculate(self, step: PlanStep) -> bool:
+        """仅无副作用且权限等级为 PUBLIC 的工具步骤允许推测执行"""
+        tool = self.components.tools.get(step.tool_name)
+        return (
+            tool is not None
+            and not tool.has_side_effect
+            and tool.permission_level == PermissionLevel.PUBLIC
+        )
+
+    def _step_failure(
+        self,
+        code: str,
+        message: str,
+        step: PlanStep,
+        action: Literal["RETRY", "REPLAN", "ROLLBACK", "HALT"],
+    ) -> ToolExecutionResult:
+        return ToolExecutionResult(
+            success=False,
+            error=StructuredError(
+                code=code,
+                message=message,
+                severity="WARNING",
+                suggested_action=action,
+                metadata={"step_id": step.id, "tool": step.tool_name},
+            ),
+        )
+
+    # ------------------------------------------------------------------
+    # 辅助方法
+    # ------------------------------------------------------------------
+
+    async def _run_agent(
+        self,
+        role: AgentRole,
+        step_context: Optional[StepContext] = None,
+    ) -> Optional[AgentOutput]:
+        """调用指定角色的 Agent；未注册时返回 None，异常封装为失败输出"""
+        agent = self.components.agents.find_by_role(role)
+        if agent is None:
+            return None
+        state = self.get_state()
+
+        async def work() -> AgentOutput:
+            try:
+                output = await agent.run(state, self._context, step_context)
+            except Exception as e:
+                return AgentOutput(
+                    success=False,
+                    confidence=0.0,
+                    role=role,
+                    errors=[StructuredError(
+                        code="AGENT_EXCEPTION",
+                        message=f"Agent {agent.name} raised {type(e).__name__}: {e}",
+                        severity="CRITICAL",
+                        suggested_action="REPLAN",
+                    )],
+                )
+            if not agent.validate_output(output):
+                return output.model_copy(update={
+                    "success": False,
+                    "errors": list(output.errors) + [StructuredError(
+                        code="INVALID_AGENT_OUTPUT",
+                        message=f"Agent {agent.name} produced invalid output",
+                        severity="WARNING",
+                        suggested_action="REPLAN",
+                    )],
+                })
+            return output
+
+        output = await self._gate.run("agent", work)
+        await self._trace(TraceEventType.AGENT_DECISION, {
+            "agent": agent.name,
+            "role": role.value,
+            "success": output.success,
+            "confidence": output.confidence,
+            "step_id": step_context.step_id if step_context else None,
+        })
+        return output
+
+    async def _snapshot(self, label: str) -> None:
+        """在关键阶段创建快照"""
+        manager = self.components.snapshot_manager
+        if manager is None:
+            return
+        snapshot_id = await manager.create_snapshot(self._context, label)
+        self._snapshots[label] = snapshot_id
+        self._context.snapshot_id = snapshot_id
+        await self._trace(TraceEventType.SNAPSHOT_CREATED, {
+            "snapshot_id": snapshot_id,
+            "label": label,
+        })
+
+    def _error(self, code: str, message: str, output: Optional[AgentOutput]) -> None:
+        self._errors.extend(output.errors if output is not None else [])
+        self._errors.append(StructuredError(
+            code=code, message=message, severity="CRITICAL", suggested_action="HALT"
+        ))
+
+    async def _trace(self, event_type: TraceEventType, payload: Dict[str, Any]) -> None:
+        tracer = self.components.tracer
+        if tracer is None or self._state is None:
+            return
+        header: Dict[str, Any] = {"execution_id": str(self._state.execution_id)}
+        if self.services.config is not None:
+            header["config_version"] = self.services.config.version
+        await tracer.record_event(event_type, {**header, **payload}, self._state.trace_id)
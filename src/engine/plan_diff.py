@@ -0,0 +1,107 @@
+"""
+增量重规划
+按步骤 ID 比较新旧 ExecutionPlan 的工具、输入与依赖，只使变更步骤及其下游失效，
+其余已完成步骤保留 intermediate_results 与 COMPLETED 状态，不会重新执行
+"""
+import json
+from dataclasses import dataclass, field
+from typing import Dict, List, Set, Tuple
+
+from src.core.models import ExecutionContext, ExecutionPlan, PlanStep
+from src.core.types import StepStatus
+
+
+StepSignature = Tuple[str, str, Tuple[str, ...]]
+
+
+def step_signature(step: PlanStep) -> StepSignature:
+    """步骤签名：工具名、规范化输入与依赖集合"""
+    inputs = json.dumps(step.input_schema, sort_keys=True, separators=(",", ":"), default=str)
+    return step.tool_name, inputs, tuple(sorted(set(step.dependencies)))
+
+
+@dataclass
+class PlanDiff:
+    """新旧计划的差异"""
+    added: List[str] = field(default_factory=list)        # 新计划中新增的步骤
+    removed: List[str] = field(default_factory=list)      # 旧计划中被删除的步骤
+    changed: List[str] = field(default_factory=list)      # 工具、输入或依赖发生变化的步骤
+    invalidated: Set[str] = field(default_factory=set)    # 新增、变更步骤及其全部下游
+    unchanged: List[str] = field(default_factory=list)    # 可沿用旧结果的步骤
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.added or self.removed or self.changed)
+
+
+def diff_plans(old: ExecutionPlan, new: ExecutionPlan) -> PlanDiff:
+    """
+    比较新旧计划
+
+    Args:
+        old: 旧计划
+        new: 新计划
+
+    Returns:
+        PlanDiff: 差异；invalidated 在新计划的依赖图上向下游传播
+    """
+    old_signatures = {step.id: step_signature(step) for step in old.steps}
+    new_ids = {step.id for step in new.steps}
+    diff = PlanDiff(removed=[step_id for step_id in old_signatures if step_id not in new_ids])
+
+    dependents: Dict[str, List[str]] = {step.id: [] for step in new.steps}
+    for step in new.steps:
+        for dep in set(step.dependencies):
+            if dep in dependents:
+                dependents[dep].append(step.id)
+        previous = old_signatures.get(step.id)
+        if previous is None:
+            diff.added.append(step.id)
+        elif previous != step_signature(step):
+            diff.changed.append(step.id)
+
+    stack = diff.added + diff.changed
+    while stack:
+        step_id = stack.pop()
+        if step_id in diff.invalidated:
+            continue
+        diff.invalidated.add(step_id)
+        stack.extend(dependents[step_id])
+    diff.unchanged = [step.id for step in new.steps if step.id not in diff.invalidated]
+    return diff
+
+
+def apply_plan_diff(context: ExecutionContext, new: ExecutionPlan, diff: PlanDiff) -> List[str]:
+    """
+    按差异更新执行上下文：未变更且已完成的步骤保留输出与 COMPLETED 状态，其余步骤置为 PENDING
+
+    Args:
+        context: 执行上下文（原地更新）
+        new: 新计划
+        diff: diff_plans(context.current_plan, new) 的结果
+
+    Returns:
+        List[str]: 沿用旧结果的步骤 ID
+    """
+    reused = [
+        step_id for step_id in diff.unchanged
+        if context.active_steps.get(step_id) == StepStatus.COMPLETED
+        and step_id in context.intermediate_results
+    ]
+    kept = set(reused)
+    steps = {step.id: step for step in new.steps}
+    shrinking = True
+    while shrinking:
+        # 上游未被沿用的步骤同样需要重新执行
+        stale = {s for s in kept if any(dep not in kept for dep in steps[s].dependencies)}
+        kept -= stale
+        shrinking = bool(stale)
+    reused = [step_id for step_id in reused if step_id in kept]
+    for step_id in list(context.active_steps):
+        if step_id not in kept:
+            context.intermediate_results.pop(step_id, None)
+    context.active_steps = {
+        step.id: StepStatus.COMPLETED if step.id in kept else StepStatus.PENDING
+        for step in new.steps
+    }
+    return reused
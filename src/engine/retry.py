@@ -0,0 +1,227 @@
+"""
+重试调度
+- 读取 StructuredError.retryable / suggested_action 判断是否重试
+- 按工具配置指数退避与抖动
+- 全局重试预算：每次首次请求向预算存入 ratio 个令牌，每次重试消耗 1 个，
+  重试流量因此被限制在总流量的固定比例内，下游故障时不会引发重试风暴
+- 退避等待使用事件循环定时器（loop.call_later），等待期间不占用任何协程或并发槽位
+"""
+import asyncio
+import random
+import time
+from pathlib import Path
+from typing import Any, Callable, Coroutine, Dict, Literal, Optional, Union
+
+from pydantic import BaseModel, Field
+
+from src.core.protocols import ToolExecutionResult
+
+
+AttemptFactory = Callable[[], Coroutine[Any, Any, ToolExecutionResult]]
+
+
+# ==============================================================================
+# 配置模型
+# ==============================================================================
+
+class RetryPolicy(BaseModel):
+    """单个工具的重试策略"""
+    max_attempts: int = Field(default=3, ge=1)        # 含首次请求
+    base_delay_ms: float = Field(default=100, ge=0)
+    max_delay_ms: float = Field(default=5000, ge=0)
+    multiplier: float = Field(default=2.0, ge=1)
+    jitter: Literal["full", "equal", "none"] = "full"
+
+
+class RetryBudgetConfig(BaseModel):
+    """全局重试预算"""
+    ratio: float = Field(default=0.1, ge=0)               # 重试流量占首次请求流量的比例上限
+    min_retries_per_second: float = Field(default=1.0, ge=0)  # 低流量时的保底重试速率
+    max_tokens: float = Field(default=100, gt=0)
+
+
+class RetryConfig(BaseModel):
+    """重试配置，对应 configs/default.yaml 的 retry 段"""
+    default: RetryPolicy = RetryPolicy()
+    tools: Dict[str, RetryPolicy] = {}
+    budget: RetryBudgetConfig = RetryBudgetConfig()
+
+    def for_tool(self, tool_name: str) -> RetryPolicy:
+        return self.tools.get(tool_name, self.default)
+
+    @classmethod
+    def from_yaml(cls, path: Union[str, Path]) -> "RetryConfig":
+        """从 YAML 文件读取 retry 段"""
+        import yaml
+
+        with open(path, "r", encoding="utf-8") as f:
+            data = yaml.safe_load(f) or {}
+        return cls(**(data.get("retry") or {}))
+
+
+# ==============================================================================
+# 重试预算
+# ==============================================================================
+
+class RetryBudget:
+    """
+    按流量比例补充的重试令牌桶
+    - record_request(): 每次首次请求存入 ratio 个令牌
+    - try_withdraw(): 每次重试前尝试取出 1 个令牌
+    - 另按 min_retries_per_second 随时间补充，保证低流量时仍可重试
+    """
+
+    def __init__(
+        self,
+        config: Optional[RetryBudgetConfig] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.config = config or RetryBudgetConfig()
+        self._clock = clock
+        self._tokens = min(self.config.max_tokens, self.config.min_retries_per_second)
+        self._updated = clock()
+
+    @property
+    def tokens(self) -> float:
+        self._refill()
+        return self._tokens
+
+    def _refill(self) -> None:
+        now = self._clock()
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(
+                self.config.max_tokens,
+                self._tokens + elapsed * self.config.min_retries_per_second,
+            )
+            self._updated = now
+
+    def record_request(self) -> None:
+        """首次请求存入预算"""
+        self._refill()
+        self._tokens = min(self.config.max_tokens, self._tokens + self.config.ratio)
+
+    def try_withdraw(self) -> bool:
+        """重试前取出 1 个令牌；预算不足返回 False"""
+        self._refill()
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+
+# ==============================================================================
+# 重试调度器
+# ==============================================================================
+
+class RetryScheduler:
+    """
+    非阻塞重试调度器
+    每次尝试作为独立任务运行，失败且可重试时仅注册一个定时器，到期后再创建下一次尝试的任务。
+    """
+
+    def __init__(
+        self,
+        config: Optional[RetryConfig] = None,
+        budget: Optional[RetryBudget] = None,
+        rng: Optional[random.Random] = None,
+    ):
+        self.config = config or RetryConfig()
+        self.budget = budget or RetryBudget(self.config.budget)
+        self._rng = rng or random.Random()
+        self.retries_scheduled = 0
+        self.budget_rejections = 0
+
+    def backoff_ms(self, policy: RetryPolicy, attempt: int) -> float:
+        """
+        计算第 attempt 次尝试失败后的退避时长
+
+        Args:
+            policy: 重试策略
+            attempt: 已完成的尝试次数（从 1 开始）
+        """
+        exponential = policy.base_delay_ms * policy.multiplier ** (attempt - 1)
+        ceiling = min(policy.max_delay_ms, exponential)
+        if policy.jitter == "full":
+            return self._rng.uniform(0, ceiling)
+        if policy.jitter == "equal":
+            return ceiling / 2 + self._rng.uniform(0, ceiling / 2)
+        return ceiling
+
+    @staticmethod
+    def is_retryable(result: ToolExecutionResult) -> bool:
+        """结果是否声明可重试"""
+        error = result.error
+        if result.success or error is None or not error.retryable:
+            return False
+        return error.suggested_action in (None, "RETRY")
+
+    async def call(self, tool_name: str, attempt: AttemptFactory) -> ToolExecutionResult:
+        """
+        执行带重试的调用
+
+        Args:
+            tool_name: 工具名，用于选择重试策略
+            attempt: 每次调用返回一次新尝试的协程
+
+        Returns:
+            ToolExecutionResult: 最后一次尝试的结果；失败时 error.metadata 记录尝试次数
+        """
+        loop = asyncio.get_running_loop()
+        policy = self.config.for_tool(tool_name)
+        outcome: "asyncio.Future[ToolExecutionResult]" = loop.create_future()
+        pending: Dict[str, Union[asyncio.TimerHandle, "asyncio.Task[ToolExecutionResult]"]] = {}
+        self.budget.record_request()
+
+        def launch(number: int) -> None:
+            pending.pop("timer", None)
+            task = loop.create_task(attempt())
+            pending["task"] = task
+            task.add_done_callback(lambda t: finished(t, number))
+
+        def finished(task: "asyncio.Task[ToolExecutionResult]", number: int) -> None:
+            pending.pop("task", None)
+            if outcome.done():
+                return
+            if task.cancelled():
+                outcome.cancel()
+                return
+            error = task.exception()
+            if error is not None:
+                outcome.set_exception(error)
+                return
+
+            result = task.result()
+            if not self.is_retryable(result) or number >= policy.max_attempts:
+                outcome.set_result(self._annotate(result, number, budget_exhausted=False))
+                return
+            if not self.budget.try_withdraw():
+                self.budget_rejections += 1
+                outcome.set_result(self._annotate(result, number, budget_exhausted=True))
+                return
+
+            self.retries_scheduled += 1
+            delay = self.backoff_ms(policy, number) / 1000
+            pending["timer"] = loop.call_later(delay, launch, number + 1)
+
+        launch(1)
+        try:
+            return await outcome
+        finally:
+            for handle in pending.values():
+                handle.cancel()
+
+    @staticmethod
+    def _annotate(
+        result: ToolExecutionResult,
+        attempts: int,
+        budget_exhausted: bool,
+    ) -> ToolExecutionResult:
+        """在失败结果的错误元数据中记录重试信息"""
+        if result.success or result.error is None:
+            return result
+        metadata = {**result.error.metadata, "attempts": attempts}
+        if budget_exhausted:
+            metadata["retry_budget_exhausted"] = True
+        error = result.error.model_copy(update={"metadata": metadata})
+        return result.model_copy(update={"error": error})
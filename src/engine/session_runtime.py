@@ -0,0 +1,339 @@
+"""
+多会话运行时
+- 单个事件循环上复用成千上万个执行会话，每个会话持有独立的 GlobalState / ExecutionContext
+- 共享组件（ComponentRegistry）与引擎服务（EngineServices）按引用注入所有会话，不做任何复制
+- Agent 与工具调用分别经过 FairScheduler 的容量槽位，按会话权重做加权公平排队（SFQ）
+"""
+import asyncio
+import heapq
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar, Union
+
+from pydantic import BaseModel, Field
+
+from src.core.protocols import EngineResult, StructuredError
+from src.registry.component_registry import ComponentRegistry
+from .execution_engine import EngineConfig, EngineServices, ExecutionEngine, WorkKind
+
+
+T = TypeVar("T")
+
+
+# ==============================================================================
+# 加权公平调度
+# ==============================================================================
+
+class FairSchedulerConfig(BaseModel):
+    """公平调度配置，对应 configs/default.yaml 的 sessions 段"""
+    agent_slots: int = Field(default=64, ge=1)   # 同时运行的 Agent 调用上限
+    tool_slots: int = Field(default=256, ge=1)   # 同时运行的工具调用上限
+
+    @classmethod
+    def from_yaml(cls, path: Union[str, Path]) -> "FairSchedulerConfig":
+        """从 YAML 文件读取 sessions 段"""
+        import yaml
+
+        with open(path, "r", encoding="utf-8") as f:
+            data = yaml.safe_load(f) or {}
+        return cls(**(data.get("sessions") or {}))
+
+
+@dataclass(order=True)
+class _Waiter:
+    start_tag: float
+    seq: int
+    session_id: str = field(compare=False)
+    future: "asyncio.Future[None]" = field(compare=False)
+
+
+class _KindQueue:
+    """单一工作类型（agent / tool）的槽位与等待队列"""
+
+    def __init__(self, slots: int):
+        self.slots = slots
+        self.running = 0
+        self.virtual_time = 0.0
+        self.finish_tags: Dict[str, float] = {}
+        self.waiters: List[_Waiter] = []
+
+
+class FairScheduler:
+    """
+    开始时间公平排队（Start-time Fair Queuing）
+    - 每个会话的每次请求获得开始标签 S = max(V, 该会话上一次请求的结束标签)，
+      结束标签 F = S + 1 / weight
+    - 槽位空闲时总是放行开始标签最小的请求，虚拟时间 V 取最近放行请求的开始标签
+    - 权重高的会话标签增长更慢，在争用时按权重比例获得槽位；新会话从当前 V 开始，不会饿死老会话
+    """
+
+    def __init__(self, config: Optional[FairSchedulerConfig] = None):
+        self.config = config or FairSchedulerConfig()
+        self._queues: Dict[str, _KindQueue] = {
+            "agent": _KindQueue(self.config.agent_slots),
+            "tool": _KindQueue(self.config.tool_slots),
+        }
+        self._weights: Dict[str, float] = {}
+        self._seq = 0
+        self.granted: Dict[str, int] = {}
+
+    def register(self, session_id: str, weight: float = 1.0) -> None:
+        """登记会话权重"""
+        if weight <= 0:
+            raise ValueError("Session weight must be positive")
+        self._weights[session_id] = weight
+
+    def unregister(self, session_id: str) -> None:
+        """会话结束后释放调度状态"""
+        self._weights.pop(session_id, None)
+        self.granted.pop(session_id, None)
+        for queue in self._queues.values():
+            queue.finish_tags.pop(session_id, None)
+
+    async def run(self, session_id: str, kind: WorkKind, work: Callable[[], Awaitable[T]]) -> T:
+        """
+        在公平调度下执行一次工作
+
+        Args:
+            session_id: 所属会话
+            kind: 工作类型
+            work: 获得槽位后执行的协程工厂
+        """
+        queue = self._queues[kind]
+        await self._acquire(queue, session_id)
+        try:
+            return await work()
+        finally:
+            queue.running -= 1
+            self._dispatch(queue)
+
+    async def _acquire(self, queue: _KindQueue, session_id: str) -> None:
+        weight = self._weights.get(session_id, 1.0)
+        start_tag = max(queue.virtual_time, queue.finish_tags.get(session_id, 0.0))
+        queue.finish_tags[session_id] = start_tag + 1.0 / weight
+
+        if queue.running < queue.slots and not queue.waiters:
+            self._grant(queue, session_id, start_tag)
+            return
+
+        self._seq += 1
+        future: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        heapq.heappush(queue.waiters, _Waiter(start_tag, self._seq, session_id, future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # 已被放行但调用方取消：归还槽位
+                queue.running -= 1
+                self._dispatch(queue)
+            raise
+
+    def _grant(self, queue: _KindQueue, session_id: str, start_tag: float) -> None:
+        queue.running += 1
+        queue.virtual_time = max(queue.virtual_time, start_tag)
+        self.granted[session_id] = self.granted.get(session_id, 0) + 1
+
+    def _dispatch(self, queue: _KindQueue) -> None:
+        """放行开始标签最小的等待者"""
+        while queue.waiters and queue.running < queue.slots:
+            waiter = heapq.heappop(queue.waiters)
+            if waiter.future.done():
+                continue
+            self._grant(queue, waiter.session_id, waiter.start_tag)
+            waiter.future.set_result(None)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """各工作类型的运行中与等待数"""
+        return {
+            kind: {"running": queue.running, "waiting": len(queue.waiters)}
+            for kind, queue in self._queues.items()
+        }
+
+
+class _SessionGate:
+    """绑定到单个会话的 WorkGate"""
+
+    __slots__ = ("_scheduler", "_session_id")
+
+    def __init__(self, scheduler: FairScheduler, session_id: str):
+        self._scheduler = scheduler
+        self._session_id = session_id
+
+    async def run(self, kind: WorkKind, work: Callable[[], Awaitable[T]]) -> T:
+        return await self._scheduler.run(self._session_id, kind, work)
+
+
+# ==============================================================================
+# 会话运行时
+# ==============================================================================
+
+@dataclass
+class SessionStats:
+    """运行时统计"""
+    active: int
+    completed: int
+    failed: int
+    sessions_per_second: float
+
+
+class SessionRuntime:
+    """
+    多会话运行时
+    每个会话是一个轻量 ExecutionEngine（只持有自己的 GlobalState / ExecutionContext），
+    所有会话共享同一个 ComponentRegistry 与 EngineServices。
+    """
+
+    def __init__(
+        self,
+        components: ComponentRegistry,
+        config: Optional[EngineConfig] = None,
+        services: Optional[EngineServices] = None,
+        scheduler: Optional[FairScheduler] = None,
+    ):
+        """
+        Args:
+            components: 所有会话共享的组件
+            config: 引擎配置
+            services: 共享引擎服务，默认按 config 创建
+            scheduler: 公平调度器
+        """
+        self.components = components
+        self.config = config or EngineConfig()
+        self.services = services or EngineServices.create(self.config, components)
+        self.scheduler = scheduler or FairScheduler()
+        self._sessions: Dict[str, ExecutionEngine] = {}
+        self._completed = 0
+        self._failed = 0
+        self._started_at = time.perf_counter()
+
+    def create_session(self, session_id: Optional[str] = None, weight: float = 1.0) -> str:
+        """
+        创建会话
+
+        Args:
+            session_id: 会话 ID，默认自动生成
+            weight: 调度权重
+
+        Returns:
+            str: 会话 ID
+        """
+        session_id = session_id or uuid.uuid4().hex
+        if session_id in self._sessions:
+            raise ValueError(f"Session {session_id} already exists")
+        self.scheduler.register(session_id, weight)
+        self._sessions[session_id] = ExecutionEngine(
+            components=self.components,
+            services=self.services,
+            config=self.config,
+            gate=_SessionGate(self.scheduler, session_id),
+        )
+        return session_id
+
+    def get_session(self, session_id: str) -> ExecutionEngine:
+        """获取会话对应的引擎"""
+        return self._sessions[session_id]
+
+    async def submit(
+        self,
+        user_input: str,
+        session_id: Optional[str] = None,
+        weight: float = 1.0,
+    ) -> Tuple[str, EngineResult]:
+        """
+        创建会话并执行到终端状态或等待人工介入
+        终端状态的会话执行完成后立即释放；等待人工的会话保留，可通过 get_session 继续
+
+        Returns:
+            Tuple[str, EngineResult]: 会话 ID 与执行结果
+        """
+        session_id = self.create_session(session_id, weight)
+        result = await self._drive(session_id, lambda engine: engine.start(user_input))
+        return session_id, result
+
+    async def resume(self, execution_id: str, weight: float = 1.0) -> EngineResult:
+        """
+        从执行日志恢复一个未结束的执行，会话 ID 与 execution_id 相同
+
+        Returns:
+            EngineResult: 恢复后的执行结果
+        """
+        session_id = self.create_session(execution_id, weight)
+        return await self._drive(session_id, lambda engine: engine.resume(execution_id))
+
+    async def _drive(
+        self,
+        session_id: str,
+        run: Callable[[ExecutionEngine], Awaitable[EngineResult]],
+    ) -> EngineResult:
+        """
+        执行会话：异常封装为失败结果；除等待人工外，会话结束后（含异常与取消）总是释放
+        """
+        engine = self._sessions[session_id]
+        result: Optional[EngineResult] = None
+        keep = False
+        try:
+            result = await run(engine)
+            keep = engine.is_waiting_human
+        except Exception as e:
+            result = EngineResult(
+                success=False,
+                final_output=None,
+                trace_id=engine.trace_id,
+                errors=[StructuredError(
+                    code="SESSION_EXCEPTION",
+                    message=f"Session {session_id} raised {type(e).__name__}: {e}",
+                    severity="CRITICAL",
+                    suggested_action="HALT",
+                )],
+            )
+        finally:
+            if not keep:
+                self.close(session_id, result is not None and result.success)
+        return result
+
+    async def resume_all(self) -> Dict[str, EngineResult]:
+        """
+        进程重启后恢复执行日志中所有未结束的执行
+        只扫描在途执行，恢复耗时与历史执行总量无关
+        """
+        journal = self.components.journal
+        if journal is None:
+            return {}
+        execution_ids = [e for e in await journal.in_flight() if e not in self._sessions]
+        results = await asyncio.gather(*(self.resume(e) for e in execution_ids))
+        return dict(zip(execution_ids, results))
+
+    async def run_many(
+        self,
+        inputs: List[str],
+        weights: Optional[List[float]] = None,
+    ) -> List[EngineResult]:
+        """并发执行多个会话，结果与输入顺序一致"""
+        weights = weights or [1.0] * len(inputs)
+        outcomes = await asyncio.gather(*(
+            self.submit(user_input, weight=weight) for user_input, weight in zip(inputs, weights)
+        ))
+        return [result for _, result in outcomes]
+
+    def close(self, session_id: str, success: bool = False) -> None:
+        """释放会话"""
+        if self._sessions.pop(session_id, None) is None:
+            return
+        self.scheduler.unregister(session_id)
+        if success:
+            self._completed += 1
+        else:
+            self._failed += 1
+
+    def stats(self) -> SessionStats:
+        """运行时统计"""
+        elapsed = time.perf_counter() - self._started_at
+        finished = self._completed + self._failed
+        return SessionStats(
+            active=len(self._sessions),
+            completed=self._completed,
+            failed=self._failed,
+            sessions_per_second=finished / elapsed if elapsed > 0 else 0.0,
+        )
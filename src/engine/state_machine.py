@@ -0,0 +1,390 @@
+"""
+状态机规则定义
+来源：《多智能体协作系统需求思路详述.md》状态转移规则模型
+
+Current State + Trigger Event + Guard Condition → Next State
+
+转移表在构造时一次性编译：
+- 按 (state, trigger) 建立索引，一次 dict 查找即可定位候选转移
+- 同一索引下的 Guard 按优先级降序预排序，依次求值，首个命中即返回
+- 构造阶段执行校验，拒绝不可达状态、冲突转移与终端状态出边
+"""
+from dataclasses import dataclass
+from enum import Enum
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from src.core.models import ExecutionContext, GlobalState
+from src.core.protocols import AgentOutput, ToolExecutionResult
+from src.core.types import LifecycleState, StepStatus
+
+
+# ==============================================================================
+# 触发事件
+# ==============================================================================
+
+class TriggerEvent(str, Enum):
+    """状态转移触发事件"""
+    START = "START"                          # 引擎启动
+    CONTEXT_READY = "CONTEXT_READY"          # 上下文构建完成
+    PLAN_READY = "PLAN_READY"                # 计划生成完成
+    PLAN_REVIEWED = "PLAN_REVIEWED"          # 计划评审完成
+    EXECUTION_READY = "EXECUTION_READY"      # 执行准备完成
+    BATCH_COMPLETED = "BATCH_COMPLETED"      # 执行批次结束
+    STEP_REVIEWED = "STEP_REVIEWED"          # 步骤评审完成
+    GLOBAL_REVIEWED = "GLOBAL_REVIEWED"      # 全局评审完成
+    REPLAN_READY = "REPLAN_READY"            # 重规划准备完成
+    ROLLBACK_DONE = "ROLLBACK_DONE"          # 回滚完成
+    HUMAN_FEEDBACK = "HUMAN_FEEDBACK"        # 人工反馈（继续执行）
+    HUMAN_REJECTED = "HUMAN_REJECTED"        # 人工否决
+    FATAL_ERROR = "FATAL_ERROR"              # 不可恢复错误
+
+
+# ==============================================================================
+# Guard 条件与转移定义
+# ==============================================================================
+
+@dataclass(slots=True)
+class GuardContext:
+    """Guard 求值上下文（只读视图，Guard 不得修改其中任何对象）"""
+    global_state: GlobalState
+    execution_context: ExecutionContext
+    agent_output: Optional[AgentOutput] = None
+    tool_result: Optional[ToolExecutionResult] = None
+
+
+Guard = Callable[[GuardContext], bool]
+
+
+@dataclass(frozen=True)
+class Transition:
+    """单条转移规则：source + trigger + guard → target"""
+    source: LifecycleState
+    trigger: TriggerEvent
+    target: LifecycleState
+    guard: Optional[Guard] = None   # None 表示无条件
+    priority: int = 0               # 数值越大越先求值
+    name: str = ""
+
+
+class StateMachineValidationError(ValueError):
+    """转移表校验失败"""
+
+    def __init__(self, errors: List[str]):
+        self.errors = errors
+        super().__init__("Invalid state machine: " + "; ".join(errors))
+
+
+_CompiledEntry = Tuple[Tuple[Optional[Guard], LifecycleState], ...]
+
+
+# ==============================================================================
+# 状态机
+# ==============================================================================
+
+class StateMachine:
+    """
+    预编译、表驱动的状态机
+    - resolve() 的开销为一次 dict 查找加上候选 Guard 调用
+    - 状态机本身无状态，可在多个执行会话间共享
+    """
+
+    def __init__(
+        self,
+        transitions: Iterable[Transition],
+        initial_state: LifecycleState = LifecycleState.INIT,
+        terminal_states: Iterable[LifecycleState] = (
+            LifecycleState.COMPLETED,
+            LifecycleState.FAILED,
+        ),
+    ):
+        """
+        编译并校验转移表
+
+        Args:
+            transitions: 转移规则列表
+            initial_state: 初始状态，可达性校验的起点
+            terminal_states: 终端状态，不允许存在出边
+
+        Raises:
+            StateMachineValidationError: 存在不可达状态或冲突转移
+        """
+        self._transitions: Tuple[Transition, ...] = tuple(transitions)
+        self._initial_state = initial_state
+        self._terminal_states: FrozenSet[LifecycleState] = frozenset(terminal_states)
+
+        errors = self._validate()
+        if errors:
+            raise StateMachineValidationError(errors)
+
+        self._table: Dict[Tuple[LifecycleState, TriggerEvent], _CompiledEntry] = self._compile()
+        self._edges: FrozenSet[Tuple[LifecycleState, LifecycleState]] = frozenset(
+            (t.source, t.target) for t in self._transitions
+        )
+        self._triggers: Dict[LifecycleState, FrozenSet[TriggerEvent]] = {}
+        for source, trigger in self._table:
+            self._triggers[source] = self._triggers.get(source, frozenset()) | {trigger}
+
+    @property
+    def initial_state(self) -> LifecycleState:
+        """初始状态"""
+        return self._initial_state
+
+    @property
+    def transitions(self) -> Tuple[Transition, ...]:
+        """原始转移规则（只读）"""
+        return self._transitions
+
+    def resolve(
+        self,
+        state: LifecycleState,
+        trigger: TriggerEvent,
+        context: GuardContext,
+    ) -> Optional[LifecycleState]:
+        """
+        计算下一个状态
+
+        Args:
+            state: 当前状态
+            trigger: 触发事件
+            context: Guard 求值上下文
+
+        Returns:
+            Optional[LifecycleState]: 下一个状态；无匹配转移时返回 None
+        """
+        entry = self._table.get((state, trigger))
+        if entry is None:
+            return None
+        for guard, target in entry:
+            if guard is None or guard(context):
+                return target
+        return None
+
+    def can_transition(self, source: LifecycleState, target: LifecycleState) -> bool:
+        """转移表中是否存在 source → target 的边（忽略 Guard）"""
+        return (source, target) in self._edges
+
+    def is_terminal(self, state: LifecycleState) -> bool:
+        """是否为终端状态"""
+        return state in self._terminal_states
+
+    def triggers_for(self, state: LifecycleState) -> FrozenSet[TriggerEvent]:
+        """指定状态下可响应的触发事件"""
+        return self._triggers.get(state, frozenset())
+
+    def _compile(self) -> Dict[Tuple[LifecycleState, TriggerEvent], _CompiledEntry]:
+        """按 (state, trigger) 分组，并将 Guard 按优先级降序固化为元组"""
+        grouped: Dict[Tuple[LifecycleState, TriggerEvent], List[Transition]] = {}
+        for transition in self._transitions:
+            grouped.setdefault((transition.source, transition.trigger), []).append(transition)
+
+        table: Dict[Tuple[LifecycleState, TriggerEvent], _CompiledEntry] = {}
+        for key, candidates in grouped.items():
+            ordered = sorted(candidates, key=lambda t: -t.priority)
+            table[key] = tuple((t.guard, t.target) for t in ordered)
+        return table
+
+    def _validate(self) -> List[str]:
+        """校验转移表，返回错误描述列表"""
+        errors: List[str] = []
+        grouped: Dict[Tuple[LifecycleState, TriggerEvent], List[Transition]] = {}
+        outgoing: Dict[LifecycleState, Set[LifecycleState]] = {}
+
+        for transition in self._transitions:
+            if transition.source in self._terminal_states:
+                errors.append(
+                    f"terminal state {transition.source.value} has outgoing transition "
+                    f"on {transition.trigger.value}"
+                )
+            grouped.setdefault((transition.source, transition.trigger), []).append(transition)
+            outgoing.setdefault(transition.source, set()).add(transition.target)
+
+        # 冲突检测：同优先级歧义、无条件转移遮蔽低优先级转移
+        for (source, trigger), candidates in grouped.items():
+            seen_priorities: Dict[int, Transition] = {}
+            for candidate in candidates:
+                previous = seen_priorities.get(candidate.priority)
+                if previous is not None:
+                    errors.append(
+                        f"conflicting transitions {source.value} --{trigger.value}--> "
+                        f"{previous.target.value} / {candidate.target.value} "
+                        f"share priority {candidate.priority}"
+                    )
+                seen_priorities[candidate.priority] = candidate
+
+            unguarded = [c for c in candidates if c.guard is None]
+            if unguarded:
+                top = max(c.priority for c in unguarded)
+                shadowed = [c for c in candidates if c.priority < top]
+                for candidate in shadowed:
+                    errors.append(
+                        f"transition {source.value} --{trigger.value}--> "
+                        f"{candidate.target.value} is shadowed by an unguarded transition"
+                    )
+
+        # 可达性检测：从初始状态出发忽略 Guard 做 BFS
+        reachable: Set[LifecycleState] = {self._initial_state}
+        frontier = [self._initial_state]
+        while frontier:
+            state = frontier.pop()
+            for target in outgoing.get(state, ()):
+                if target not in reachable:
+                    reachable.add(target)
+                    frontier.append(target)
+
+        referenced: Set[LifecycleState] = set(outgoing)
+        for transition in self._transitions:
+            referenced.add(transition.target)
+        for state in sorted(referenced - reachable, key=lambda s: s.value):
+            errors.append(f"state {state.value} is unreachable from {self._initial_state.value}")
+
+        # 死胡同检测：非终端状态必须有出边
+        for state in sorted(referenced - self._terminal_states, key=lambda s: s.value):
+            if state not in outgoing:
+                errors.append(f"non-terminal state {state.value} has no outgoing transition")
+
+        return errors
+
+
+# ==============================================================================
+# 常用 Guard 工厂（构造时绑定参数，返回闭包）
+# ==============================================================================
+
+def agent_approved(confidence_threshold: float) -> Guard:
+    """Agent 输出成功、置信度达标且无 CRITICAL 错误"""
+
+    def guard(context: GuardContext) -> bool:
+        output = context.agent_output
+        if output is None or not output.success:
+            return False
+        if output.confidence < confidence_threshold:
+            return False
+        for error in output.errors:
+            if error.severity == "CRITICAL":
+                return False
+        return True
+
+    return guard
+
+
+def has_critical_error(context: GuardContext) -> bool:
+    """Agent 输出或工具结果中包含需要回滚的严重错误"""
+    output = context.agent_output
+    if output is not None:
+        for error in output.errors:
+            if error.severity == "CRITICAL" or error.suggested_action == "ROLLBACK":
+                return True
+    result = context.tool_result
+    if result is not None and result.error is not None:
+        return result.error.severity == "CRITICAL" or result.error.suggested_action == "ROLLBACK"
+    return False
+
+
+_UNFINISHED_STATUSES = frozenset({StepStatus.PENDING, StepStatus.RUNNING})
+
+
+def has_pending_steps(context: GuardContext) -> bool:
+    """当前计划仍有未完成的步骤"""
+    unfinished = _UNFINISHED_STATUSES
+    for status in context.execution_context.active_steps.values():
+        if status in unfinished:
+            return True
+    return False
+
+
+def iteration_limit_reached(max_iterations: int) -> Guard:
+    """迭代次数达到上限"""
+
+    def guard(context: GuardContext) -> bool:
+        return context.global_state.iteration_count >= max_iterations
+
+    return guard
+
+
+def all_of(*guards: Guard) -> Guard:
+    """组合多个 Guard（逻辑与），短路求值"""
+    compiled = tuple(guards)
+
+    def guard(context: GuardContext) -> bool:
+        for item in compiled:
+            if not item(context):
+                return False
+        return True
+
+    return guard
+
+
+# ==============================================================================
+# 默认转移表（对应《流程图.md》）
+# ==============================================================================
+
+def default_transitions(
+    confidence_threshold: float = 0.7,
+    max_iterations: int = 3,
+) -> List[Transition]:
+    """
+    构建默认转移规则
+
+    Args:
+        confidence_threshold: 评审通过所需的最低置信度
+        max_iterations: 最大重规划次数
+
+    Returns:
+        List[Transition]: 转移规则列表
+    """
+    S = LifecycleState
+    T = TriggerEvent
+    approved = agent_approved(confidence_threshold)
+
+    transitions = [
+        Transition(S.INIT, T.START, S.CONTEXT_BUILD),
+        Transition(S.CONTEXT_BUILD, T.CONTEXT_READY, S.PLAN_GENERATION),
+        Transition(S.PLAN_GENERATION, T.PLAN_READY, S.PLAN_CHECK),
+
+        Transition(
+            S.PLAN_CHECK, T.PLAN_REVIEWED, S.EXECUTION_PREPARE, approved, 10, "plan_approved",
+        ),
+        Transition(S.PLAN_CHECK, T.PLAN_REVIEWED, S.REPLAN, None, 0, "plan_rejected"),
+
+        Transition(S.EXECUTION_PREPARE, T.EXECUTION_READY, S.STEP_EXECUTION),
+        Transition(S.STEP_EXECUTION, T.BATCH_COMPLETED, S.STEP_REVIEW),
+
+        Transition(
+            S.STEP_REVIEW, T.STEP_REVIEWED, S.ROLLBACK, has_critical_error, 30, "critical_error",
+        ),
+        Transition(
+            S.STEP_REVIEW, T.STEP_REVIEWED, S.STEP_EXECUTION,
+            all_of(approved, has_pending_steps), 20, "next_batch",
+        ),
+        Transition(S.STEP_REVIEW, T.STEP_REVIEWED, S.GLOBAL_REVIEW, approved, 10, "steps_done"),
+        Transition(S.STEP_REVIEW, T.STEP_REVIEWED, S.REPLAN, None, 0, "minor_issue"),
+
+        Transition(S.ROLLBACK, T.ROLLBACK_DONE, S.REPLAN),
+        Transition(
+            S.REPLAN, T.REPLAN_READY, S.FAILED,
+            iteration_limit_reached(max_iterations), 10, "iteration_exhausted",
+        ),
+        Transition(S.REPLAN, T.REPLAN_READY, S.PLAN_GENERATION, None, 0, "replan"),
+
+        Transition(
+            S.GLOBAL_REVIEW, T.GLOBAL_REVIEWED, S.COMPLETED, approved, 10, "global_approved",
+        ),
+        Transition(S.GLOBAL_REVIEW, T.GLOBAL_REVIEWED, S.WAIT_HUMAN, None, 0, "need_human"),
+
+        Transition(S.WAIT_HUMAN, T.HUMAN_FEEDBACK, S.STEP_EXECUTION),
+        Transition(S.WAIT_HUMAN, T.HUMAN_REJECTED, S.FAILED),
+    ]
+
+    # 任意非终端状态遇到不可恢复错误直接进入 FAILED
+    for state in S:
+        if state not in (S.COMPLETED, S.FAILED):
+            transitions.append(Transition(state, T.FATAL_ERROR, S.FAILED, name="fatal"))
+
+    return transitions
+
+
+def build_default_state_machine(
+    confidence_threshold: float = 0.7,
+    max_iterations: int = 3,
+) -> StateMachine:
+    """构建并编译默认状态机"""
+    return StateMachine(default_transitions(confidence_threshold, max_iterations))
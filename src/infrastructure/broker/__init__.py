@@ -0,0 +1,8 @@
+from .base_broker import BaseBroker, StepTask
+from .sqlite_broker import SqliteBroker
+
+__all__ = [
+    "BaseBroker",
+    "StepTask",
+    "SqliteBroker"
+]
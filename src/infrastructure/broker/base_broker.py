@@ -0,0 +1,106 @@
+"""
+步骤任务代理抽象基类
+引擎发布就绪的 PlanStep，工作进程租用、执行并回传 ToolExecutionResult：
+- 至少一次投递：租约到期未完成的任务会重新投递给其他工作进程
+- 租约与心跳：执行期间工作进程定期续租，续租失败说明任务已被重新投递
+"""
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Sequence
+
+from pydantic import BaseModel
+
+from src.core.models import PlanStep
+from src.core.protocols import ToolExecutionResult
+
+
+class StepTask(BaseModel):
+    """发布到代理的步骤任务"""
+    task_id: str
+    step: PlanStep
+    tool_input: Dict[str, Any]       # 引擎侧 StepExecutor 生成的工具输入
+    trace_id: str = ""
+    delivery: int = 0                # 第几次投递（租用时填写）
+
+
+class BaseBroker(ABC):
+    """
+    步骤任务代理抽象基类，定义了代理的基本操作接口
+    """
+
+    @abstractmethod
+    async def publish(self, task: StepTask) -> None:
+        """
+        发布任务
+
+        Args:
+            task: 步骤任务
+        """
+        pass
+
+    @abstractmethod
+    async def lease(
+        self,
+        worker_id: str,
+        tool_names: Sequence[str],
+        lease_seconds: float,
+    ) -> Optional[StepTask]:
+        """
+        租用一个可执行的任务（待执行或租约已过期）
+
+        Args:
+            worker_id: 工作进程 ID
+            tool_names: 工作进程已注册的工具
+            lease_seconds: 租约时长
+
+        Returns:
+            Optional[StepTask]: 任务，无可执行任务时返回 None
+        """
+        pass
+
+    @abstractmethod
+    async def heartbeat(self, task_id: str, worker_id: str, lease_seconds: float) -> bool:
+        """
+        续租
+
+        Returns:
+            bool: 租约仍归该工作进程所有时返回 True
+        """
+        pass
+
+    @abstractmethod
+    async def complete(
+        self,
+        task_id: str,
+        worker_id: str,
+        result: ToolExecutionResult,
+    ) -> bool:
+        """
+        提交任务结果
+
+        Returns:
+            bool: 租约仍归该工作进程所有且结果已记录时返回 True
+        """
+        pass
+
+    @abstractmethod
+    async def results(self, task_ids: Sequence[str]) -> Dict[str, ToolExecutionResult]:
+        """
+        查询已完成任务的结果
+
+        Args:
+            task_ids: 待查询的任务 ID
+
+        Returns:
+            Dict[str, ToolExecutionResult]: 已完成任务 → 结果
+        """
+        pass
+
+    @abstractmethod
+    async def remove(self, task_ids: Sequence[str]) -> None:
+        """删除任务（结果已取回或发布方放弃等待）"""
+        pass
+
+    @abstractmethod
+    async def stats(self) -> Dict[str, int]:
+        """各状态的任务数"""
+        pass
@@ -0,0 +1,225 @@
+"""
+SQLite 步骤任务代理
+任务表保存在单个 SQLite 文件中（WAL 模式），同一主机或共享该文件的多个进程可同时作为发布方与工作进程，
+无需任何外部服务。租用在 BEGIN IMMEDIATE 事务中完成，同一任务同一时刻只归一个工作进程所有。
+所有数据库操作在线程池中执行，不阻塞事件循环。
+"""
+import asyncio
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from src.core.protocols import StructuredError, ToolExecutionResult
+from .base_broker import BaseBroker, StepTask
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id TEXT PRIMARY KEY,
+    tool_name TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL,
+    worker_id TEXT,
+    lease_expires REAL,
+    deliveries INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_state ON tasks (state, created_at);
+"""
+
+# 单条 SQL 中 IN (...) 的参数个数上限
+_CHUNK = 500
+
+
+class SqliteBroker(BaseBroker):
+    """
+    SQLite 步骤任务代理
+    任务状态：PENDING（待执行）→ LEASED（已租用）→ DONE（已有结果）；
+    租约过期的 LEASED 任务可被重新租用，投递次数达到上限后以 STEP_DELIVERY_EXHAUSTED 结束
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_deliveries: int = 3,
+        busy_timeout_seconds: float = 30.0,
+    ):
+        """
+        初始化代理
+
+        Args:
+            path: 数据库文件路径，默认为 ./data/broker.sqlite3
+            max_deliveries: 单个任务的最大投递次数
+            busy_timeout_seconds: 等待其他进程释放写锁的时长
+        """
+        self.path = Path(path or "./data/broker.sqlite3")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_deliveries = max_deliveries
+        self.busy_timeout_seconds = busy_timeout_seconds
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """每次操作使用独立连接（自动提交模式），调用可安全地分布到线程池的任意线程"""
+        conn = sqlite3.connect(
+            self.path, timeout=self.busy_timeout_seconds, isolation_level=None
+        )
+        try:
+            conn.execute("PRAGMA synchronous=NORMAL")
+            yield conn
+        finally:
+            conn.close()
+
+    # ------------------------------------------------------------------
+    # 发布方
+    # ------------------------------------------------------------------
+
+    async def publish(self, task: StepTask) -> None:
+        await asyncio.to_thread(self._publish, task)
+
+    def _publish(self, task: StepTask) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO tasks (task_id, tool_name, payload, state, created_at) "
+                "VALUES (?, ?, ?, 'PENDING', ?)",
+                (task.task_id, task.step.tool_name, task.model_dump_json(), time.time()),
+            )
+
+    async def results(self, task_ids: Sequence[str]) -> Dict[str, ToolExecutionResult]:
+        return await asyncio.to_thread(self._results, list(task_ids))
+
+    def _results(self, task_ids: List[str]) -> Dict[str, ToolExecutionResult]:
+        found: Dict[str, ToolExecutionResult] = {}
+        with self._connect() as conn:
+            for start in range(0, len(task_ids), _CHUNK):
+                chunk = task_ids[start:start + _CHUNK]
+                rows = conn.execute(
+                    f"SELECT task_id, result FROM tasks WHERE state = 'DONE' "
+                    f"AND task_id IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+                for task_id, result in rows:
+                    found[task_id] = ToolExecutionResult.model_validate_json(result)
+        return found
+
+    async def remove(self, task_ids: Sequence[str]) -> None:
+        await asyncio.to_thread(self._remove, list(task_ids))
+
+    def _remove(self, task_ids: List[str]) -> None:
+        with self._connect() as conn:
+            for start in range(0, len(task_ids), _CHUNK):
+                chunk = task_ids[start:start + _CHUNK]
+                conn.execute(
+                    f"DELETE FROM tasks WHERE task_id IN ({','.join('?' * len(chunk))})", chunk
+                )
+
+    # ------------------------------------------------------------------
+    # 工作进程
+    # ------------------------------------------------------------------
+
+    async def lease(
+        self,
+        worker_id: str,
+        tool_names: Sequence[str],
+        lease_seconds: float,
+    ) -> Optional[StepTask]:
+        if not tool_names:
+            return None
+        return await asyncio.to_thread(self._lease, worker_id, list(tool_names), lease_seconds)
+
+    def _lease(
+        self,
+        worker_id: str,
+        tool_names: List[str],
+        lease_seconds: float,
+    ) -> Optional[StepTask]:
+        placeholders = ",".join("?" * len(tool_names))
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                while True:
+                    now = time.time()
+                    row = conn.execute(
+                        f"SELECT task_id, payload, deliveries FROM tasks "
+                        f"WHERE (state = 'PENDING' OR (state = 'LEASED' AND lease_expires < ?)) "
+                        f"AND tool_name IN ({placeholders}) ORDER BY created_at LIMIT 1",
+                        [now, *tool_names],
+                    ).fetchone()
+                    if row is None:
+                        conn.execute("COMMIT")
+                        return None
+                    task_id, payload, deliveries = row
+                    if deliveries >= self.max_deliveries:
+                        # 每次投递都未能完成（工作进程崩溃或失联），不再重试
+                        conn.execute(
+                            "UPDATE tasks SET state = 'DONE', result = ? WHERE task_id = ?",
+                            (self._exhausted(task_id, deliveries).model_dump_json(), task_id),
+                        )
+                        continue
+                    conn.execute(
+                        "UPDATE tasks SET state = 'LEASED', worker_id = ?, lease_expires = ?, "
+                        "deliveries = deliveries + 1 WHERE task_id = ?",
+                        (worker_id, now + lease_seconds, task_id),
+                    )
+                    conn.execute("COMMIT")
+                    task = StepTask.model_validate_json(payload)
+                    return task.model_copy(update={"delivery": deliveries + 1})
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _exhausted(self, task_id: str, deliveries: int) -> ToolExecutionResult:
+        return ToolExecutionResult(
+            success=False,
+            error=StructuredError(
+                code="STEP_DELIVERY_EXHAUSTED",
+                message=f"Task {task_id} was not completed after {deliveries} deliveries",
+                severity="CRITICAL",
+                suggested_action="REPLAN",
+                metadata={"task_id": task_id, "deliveries": deliveries},
+            ),
+        )
+
+    async def heartbeat(self, task_id: str, worker_id: str, lease_seconds: float) -> bool:
+        return await asyncio.to_thread(self._heartbeat, task_id, worker_id, lease_seconds)
+
+    def _heartbeat(self, task_id: str, worker_id: str, lease_seconds: float) -> bool:
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET lease_expires = ? "
+                "WHERE task_id = ? AND worker_id = ? AND state = 'LEASED'",
+                (time.time() + lease_seconds, task_id, worker_id),
+            )
+            return cursor.rowcount == 1
+
+    async def complete(
+        self,
+        task_id: str,
+        worker_id: str,
+        result: ToolExecutionResult,
+    ) -> bool:
+        return await asyncio.to_thread(self._complete, task_id, worker_id, result)
+
+    def _complete(self, task_id: str, worker_id: str, result: ToolExecutionResult) -> bool:
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET state = 'DONE', result = ? "
+                "WHERE task_id = ? AND worker_id = ? AND state = 'LEASED'",
+                (result.model_dump_json(fallback=str), task_id, worker_id),
+            )
+            return cursor.rowcount == 1
+
+    async def stats(self) -> Dict[str, int]:
+        return await asyncio.to_thread(self._stats)
+
+    def _stats(self) -> Dict[str, int]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT state, COUNT(*) FROM tasks GROUP BY state").fetchall()
+        counts = {"PENDING": 0, "LEASED": 0, "DONE": 0}
+        counts.update({state: count for state, count in rows})
+        return counts
@@ -0,0 +1,8 @@
+from .base_journal import BaseJournal, JournalEntry
+from .jsonl_journal import JsonlJournal
+
+__all__ = [
+    "BaseJournal",
+    "JournalEntry",
+    "JsonlJournal"
+]
@@ -0,0 +1,81 @@
+"""
+执行日志抽象基类
+记录 GlobalState 转移与步骤完成情况，与快照一起用于进程崩溃后恢复执行
+"""
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from src.core.models import GlobalState
+
+
+class JournalEntry(BaseModel):
+    """
+    单个执行的恢复信息（日志折叠后的结果）
+    - state: 最近一次转移后的 GlobalState
+    - snapshot_id: 最近一次转移时关联的快照 ID
+    - snapshots: 快照标签 → 快照 ID
+    - completed_steps: 本轮执行（最近一次 reset_steps 之后）已完成的步骤 → 输出
+    - started_steps: 已开始但未记录完成的有副作用步骤
+    """
+    state: GlobalState
+    snapshot_id: Optional[str] = None
+    snapshots: Dict[str, str] = {}
+    completed_steps: Dict[str, Any] = {}
+    started_steps: List[str] = []
+
+
+class BaseJournal(ABC):
+    """
+    执行日志抽象基类，定义了日志的基本操作接口
+    """
+
+    @abstractmethod
+    async def record_transition(
+        self,
+        state: GlobalState,
+        snapshot_id: Optional[str],
+        snapshots: Dict[str, str],
+        reset_steps: bool = False,
+    ) -> None:
+        """
+        记录状态转移
+
+        Args:
+            state: 转移后的 GlobalState
+            snapshot_id: 当前关联的快照 ID
+            snapshots: 快照标签 → 快照 ID
+            reset_steps: 是否清空此前记录的步骤（开始新一轮执行时）
+        """
+        pass
+
+    @abstractmethod
+    async def record_step_started(self, execution_id: str, step_id: str) -> None:
+        """记录有副作用步骤开始执行"""
+        pass
+
+    @abstractmethod
+    async def record_step_completed(self, execution_id: str, step_id: str, output: Any) -> None:
+        """记录步骤成功完成及其输出"""
+        pass
+
+    @abstractmethod
+    async def finish(self, execution_id: str) -> None:
+        """执行进入终端状态，不再需要恢复"""
+        pass
+
+    @abstractmethod
+    async def load(self, execution_id: str) -> Optional[JournalEntry]:
+        """
+        读取执行的恢复信息
+
+        Returns:
+            Optional[JournalEntry]: 不存在或已结束时返回 None
+        """
+        pass
+
+    @abstractmethod
+    async def in_flight(self) -> List[str]:
+        """所有未结束执行的 execution_id"""
+        pass
@@ -0,0 +1,146 @@
+"""
+JSONL 执行日志实现
+每个未结束的执行对应 active/ 下的一个追加写文件，执行结束后移入 finished/，
+因此重启恢复只需扫描 active/，耗时取决于在途执行数量而非历史总量。
+文件读写在线程中执行，不阻塞所有会话共享的事件循环；同一执行的记录按调用顺序串行写入
+"""
+import asyncio
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from src.core.models import GlobalState
+from .base_journal import BaseJournal, JournalEntry
+
+
+class JsonlJournal(BaseJournal):
+    """
+    JSONL 执行日志，每行一条记录：
+    - {"type": "transition", "state": {...}, "snapshot_id": ..., "snapshots": {...}}
+    - {"type": "step_started", "step_id": ...}
+    - {"type": "step_completed", "step_id": ..., "output": ...}
+    """
+
+    def __init__(
+        self,
+        storage_path: Optional[str] = None,
+        fsync: bool = False,
+        keep_finished: bool = True,
+    ):
+        """
+        初始化执行日志
+
+        Args:
+            storage_path: 日志存储路径，默认为 ./journal/
+            fsync: 每条记录后是否 fsync（默认仅 flush，可抵御进程崩溃；开启后可抵御断电）
+            keep_finished: 结束的执行日志是否保留在 finished/ 下，False 时直接删除
+        """
+        self.storage_path = Path(storage_path or "./journal/")
+        self.active_path = self.storage_path / "active"
+        self.finished_path = self.storage_path / "finished"
+        self.active_path.mkdir(parents=True, exist_ok=True)
+        self.finished_path.mkdir(parents=True, exist_ok=True)
+        self.fsync = fsync
+        self.keep_finished = keep_finished
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def _file(self, execution_id: str) -> Path:
+        return self.active_path / f"{execution_id}.jsonl"
+
+    async def _append(self, execution_id: str, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        lock = self._locks.setdefault(execution_id, asyncio.Lock())
+        async with lock:
+            await asyncio.to_thread(self._write, self._file(execution_id), line)
+
+    def _write(self, path: Path, line: str) -> None:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+
+    async def record_transition(
+        self,
+        state: GlobalState,
+        snapshot_id: Optional[str],
+        snapshots: Dict[str, str],
+        reset_steps: bool = False,
+    ) -> None:
+        await self._append(str(state.execution_id), {
+            "type": "transition",
+            "state": state.model_dump(mode="json"),
+            "snapshot_id": snapshot_id,
+            "snapshots": snapshots,
+            "reset_steps": reset_steps,
+        })
+
+    async def record_step_started(self, execution_id: str, step_id: str) -> None:
+        await self._append(execution_id, {"type": "step_started", "step_id": step_id})
+
+    async def record_step_completed(self, execution_id: str, step_id: str, output: Any) -> None:
+        await self._append(execution_id, {
+            "type": "step_completed",
+            "step_id": step_id,
+            "output": output,
+        })
+
+    async def finish(self, execution_id: str) -> None:
+        lock = self._locks.setdefault(execution_id, asyncio.Lock())
+        async with lock:
+            await asyncio.to_thread(self._archive, self._file(execution_id))
+        self._locks.pop(execution_id, None)
+
+    def _archive(self, source: Path) -> None:
+        if not source.exists():
+            return
+        if self.keep_finished:
+            os.replace(source, self.finished_path / source.name)
+        else:
+            source.unlink()
+
+    async def load(self, execution_id: str) -> Optional[JournalEntry]:
+        source = self._file(execution_id)
+        if not source.exists():
+            return None
+        lines = await asyncio.to_thread(self._read_lines, source)
+
+        entry: Optional[JournalEntry] = None
+        started: Dict[str, None] = {}
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # 崩溃时最后一行可能只写了一半
+                break
+            kind = record.get("type")
+            if kind == "transition":
+                previous = entry
+                entry = JournalEntry(
+                    state=GlobalState.model_validate(record["state"]),
+                    snapshot_id=record.get("snapshot_id"),
+                    snapshots=record.get("snapshots") or {},
+                )
+                if previous is not None and not record.get("reset_steps"):
+                    entry.completed_steps = previous.completed_steps
+                else:
+                    started.clear()
+            elif entry is not None and kind == "step_started":
+                started[record["step_id"]] = None
+            elif entry is not None and kind == "step_completed":
+                entry.completed_steps[record["step_id"]] = record.get("output")
+                started.pop(record["step_id"], None)
+
+        if entry is not None:
+            entry.started_steps = list(started)
+        return entry
+
+    @staticmethod
+    def _read_lines(source: Path) -> List[str]:
+        with open(source, "r", encoding="utf-8") as f:
+            return f.readlines()
+
+    async def in_flight(self) -> List[str]:
+        paths = await asyncio.to_thread(lambda: list(self.active_path.glob("*.jsonl")))
+        return sorted(path.stem for path in paths)
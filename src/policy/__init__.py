@@ -0,0 +1,25 @@
+from .base_policy import DefaultPolicy, PolicyBase
+from .permission import PermissionConfig, PermissionMatrix, PermissionSystem, ToolPermission
+from .risk_control import (
+    Ewma, RiskAssessment, RiskConfig, RiskController, SlidingWindowCounter,
+)
+from .rules import CompiledRule, PolicyFacts, PolicyRuleError, RuleDecision, RuleEngine
+
+__all__ = [
+    "DefaultPolicy",
+    "PolicyBase",
+    "PermissionConfig",
+    "PermissionMatrix",
+    "PermissionSystem",
+    "ToolPermission",
+    "Ewma",
+    "RiskAssessment",
+    "RiskConfig",
+    "RiskController",
+    "SlidingWindowCounter",
+    "CompiledRule",
+    "PolicyFacts",
+    "PolicyRuleError",
+    "RuleDecision",
+    "RuleEngine",
+]
@@ -0,0 +1,199 @@
+"""
+策略基类与默认策略
+来源：《关键接口抽象框架.md》v2.0
+
+- PolicyBase：在 BasePolicy 的基础上接收触发事件与状态机计算出的候选状态，
+  ExecutionEngine 检测到该基类时改为调用 evaluate_event()，并通过 record_step() 上报步骤结果
+- DefaultPolicy：由 configs/policies.yaml 编译的规则引擎决定状态转移，
+  由 configs/permissions.yaml 编译的权限矩阵决定工具调用权限，
+  由风险控制器（configs/default.yaml 的 risk 段）在风险过高时要求人工介入
+"""
+from abc import abstractmethod
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+from src.core.interfaces import BasePolicy, BaseTool
+from src.core.models import ExecutionContext, GlobalState, PlanStep
+from src.core.protocols import AgentOutput, PolicyDecision, ToolExecutionResult
+from src.core.types import AgentRole, LifecycleState, RiskLevel
+from .permission import PermissionConfig, PermissionSystem
+from .risk_control import RiskConfig, RiskController
+from .rules import PolicyFacts, RuleEngine
+
+
+_ALLOW = PolicyDecision(allow=True)
+
+# 风险控制不拦截的候选状态与事件：避免人工介入本身或失败终止被再次拦截
+_UNGATED_STATES = frozenset({LifecycleState.WAIT_HUMAN, LifecycleState.FAILED})
+_HUMAN_FEEDBACK = "HUMAN_FEEDBACK"
+
+
+class PolicyBase(BasePolicy):
+    """带触发事件的策略基类"""
+
+    @abstractmethod
+    def evaluate_event(
+        self,
+        global_state: GlobalState,
+        execution_context: ExecutionContext,
+        event: Optional[str],
+        proposed: Optional[LifecycleState],
+        agent_output: Optional[AgentOutput] = None,
+        tool_result: Optional[ToolExecutionResult] = None,
+    ) -> PolicyDecision:
+        """
+        评估状态转移是否允许
+
+        Args:
+            global_state: 当前 GlobalState
+            execution_context: 当前 ExecutionContext
+            event: 触发事件（TriggerEvent 的值），未知时为 None
+            proposed: 状态机计算出的下一状态，未知时为 None
+            agent_output: 本步 Agent 输出
+            tool_result: 本步工具结果
+
+        Returns:
+            PolicyDecision: 策略决策
+        """
+        pass
+
+    def evaluate_transition(
+        self,
+        global_state: GlobalState,
+        execution_context: ExecutionContext,
+        agent_output: Optional[AgentOutput] = None,
+        tool_result: Optional[ToolExecutionResult] = None,
+    ) -> PolicyDecision:
+        """不带触发事件的评估：只有未限定事件的规则生效"""
+        return self.evaluate_event(
+            global_state, execution_context, None, None, agent_output, tool_result
+        )
+
+    def record_step(self, trace_id: str, step: PlanStep, result: ToolExecutionResult) -> None:
+        """
+        步骤执行完成时由 ExecutionEngine 调用，默认不做处理
+
+        Args:
+            trace_id: 执行追踪 ID
+            step: 已执行的步骤
+            result: 步骤结果
+        """
+
+
+class DefaultPolicy(PolicyBase):
+    """
+    默认策略
+    状态转移由规则引擎决定，没有规则命中时放行；工具调用权限由权限系统决定，未配置时全部放行；
+    规则放行的转移再由风险控制器评估，风险等级写入决策，达到阈值时拒绝并要求人工介入
+    """
+
+    def __init__(
+        self,
+        rules: Optional[RuleEngine] = None,
+        permissions: Optional[PermissionSystem] = None,
+        risk: Optional[RiskController] = None,
+    ):
+        """
+        Args:
+            rules: 编译后的规则引擎，默认不含任何规则
+            permissions: 权限系统
+            risk: 风险控制器
+        """
+        self.rules = rules if rules is not None else RuleEngine([])
+        self.permissions = permissions
+        self.risk = risk
+
+    @classmethod
+    def from_config(
+        cls,
+        config_dir: Union[str, Path],
+        tools: Iterable[BaseTool] = (),
+    ) -> "DefaultPolicy":
+        """
+        从配置目录读取 policies.yaml、permissions.yaml 与 default.yaml 的 risk 段
+
+        Args:
+            config_dir: 配置目录
+            tools: 已注册的工具，预先编入权限矩阵
+        """
+        risk_config = RiskConfig.from_yaml(Path(config_dir) / "default.yaml")
+        return cls(
+            RuleEngine.from_yaml(Path(config_dir) / "policies.yaml"),
+            PermissionSystem.from_config(config_dir, tools),
+            RiskController(risk_config) if risk_config.enabled else None,
+        )
+
+    def reload(
+        self,
+        rules: Optional[RuleEngine] = None,
+        permissions: Optional[PermissionConfig] = None,
+        risk: Optional[RiskConfig] = None,
+    ) -> None:
+        """
+        热更新：各部分分别整体替换引用，进行中的求值继续使用旧对象
+        风险控制器保留已累积的统计，只替换阈值配置
+
+        Args:
+            rules: 新规则引擎
+            permissions: 新权限配置
+            risk: 新风险控制配置，enabled 为 False 时关闭风险控制
+        """
+        if rules is not None:
+            self.rules = rules
+        if permissions is not None:
+            if self.permissions is None:
+                self.permissions = PermissionSystem(permissions)
+            else:
+                self.permissions.reload(permissions)
+        if risk is not None:
+            if not risk.enabled:
+                self.risk = None
+            elif self.risk is None:
+                self.risk = RiskController(risk)
+            else:
+                self.risk.config = risk
+
+    def evaluate_event(
+        self,
+        global_state: GlobalState,
+        execution_context: ExecutionContext,
+        event: Optional[str],
+        proposed: Optional[LifecycleState],
+        agent_output: Optional[AgentOutput] = None,
+        tool_result: Optional[ToolExecutionResult] = None,
+    ) -> PolicyDecision:
+        risk, trace_id = self.risk, global_state.trace_id
+        if risk is not None:
+            if event == _HUMAN_FEEDBACK:
+                risk.acknowledge(trace_id)
+            if agent_output is not None:
+                risk.record_confidence(trace_id, agent_output.confidence)
+
+        decision = self.rules.evaluate(PolicyFacts(
+            global_state, execution_context, agent_output, tool_result, event, proposed
+        ))
+        if decision is None:
+            decision = _ALLOW
+        if risk is None or not decision.allow or proposed in _UNGATED_STATES:
+            return decision
+
+        assessment = risk.assess(trace_id)
+        if assessment.level is RiskLevel.LOW:
+            return decision
+        if risk.requires_human(assessment.level):
+            return PolicyDecision(
+                allow=False,
+                reason="; ".join(assessment.reasons),
+                risk_level=assessment.level,
+                require_human_approval=True,
+            )
+        return decision.model_copy(update={"risk_level": assessment.level})
+
+    def record_step(self, trace_id: str, step: PlanStep, result: ToolExecutionResult) -> None:
+        if self.risk is not None:
+            self.risk.record_step(trace_id, step.tool_name, result.success)
+
+    def check_tool_permission(self, agent_role: AgentRole, tool: BaseTool) -> bool:
+        if self.permissions is None:
+            return True
+        return self.permissions.check(agent_role, tool)
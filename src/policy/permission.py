@@ -0,0 +1,209 @@
+"""
+权限系统
+来源：configs/permissions.yaml
+
+- 权限在加载时编译为稠密矩阵：每个 (工具, 权限等级) 一列，列内按 AgentRole 序号存放是否允许；
+  只含 deny 的覆盖项为每个权限等级各编译一列，检查时按工具实际声明的等级取列，
+  不依赖编译时是否提供了该工具；未编入矩阵的工具按其 PermissionLevel 查默认列。
+  每次检查为两次 dict 查找加一次元组下标
+- 配置变更时构建新矩阵并整体替换引用，读路径不加锁，始终看到完整的旧矩阵或新矩阵
+- 被拒绝的检查按 (角色, 工具) 计数，供 stats() 输出
+"""
+import os
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple, Union
+
+from pydantic import BaseModel
+
+from src.core.interfaces import BaseTool
+from src.core.types import AgentRole, PermissionLevel
+
+
+_ROLES: Tuple[AgentRole, ...] = tuple(AgentRole)
+_ROLE_INDEX: Dict[AgentRole, int] = {role: index for index, role in enumerate(_ROLES)}
+
+Column = Tuple[bool, ...]
+
+
+class ToolPermission(BaseModel):
+    """工具级权限覆盖"""
+    allow: Optional[List[str]] = None   # 允许的角色，覆盖权限等级默认值；"*" 表示全部
+    deny: List[str] = []                # 在允许集合上再排除的角色
+
+
+class PermissionConfig(BaseModel):
+    """权限配置，对应 configs/permissions.yaml"""
+    levels: Dict[PermissionLevel, List[str]] = {
+        PermissionLevel.PUBLIC: ["*"],
+        PermissionLevel.INTERNAL: [AgentRole.STEP_EXECUTOR.value],
+        PermissionLevel.ADMIN: [],
+    }
+    tools: Dict[str, ToolPermission] = {}
+
+    @classmethod
+    def from_yaml(cls, path: Union[str, Path]) -> "PermissionConfig":
+        """从 YAML 文件读取权限配置"""
+        import yaml
+
+        with open(path, "r", encoding="utf-8") as f:
+            data = yaml.safe_load(f) or {}
+        return cls(**data)
+
+
+def _roles(spec: Iterable[str]) -> FrozenSet[AgentRole]:
+    values = list(spec)
+    if "*" in values:
+        return frozenset(_ROLES)
+    return frozenset(AgentRole(value) for value in values)
+
+
+def _column(allowed: FrozenSet[AgentRole]) -> Column:
+    return tuple(role in allowed for role in _ROLES)
+
+
+class PermissionMatrix:
+    """
+    不可变的角色 × 工具权限矩阵
+    构造后不再修改，可被任意数量的读者无锁共享
+    """
+
+    __slots__ = ("_levels", "_tools", "tool_names")
+
+    def __init__(self, config: PermissionConfig, tools: Iterable[BaseTool] = ()):
+        """
+        编译权限矩阵
+
+        Args:
+            config: 权限配置
+            tools: 已注册的工具，按其声明的权限等级预先编入矩阵
+
+        Raises:
+            ValueError: 配置中出现未知的角色
+        """
+        level_roles = {
+            level: _roles(config.levels.get(level, [])) for level in PermissionLevel
+        }
+        self._levels: Dict[PermissionLevel, Column] = {
+            level: _column(roles) for level, roles in level_roles.items()
+        }
+        columns: Dict[Tuple[str, PermissionLevel], Column] = {
+            (tool.name, tool.permission_level): self._levels[tool.permission_level]
+            for tool in tools
+        }
+        for name, override in config.tools.items():
+            denied = _roles(override.deny)
+            for level in PermissionLevel:
+                # 未给出 allow 时以工具在检查时声明的等级为基准，而不是编译时已知的等级
+                base = _roles(override.allow) if override.allow is not None else level_roles[level]
+                columns[(name, level)] = _column(base - denied)
+        self._tools = columns
+        self.tool_names: FrozenSet[str] = frozenset(name for name, _ in columns)
+
+    def allows(self, role: AgentRole, tool: BaseTool) -> bool:
+        """O(1) 权限检查"""
+        level = tool.permission_level
+        column = self._tools.get((tool.name, level))
+        if column is None:
+            column = self._levels[level]
+        return column[_ROLE_INDEX[role]]
+
+
+class PermissionSystem:
+    """
+    权限系统
+    持有当前权限矩阵；reload() 构建新矩阵后整体替换引用
+    """
+
+    def __init__(
+        self,
+        config: Optional[PermissionConfig] = None,
+        tools: Iterable[BaseTool] = (),
+        path: Optional[Union[str, Path]] = None,
+    ):
+        """
+        Args:
+            config: 权限配置，默认按 path 读取，均未提供时使用内置默认值
+            tools: 已注册的工具
+            path: 配置文件路径，reload() 从该文件重新读取
+        """
+        self.path = Path(path) if path is not None else None
+        self._tools = list(tools)
+        self._mtime: Optional[float] = None
+        if config is None and self.path is not None:
+            config, self._mtime = self._read(self.path)
+        self.config = config or PermissionConfig()
+        self._matrix = PermissionMatrix(self.config, self._tools)
+        self.denied: "Counter[Tuple[str, str]]" = Counter()
+
+    @classmethod
+    def from_config(
+        cls,
+        config_dir: Union[str, Path],
+        tools: Iterable[BaseTool] = (),
+    ) -> "PermissionSystem":
+        """从配置目录读取 permissions.yaml"""
+        return cls(tools=tools, path=Path(config_dir) / "permissions.yaml")
+
+    @property
+    def matrix(self) -> PermissionMatrix:
+        """当前权限矩阵"""
+        return self._matrix
+
+    def check(self, role: AgentRole, tool: BaseTool) -> bool:
+        """
+        检查角色能否调用工具，拒绝时计数
+
+        Args:
+            role: Agent 角色
+            tool: 目标工具
+
+        Returns:
+            bool: 是否允许
+        """
+        if self._matrix.allows(role, tool):
+            return True
+        self.denied[(role.value, tool.name)] += 1
+        return False
+
+    @staticmethod
+    def _read(path: Path) -> Tuple[PermissionConfig, float]:
+        mtime = os.stat(path).st_mtime
+        return PermissionConfig.from_yaml(path), mtime
+
+    def reload(
+        self,
+        config: Optional[PermissionConfig] = None,
+        tools: Optional[Iterable[BaseTool]] = None,
+    ) -> None:
+        """
+        用新配置或新的工具集合重建矩阵并原子替换；编译失败时保留旧矩阵并抛出异常
+
+        Args:
+            config: 新配置，默认从 path 重新读取（未设置 path 时沿用当前配置）
+            tools: 新的已注册工具集合，默认沿用
+        """
+        mtime = self._mtime
+        if config is None and self.path is not None:
+            config, mtime = self._read(self.path)
+        config = config or self.config
+        tool_list = list(tools) if tools is not None else self._tools
+        matrix = PermissionMatrix(config, tool_list)
+        # 单次引用赋值：读者要么看到旧矩阵，要么看到新矩阵
+        self.config, self._tools, self._mtime = config, tool_list, mtime
+        self._matrix = matrix
+
+    def reload_if_changed(self) -> bool:
+        """配置文件修改时间变化时重建矩阵，返回是否重建"""
+        if self.path is None or os.stat(self.path).st_mtime == self._mtime:
+            return False
+        self.reload()
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """矩阵规模与按 (角色, 工具) 统计的拒绝次数"""
+        return {
+            "tools": len(self._matrix.tool_names),
+            "denied": {f"{role}:{tool}": count for (role, tool), count in self.denied.items()},
+            "denied_total": sum(self.denied.values()),
+        }
@@ -0,0 +1,310 @@
+"""
+风险控制
+来源：《多智能体协作系统需求思路详述.md》风险控制模块
+
+评估连续失败次数、数据来源风险与输出置信度，风险达到阈值时要求人工介入。
+所有指标均为增量结构，每个事件 O(1) 更新，评估时不再扫描 ExecutionContext.errors 或追踪记录：
+- 按执行统计：连续失败计数、时间窗口内的失败数、Agent 输出置信度的指数平滑均值
+- 按工具统计（跨执行共享）：时间窗口内的调用数与失败数，失败率过高的工具视为高风险数据来源
+- 时间窗口按固定时长分桶的环形数组实现，过期的桶在下次访问时清零
+"""
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from pydantic import BaseModel, Field
+
+from src.core.types import RiskLevel
+
+
+_LEVELS = list(RiskLevel)
+_RANK: Dict[RiskLevel, int] = {level: rank for rank, level in enumerate(_LEVELS)}
+
+
+def _max_level(a: RiskLevel, b: RiskLevel) -> RiskLevel:
+    return a if _RANK[a] >= _RANK[b] else b
+
+
+class RiskConfig(BaseModel):
+    """风险控制配置，对应 configs/default.yaml 的 risk 段"""
+    enabled: bool = True
+    window_seconds: float = Field(default=300.0, gt=0)          # 失败统计的时间窗口
+    bucket_seconds: float = Field(default=10.0, gt=0)           # 时间窗口的分桶粒度
+    max_consecutive_failures: int = Field(default=3, ge=1)      # 执行内连续失败达到即为 HIGH
+    max_window_failures: int = Field(default=10, ge=1)          # 执行在窗口内失败达到即为 HIGH
+    tool_failure_rate: float = Field(default=0.5, gt=0, le=1)   # 工具窗口失败率达到即为 MEDIUM
+    tool_min_calls: int = Field(default=4, ge=1)                # 计算工具失败率所需的最少调用数
+    confidence_smoothing: float = Field(default=0.3, gt=0, le=1)
+    min_confidence: float = Field(default=0.6, ge=0, le=1)      # 置信度平滑值低于即为 MEDIUM
+    tool_risk: Dict[str, RiskLevel] = {}                        # 数据来源的固有风险等级
+    human_threshold: RiskLevel = RiskLevel.HIGH                 # 达到该等级时要求人工介入
+    max_executions: int = Field(default=1024, ge=1)             # 保留统计的执行数上限
+
+    @classmethod
+    def from_yaml(cls, path: Union[str, Path]) -> "RiskConfig":
+        """从 YAML 文件读取 risk 段"""
+        import yaml
+
+        with open(path, "r", encoding="utf-8") as f:
+            data = yaml.safe_load(f) or {}
+        return cls(**(data.get("risk") or {}))
+
+
+# ==============================================================================
+# 增量统计结构
+# ==============================================================================
+
+class SlidingWindowCounter:
+    """
+    分桶时间窗口计数器
+    窗口由 ceil(window / bucket) 个桶组成的环形数组表示，同时维护窗口总数；
+    每次访问最多清零一圈过期桶，add() 与 total() 均为 O(1)
+    """
+
+    __slots__ = ("_bucket_seconds", "_counts", "_head", "_total", "_clock")
+
+    def __init__(
+        self,
+        window_seconds: float,
+        bucket_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            window_seconds: 窗口时长（秒）
+            bucket_seconds: 分桶粒度（秒）
+            clock: 时钟函数
+        """
+        self._bucket_seconds = bucket_seconds
+        self._counts = [0] * max(1, math.ceil(window_seconds / bucket_seconds))
+        self._clock = clock
+        self._head = int(clock() // bucket_seconds)
+        self._total = 0
+
+    def _advance(self) -> int:
+        index = int(self._clock() // self._bucket_seconds)
+        gap = index - self._head
+        if gap <= 0:
+            return self._head
+        size = len(self._counts)
+        if gap >= size:
+            self._counts = [0] * size
+            self._total = 0
+        else:
+            for expired in range(self._head + 1, index + 1):
+                slot = expired % size
+                self._total -= self._counts[slot]
+                self._counts[slot] = 0
+        self._head = index
+        return index
+
+    def add(self, count: int = 1) -> None:
+        """在当前桶中计数"""
+        index = self._advance()
+        self._counts[index % len(self._counts)] += count
+        self._total += count
+
+    def total(self) -> int:
+        """窗口内的总数"""
+        self._advance()
+        return self._total
+
+    def clear(self) -> None:
+        """清空窗口"""
+        self._counts = [0] * len(self._counts)
+        self._total = 0
+
+
+class Ewma:
+    """指数加权移动平均，首个样本直接作为初值"""
+
+    __slots__ = ("alpha", "value")
+
+    def __init__(self, alpha: float):
+        self.alpha = alpha
+        self.value: Optional[float] = None
+
+    def update(self, sample: float) -> float:
+        """加入样本并返回新的平滑值"""
+        if self.value is None:
+            self.value = sample
+        else:
+            self.value += self.alpha * (sample - self.value)
+        return self.value
+
+
+class _ToolRisk:
+    """单个工具的窗口统计"""
+
+    __slots__ = ("calls", "failures")
+
+    def __init__(self, config: RiskConfig, clock: Callable[[], float]):
+        self.calls = SlidingWindowCounter(config.window_seconds, config.bucket_seconds, clock)
+        self.failures = SlidingWindowCounter(config.window_seconds, config.bucket_seconds, clock)
+
+
+class _ExecutionRisk:
+    """单个执行的风险统计"""
+
+    __slots__ = ("consecutive", "failures", "confidence", "source_level", "source")
+
+    def __init__(self, config: RiskConfig, clock: Callable[[], float]):
+        self.consecutive = 0
+        self.failures = SlidingWindowCounter(config.window_seconds, config.bucket_seconds, clock)
+        self.confidence = Ewma(config.confidence_smoothing)
+        self.source_level = RiskLevel.LOW    # 本次执行用到的数据来源中的最高风险
+        self.source: Optional[str] = None
+
+
+# ==============================================================================
+# 风险控制器
+# ==============================================================================
+
+@dataclass
+class RiskAssessment:
+    """风险评估结果"""
+    level: RiskLevel = RiskLevel.LOW
+    reasons: List[str] = field(default_factory=list)
+
+    def raise_to(self, level: RiskLevel, reason: str) -> None:
+        self.level = _max_level(self.level, level)
+        self.reasons.append(reason)
+
+
+class RiskController:
+    """
+    风险控制器
+    可在多个执行间共享：执行级统计按 trace_id 隔离（超过 max_executions 时淘汰最久未访问的执行），
+    工具级统计跨执行累积
+    """
+
+    def __init__(
+        self,
+        config: Optional[RiskConfig] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            config: 风险控制配置
+            clock: 时钟函数
+        """
+        self.config = config or RiskConfig()
+        self._clock = clock
+        self._executions: "OrderedDict[str, _ExecutionRisk]" = OrderedDict()
+        self._tools: Dict[str, _ToolRisk] = {}
+
+    def _execution(self, trace_id: str) -> _ExecutionRisk:
+        execution = self._executions.get(trace_id)
+        if execution is None:
+            execution = self._executions[trace_id] = _ExecutionRisk(self.config, self._clock)
+            if len(self._executions) > self.config.max_executions:
+                self._executions.popitem(last=False)
+        else:
+            self._executions.move_to_end(trace_id)
+        return execution
+
+    def tool_level(self, tool_name: str) -> RiskLevel:
+        """工具作为数据来源的当前风险：固有风险与窗口失败率取高者"""
+        level = self.config.tool_risk.get(tool_name, RiskLevel.LOW)
+        stats = self._tools.get(tool_name)
+        if stats is not None:
+            calls = stats.calls.total()
+            if (
+                calls >= self.config.tool_min_calls
+                and stats.failures.total() >= self.config.tool_failure_rate * calls
+            ):
+                level = _max_level(level, RiskLevel.MEDIUM)
+        return level
+
+    def record_step(self, trace_id: str, tool_name: str, success: bool) -> None:
+        """
+        记录一次步骤结果
+
+        Args:
+            trace_id: 执行追踪 ID
+            tool_name: 步骤使用的工具
+            success: 步骤是否成功
+        """
+        stats = self._tools.get(tool_name)
+        if stats is None:
+            stats = self._tools[tool_name] = _ToolRisk(self.config, self._clock)
+        stats.calls.add()
+        execution = self._execution(trace_id)
+        if success:
+            execution.consecutive = 0
+        else:
+            stats.failures.add()
+            execution.consecutive += 1
+            execution.failures.add()
+        level = self.tool_level(tool_name)
+        if _RANK[level] > _RANK[execution.source_level]:
+            execution.source_level, execution.source = level, tool_name
+
+    def record_confidence(self, trace_id: str, confidence: float) -> None:
+        """记录一次 Agent 输出置信度"""
+        self._execution(trace_id).confidence.update(confidence)
+
+    def acknowledge(self, trace_id: str) -> None:
+        """人工确认后清除执行级的失败与数据来源风险，工具级统计保留"""
+        execution = self._executions.get(trace_id)
+        if execution is not None:
+            execution.consecutive = 0
+            execution.failures.clear()
+            execution.source_level, execution.source = RiskLevel.LOW, None
+
+    def forget(self, trace_id: str) -> None:
+        """丢弃执行级统计"""
+        self._executions.pop(trace_id, None)
+
+    def assess(self, trace_id: str) -> RiskAssessment:
+        """
+        评估执行的当前风险
+
+        Args:
+            trace_id: 执行追踪 ID
+
+        Returns:
+            RiskAssessment: 风险等级与原因
+        """
+        assessment = RiskAssessment()
+        execution = self._executions.get(trace_id)
+        if execution is None:
+            return assessment
+        config = self.config
+        if execution.consecutive >= config.max_consecutive_failures:
+            assessment.raise_to(
+                RiskLevel.HIGH, f"{execution.consecutive} consecutive step failures"
+            )
+        failures = execution.failures.total()
+        if failures >= config.max_window_failures:
+            assessment.raise_to(
+                RiskLevel.HIGH, f"{failures} step failures within {config.window_seconds:g}s"
+            )
+        if execution.source_level is not RiskLevel.LOW:
+            assessment.raise_to(
+                execution.source_level, f"Risky data source {execution.source}"
+            )
+        confidence = execution.confidence.value
+        if confidence is not None and confidence < config.min_confidence:
+            assessment.raise_to(
+                RiskLevel.MEDIUM, f"Smoothed confidence {confidence:.2f} below "
+                f"{config.min_confidence:g}"
+            )
+        return assessment
+
+    def requires_human(self, level: RiskLevel) -> bool:
+        """风险等级是否达到人工介入阈值"""
+        return _RANK[level] >= _RANK[self.config.human_threshold]
+
+    def stats(self) -> Dict[str, Any]:
+        """跟踪中的执行数与各工具的窗口调用数、失败数"""
+        return {
+            "executions": len(self._executions),
+            "tools": {
+                name: {"calls": s.calls.total(), "failures": s.failures.total()}
+                for name, s in self._tools.items()
+            },
+        }
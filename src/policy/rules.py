@@ -0,0 +1,347 @@
+"""
+策略规则引擎
+来源：configs/policies.yaml
+
+规则在加载时一次性编译：
+- 条件编译为闭包，字段路径（如 state.iteration_count）预先拆分为属性访问链
+- 按 (生命周期状态, 触发事件) 建立索引，每次求值只执行相关规则，索引按需构建并缓存
+- 同一索引下的规则按优先级降序预排序，首个命中的规则决定结果
+- 决策按"相关规则引用到的字段值"记忆化：输入相同的求值直接返回缓存结果
+
+规则格式：
+    - id: iteration_limit
+      states: [REPLAN]                 # 省略表示任意状态
+      events: [REPLAN_READY]           # 省略表示任意事件
+      priority: 100
+      when:                            # 列表表示全部满足，也可使用 all / any / not 组合
+        - {field: state.iteration_count, op: ">=", value: 5}
+      decision: {allow: false, reason: "...", risk_level: HIGH}
+"""
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import (
+    Any, Callable, Dict, FrozenSet, Hashable, Iterable, List, Optional, Tuple, Union, cast,
+)
+
+from src.core.models import ExecutionContext, GlobalState
+from src.core.protocols import AgentOutput, PolicyDecision, ToolExecutionResult
+from src.core.types import LifecycleState
+
+
+# ==============================================================================
+# 求值输入
+# ==============================================================================
+
+@dataclass(slots=True)
+class PolicyFacts:
+    """一次策略求值的输入（只读视图，规则不得修改其中任何对象）"""
+    global_state: GlobalState
+    execution_context: ExecutionContext
+    agent_output: Optional[AgentOutput] = None
+    tool_result: Optional[ToolExecutionResult] = None
+    event: Optional[str] = None                  # 触发事件（TriggerEvent 的值）
+    proposed: Optional[LifecycleState] = None    # 状态机计算出的下一状态
+
+
+class RuleDecision(PolicyDecision):
+    """规则给出的决策，附带规则 ID，供引擎记录人工确认针对的是哪条规则"""
+    rule_id: Optional[str] = None
+
+
+Accessor = Callable[[PolicyFacts], Any]
+Predicate = Callable[[PolicyFacts], bool]
+
+_ROOTS: Dict[str, Accessor] = {
+    "state": lambda f: f.global_state,
+    "context": lambda f: f.execution_context,
+    "output": lambda f: f.agent_output,
+    "tool_result": lambda f: f.tool_result,
+    "event": lambda f: f.event,
+    "proposed": lambda f: f.proposed,
+}
+
+
+class PolicyRuleError(ValueError):
+    """策略规则校验失败"""
+
+    def __init__(self, errors: List[str]):
+        self.errors = errors
+        super().__init__("Invalid policy rules: " + "; ".join(errors))
+
+
+# ==============================================================================
+# 条件编译
+# ==============================================================================
+
+def _codes(value: Any) -> FrozenSet[str]:
+    """错误列表中的错误码（StructuredError 或 "step_id: CODE" 形式的字符串）"""
+    codes = set()
+    for item in value or ():
+        code = getattr(item, "code", None)
+        if code is None and isinstance(item, str):
+            code = item.rsplit(":", 1)[-1].strip()
+        if code is not None:
+            codes.add(code)
+    return frozenset(codes)
+
+
+_FUNCTIONS: Dict[str, Callable[[Any], Any]] = {
+    "len": lambda v: len(v) if v is not None else 0,
+    "codes": _codes,
+}
+
+_OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "<": lambda a, b: a is not None and a < b,
+    "<=": lambda a, b: a is not None and a <= b,
+    ">": lambda a, b: a is not None and a > b,
+    ">=": lambda a, b: a is not None and a >= b,
+    "in": lambda a, b: a in b,
+    "not_in": lambda a, b: a not in b,
+    "contains": lambda a, b: a is not None and b in a,
+    "exists": lambda a, b: (a is not None) == bool(b),
+}
+
+
+def _compile_accessor(path: str, fn: Optional[str]) -> Accessor:
+    root, *segments = path.split(".")
+    if root not in _ROOTS:
+        raise ValueError(f"unknown field root '{root}' in '{path}'")
+    if fn is not None and fn not in _FUNCTIONS:
+        raise ValueError(f"unknown fn '{fn}'")
+    get_root = _ROOTS[root]
+    attrs = tuple(segments)
+    apply = _FUNCTIONS[fn] if fn is not None else None
+
+    def accessor(facts: PolicyFacts) -> Any:
+        value = get_root(facts)
+        for attr in attrs:
+            if value is None:
+                break
+            value = value.get(attr) if isinstance(value, dict) else getattr(value, attr, None)
+        return apply(value) if apply is not None else value
+
+    return accessor
+
+
+class _Compiler:
+    """将条件树编译为谓词，并收集引用到的字段（用于记忆化键）"""
+
+    def __init__(self) -> None:
+        self.accessors: Dict[Tuple[str, Optional[str]], Accessor] = {}
+
+    def accessor(self, path: str, fn: Optional[str]) -> Tuple[Tuple[str, Optional[str]], Accessor]:
+        key = (path, fn)
+        if key not in self.accessors:
+            self.accessors[key] = _compile_accessor(path, fn)
+        return key, self.accessors[key]
+
+    def compile(self, spec: Any) -> Tuple[Predicate, FrozenSet[Tuple[str, Optional[str]]]]:
+        """
+        编译条件
+
+        Returns:
+            Tuple[Predicate, FrozenSet]: 谓词与其引用的字段
+        """
+        if spec is None:
+            return (lambda facts: True), frozenset()
+        if isinstance(spec, list):
+            spec = {"all": spec}
+        if not isinstance(spec, dict):
+            raise ValueError(f"condition must be a mapping or list, got {spec!r}")
+
+        if "all" in spec or "any" in spec:
+            combinator = "all" if "all" in spec else "any"
+            parts = [self.compile(item) for item in spec[combinator]]
+            predicates = tuple(p for p, _ in parts)
+            fields = frozenset().union(*(f for _, f in parts))
+            if combinator == "all":
+                return (lambda facts: all(p(facts) for p in predicates)), fields
+            return (lambda facts: any(p(facts) for p in predicates)), fields
+        if "not" in spec:
+            inner, fields = self.compile(spec["not"])
+            return (lambda facts: not inner(facts)), fields
+
+        op = spec.get("op", "==")
+        value = spec.get("value")
+        key, get = self.accessor(spec["field"], spec.get("fn"))
+        if op == "matches":
+            pattern = re.compile(str(value))
+
+            def matches(facts: PolicyFacts) -> bool:
+                return pattern.search(str(get(facts) or "")) is not None
+
+            return matches, frozenset({key})
+        if op not in _OPERATORS:
+            raise ValueError(f"unknown op '{op}'")
+        compare = _OPERATORS[op]
+        if op in ("in", "not_in"):
+            value = frozenset(value or ())
+        return (lambda facts: compare(get(facts), value)), frozenset({key})
+
+
+# ==============================================================================
+# 规则与规则引擎
+# ==============================================================================
+
+@dataclass(frozen=True)
+class CompiledRule:
+    """编译后的规则"""
+    id: str
+    priority: int
+    order: int
+    states: Optional[FrozenSet[LifecycleState]]   # None 表示任意状态
+    events: Optional[FrozenSet[str]]              # None 表示任意事件
+    predicate: Predicate
+    fields: FrozenSet[Tuple[str, Optional[str]]]
+    decision: PolicyDecision
+
+    def applies_to(self, state: LifecycleState, event: Optional[str]) -> bool:
+        if self.states is not None and state not in self.states:
+            return False
+        if self.events is None:
+            return True
+        # 指定了事件的规则只在调用方提供对应事件时生效
+        return event is not None and event in self.events
+
+
+_Bucket = Tuple[Tuple[CompiledRule, ...], Tuple[Accessor, ...]]
+_MemoKey = Tuple[LifecycleState, Optional[str], Tuple[Hashable, ...]]
+
+
+def _freeze(value: Any) -> Hashable:
+    """将字段值转为可哈希形式；无法转换时抛出 TypeError"""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, set):
+        return frozenset(value)
+    hash(value)
+    return cast(Hashable, value)
+
+
+class RuleEngine:
+    """
+    预编译、按状态与事件索引的策略规则引擎
+    - evaluate() 的开销为一次索引查找、一次记忆化查找，未命中时加上相关规则的谓词调用
+    - 规则引擎本身无会话状态，可在多个执行会话间共享
+    """
+
+    def __init__(self, rules: Iterable[Dict[str, Any]], memo_size: int = 4096):
+        """
+        编译并校验规则
+
+        Args:
+            rules: 规则定义（configs/policies.yaml 的 rules 列表）
+            memo_size: 记忆化缓存条目上限
+
+        Raises:
+            PolicyRuleError: 规则格式错误
+        """
+        from src.engine.state_machine import TriggerEvent
+
+        known_events = {e.value for e in TriggerEvent}
+        compiler = _Compiler()
+        compiled: List[CompiledRule] = []
+        errors: List[str] = []
+        seen: set = set()
+        for order, spec in enumerate(rules):
+            rule_id = str(spec.get("id") or f"rule-{order}")
+            try:
+                if rule_id in seen:
+                    raise ValueError("duplicate id")
+                seen.add(rule_id)
+                events = spec.get("events")
+                unknown = set(events or ()) - known_events
+                if unknown:
+                    raise ValueError(f"unknown events {sorted(unknown)}")
+                predicate, fields = compiler.compile(spec.get("when"))
+                decision = dict(spec.get("decision") or {})
+                decision.setdefault("allow", True)
+                decision.setdefault("reason", rule_id)
+                compiled.append(CompiledRule(
+                    id=rule_id,
+                    priority=int(spec.get("priority", 0)),
+                    order=order,
+                    states=frozenset(LifecycleState(s) for s in spec["states"])
+                    if spec.get("states") else None,
+                    events=frozenset(events) if events else None,
+                    predicate=predicate,
+                    fields=fields,
+                    decision=RuleDecision(rule_id=rule_id, **decision),
+                ))
+            except (KeyError, TypeError, ValueError) as e:
+                errors.append(f"{rule_id}: {e}")
+        if errors:
+            raise PolicyRuleError(errors)
+
+        self._rules: Tuple[CompiledRule, ...] = tuple(
+            sorted(compiled, key=lambda r: (-r.priority, r.order))
+        )
+        self._accessors = compiler.accessors
+        self._buckets: Dict[Tuple[LifecycleState, Optional[str]], _Bucket] = {}
+        self._memo: "OrderedDict[_MemoKey, Optional[PolicyDecision]]" = OrderedDict()
+        self._memo_size = memo_size
+        self.memo_hits = 0
+        self.evaluations = 0
+
+    @classmethod
+    def from_yaml(cls, path: Union[str, Path], memo_size: int = 4096) -> "RuleEngine":
+        """从 YAML 文件读取 rules 列表"""
+        import yaml
+
+        with open(path, "r", encoding="utf-8") as f:
+            data = yaml.safe_load(f) or {}
+        return cls(data.get("rules") or [], memo_size)
+
+    @property
+    def rules(self) -> Tuple[CompiledRule, ...]:
+        """按优先级排序的全部规则（只读）"""
+        return self._rules
+
+    def _bucket(self, state: LifecycleState, event: Optional[str]) -> _Bucket:
+        key = (state, event)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            rules = tuple(r for r in self._rules if r.applies_to(state, event))
+            fields = sorted(set().union(*(r.fields for r in rules)), key=str)
+            bucket = self._buckets[key] = (rules, tuple(self._accessors[f] for f in fields))
+        return bucket
+
+    def evaluate(self, facts: PolicyFacts) -> Optional[PolicyDecision]:
+        """
+        求值
+
+        Args:
+            facts: 求值输入
+
+        Returns:
+            Optional[PolicyDecision]: 首个命中规则的决策，无命中时返回 None
+        """
+        state = facts.global_state.lifecycle_state
+        rules, accessors = self._bucket(state, facts.event)
+        if not rules:
+            return None
+
+        try:
+            key: Optional[_MemoKey] = (
+                state, facts.event, tuple(_freeze(get(facts)) for get in accessors)
+            )
+        except TypeError:
+            key = None   # 字段值不可哈希：不做记忆化
+        if key is not None and key in self._memo:
+            self.memo_hits += 1
+            self._memo.move_to_end(key)
+            return self._memo[key]
+
+        self.evaluations += 1
+        decision = next((r.decision for r in rules if r.predicate(facts)), None)
+        if key is not None:
+            self._memo[key] = decision
+            if len(self._memo) > self._memo_size:
+                self._memo.popitem(last=False)
+        return decision
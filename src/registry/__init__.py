@@ -1,2 +1,3 @@
 from .agent_registry import AgentRegistry
-from .tool_registry import ToolRegistry
\ No newline at end of file
+from .tool_registry import ToolRegistry
+from .component_registry import ComponentRegistry
@@ -2,7 +2,7 @@
 Agent 注册中心
 来源：《关键接口抽象框架.md》v2.0
 """
-from typing import Dict
+from typing import Dict, Optional
 
 from src.core.interfaces import BaseAgent
 from src.core.types import AgentRole
@@ -27,6 +27,13 @@ class AgentRegistry:
                 return agent
         raise ValueError(f"No agent found for role {role}")
 
+    def find_by_role(self, role: AgentRole) -> Optional[BaseAgent]:
+        """通过角色查找 Agent，未注册时返回 None"""
+        for agent in self._agents.values():
+            if agent.role == role:
+                return agent
+        return None
+
     def get(self, name: str) -> BaseAgent:
         """通过名称获取 Agent"""
         return self._agents[name]
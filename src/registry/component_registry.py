@@ -0,0 +1,48 @@
+"""
+统一组件注册中心
+来源：《代码框架.txt》registry/component_registry.py
+
+同一进程内所有执行会话共享的可插拔组件（Agent、工具、策略、追踪、快照、记忆、执行日志）。
+组件以引用方式共享，任何会话都不会复制它们。
+"""
+from typing import Optional
+
+from src.core.interfaces import BaseAgent, BaseMemory, BasePolicy, BaseTool, BaseTracer
+from src.infrastructure.journal.base_journal import BaseJournal
+from src.infrastructure.snapshot.base_snapshot import BaseSnapshotManager
+from .agent_registry import AgentRegistry
+from .tool_registry import ToolRegistry
+
+
+class ComponentRegistry:
+    """共享组件容器"""
+
+    def __init__(
+        self,
+        agents: Optional[AgentRegistry] = None,
+        tools: Optional[ToolRegistry] = None,
+        policy: Optional[BasePolicy] = None,
+        tracer: Optional[BaseTracer] = None,
+        snapshot_manager: Optional[BaseSnapshotManager] = None,
+        memory: Optional[BaseMemory] = None,
+        journal: Optional[BaseJournal] = None,
+    ):
+        self.agents = agents or AgentRegistry()
+        self.tools = tools or ToolRegistry()
+        self.policy = policy
+        self.tracer = tracer
+        self.snapshot_manager = snapshot_manager
+        self.memory = memory
+        self.journal = journal
+
+    def register_agent(self, agent: BaseAgent) -> None:
+        """注册 Agent"""
+        self.agents.register(agent)
+
+    def register_tool(self, tool: BaseTool) -> None:
+        """注册工具"""
+        self.tools.register(tool)
+
+    def set_policy(self, policy: BasePolicy) -> None:
+        """注入策略引擎"""
+        self.policy = policy
@@ -1,30 +1,222 @@
 """
 工具注册中心
 来源：《关键接口抽象框架.md》v2.0
+
+- 工具可直接注册实例，也可只登记 ToolSpec 声明，首次 get() 时才导入并实例化（见 src/tools/registry.py）
+- 同名工具的多个版本并存：get(name) 返回最高版本，get(name, "2") 返回 2.x 中的最高版本，
+  get(name, "2.1.0") 返回精确版本
+- 按权限等级、是否有副作用与主版本号维护二级索引，find() 不导入任何工具
 """
-from typing import Dict, Optional
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import DefaultDict, Dict, Iterable, List, Optional, Set, Tuple, Union
 
 from src.core.interfaces import BaseTool
+from src.core.protocols import StructuredError
+from src.core.types import PermissionLevel
+from src.tools.registry import (
+    ENTRY_POINT_GROUP, ToolSpec, discover_entry_points, load_manifest, version_key,
+)
+
+
+ToolKey = Tuple[str, str]   # (name, version)
+
+
+class _Entry:
+    """单个工具版本：声明与（导入后的）实例"""
+
+    __slots__ = ("spec", "tool")
+
+    def __init__(self, spec: ToolSpec, tool: Optional[BaseTool] = None):
+        self.spec = spec
+        self.tool = tool
 
 
 class ToolRegistry:
     """工具注册与查询中心"""
-    
-    def __init__(self):
-        self._tools: Dict[str, BaseTool] = {}
+
+    def __init__(self) -> None:
+        self._entries: Dict[ToolKey, _Entry] = {}
+        self._versions: Dict[str, List[str]] = {}     # name -> 按版本升序
+        self._latest: Dict[str, _Entry] = {}          # name -> 最高版本，get(name) 的快速路径
+        self._by_level: DefaultDict[PermissionLevel, Set[ToolKey]] = defaultdict(set)
+        self._by_side_effect: DefaultDict[bool, Set[ToolKey]] = defaultdict(set)
+        self._by_major: DefaultDict[int, Set[ToolKey]] = defaultdict(set)
+        self._load_lock = threading.Lock()
+        self.load_errors: Dict[ToolKey, StructuredError] = {}
+
+    # ------------------------------------------------------------------
+    # 注册
+    # ------------------------------------------------------------------
 
     def register(self, tool: BaseTool) -> None:
-        """注册工具"""
-        self._tools[tool.name] = tool
+        """注册工具实例；同名同版本的已有注册被替换"""
+        self._add(_Entry(ToolSpec.of(tool), tool))
+
+    def register_spec(self, spec: ToolSpec) -> None:
+        """登记工具声明，首次 get() 时导入"""
+        self._add(_Entry(spec))
+
+    def discover(
+        self,
+        manifest: Optional[Union[str, Path]] = None,
+        entry_point_group: Optional[str] = ENTRY_POINT_GROUP,
+    ) -> int:
+        """
+        从清单文件与入口点登记工具声明，不导入任何工具模块
+
+        Args:
+            manifest: 清单文件路径（如 configs/tools.yaml）
+            entry_point_group: 入口点组名，None 表示不扫描入口点
+
+        Returns:
+            int: 登记的声明数
+        """
+        specs: List[ToolSpec] = []
+        if manifest is not None:
+            specs.extend(load_manifest(manifest))
+        if entry_point_group is not None:
+            specs.extend(discover_entry_points(entry_point_group))
+        for spec in specs:
+            self.register_spec(spec)
+        return len(specs)
 
-    def get(self, name: str) -> Optional[BaseTool]:
-        """通过名称获取工具"""
-        return self._tools.get(name)
+    def _add(self, entry: _Entry) -> None:
+        spec = entry.spec
+        key = (spec.name, spec.version)
+        if key in self._entries:
+            self._unindex(key)
+        self._entries[key] = entry
+        self._index(key, spec)
+        versions = self._versions.setdefault(spec.name, [])
+        if spec.version not in versions:
+            versions.append(spec.version)
+            versions.sort(key=version_key)
+        self._latest[spec.name] = self._entries[(spec.name, versions[-1])]
+        self.load_errors.pop(key, None)
+
+    def _index(self, key: ToolKey, spec: ToolSpec) -> None:
+        self._by_level[spec.permission_level].add(key)
+        self._by_side_effect[spec.has_side_effect].add(key)
+        self._by_major[spec.major].add(key)
+
+    def _unindex(self, key: ToolKey) -> None:
+        spec = self._entries[key].spec
+        self._by_level[spec.permission_level].discard(key)
+        self._by_side_effect[spec.has_side_effect].discard(key)
+        self._by_major[spec.major].discard(key)
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+
+    def _resolve(self, name: str, version: Optional[str]) -> Optional[_Entry]:
+        if version is None:
+            return self._latest.get(name)
+        entry = self._entries.get((name, version))
+        if entry is not None or not version.isdigit():
+            return entry
+        # 只给出主版本号：取该主版本中的最高版本
+        major = int(version)
+        matches = [v for v in self._versions.get(name, ()) if version_key(v)[0] == major]
+        return self._entries[(name, matches[-1])] if matches else None
+
+    def get(self, name: str, version: Optional[str] = None) -> Optional[BaseTool]:
+        """
+        通过名称获取工具，必要时导入
+
+        Args:
+            name: 工具名
+            version: 精确版本或主版本号，默认最高版本
+
+        Returns:
+            Optional[BaseTool]: 工具实例；未注册或导入失败时为 None（失败原因见 load_errors）
+        """
+        entry = self._resolve(name, version)
+        if entry is None:
+            return None
+        tool = entry.tool
+        return tool if tool is not None else self._load(entry)
+
+    def _load(self, entry: _Entry) -> Optional[BaseTool]:
+        spec = entry.spec
+        key = (spec.name, spec.version)
+        with self._load_lock:
+            if entry.tool is not None:
+                return entry.tool
+            if key in self.load_errors:
+                return None
+            try:
+                tool = spec.load()
+                if (tool.name, tool.version) != key:
+                    raise TypeError(
+                        f"{spec.target} provides {tool.name} {tool.version}, "
+                        f"declared as {spec.name} {spec.version}"
+                    )
+            except Exception as e:
+                self.load_errors[key] = StructuredError(
+                    code="TOOL_LOAD_FAILED",
+                    message=f"Failed to load tool {spec.name} {spec.version}: {e}",
+                    severity="WARNING",
+                    suggested_action="REPLAN",
+                    metadata={"tool": spec.name, "version": spec.version, "target": spec.target},
+                )
+                return None
+            actual = ToolSpec.of(tool).model_copy(
+                update={"target": spec.target, "kwargs": spec.kwargs}
+            )
+            if actual != spec:
+                # 以实例的元数据为准更新索引
+                self._unindex(key)
+                entry.spec = actual
+                self._index(key, actual)
+            entry.tool = tool
+            return tool
+
+    def spec(self, name: str, version: Optional[str] = None) -> Optional[ToolSpec]:
+        """工具声明，不触发导入"""
+        entry = self._resolve(name, version)
+        return entry.spec if entry is not None else None
+
+    def versions(self, name: str) -> List[str]:
+        """已注册的版本，按版本升序"""
+        return list(self._versions.get(name, ()))
+
+    def find(
+        self,
+        permission_level: Optional[PermissionLevel] = None,
+        has_side_effect: Optional[bool] = None,
+        major: Optional[int] = None,
+    ) -> List[ToolSpec]:
+        """
+        按索引筛选工具声明（条件之间为与关系），不触发导入
+
+        Returns:
+            List[ToolSpec]: 按 (名称, 版本) 排序的声明
+        """
+        candidates: List[Set[ToolKey]] = []
+        if permission_level is not None:
+            candidates.append(self._by_level.get(permission_level, set()))
+        if has_side_effect is not None:
+            candidates.append(self._by_side_effect.get(has_side_effect, set()))
+        if major is not None:
+            candidates.append(self._by_major.get(major, set()))
+        keys: Iterable[ToolKey] = (
+            set.intersection(*candidates) if candidates else self._entries
+        )
+        ordered = sorted(keys, key=lambda k: (k[0], version_key(k[1])))
+        return [self._entries[key].spec for key in ordered]
 
     def list_tools(self) -> Dict[str, str]:
-        """列出所有已注册工具 (name -> version)"""
-        return {name: tool.version for name, tool in self._tools.items()}
+        """列出所有已注册工具 (name -> 最高版本)，不触发导入"""
+        return {name: entry.spec.version for name, entry in self._latest.items()}
 
     def exists(self, name: str) -> bool:
         """检查工具是否存在"""
-        return name in self._tools
\ No newline at end of file
+        return name in self._latest
+
+    def is_loaded(self, name: str, version: Optional[str] = None) -> bool:
+        """工具是否已导入"""
+        entry = self._resolve(name, version)
+        return entry is not None and entry.tool is not None
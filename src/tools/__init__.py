@@ -0,0 +1,38 @@
+from .base_tool import BaseToolImpl, ExecutionLane
+from .batching import BatchingConfig, ToolCallCoalescer
+from .lanes import ExecutionLanes, LaneConfig
+from .limits import TokenBucket, ToolLimiter, ToolLimits, ToolLimitsConfig
+from .cache import CacheConfig, ToolResultCache
+from .deadline import LatencyTracker, deadline_scope, remaining_ms
+from .pool import ConnectionPool, HttpResponse, PoolConfig, connection_pool
+from .runtime import HedgingConfig, ToolRuntime, ToolRuntimeConfig
+from .validator import SchemaCompileError, ToolValidator, ValidatorConfig, compile_schema
+
+__all__ = [
+    "BaseToolImpl",
+    "BatchingConfig",
+    "CacheConfig",
+    "ConnectionPool",
+    "ExecutionLane",
+    "ExecutionLanes",
+    "LaneConfig",
+    "HedgingConfig",
+    "HttpResponse",
+    "LatencyTracker",
+    "PoolConfig",
+    "TokenBucket",
+    "ToolCallCoalescer",
+    "ToolLimiter",
+    "ToolLimits",
+    "ToolLimitsConfig",
+    "ToolRuntime",
+    "ToolResultCache",
+    "ToolRuntimeConfig",
+    "SchemaCompileError",
+    "ToolValidator",
+    "ValidatorConfig",
+    "compile_schema",
+    "connection_pool",
+    "deadline_scope",
+    "remaining_ms",
+]
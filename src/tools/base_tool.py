@@ -0,0 +1,98 @@
+"""
+Tool 通用骨架
+来源：《PROJECT_PLAN.md》5.1
+
+- 工具元数据以类属性声明，子类只需提供 name / version 与计算逻辑
+- 工具可声明执行通道（ExecutionLane）：
+    INLINE  - 在事件循环上执行 execute()，适合 I/O 型工具
+    THREAD  - compute() 在线程池中执行，适合会释放 GIL 的阻塞调用
+    PROCESS - compute() 在常驻进程池中执行，适合 CPU 密集型工具
+- THREAD / PROCESS 通道由 ToolRuntime 调度，execute() 仅在直接调用时使用
+- max_batch_size > 1 的工具支持批量调用：ToolRuntime 开启调用合并时，
+  同一工具的并发调用合并为一次 execute_batch()（INLINE）或 compute_batch()（THREAD / PROCESS）
+"""
+import asyncio
+from enum import Enum
+from typing import Any, Dict, List
+
+from src.core.interfaces import BaseTool
+from src.core.protocols import StructuredError, ToolExecutionResult
+from src.core.types import PermissionLevel
+
+
+class ExecutionLane(str, Enum):
+    """工具执行通道"""
+    INLINE = "INLINE"
+    THREAD = "THREAD"
+    PROCESS = "PROCESS"
+
+
+class BaseToolImpl(BaseTool):
+    """
+    工具通用骨架
+    PROCESS 通道的工具实例会被 pickle 发送到工作进程，因此必须定义在可导入的模块中，
+    且 compute() 只能依赖实例自身的可序列化属性。
+    """
+    execution_lane: ExecutionLane = ExecutionLane.INLINE
+    input_schema: Dict[str, Any] = {"type": "object"}
+    output_schema: Dict[str, Any] = {"type": "object"}
+    timeout_ms: int = 5000
+    permission_level: PermissionLevel = PermissionLevel.PUBLIC
+    has_side_effect: bool = False
+    max_batch_size: int = 1      # 单次批量调用的最大输入数，1 表示不支持批量调用
+
+    def compute(self, input_data: Dict[str, Any]) -> Any:
+        """
+        同步计算逻辑，返回值作为 ToolExecutionResult.output
+
+        Args:
+            input_data: 工具输入
+
+        Returns:
+            Any: 工具输出（PROCESS 通道下必须可 pickle）
+        """
+        raise NotImplementedError(f"Tool {self.name} does not implement compute()")
+
+    async def execute(self, input_data: Dict[str, Any]) -> ToolExecutionResult:
+        """在当前线程执行 compute() 并封装异常"""
+        try:
+            return ToolExecutionResult(success=True, output=self.compute(input_data))
+        except Exception as e:
+            return self.failure(e)
+
+    def compute_batch(self, inputs: List[Dict[str, Any]]) -> List[Any]:
+        """
+        批量计算逻辑，默认逐个调用 compute()；可向量化的工具覆盖此方法
+
+        Args:
+            inputs: 工具输入列表
+
+        Returns:
+            List[Any]: 与 inputs 一一对应的输出；抛出异常时整批失败
+        """
+        return [self.compute(input_data) for input_data in inputs]
+
+    async def execute_batch(self, inputs: List[Dict[str, Any]]) -> List[ToolExecutionResult]:
+        """
+        批量执行，默认并发调用 execute()；INLINE 通道的批量接口（如按批计费的远程服务）覆盖此方法
+
+        Args:
+            inputs: 工具输入列表
+
+        Returns:
+            List[ToolExecutionResult]: 与 inputs 一一对应的结果
+        """
+        return list(await asyncio.gather(*(self.execute(input_data) for input_data in inputs)))
+
+    def failure(self, error: Exception) -> ToolExecutionResult:
+        """将异常封装为 ToolExecutionResult"""
+        return ToolExecutionResult(
+            success=False,
+            error=StructuredError(
+                code="TOOL_EXCEPTION",
+                message=f"Tool {self.name} raised {type(error).__name__}: {error}",
+                severity="WARNING",
+                suggested_action="REPLAN",
+                metadata={"tool": self.name},
+            ),
+        )
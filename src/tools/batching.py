@@ -0,0 +1,183 @@
+"""
+工具调用合并
+同一工具（name@version）的并发调用在一个短窗口内合并为一次批量调用，结果逐一返回给各调用方：
+- 工具以 max_batch_size > 1 声明支持批量调用（见 BaseToolImpl.execute_batch / compute_batch）
+- 窗口从该工具第一个待合并的调用到达时开始计时，批次达到上限时立即发出
+- 每个调用仍各自经过输入校验、结果缓存与截止时间；发出前已放弃（超时或取消）的调用移出批次
+- 批次以调用方中最晚的截止时间为限（调用方无截止时间时按工具超时），全部调用方放弃后取消批次，
+  挂起的批量调用不会一直占用工具的并发槽位
+- 引擎并发启动的就绪步骤由此合并为一次工具调用，摊薄每次调用的固定开销（远程往返、模型前向、线程切换）
+"""
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from pydantic import BaseModel, Field
+
+from src.core.interfaces import BaseTool
+from src.core.protocols import ToolExecutionResult
+from .deadline import current_deadline, override_deadline
+
+
+class BatchingConfig(BaseModel):
+    """调用合并配置，对应 tool_runtime.batching 段"""
+    enabled: bool = False
+    window_ms: float = Field(default=2.0, ge=0)     # 等待更多调用加入批次的最长时间
+    max_batch_size: int = Field(default=64, ge=1)   # 全局批量上限，与工具声明的上限取较小值
+    exclude: List[str] = []                         # 不参与合并的工具
+
+
+def batch_limit(tool: BaseTool) -> int:
+    """工具声明的批量上限；未声明或未提供 execute_batch() 时为 1"""
+    if not callable(getattr(tool, "execute_batch", None)):
+        return 1
+    return max(1, int(getattr(tool, "max_batch_size", 1)))
+
+
+@dataclass
+class BatchCall:
+    """批次中的单个调用"""
+    input_data: Dict[str, Any]
+    trace_id: str
+    step_id: Optional[str]
+    future: "asyncio.Future[ToolExecutionResult]"
+    deadline: Optional[float] = None    # 调用方的绝对截止时间（loop.time() 时钟）
+
+
+BatchExecutor = Callable[[BaseTool, List[BatchCall]], Awaitable[List[ToolExecutionResult]]]
+
+
+class _Pending:
+    """正在收集的批次"""
+
+    __slots__ = ("tool", "calls", "timer")
+
+    def __init__(self, tool: BaseTool, timer: asyncio.TimerHandle):
+        self.tool = tool
+        self.calls: List[BatchCall] = []
+        self.timer = timer
+
+
+class ToolCallCoalescer:
+    """按工具收集并发调用，交由 execute 批量执行后按调用分发结果"""
+
+    def __init__(self, execute: BatchExecutor, config: Optional[BatchingConfig] = None):
+        """
+        Args:
+            execute: 批量执行函数，返回与批次调用一一对应的结果
+            config: 合并配置
+        """
+        self.config = config or BatchingConfig()
+        self._execute = execute
+        self._excluded = set(self.config.exclude)
+        self._pending: Dict[Tuple[str, str], _Pending] = {}
+        self._running: Set["asyncio.Task[None]"] = set()
+        self.batches = 0
+        self.calls = 0
+
+    def applies(self, tool: BaseTool) -> bool:
+        """工具调用是否参与合并"""
+        return (
+            self.config.enabled
+            and tool.name not in self._excluded
+            and batch_limit(tool) > 1
+        )
+
+    def limit(self, tool: BaseTool) -> int:
+        """工具的实际批量上限"""
+        return min(batch_limit(tool), self.config.max_batch_size)
+
+    async def submit(
+        self,
+        tool: BaseTool,
+        input_data: Dict[str, Any],
+        trace_id: str = "",
+        step_id: Optional[str] = None,
+    ) -> ToolExecutionResult:
+        """
+        将调用加入该工具当前的批次并等待其结果
+
+        Args:
+            tool: 支持批量调用的工具
+            input_data: 工具输入
+            trace_id: 追踪 ID
+            step_id: 所属计划步骤 ID
+
+        Returns:
+            ToolExecutionResult: 本调用的结果
+        """
+        loop = asyncio.get_running_loop()
+        key = (tool.name, tool.version)
+        pending = self._pending.get(key)
+        if pending is None:
+            timer = loop.call_later(self.config.window_ms / 1000, self._flush, key)
+            pending = self._pending[key] = _Pending(tool, timer)
+        call = BatchCall(input_data, trace_id, step_id, loop.create_future(), current_deadline())
+        pending.calls.append(call)
+        if len(pending.calls) >= self.limit(tool):
+            self._flush(key)
+        return await call.future
+
+    def _flush(self, key: Tuple[str, str]) -> None:
+        """发出批次，跳过已被调用方放弃的调用"""
+        pending = self._pending.pop(key, None)
+        if pending is None:
+            return
+        pending.timer.cancel()
+        calls = [call for call in pending.calls if not call.future.done()]
+        if not calls:
+            return
+        self.batches += 1
+        self.calls += len(calls)
+        deadline = self._deadline(pending.tool, calls)
+        task = asyncio.ensure_future(self._run(pending.tool, calls, deadline))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+        def abandon(_: "asyncio.Future[ToolExecutionResult]") -> None:
+            # 全部调用方都已得到结果或放弃时，不再需要批次的结果
+            if not task.done() and all(call.future.done() for call in calls):
+                task.cancel()
+
+        for call in calls:
+            call.future.add_done_callback(abandon)
+
+    @staticmethod
+    def _deadline(tool: BaseTool, calls: List[BatchCall]) -> Optional[float]:
+        """批次的截止时间：调用方截止时间中最晚者；存在无截止时间的调用方时按工具超时计算"""
+        deadlines = [call.deadline for call in calls if call.deadline is not None]
+        if len(deadlines) == len(calls):
+            return max(deadlines)
+        if tool.timeout_ms is None:
+            return None
+        return asyncio.get_running_loop().time() + tool.timeout_ms / 1000
+
+    async def _run(
+        self,
+        tool: BaseTool,
+        calls: List[BatchCall],
+        deadline: Optional[float],
+    ) -> None:
+        try:
+            with override_deadline(deadline):
+                async with asyncio.timeout_at(deadline):
+                    results = await self._execute(tool, calls)
+            for call, result in zip(calls, results):
+                if not call.future.done():
+                    call.future.set_result(result)
+        except Exception as e:
+            for call in calls:
+                if not call.future.done():
+                    call.future.set_exception(e)
+        finally:
+            for call in calls:
+                if not call.future.done():
+                    call.future.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """批次数与平均批量大小"""
+        return {
+            "batches": self.batches,
+            "calls": self.calls,
+            "mean_batch_size": self.calls / self.batches if self.batches else 0.0,
+        }
@@ -0,0 +1,421 @@
+"""
+安全计算器工具
+- 表达式先经 AST 白名单校验再编译为代码对象：只允许数字常量、变量、算术 / 比较 / 布尔运算、
+  条件表达式与白名单函数调用，属性访问、下标、推导式、lambda 等一律拒绝，执行时不提供内建函数
+- 幂运算在执行时检查整数结果的位数，避免 9 ** 9 ** 9 之类的表达式耗尽 CPU 与内存；
+  负数的非整数次幂与 math.pow 一样抛出 ValueError，不返回复数
+- 编译结果按表达式源文本做 LRU 缓存，同一表达式只解析、校验、编译一次
+- 批量模式在多组变量绑定上求值同一表达式：安装了 NumPy 时整列转为 float64 数组一次求值，
+  布尔运算、链式比较与条件表达式改写为逐元素运算（and / or 与标量求值一样返回操作数的值，
+  如 x and 5 在 x 非零时为 5）；未安装时逐行执行已编译的代码。
+  除零、定义域错误等无效行在向量化路径上为 inf / nan，在逐行路径上为 nan
+"""
+import ast
+import math
+import threading
+from collections import OrderedDict
+from types import CodeType
+from typing import Any, Callable, Dict, FrozenSet, List, Mapping, Optional, Sequence, Tuple
+
+from src.tools.base_tool import BaseToolImpl, ExecutionLane
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:   # 可选依赖：批量模式退化为逐行求值
+    HAS_NUMPY = False
+
+
+MAX_INT_BITS = 10_000          # 整数幂结果的位数上限
+MAX_ROUND_DIGITS = 1_000       # round() 的 ndigits 绝对值上限
+
+_BINARY = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow)
+_UNARY = (ast.UAdd, ast.USub, ast.Not)
+_COMPARE = (ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE)
+
+
+class ExpressionError(ValueError):
+    """表达式含有不允许的语法、未知函数或未绑定的变量"""
+
+
+def _check_digits(digits: Optional[int]) -> None:
+    # 整数按负 ndigits 取整需要计算 10 ** -ndigits
+    if digits is not None and abs(digits) > MAX_ROUND_DIGITS:
+        raise OverflowError(f"round() digits must be within ±{MAX_ROUND_DIGITS}")
+
+
+def _round(x: Any, digits: Optional[int] = None) -> Any:
+    _check_digits(digits)
+    return round(x, digits)
+
+
+def _pow(base: Any, exponent: Any) -> Any:
+    if (
+        isinstance(base, int) and isinstance(exponent, int)
+        and exponent > 0 and abs(base) > 1
+        and base.bit_length() * exponent > MAX_INT_BITS
+    ):
+        raise OverflowError(f"integer power exceeds {MAX_INT_BITS} bits")
+    result = base ** exponent
+    if isinstance(result, complex):
+        raise ValueError("math domain error")
+    return result
+
+
+CONSTANTS: Dict[str, float] = {"pi": math.pi, "e": math.e, "tau": math.tau, "inf": math.inf}
+
+FUNCTIONS: Dict[str, Callable[..., Any]] = {
+    "abs": abs,
+    "min": min,
+    "max": max,
+    "round": _round,
+    "sqrt": math.sqrt,
+    "exp": math.exp,
+    "log": math.log,
+    "log2": math.log2,
+    "log10": math.log10,
+    "sin": math.sin,
+    "cos": math.cos,
+    "tan": math.tan,
+    "asin": math.asin,
+    "acos": math.acos,
+    "atan": math.atan,
+    "atan2": math.atan2,
+    "hypot": math.hypot,
+    "floor": math.floor,
+    "ceil": math.ceil,
+}
+
+
+_SCALAR_NAMESPACE: Dict[str, Any] = {
+    "__builtins__": {}, **CONSTANTS, **FUNCTIONS, "_pow": _pow,
+}
+_VECTOR_NAMESPACE: Dict[str, Any] = {}
+
+
+def _vector_namespace() -> Dict[str, Any]:
+    """批量模式的求值环境：与 FUNCTIONS 同名的逐元素实现"""
+    if not _VECTOR_NAMESPACE:
+        _VECTOR_NAMESPACE.update(_vector_functions())
+    return _VECTOR_NAMESPACE
+
+
+def _vector_functions() -> Dict[str, Any]:
+    def log(x: Any, base: Optional[Any] = None) -> Any:
+        return np.log(x) if base is None else np.log(x) / np.log(base)
+
+    def round_(x: Any, digits: int = 0) -> Any:
+        _check_digits(digits)
+        return np.round(x, digits)
+
+    return {
+        "abs": np.abs,
+        "min": lambda *args: np.minimum.reduce(np.broadcast_arrays(*args)),
+        "max": lambda *args: np.maximum.reduce(np.broadcast_arrays(*args)),
+        "round": round_,
+        "sqrt": np.sqrt,
+        "exp": np.exp,
+        "log": log,
+        "log2": np.log2,
+        "log10": np.log10,
+        "sin": np.sin,
+        "cos": np.cos,
+        "tan": np.tan,
+        "asin": np.arcsin,
+        "acos": np.arccos,
+        "atan": np.arctan,
+        "atan2": np.arctan2,
+        "hypot": np.hypot,
+        "floor": np.floor,
+        "ceil": np.ceil,
+        "_pow": np.float_power,
+        "_not": np.logical_not,
+        "_and": lambda *args: np.logical_and.reduce(np.broadcast_arrays(*args)),
+        "_where": np.where,
+        "__builtins__": {},
+        **CONSTANTS,
+    }
+
+
+# ==============================================================================
+# 编译
+# ==============================================================================
+
+def _call(name: str, args: List[ast.expr]) -> ast.Call:
+    return ast.Call(func=ast.Name(id=name, ctx=ast.Load()), args=args, keywords=[])
+
+
+class _Checker(ast.NodeTransformer):
+    """白名单校验并改写 AST；vector 为 True 时把标量专用的语法改写为逐元素函数"""
+
+    def __init__(self, vector: bool):
+        self.vector = vector
+        self.variables: set[str] = set()
+
+    def generic_visit(self, node: ast.AST) -> ast.AST:
+        raise ExpressionError(f"{type(node).__name__} is not allowed in expressions")
+
+    def visit_Expression(self, node: ast.Expression) -> ast.AST:
+        node.body = self.visit(node.body)
+        return node
+
+    def visit_Constant(self, node: ast.Constant) -> ast.AST:
+        if type(node.value) not in (int, float, bool):
+            raise ExpressionError(f"constant {node.value!r} is not a number")
+        return node
+
+    def visit_Name(self, node: ast.Name) -> ast.AST:
+        if node.id.startswith("_"):
+            raise ExpressionError(f"name {node.id!r} is reserved")
+        if node.id in FUNCTIONS:
+            raise ExpressionError(f"function {node.id!r} must be called")
+        if node.id not in CONSTANTS:
+            self.variables.add(node.id)
+        return node
+
+    def visit_BinOp(self, node: ast.BinOp) -> ast.AST:
+        if not isinstance(node.op, _BINARY):
+            raise ExpressionError(f"operator {type(node.op).__name__} is not allowed")
+        left, right = self.visit(node.left), self.visit(node.right)
+        if isinstance(node.op, ast.Pow):
+            return _call("_pow", [left, right])
+        return ast.BinOp(left=left, op=node.op, right=right)
+
+    def visit_UnaryOp(self, node: ast.UnaryOp) -> ast.AST:
+        if not isinstance(node.op, _UNARY):
+            raise ExpressionError(f"operator {type(node.op).__name__} is not allowed")
+        operand = self.visit(node.operand)
+        if self.vector and isinstance(node.op, ast.Not):
+            return _call("_not", [operand])
+        return ast.UnaryOp(op=node.op, operand=operand)
+
+    def visit_BoolOp(self, node: ast.BoolOp) -> ast.AST:
+        values = [self.visit(value) for value in node.values]
+        if not self.vector:
+            return ast.BoolOp(op=node.op, values=values)
+        # 保持 Python 的取值语义而非逻辑 0 / 1：a and b → a ? b : a，a or b → a ? a : b，从右向左折叠
+        result: ast.expr = values[-1]
+        for value in reversed(values[:-1]):
+            if isinstance(node.op, ast.And):
+                result = _call("_where", [value, result, value])
+            else:
+                result = _call("_where", [value, value, result])
+        return result
+
+    def visit_Compare(self, node: ast.Compare) -> ast.AST:
+        if not all(isinstance(op, _COMPARE) for op in node.ops):
+            raise ExpressionError("only ==, !=, <, <=, >, >= comparisons are allowed")
+        operands = [self.visit(node.left)] + [self.visit(c) for c in node.comparators]
+        if self.vector and len(node.ops) > 1:
+            # 数组不支持链式比较：a < b < c 改写为 (a < b) & (b < c)
+            return _call("_and", [
+                ast.Compare(left=operands[i], ops=[op], comparators=[operands[i + 1]])
+                for i, op in enumerate(node.ops)
+            ])
+        return ast.Compare(left=operands[0], ops=node.ops, comparators=operands[1:])
+
+    def visit_IfExp(self, node: ast.IfExp) -> ast.AST:
+        test, body, orelse = self.visit(node.test), self.visit(node.body), self.visit(node.orelse)
+        if self.vector:
+            return _call("_where", [test, body, orelse])
+        return ast.IfExp(test=test, body=body, orelse=orelse)
+
+    def visit_Call(self, node: ast.Call) -> ast.AST:
+        if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS:
+            raise ExpressionError(f"call to {ast.unparse(node.func)!r} is not allowed")
+        if node.keywords or any(isinstance(arg, ast.Starred) for arg in node.args):
+            raise ExpressionError(f"{node.func.id}() only accepts positional arguments")
+        return _call(node.func.id, [self.visit(arg) for arg in node.args])
+
+
+def _compile(source: str, vector: bool) -> Tuple[CodeType, FrozenSet[str]]:
+    checker = _Checker(vector)
+    try:
+        tree = ast.parse(source.strip(), mode="eval")
+        tree = ast.fix_missing_locations(checker.visit(tree))
+        return compile(tree, "<expression>", "eval"), frozenset(checker.variables)
+    except SyntaxError as e:
+        raise ExpressionError(f"invalid expression: {e.msg}") from None
+    except (RecursionError, MemoryError):
+        # 解析、校验与编译都按嵌套深度递归：过深的表达式（如一长串一元负号）按不合法输入处理
+        raise ExpressionError("expression is nested too deeply") from None
+
+
+class CompiledExpression:
+    """校验并编译后的表达式；批量模式的代码在首次使用时编译"""
+
+    __slots__ = ("source", "variables", "_code", "_vector_code")
+
+    def __init__(self, source: str):
+        """
+        Raises:
+            ExpressionError: 语法错误或含有不允许的内容
+        """
+        self.source = source
+        self._code, self.variables = _compile(source, vector=False)
+        self._vector_code: Optional[CodeType] = None
+
+    def _namespace(self, variables: Mapping[str, Any], base: Mapping[str, Any]) -> Dict[str, Any]:
+        missing = self.variables - variables.keys()
+        if missing:
+            raise ExpressionError(f"unbound variables: {', '.join(sorted(missing))}")
+        # 常量、函数与 __builtins__ 最后写入，绑定无法覆盖
+        namespace = dict(variables)
+        namespace.update(base)
+        return namespace
+
+    def evaluate(self, variables: Optional[Mapping[str, float]] = None) -> Any:
+        """
+        以一组变量绑定求值
+
+        Args:
+            variables: 变量名 → 数值
+
+        Returns:
+            Any: 计算结果
+
+        Raises:
+            ExpressionError: 有未绑定的变量
+            ArithmeticError / ValueError: 除零、溢出、定义域错误等
+        """
+        return eval(self._code, self._namespace(variables or {}, _SCALAR_NAMESPACE))
+
+    def evaluate_batch(
+        self,
+        columns: Mapping[str, Sequence[float]],
+        variables: Optional[Mapping[str, float]] = None,
+    ) -> List[float]:
+        """
+        在多组变量绑定上以 float64 求值
+
+        Args:
+            columns: 变量名 → 每行的取值，各列长度相同
+            variables: 所有行共用的标量变量
+
+        Returns:
+            List[float]: 每行的结果
+        """
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) > 1:
+            raise ExpressionError("batch columns must have the same length")
+        rows = lengths.pop() if lengths else 1
+        if not HAS_NUMPY:
+            return self._evaluate_rows(columns, variables or {}, rows)
+
+        if self._vector_code is None:
+            self._vector_code, _ = _compile(self.source, vector=True)
+        bindings: Dict[str, Any] = dict(variables or {})
+        for name, values in columns.items():
+            bindings[name] = np.asarray(values, dtype=np.float64)
+        namespace = self._namespace(bindings, _vector_namespace())
+        with np.errstate(all="ignore"):
+            result = eval(self._vector_code, namespace)
+        output: List[float] = np.broadcast_to(
+            np.asarray(result, dtype=np.float64), (rows,)
+        ).tolist()
+        return output
+
+    def _evaluate_rows(
+        self, columns: Mapping[str, Sequence[float]], variables: Mapping[str, float], rows: int
+    ) -> List[float]:
+        namespace = self._namespace({**variables, **dict.fromkeys(columns, 0.0)}, _SCALAR_NAMESPACE)
+        code, names = self._code, list(columns)
+        results: List[float] = []
+        for row in range(rows):
+            for name in names:
+                namespace[name] = float(columns[name][row])
+            try:
+                results.append(float(eval(code, namespace)))
+            except (ArithmeticError, ValueError):
+                results.append(math.nan)
+        return results
+
+
+class ExpressionCompiler:
+    """按源文本缓存编译结果的 LRU 编译器，可在多个线程中共享"""
+
+    def __init__(self, max_entries: int = 256, max_length: int = 1000):
+        """
+        Args:
+            max_entries: 缓存的表达式数上限
+            max_length: 表达式源文本的长度上限
+        """
+        self.max_entries = max_entries
+        self.max_length = max_length
+        self._entries: "OrderedDict[str, CompiledExpression]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def compile(self, source: str) -> CompiledExpression:
+        """
+        获取表达式的编译结果，未命中时编译并缓存
+
+        Raises:
+            ExpressionError: 表达式过长或不合法（不缓存）
+        """
+        with self._lock:
+            compiled = self._entries.get(source)
+            if compiled is not None:
+                self._entries.move_to_end(source)
+                self.hits += 1
+                return compiled
+        if len(source) > self.max_length:
+            raise ExpressionError(f"expression longer than {self.max_length} characters")
+        compiled = CompiledExpression(source)
+        with self._lock:
+            self.misses += 1
+            self._entries[source] = compiled
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return compiled
+
+
+# ==============================================================================
+# 工具
+# ==============================================================================
+
+class CalculatorTool(BaseToolImpl):
+    """
+    算术表达式计算
+    输入 variables 为标量绑定；给出 batch（变量名 → 数组）时按行批量求值，返回 results 列表。
+    在线程通道中执行：未安装 NumPy 时大批量的逐行求值耗时可达数十毫秒，不能占用事件循环。
+    """
+    name = "calculator"
+    version = "1.0.0"
+    execution_lane = ExecutionLane.THREAD
+    input_schema = {
+        "type": "object",
+        "properties": {
+            "expression": {"type": "string", "minLength": 1},
+            "variables": {"type": "object", "additionalProperties": {"type": "number"}},
+            "batch": {
+                "type": "object",
+                "additionalProperties": {"type": "array", "items": {"type": "number"}},
+            },
+        },
+        "required": ["expression"],
+        "additionalProperties": False,
+    }
+    output_schema = {
+        "type": "object",
+        "properties": {"result": {"type": "number"}, "results": {"type": "array"}},
+    }
+
+    def __init__(self, cache_size: int = 256, max_length: int = 1000):
+        """
+        Args:
+            cache_size: 编译缓存的表达式数上限
+            max_length: 表达式源文本的长度上限
+        """
+        self.compiler = ExpressionCompiler(cache_size, max_length)
+
+    def compute(self, input_data: Dict[str, Any]) -> Any:
+        expression = self.compiler.compile(input_data["expression"])
+        variables = input_data.get("variables") or {}
+        if "batch" in input_data:
+            return {"results": expression.evaluate_batch(input_data["batch"], variables)}
+        return {"result": expression.evaluate(variables)}
@@ -0,0 +1,530 @@
+"""
+本地 BM25 检索工具
+索引是离线构建的单个只读文件，查询时以 mmap 打开：打开只解析文件头，词典、倒排与文档
+都按需从映射页中读取，打开耗时与文档数无关，多个进程打开同一索引时共享页缓存。
+
+文件布局（小端序，各段按 8 字节对齐，偏移记录在文件头）：
+    header     魔数、块大小、文档数、词项数、k1、b、平均文档长度、各段偏移
+    docs       文档存储：每篇文档 zlib 压缩的 JSON，uint64 偏移表在其后
+    norms      float32[文档数]：k1 * (1 - b + b * 文档长度 / 平均长度)
+    postings   倒排块数据：块内文档号差值与词频，按块内最大值选择 1 / 2 / 4 字节定宽编码
+    blocks     每个倒排块一条定长记录：块内最大文档号、条目数、编码宽度、块分数上界、数据偏移
+    terms      词典：按 UTF-8 字节序排序，uint64 偏移表 + 字节串，查询时二分查找
+    term_info  每个词项一条定长记录：文档频率、块数、首块序号、全局分数上界
+
+查询按 BM25 打分，以 MaxScore 动态剪枝求 top-k：查询词按分数上界升序排列，累计上界不超过
+当前第 k 名分数的词为非必要词，只在必要词的倒排上枚举候选文档，非必要词按文档号跳块探查。
+必要词按块对齐的文档号窗口处理：窗口内各块的分数上界之和不足以进入 top-k 时整个窗口跳过，
+否则在窗口内批量累加分数，减少逐文档的解释器开销。
+
+构建索引：
+    python -m src.tools.builtin.search_tool corpus.jsonl data/search.idx
+corpus.jsonl 每行一篇文档，如 {"id": "doc-1", "title": "...", "text": "..."}；
+title 与 text 参与索引，整篇文档原样存入文档存储。
+"""
+import argparse
+import json
+import math
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from heapq import heappush, heapreplace
+from itertools import accumulate
+from pathlib import Path
+from typing import (
+    Any, BinaryIO, Dict, Iterable, Iterator, List, Literal, Mapping, Optional, Sequence, Tuple,
+    Union,
+)
+
+from src.tools.base_tool import BaseToolImpl, ExecutionLane
+
+
+MAGIC = b"MASBM25\x01"
+
+_HEADER = struct.Struct("<8sI2Q3d9Q")
+_HEADER_SIZE = 128
+_BLOCK = struct.Struct("<IHBBfQ")      # 块内最大文档号、条目数、文档号宽度、词频宽度、块上界、偏移
+_TERM = struct.Struct("<IIQf")         # 文档频率、块数、首块序号、全局上界
+_CODES: Dict[int, Literal["B", "H", "I"]] = {1: "B", 2: "H", 4: "I"}
+_END = 1 << 32                         # 倒排耗尽时的文档号
+
+_TOKEN = re.compile(r"[\u4e00-\u9fff]|[^\W_\u4e00-\u9fff]+")
+
+
+class SearchIndexError(ValueError):
+    """索引文件格式错误或与当前平台不兼容"""
+
+
+def tokenize(text: str) -> List[str]:
+    """小写化分词：连续的字母数字为一个词，汉字逐字成词"""
+    return _TOKEN.findall(text.lower())
+
+
+def _width(value: int) -> int:
+    return 1 if value < 1 << 8 else 2 if value < 1 << 16 else 4
+
+
+def _align(f: BinaryIO) -> int:
+    position = f.tell()
+    padding = -position % 8
+    f.write(b"\0" * padding)
+    return position + padding
+
+
+def _idf(num_docs: int, df: int) -> float:
+    return math.log(1 + (num_docs - df + 0.5) / (df + 0.5))
+
+
+def _check_platform() -> None:
+    # 数组段直接以机器字节序读写
+    if sys.byteorder != "little" or array("I").itemsize != 4:
+        raise SearchIndexError("BM25 index files require a little-endian platform")
+
+
+# ==============================================================================
+# 离线索引器
+# ==============================================================================
+
+def build_index(
+    documents: Iterable[Mapping[str, Any]],
+    path: Union[str, Path],
+    k1: float = 1.2,
+    b: float = 0.75,
+    block_size: int = 128,
+) -> int:
+    """
+    构建索引文件；先写入同目录的临时文件，完成后原子替换目标文件
+
+    Args:
+        documents: 文档序列，title 与 text 字段参与索引
+        path: 索引文件路径
+        k1: BM25 词频饱和参数
+        b: BM25 文档长度归一化参数
+        block_size: 倒排块大小（条目数）
+
+    Returns:
+        int: 索引的文档数
+    """
+    _check_platform()
+    if not 1 <= block_size < 1 << 16:
+        raise ValueError("block_size must be in [1, 65535]")
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(path.name + ".tmp")
+
+    postings: Dict[str, Tuple["array[int]", "array[int]"]] = {}
+    lengths = array("I")
+    doc_offsets = array("Q", [0])
+    with open(temporary, "wb") as f:
+        f.write(b"\0" * _HEADER_SIZE)
+
+        # 文档存储与倒排收集
+        docs_offset = f.tell()
+        for number, document in enumerate(documents):
+            counts = Counter(tokenize(f"{document.get('title', '')}\n{document.get('text', '')}"))
+            for term, tf in counts.items():
+                entry = postings.get(term)
+                if entry is None:
+                    entry = postings[term] = (array("I"), array("I"))
+                entry[0].append(number)
+                entry[1].append(tf)
+            lengths.append(sum(counts.values()))
+            blob = zlib.compress(json.dumps(dict(document), ensure_ascii=False).encode())
+            f.write(blob)
+            doc_offsets.append(doc_offsets[-1] + len(blob))
+        num_docs = len(lengths)
+        doc_offsets_offset = _align(f)
+        f.write(doc_offsets.tobytes())
+
+        avgdl = sum(lengths) / num_docs if num_docs else 1.0
+        norms = array("f", (k1 * (1 - b + b * length / avgdl) for length in lengths))
+        norms_offset = _align(f)
+        f.write(norms.tobytes())
+        del lengths
+
+        # 倒排块；分数上界按查询时读到的 float32 归一化值计算，并向上留出 float32 舍入余量
+        postings_offset = _align(f)
+        encoded = sorted(term.encode() for term in postings)
+        blocks = bytearray()
+        term_info = bytearray()
+        num_blocks = 0
+        for term_bytes in encoded:
+            docs, tfs = postings.pop(term_bytes.decode())
+            weight = _idf(num_docs, len(docs)) * (k1 + 1)
+            first_block, term_max, base = num_blocks, 0.0, 0
+            for start in range(0, len(docs), block_size):
+                chunk_docs = docs[start:start + block_size]
+                chunk_tfs = tfs[start:start + block_size]
+                gaps = array("I", [chunk_docs[0] - base])
+                gaps.extend(chunk_docs[i] - chunk_docs[i - 1] for i in range(1, len(chunk_docs)))
+                doc_width, tf_width = _width(max(gaps)), _width(max(chunk_tfs))
+                block_max = max(
+                    weight * tf / (tf + norms[doc]) for doc, tf in zip(chunk_docs, chunk_tfs)
+                ) * (1 + 1e-6)
+                term_max = max(term_max, block_max)
+                blocks += _BLOCK.pack(
+                    chunk_docs[-1], len(chunk_docs), doc_width, tf_width, block_max, f.tell()
+                )
+                f.write(array(_CODES[doc_width], gaps).tobytes())
+                f.write(array(_CODES[tf_width], chunk_tfs).tobytes())
+                base = chunk_docs[-1]
+                num_blocks += 1
+            term_info += _TERM.pack(len(docs), num_blocks - first_block, first_block, term_max)
+
+        blocks_offset = _align(f)
+        f.write(blocks)
+        term_offsets = array("Q", [0])
+        for term_bytes in encoded:
+            term_offsets.append(term_offsets[-1] + len(term_bytes))
+        term_offsets_offset = _align(f)
+        f.write(term_offsets.tobytes())
+        term_bytes_offset = f.tell()
+        f.write(b"".join(encoded))
+        term_info_offset = _align(f)
+        f.write(term_info)
+
+        f.seek(0)
+        f.write(_HEADER.pack(
+            MAGIC, block_size, num_docs, len(encoded), k1, b, avgdl,
+            docs_offset, doc_offsets_offset, norms_offset, postings_offset, blocks_offset,
+            term_offsets_offset, term_bytes_offset, term_info_offset, 0,
+        ))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+    return num_docs
+
+
+# ==============================================================================
+# 查询
+# ==============================================================================
+
+class _Cursor:
+    """单个查询词的倒排游标，按块解码"""
+
+    __slots__ = (
+        "view", "norms", "weight", "max_score", "blocks", "lasts",
+        "block", "docs", "tfs", "pos", "doc", "block_max",
+    )
+
+    def __init__(
+        self,
+        view: "memoryview[int]",
+        norms: "memoryview[float]",
+        weight: float,
+        max_score: float,
+        blocks: List[Tuple[int, int, int, int, float, int]],
+    ):
+        self.view = view
+        self.norms = norms
+        self.weight = weight
+        self.max_score = max_score
+        self.blocks = blocks
+        self.lasts = [block[0] for block in blocks]
+        self.docs: List[int] = []
+        self.tfs: List[int] = []
+        self._load(0)
+
+    def _load(self, block: int) -> None:
+        self.block = block
+        self.pos = 0
+        if block >= len(self.blocks):
+            self.doc = _END
+            self.block_max = 0.0
+            return
+        _, count, doc_width, tf_width, self.block_max, offset = self.blocks[block]
+        tfs_offset = offset + count * doc_width
+        gaps = self.view[offset:tfs_offset].cast(_CODES[doc_width])
+        self.docs = list(accumulate(gaps, initial=self.lasts[block - 1] if block else 0))
+        del self.docs[0]
+        self.tfs = self.view[tfs_offset:tfs_offset + count * tf_width].cast(
+            _CODES[tf_width]
+        ).tolist()
+        self.doc = self.docs[0]
+
+    def _seek(self, pos: int) -> None:
+        if pos < len(self.docs):
+            self.pos = pos
+            self.doc = self.docs[pos]
+        else:
+            self._load(self.block + 1)
+
+    def next(self) -> None:
+        self._seek(self.pos + 1)
+
+    def skip(self, high: int) -> None:
+        """跳过文档号不大于 high 的条目（high 不超过当前块的最大文档号）"""
+        self._seek(bisect_right(self.docs, high, self.pos))
+
+    def accumulate(self, high: int, scores: Dict[int, float]) -> None:
+        """将文档号不大于 high 的条目的分数累加到 scores，并跳过这些条目"""
+        end = bisect_right(self.docs, high, self.pos)
+        weight, norms, get = self.weight, self.norms, scores.get
+        for doc, tf in zip(self.docs[self.pos:end], self.tfs[self.pos:end]):
+            scores[doc] = get(doc, 0.0) + weight * tf / (tf + norms[doc])
+        self._seek(end)
+
+    def advance(self, target: int) -> None:
+        """移动到第一个文档号不小于 target 的条目，跳过的块不解码"""
+        if target <= self.doc:
+            return
+        if target > self.lasts[self.block]:
+            self._load(bisect_left(self.lasts, target, self.block + 1))
+            if target <= self.doc:
+                return
+        self.pos = bisect_left(self.docs, target, self.pos)
+        self.doc = self.docs[self.pos]
+
+    def score(self) -> float:
+        tf = self.tfs[self.pos]
+        return self.weight * tf / (tf + self.norms[self.doc])
+
+
+class SearchIndex:
+    """以 mmap 打开的只读 BM25 索引，可在多个线程中并发查询"""
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        打开索引文件，只读取文件头
+
+        Raises:
+            OSError: 文件无法打开
+            SearchIndexError: 文件格式错误
+        """
+        _check_platform()
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mm) < _HEADER_SIZE or self._mm[:len(MAGIC)] != MAGIC:
+            self._mm.close()
+            raise SearchIndexError(f"{self.path} is not a BM25 index")
+        (
+            _, self.block_size, self.num_docs, self.num_terms, self.k1, self.b, self.avgdl,
+            self._docs, doc_offsets, norms, _, self._blocks,
+            term_offsets, self._term_bytes, self._term_info, _,
+        ) = _HEADER.unpack_from(self._mm)
+        self._view = memoryview(self._mm)
+        self._doc_offsets = self._view[doc_offsets:doc_offsets + 8 * (self.num_docs + 1)].cast("Q")
+        self._norms = self._view[norms:norms + 4 * self.num_docs].cast("f")
+        self._term_offsets = self._view[
+            term_offsets:term_offsets + 8 * (self.num_terms + 1)
+        ].cast("Q")
+
+    def close(self) -> None:
+        """释放映射；之后不可再查询"""
+        for view in (self._doc_offsets, self._norms, self._term_offsets, self._view):
+            view.release()
+        self._mm.close()
+
+    def __enter__(self) -> "SearchIndex":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def _lookup(self, term: bytes) -> Optional[int]:
+        offsets, base = self._term_offsets, self._term_bytes
+        low, high = 0, int(self.num_terms)
+        while low < high:
+            middle = (low + high) // 2
+            probe = self._mm[base + offsets[middle]:base + offsets[middle + 1]]
+            if probe < term:
+                low = middle + 1
+            elif probe > term:
+                high = middle
+            else:
+                return middle
+        return None
+
+    def _cursor(self, term: str) -> Optional[_Cursor]:
+        number = self._lookup(term.encode())
+        if number is None:
+            return None
+        df, num_blocks, first_block, max_score = _TERM.unpack_from(
+            self._mm, self._term_info + number * _TERM.size
+        )
+        start = self._blocks + first_block * _BLOCK.size
+        blocks = list(_BLOCK.iter_unpack(self._view[start:start + num_blocks * _BLOCK.size]))
+        weight = _idf(self.num_docs, df) * (self.k1 + 1)
+        return _Cursor(self._view, self._norms, weight, max_score, blocks)
+
+    def document_frequency(self, term: str) -> int:
+        """词项的文档频率，term 需为 tokenize() 的输出"""
+        number = self._lookup(term.encode())
+        if number is None:
+            return 0
+        return int(_TERM.unpack_from(self._mm, self._term_info + number * _TERM.size)[0])
+
+    def document(self, number: int) -> Dict[str, Any]:
+        """按内部文档号读取原始文档"""
+        start = self._docs + self._doc_offsets[number]
+        end = self._docs + self._doc_offsets[number + 1]
+        document: Dict[str, Any] = json.loads(zlib.decompress(self._mm[start:end]))
+        return document
+
+    def search(self, query: str, top_k: int = 10) -> List[Tuple[int, float]]:
+        """
+        BM25 top-k 检索
+
+        Args:
+            query: 查询文本，重复的词只计一次
+            top_k: 返回的文档数
+
+        Returns:
+            List[Tuple[int, float]]: (内部文档号, 分数)，按分数降序，同分按文档号升序
+        """
+        cursors = [
+            cursor for term in dict.fromkeys(tokenize(query))
+            if (cursor := self._cursor(term)) is not None
+        ]
+        if not cursors or top_k <= 0:
+            return []
+        cursors.sort(key=lambda cursor: cursor.max_score)
+        bounds = list(accumulate(cursor.max_score for cursor in cursors))
+
+        heap: List[Tuple[float, int]] = []      # (分数, -文档号) 最小堆，堆顶为当前第 k 名
+        threshold = 0.0
+        essential = 0                           # cursors[essential:] 为必要词
+        while essential < len(cursors):
+            active = [cursor for cursor in cursors[essential:] if cursor.doc != _END]
+            if not active:
+                break
+            # 窗口止于必要词当前块中最早结束的一块，窗口内每个必要词的条目都在其当前块中
+            high = min(cursor.lasts[cursor.block] for cursor in active)
+            window = [cursor for cursor in active if cursor.doc <= high]
+            rest = bounds[essential - 1] if essential else 0.0
+            full = len(heap) == top_k
+            if full and rest + sum(cursor.block_max for cursor in window) <= threshold:
+                for cursor in window:
+                    cursor.skip(high)
+                continue
+
+            scores: Dict[int, float] = {}
+            for cursor in window:
+                cursor.accumulate(high, scores)
+            cutoff = threshold - rest if full else -1.0
+            for doc in sorted(doc for doc, score in scores.items() if score > cutoff):
+                score = scores[doc]
+                for i in range(essential - 1, -1, -1):
+                    if score + bounds[i] <= threshold:
+                        break
+                    cursor = cursors[i]
+                    cursor.advance(doc)
+                    if cursor.doc == doc:
+                        score += cursor.score()
+                if len(heap) < top_k:
+                    heappush(heap, (score, -doc))
+                elif score > threshold:
+                    heapreplace(heap, (score, -doc))
+                if len(heap) == top_k:
+                    threshold = heap[0][0]
+            # 窗口处理完后再调整必要词，窗口内的非必要词探查范围保持不变
+            while essential < len(cursors) and bounds[essential] <= threshold:
+                essential += 1
+        return [(-negated, score) for score, negated in sorted(heap, reverse=True)]
+
+
+# ==============================================================================
+# 工具
+# ==============================================================================
+
+class SearchTool(BaseToolImpl):
+    """
+    本地全文检索
+    索引在第一次调用时打开；查询在线程通道中执行，不阻塞事件循环。
+    开启调用合并时，一批查询在一次线程切换中依次执行。
+    """
+    name = "search"
+    version = "1.0.0"
+    execution_lane = ExecutionLane.THREAD
+    max_batch_size = 32
+    input_schema = {
+        "type": "object",
+        "properties": {
+            "query": {"type": "string", "minLength": 1},
+            "top_k": {"type": "integer", "minimum": 1, "maximum": 100},
+        },
+        "required": ["query"],
+        "additionalProperties": False,
+    }
+    output_schema = {
+        "type": "object",
+        "properties": {"results": {"type": "array"}},
+    }
+
+    def __init__(self, index_path: Union[str, Path], top_k: int = 10, snippet_chars: int = 200):
+        """
+        Args:
+            index_path: build_index() 生成的索引文件
+            top_k: 默认返回的文档数
+            snippet_chars: 结果中正文摘录的最大字符数
+        """
+        self.index_path = Path(index_path)
+        self.top_k = top_k
+        self.snippet_chars = snippet_chars
+        self._index: Optional[SearchIndex] = None
+        self._open_lock = threading.Lock()
+
+    @property
+    def index(self) -> SearchIndex:
+        if self._index is None:
+            with self._open_lock:
+                if self._index is None:
+                    self._index = SearchIndex(self.index_path)
+        return self._index
+
+    def compute(self, input_data: Dict[str, Any]) -> Any:
+        index = self.index
+        results = []
+        for number, score in index.search(input_data["query"], input_data.get("top_k", self.top_k)):
+            document = index.document(number)
+            results.append({
+                "id": document.get("id", number),
+                "title": document.get("title", ""),
+                "snippet": str(document.get("text", ""))[:self.snippet_chars],
+                "score": round(score, 4),
+            })
+        return {"results": results}
+
+    def close(self) -> None:
+        """关闭已打开的索引"""
+        if self._index is not None:
+            self._index.close()
+            self._index = None
+
+
+# ==============================================================================
+# 命令行
+# ==============================================================================
+
+def _read_jsonl(path: Path) -> Iterator[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """离线索引器入口"""
+    parser = argparse.ArgumentParser(description="Build a BM25 index for the search tool")
+    parser.add_argument("corpus", help="JSON Lines file, one document per line")
+    parser.add_argument("index", help="output index file")
+    parser.add_argument("--k1", type=float, default=1.2)
+    parser.add_argument("--b", type=float, default=0.75)
+    parser.add_argument("--block-size", type=int, default=128)
+    args = parser.parse_args(argv)
+    count = build_index(
+        _read_jsonl(Path(args.corpus)), args.index, args.k1, args.b, args.block_size
+    )
+    print(f"indexed {count} documents into {args.index}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+工具结果缓存
+- 仅对无副作用的工具生效，键为 (工具名, version, 输入的规范化哈希)；同名工具的多个版本可并存，
+  各版本的条目互不影响，不再被调用的版本的条目随 TTL / LRU 淘汰
+- TTL 过期 + 条目数上限的 LRU 淘汰
+- 单飞（single-flight）：并发的相同调用只执行一次，其余调用等待同一结果
+- 只缓存成功结果；缓存结果的 output 在调用方之间共享，调用方应视为只读
+"""
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Literal, Optional, Set, Tuple
+
+from pydantic import BaseModel, Field
+
+from src.core.interfaces import BaseTool
+from src.core.protocols import ToolExecutionResult
+
+
+CacheKey = Tuple[str, str, str]
+CacheSource = Literal["hit", "coalesced", "miss", "bypass"]
+
+
+class CacheConfig(BaseModel):
+    """工具结果缓存配置，对应 tool_runtime.cache 段"""
+    enabled: bool = False
+    max_entries: int = Field(default=1024, ge=1)
+    ttl_seconds: float = Field(default=300, gt=0)
+    ttl_overrides: Dict[str, float] = {}   # 工具级 TTL 覆盖
+    exclude: List[str] = []                # 结果随时间变化、不应缓存的只读工具
+
+
+def canonical_key(tool: BaseTool, input_data: Dict[str, Any]) -> CacheKey:
+    """按工具名、版本与规范化输入（键排序的紧凑 JSON）计算缓存键"""
+    payload = json.dumps(
+        input_data, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str
+    )
+    digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    return tool.name, tool.version, digest
+
+
+@dataclass
+class _Entry:
+    result: ToolExecutionResult
+    expires_at: float
+
+
+class _Flight:
+    """进行中的调用及其等待者数量"""
+
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: "asyncio.Task[ToolExecutionResult]"):
+        self.task = task
+        self.waiters = 0
+
+
+class ToolResultCache:
+    """带单飞去重的工具结果缓存"""
+
+    def __init__(
+        self,
+        config: Optional[CacheConfig] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.config = config or CacheConfig()
+        self._clock = clock
+        self._entries: "OrderedDict[CacheKey, _Entry]" = OrderedDict()
+        self._flights: Dict[CacheKey, _Flight] = {}
+        self._keys_by_tool: Dict[str, Set[CacheKey]] = {}
+        self._excluded = set(self.config.exclude)
+        self.hits = 0
+        self.coalesced = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def applies(self, tool: BaseTool) -> bool:
+        """工具调用是否可缓存"""
+        return (
+            self.config.enabled
+            and not tool.has_side_effect
+            and tool.name not in self._excluded
+        )
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def call(
+        self,
+        tool: BaseTool,
+        input_data: Dict[str, Any],
+        execute: Callable[[], Awaitable[ToolExecutionResult]],
+    ) -> Tuple[ToolExecutionResult, CacheSource]:
+        """
+        通过缓存执行工具调用
+
+        Args:
+            tool: 目标工具
+            input_data: 工具输入
+            execute: 缓存未命中时执行实际调用
+
+        Returns:
+            Tuple[ToolExecutionResult, CacheSource]: 调用结果与来源
+        """
+        if not self.applies(tool):
+            return await execute(), "bypass"
+
+        key = canonical_key(tool, input_data)
+        cached = self._lookup(key)
+        if cached is not None:
+            self.hits += 1
+            return cached, "hit"
+
+        flight = self._flights.get(key)
+        source: CacheSource = "coalesced"
+        if flight is None:
+            source = "miss"
+            self.misses += 1
+            flight = self._flights[key] = _Flight(asyncio.ensure_future(execute()))
+            flight.task.add_done_callback(lambda task: self._landed(key, task))
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task), source
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # 所有等待者都已放弃（超时或取消），不再需要该结果
+                flight.task.cancel()
+
+    def _lookup(self, key: CacheKey) -> Optional[ToolExecutionResult]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= self._clock():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry.result
+
+    def _landed(self, key: CacheKey, task: "asyncio.Task[ToolExecutionResult]") -> None:
+        """调用完成：移除进行中记录，缓存成功结果"""
+        if self._flights.get(key) is not None and self._flights[key].task is task:
+            del self._flights[key]
+        if task.cancelled() or task.exception() is not None:
+            return
+        result = task.result()
+        if not result.success:
+            return
+        ttl = self.config.ttl_overrides.get(key[0], self.config.ttl_seconds)
+        self._entries[key] = _Entry(result, self._clock() + ttl)
+        self._entries.move_to_end(key)
+        self._keys_by_tool.setdefault(key[0], set()).add(key)
+        while len(self._entries) > self.config.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: CacheKey) -> None:
+        self._entries.pop(key, None)
+        keys = self._keys_by_tool.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+
+    def invalidate(self, tool_name: Optional[str] = None) -> None:
+        """清除指定工具（默认全部）的缓存条目"""
+        if tool_name is None:
+            self._entries.clear()
+            self._keys_by_tool.clear()
+            return
+        for key in self._keys_by_tool.pop(tool_name, set()):
+            self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """命中率等统计"""
+        lookups = self.hits + self.coalesced + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "coalesced": self.coalesced,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+        }
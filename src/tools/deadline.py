@@ -0,0 +1,123 @@
+"""
+截止时间传播与延迟统计
+- 截止时间保存在 ContextVar 中，嵌套调用自动继承并取更早者
+- LatencyTracker 维护每个工具最近的延迟样本，用于计算对冲请求的触发阈值
+"""
+import asyncio
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Deque, Dict, Iterator, Optional
+
+
+# 绝对截止时间（事件循环时钟，秒）；None 表示无截止时间
+_current_deadline: ContextVar[Optional[float]] = ContextVar("tool_deadline", default=None)
+
+
+def current_deadline() -> Optional[float]:
+    """当前上下文的绝对截止时间（loop.time() 时钟）"""
+    return _current_deadline.get()
+
+
+def remaining_ms() -> Optional[float]:
+    """距离当前截止时间的剩余毫秒数；无截止时间时返回 None"""
+    deadline = _current_deadline.get()
+    if deadline is None:
+        return None
+    return max(0.0, (deadline - asyncio.get_running_loop().time()) * 1000)
+
+
+@contextmanager
+def deadline_scope(timeout_ms: Optional[float]) -> Iterator[Optional[float]]:
+    """
+    在当前上下文中设置截止时间，与外层截止时间取较早者
+
+    Args:
+        timeout_ms: 相对超时（毫秒）；None 表示仅继承外层截止时间
+
+    Yields:
+        Optional[float]: 生效的绝对截止时间
+    """
+    outer = _current_deadline.get()
+    deadline = outer
+    if timeout_ms is not None:
+        candidate = asyncio.get_running_loop().time() + timeout_ms / 1000
+        deadline = candidate if outer is None else min(outer, candidate)
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+@contextmanager
+def override_deadline(deadline: Optional[float]) -> Iterator[Optional[float]]:
+    """
+    以给定的绝对截止时间替换当前上下文的截止时间，不与外层截止时间比较
+    用于代表多个调用方执行的任务（如合并后的批次），其创建时继承的截止时间只属于其中一个调用方
+
+    Args:
+        deadline: 绝对截止时间（loop.time() 时钟）；None 表示无截止时间
+
+    Yields:
+        Optional[float]: 生效的绝对截止时间
+    """
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+class LatencyTracker:
+    """
+    每个工具的滑动窗口延迟统计
+    分位数按需排序计算，并在累计一定新样本后才重新计算，避免每次调用都排序
+    """
+
+    def __init__(self, window: int = 256, min_samples: int = 20, refresh_every: int = 16):
+        """
+        Args:
+            window: 每个工具保留的最近样本数
+            min_samples: 计算分位数所需的最少样本数
+            refresh_every: 新增多少样本后刷新分位数缓存
+        """
+        self.window = window
+        self.min_samples = min_samples
+        self.refresh_every = refresh_every
+        self._samples: Dict[str, Deque[float]] = {}
+        self._dirty: Dict[str, int] = {}
+        self._cache: Dict[str, Dict[float, float]] = {}
+
+    def record(self, tool_name: str, latency_ms: float) -> None:
+        """记录一次延迟样本"""
+        samples = self._samples.get(tool_name)
+        if samples is None:
+            samples = self._samples[tool_name] = deque(maxlen=self.window)
+        samples.append(latency_ms)
+        self._dirty[tool_name] = self._dirty.get(tool_name, 0) + 1
+
+    def quantile(self, tool_name: str, q: float) -> Optional[float]:
+        """
+        获取延迟分位数
+
+        Returns:
+            Optional[float]: 分位数（毫秒）；样本不足时返回 None
+        """
+        samples = self._samples.get(tool_name)
+        if samples is None or len(samples) < self.min_samples:
+            return None
+        cache = self._cache.setdefault(tool_name, {})
+        if q not in cache or self._dirty.get(tool_name, 0) >= self.refresh_every:
+            ordered = sorted(samples)
+            index = min(len(ordered) - 1, int(q * len(ordered)))
+            if self._dirty.get(tool_name, 0) >= self.refresh_every:
+                cache.clear()
+                self._dirty[tool_name] = 0
+            cache[q] = ordered[index]
+        return cache[q]
+
+    def sample_count(self, tool_name: str) -> int:
+        """当前窗口内的样本数"""
+        samples = self._samples.get(tool_name)
+        return len(samples) if samples is not None else 0
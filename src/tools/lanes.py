@@ -0,0 +1,187 @@
+"""
+工具执行通道
+- THREAD 通道：共享线程池
+- PROCESS 通道：常驻进程池（可在启动时预热），工具实例按 name@version 与序列化内容的摘要缓存在
+  工作进程中，首次调用后每次只传输输入与输出，不再重复序列化工具实例；同名同版本但配置不同的
+  实例各自缓存，互不替代
+- 进程中的计算无法被中途取消：超时后调用方立即返回，工作进程在后台完成当前计算
+"""
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import pickle
+import time
+import weakref
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Literal, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+from src.core.interfaces import BaseTool
+from .base_tool import ExecutionLane
+
+
+class LaneConfig(BaseModel):
+    """执行通道配置，对应 tool_runtime.lanes 段"""
+    thread_workers: Optional[int] = Field(default=None, ge=1)   # None 表示使用默认值
+    process_workers: Optional[int] = Field(default=None, ge=1)  # None 表示 CPU 核数
+    start_method: Literal["spawn", "forkserver", "fork"] = "spawn"
+
+
+def lane_of(tool: BaseTool) -> ExecutionLane:
+    """工具声明的执行通道；未声明时为 INLINE"""
+    return getattr(tool, "execution_lane", ExecutionLane.INLINE)
+
+
+# ==============================================================================
+# 工作进程侧
+# ==============================================================================
+
+# 工作进程内的工具实例缓存：name@version#摘要 → 实例
+_WORKER_TOOLS: Dict[str, Any] = {}
+
+_MISS = "miss"
+_OK = "ok"
+
+
+def _worker_ping() -> int:
+    """预热用：返回工作进程 PID"""
+    return os.getpid()
+
+
+def _worker_compute(
+    key: str,
+    payload: Optional[bytes],
+    input_data: Any,
+    method: str = "compute",
+) -> Tuple[str, Any, float]:
+    """
+    在工作进程中执行 compute()（批量调用时为 compute_batch()）
+
+    Returns:
+        Tuple[str, Any, float]: (状态, 输出, 计算耗时毫秒)；缓存未命中且未携带工具时状态为 miss
+    """
+    tool = _WORKER_TOOLS.get(key)
+    if tool is None:
+        if payload is None:
+            return _MISS, None, 0.0
+        tool = _WORKER_TOOLS[key] = pickle.loads(payload)
+    started = time.perf_counter()
+    output = getattr(tool, method)(input_data)
+    return _OK, output, (time.perf_counter() - started) * 1000
+
+
+# ==============================================================================
+# 通道调度
+# ==============================================================================
+
+class ExecutionLanes:
+    """线程池与进程池的持有者，由 ToolRuntime 按工具声明的通道分派 compute()"""
+
+    def __init__(self, config: Optional[LaneConfig] = None):
+        self.config = config or LaneConfig()
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._processes: Optional[ProcessPoolExecutor] = None
+        # 工具实例 → (工作进程缓存键, 序列化结果)；实例被回收后条目随之移除
+        self._payloads: "weakref.WeakKeyDictionary[BaseTool, Tuple[str, bytes]]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    @property
+    def process_workers(self) -> int:
+        return self.config.process_workers or os.cpu_count() or 1
+
+    def _thread_pool(self) -> ThreadPoolExecutor:
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(
+                self.config.thread_workers, thread_name_prefix="tool-lane"
+            )
+        return self._threads
+
+    def _process_pool(self) -> ProcessPoolExecutor:
+        if self._processes is None:
+            self._processes = ProcessPoolExecutor(
+                self.process_workers,
+                mp_context=multiprocessing.get_context(self.config.start_method),
+            )
+        return self._processes
+
+    async def warm(self) -> None:
+        """启动全部工作进程，避免首批调用承担进程启动开销"""
+        loop = asyncio.get_running_loop()
+        pool = self._process_pool()
+        await asyncio.gather(*(
+            loop.run_in_executor(pool, _worker_ping) for _ in range(self.process_workers)
+        ))
+
+    async def run(self, tool: BaseTool, input_data: Dict[str, Any]) -> Any:
+        """
+        在工具声明的通道中执行 compute()
+
+        Args:
+            tool: THREAD 或 PROCESS 通道的工具
+            input_data: 工具输入
+
+        Returns:
+            Any: compute() 的返回值；compute() 抛出的异常原样抛出
+        """
+        return await self._call(tool, "compute", input_data)
+
+    async def run_batch(self, tool: BaseTool, inputs: List[Dict[str, Any]]) -> List[Any]:
+        """
+        在工具声明的通道中一次执行 compute_batch()，整批只占用一次线程切换 / 进程往返
+
+        Args:
+            tool: THREAD 或 PROCESS 通道的工具
+            inputs: 工具输入列表
+
+        Returns:
+            List[Any]: 与 inputs 一一对应的输出
+        """
+        return list(await self._call(tool, "compute_batch", inputs))
+
+    async def _call(self, tool: BaseTool, method: str, argument: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        lane = lane_of(tool)
+        if lane == ExecutionLane.THREAD:
+            return await loop.run_in_executor(
+                self._thread_pool(), getattr(tool, method), argument
+            )
+        if lane != ExecutionLane.PROCESS:
+            raise ValueError(f"Tool {tool.name} does not run in an executor lane")
+
+        key, payload = self._payload(tool)
+        pool: Executor = self._process_pool()
+        status, output, _ = await loop.run_in_executor(
+            pool, _worker_compute, key, None, argument, method
+        )
+        if status == _MISS:
+            status, output, _ = await loop.run_in_executor(
+                pool, _worker_compute, key, payload, argument, method
+            )
+        return output
+
+    def _payload(self, tool: BaseTool) -> Tuple[str, bytes]:
+        """工具实例的工作进程缓存键与序列化结果，每个实例只序列化一次"""
+        cached = self._payloads.get(tool)
+        if cached is None:
+            payload = pickle.dumps(tool, pickle.HIGHEST_PROTOCOL)
+            digest = hashlib.sha256(payload).hexdigest()[:16]
+            cached = self._payloads[tool] = (f"{tool.name}@{tool.version}#{digest}", payload)
+        return cached
+
+    def reset_process_pool(self) -> None:
+        """工作进程崩溃后丢弃进程池，下一次调用时重建"""
+        if self._processes is not None:
+            self._processes.shutdown(wait=False, cancel_futures=True)
+            self._processes = None
+
+    def shutdown(self, wait: bool = True) -> None:
+        """关闭所有执行池"""
+        if self._threads is not None:
+            self._threads.shutdown(wait=wait, cancel_futures=True)
+            self._threads = None
+        if self._processes is not None:
+            self._processes.shutdown(wait=wait, cancel_futures=True)
+            self._processes = None
@@ -0,0 +1,239 @@
+"""
+工具并发与限流
+- 每个工具、每个权限等级一个并发信号量
+- 每个工具一个令牌桶限流器
+配置来源：configs/default.yaml 的 tool_runtime.limits 段
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Callable, Dict, Optional, Union
+
+from pydantic import BaseModel, Field
+
+from src.core.interfaces import BaseTool
+from src.core.types import PermissionLevel
+
+
+# ==============================================================================
+# 配置模型
+# ==============================================================================
+
+class ToolLimits(BaseModel):
+    """单个工具的限制；字段为 None 表示不限制"""
+    max_concurrency: Optional[int] = Field(default=None, ge=1)
+    rate_per_second: Optional[float] = Field(default=None, gt=0)
+    burst: Optional[int] = Field(default=None, ge=1)   # 令牌桶容量，默认等于 ceil(rate)
+
+
+class ToolLimitsConfig(BaseModel):
+    """工具运行时限制配置"""
+    default: ToolLimits = ToolLimits()
+    tools: Dict[str, ToolLimits] = {}
+    permission_levels: Dict[PermissionLevel, int] = {}   # 权限等级 -> 并发上限
+
+    def for_tool(self, tool_name: str) -> ToolLimits:
+        """工具级配置覆盖默认配置中对应的字段"""
+        override = self.tools.get(tool_name)
+        if override is None:
+            return self.default
+        merged = self.default.model_dump()
+        merged.update(override.model_dump(exclude_unset=True))
+        return ToolLimits(**merged)
+
+    @classmethod
+    def from_yaml(cls, path: Union[str, Path]) -> "ToolLimitsConfig":
+        """
+        从 YAML 文件读取 tool_runtime.limits 段
+
+        Args:
+            path: 配置文件路径，通常为 configs/default.yaml
+
+        Returns:
+            ToolLimitsConfig: 配置对象；文件为空或缺少该段时返回默认配置
+        """
+        import yaml
+
+        with open(path, "r", encoding="utf-8") as f:
+            data = yaml.safe_load(f) or {}
+        section = (data.get("tool_runtime") or {}).get("limits") or {}
+        return cls(**section)
+
+
+# ==============================================================================
+# 令牌桶
+# ==============================================================================
+
+class TokenBucket:
+    """
+    令牌桶限流器（预约式）
+    - acquire() 先预扣令牌，令牌可透支为负数，调用方按透支额计算等待时长
+    - 等待方按调用顺序依次放行，无需锁与轮询
+    - 等待期间被取消时退还预扣的令牌
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            rate: 每秒补充的令牌数
+            capacity: 桶容量（允许的突发量）
+            clock: 单调时钟，便于测试注入
+        """
+        if rate <= 0 or capacity <= 0:
+            raise ValueError("rate and capacity must be positive")
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+
+    @property
+    def tokens(self) -> float:
+        """当前可用令牌数（可能为负，表示已有等待方）"""
+        self._refill()
+        return self._tokens
+
+    def _refill(self) -> None:
+        now = self._clock()
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """非阻塞获取，令牌不足时返回 False 且不预扣"""
+        self._refill()
+        if self._tokens >= tokens:
+            self._tokens -= tokens
+            return True
+        return False
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """预扣令牌，返回需要等待的秒数"""
+        self._refill()
+        self._tokens -= tokens
+        if self._tokens >= 0:
+            return 0.0
+        return -self._tokens / self.rate
+
+    def refund(self, tokens: float = 1.0) -> None:
+        """退还预扣的令牌"""
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens + tokens)
+
+    async def acquire(self, tokens: float = 1.0) -> float:
+        """
+        获取令牌，必要时等待
+
+        Returns:
+            float: 实际等待的秒数
+        """
+        delay = self.reserve(tokens)
+        if delay > 0:
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                self.refund(tokens)
+                raise
+        return delay
+
+
+# ==============================================================================
+# 工具限制器
+# ==============================================================================
+
+class ToolLimiter:
+    """
+    按工具名与权限等级施加并发与速率限制
+    获取顺序：令牌桶 → 工具信号量 → 权限等级信号量，等待令牌时不占用任何并发槽位
+    """
+
+    def __init__(self, config: Optional[ToolLimitsConfig] = None):
+        self._config = config or ToolLimitsConfig()
+        self._tool_semaphores: Dict[str, Optional[asyncio.Semaphore]] = {}
+        self._buckets: Dict[str, Optional[TokenBucket]] = {}
+        self._level_semaphores: Dict[PermissionLevel, asyncio.Semaphore] = {
+            level: asyncio.Semaphore(limit)
+            for level, limit in self._config.permission_levels.items()
+        }
+        self._in_flight: Dict[str, int] = {}
+        self._waiting: Dict[str, int] = {}
+
+    @property
+    def config(self) -> ToolLimitsConfig:
+        return self._config
+
+    def _tool_semaphore(self, tool_name: str) -> Optional[asyncio.Semaphore]:
+        if tool_name not in self._tool_semaphores:
+            limit = self._config.for_tool(tool_name).max_concurrency
+            self._tool_semaphores[tool_name] = asyncio.Semaphore(limit) if limit else None
+        return self._tool_semaphores[tool_name]
+
+    def _bucket(self, tool_name: str) -> Optional[TokenBucket]:
+        if tool_name not in self._buckets:
+            limits = self._config.for_tool(tool_name)
+            bucket = None
+            if limits.rate_per_second:
+                capacity = limits.burst or max(1, int(limits.rate_per_second + 0.999))
+                bucket = TokenBucket(limits.rate_per_second, capacity)
+            self._buckets[tool_name] = bucket
+        return self._buckets[tool_name]
+
+    @asynccontextmanager
+    async def limit(self, tool: BaseTool) -> AsyncIterator[float]:
+        """
+        在限制内执行工具调用
+
+        Yields:
+            float: 排队等待时长（毫秒）
+        """
+        name = tool.name
+        bucket = self._bucket(name)
+        tool_semaphore = self._tool_semaphore(name)
+        level_semaphore = self._level_semaphores.get(tool.permission_level)
+
+        started = time.perf_counter()
+        self._waiting[name] = self._waiting.get(name, 0) + 1
+        acquired_tool = acquired_level = False
+        try:
+            if bucket is not None:
+                await bucket.acquire()
+            if tool_semaphore is not None:
+                await tool_semaphore.acquire()
+                acquired_tool = True
+            if level_semaphore is not None:
+                await level_semaphore.acquire()
+                acquired_level = True
+        except BaseException:
+            if acquired_tool and tool_semaphore is not None:
+                tool_semaphore.release()
+            self._waiting[name] -= 1
+            raise
+
+        self._waiting[name] -= 1
+        self._in_flight[name] = self._in_flight.get(name, 0) + 1
+        try:
+            yield (time.perf_counter() - started) * 1000
+        finally:
+            self._in_flight[name] -= 1
+            if acquired_level and level_semaphore is not None:
+                level_semaphore.release()
+            if acquired_tool and tool_semaphore is not None:
+                tool_semaphore.release()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """各工具当前的执行中与排队数量"""
+        names = set(self._in_flight) | set(self._waiting)
+        return {
+            name: {
+                "in_flight": self._in_flight.get(name, 0),
+                "waiting": self._waiting.get(name, 0),
+            }
+            for name in sorted(names)
+        }
@@ -0,0 +1,480 @@
+"""
+网络连接池
+访问网络服务的工具（检索、HTTP API、模型服务）共享的 HTTP/1.1 连接池，由 ToolRuntime 持有：
+- 按端点 (scheme, host, port) 复用 keep-alive 连接，避免每次调用都重新进行 TCP / TLS 握手
+- 每个端点的连接数上限与全局上限；达到全局上限时先关闭其他端点最久未用的空闲连接
+- 端点连接数已满时，GET / HEAD 请求可在已确认 keep-alive 的连接上流水线发送
+  （pipeline_depth > 1，响应按发送顺序读取），否则排队等待空闲连接
+- 空闲超过 idle_timeout_seconds 的连接由后台任务关闭；取用前丢弃已被服务端关闭的连接
+- 复用的连接上请求失败时（服务端已关闭 keep-alive 连接），幂等请求在新连接上重试一次
+- stats() 返回各端点的请求、新建、复用、流水线、重试、等待与淘汰计数
+
+工具在 execute() 中通过 connection_pool() 取得当前 ToolRuntime 的连接池：
+    response = await connection_pool().request("GET", "https://api.example.com/v1/items")
+连接池基于 asyncio，仅供 INLINE 通道的工具使用。
+"""
+import asyncio
+import json
+import ssl
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple
+from urllib.parse import urlsplit
+
+from pydantic import BaseModel, Field
+
+
+Endpoint = Tuple[str, str, int]     # (scheme, host, port)
+
+_RETRYABLE = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+_PIPELINABLE = frozenset({"GET", "HEAD"})
+
+
+class PoolConfig(BaseModel):
+    """连接池配置，对应 tool_runtime.connections 段"""
+    max_per_host: int = Field(default=8, ge=1)
+    max_total: int = Field(default=64, ge=1)
+    pipeline_depth: int = Field(default=1, ge=1)      # 单连接上未完成的请求数上限，1 表示不流水线
+    idle_timeout_seconds: float = Field(default=30, gt=0)
+    connect_timeout_seconds: float = Field(default=10, gt=0)
+    max_requests_per_connection: Optional[int] = Field(default=None, ge=1)
+
+
+@dataclass
+class HttpResponse:
+    """完整读取的 HTTP 响应"""
+    status: int
+    reason: str
+    headers: Dict[str, str]         # 键为小写
+    body: bytes
+
+    def text(self, encoding: str = "utf-8") -> str:
+        return self.body.decode(encoding)
+
+    def json(self) -> Any:
+        return json.loads(self.body)
+
+
+@dataclass
+class EndpointStats:
+    """单个端点的累计计数"""
+    requests: int = 0
+    opened: int = 0
+    reused: int = 0
+    pipelined: int = 0
+    retried: int = 0
+    waits: int = 0
+    evicted: int = 0
+
+
+def endpoint_of(url: str) -> Tuple[Endpoint, str]:
+    """
+    解析 URL
+
+    Returns:
+        Tuple[Endpoint, str]: 端点与请求目标（路径 + 查询串）
+
+    Raises:
+        ValueError: 不是 http / https URL
+    """
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in ("http", "https") or not parts.hostname:
+        raise ValueError(f"Unsupported URL: {url}")
+    port = parts.port or (443 if scheme == "https" else 80)
+    target = parts.path or "/"
+    if parts.query:
+        target += "?" + parts.query
+    return (scheme, parts.hostname, port), target
+
+
+# 当前工具调用可用的连接池，由 ToolRuntime 在执行工具时设置
+_current_pool: ContextVar[Optional["ConnectionPool"]] = ContextVar("connection_pool", default=None)
+
+
+def connection_pool() -> "ConnectionPool":
+    """
+    当前 ToolRuntime 的连接池
+
+    Raises:
+        RuntimeError: 不在 ToolRuntime 执行的工具调用中
+    """
+    pool = _current_pool.get()
+    if pool is None:
+        raise RuntimeError("No connection pool in context; invoke the tool through ToolRuntime")
+    return pool
+
+
+@contextmanager
+def pool_scope(pool: "ConnectionPool") -> Iterator["ConnectionPool"]:
+    """在当前上下文中设置 connection_pool() 返回的连接池"""
+    token = _current_pool.set(pool)
+    try:
+        yield pool
+    finally:
+        _current_pool.reset(token)
+
+
+# ==============================================================================
+# HTTP/1.1 编解码
+# ==============================================================================
+
+def _encode_request(
+    method: str, target: str, host: str, headers: Mapping[str, str], body: bytes
+) -> bytes:
+    lines = [f"{method} {target} HTTP/1.1", f"Host: {host}"]
+    lines.extend(f"{name}: {value}" for name, value in headers.items())
+    if body or method in ("POST", "PUT", "PATCH"):
+        if not any(name.lower() == "content-length" for name in headers):
+            lines.append(f"Content-Length: {len(body)}")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+
+async def _read_headers(reader: asyncio.StreamReader) -> Dict[str, str]:
+    headers: Dict[str, str] = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n"):
+            return headers
+        if not line:
+            raise asyncio.IncompleteReadError(b"", None)
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+
+async def _read_chunked(reader: asyncio.StreamReader) -> bytes:
+    chunks: List[bytes] = []
+    while True:
+        size = int((await reader.readline()).split(b";")[0].strip() or b"0", 16)
+        if size == 0:
+            await _read_headers(reader)     # trailer
+            return b"".join(chunks)
+        chunks.append(await reader.readexactly(size))
+        await reader.readexactly(2)
+
+
+async def _read_response(
+    reader: asyncio.StreamReader, method: str
+) -> Tuple[HttpResponse, bool]:
+    """读取一个响应，返回响应与连接是否可继续复用"""
+    line = await reader.readline()
+    if not line:
+        raise ConnectionResetError("Connection closed by server")
+    version, _, rest = line.decode("latin-1").rstrip("\r\n").partition(" ")
+    status_text, _, reason = rest.partition(" ")
+    status = int(status_text)
+    headers = await _read_headers(reader)
+
+    connection = headers.get("connection", "").lower()
+    keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+    if method == "HEAD" or status in (204, 304) or 100 <= status < 200:
+        body = b""
+    elif "chunked" in headers.get("transfer-encoding", "").lower():
+        body = await _read_chunked(reader)
+    elif "content-length" in headers:
+        body = await reader.readexactly(int(headers["content-length"]))
+    else:
+        body = await reader.read()          # 以关闭连接结束的响应
+        keep_alive = False
+    return HttpResponse(status, reason, headers, body), keep_alive
+
+
+# ==============================================================================
+# 连接
+# ==============================================================================
+
+class _Connection:
+    """一条 keep-alive 连接；流水线请求按发送顺序读取响应"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.last_used = time.monotonic()
+        self.served = 0                 # 已完成的请求数
+        self.in_flight = 0
+        self.reusable = True
+        self._tail: Optional["asyncio.Future[None]"] = None   # 上一个请求读完响应的信号
+
+    def alive(self) -> bool:
+        return self.reusable and not self.reader.at_eof() and not self.writer.is_closing()
+
+    def close(self) -> None:
+        self.reusable = False
+        self.writer.close()
+
+    async def exchange(
+        self, method: str, target: str, host: str, headers: Mapping[str, str], body: bytes
+    ) -> Tuple[HttpResponse, bool]:
+        """发送请求并在前序请求的响应读完后读取本请求的响应"""
+        previous, done = self._tail, asyncio.get_running_loop().create_future()
+        self._tail = done
+        try:
+            # 写入与排队在同一同步段内完成，响应顺序与发送顺序一致
+            self.writer.write(_encode_request(method, target, host, headers, body))
+            await self.writer.drain()
+            if previous is not None:
+                await previous
+            if self.writer.is_closing():
+                raise ConnectionResetError("Connection closed before response")
+            response, keep_alive = await _read_response(self.reader, method)
+        except BaseException:
+            # 响应流位置未知，连接不可再用；排在后面的请求随即失败
+            self.close()
+            raise
+        finally:
+            done.set_result(None)
+        return response, keep_alive
+
+
+class _HostPool:
+    """单个端点的连接集合"""
+
+    def __init__(self, endpoint: Endpoint):
+        self.endpoint = endpoint
+        scheme, host, port = endpoint
+        name = f"[{host}]" if ":" in host else host
+        self.host_header = name if port == (443 if scheme == "https" else 80) else f"{name}:{port}"
+        self.connections: List[_Connection] = []
+        self.opening = 0
+        self.stats = EndpointStats()
+
+    def discard(self, connection: _Connection) -> None:
+        connection.close()
+        self.connections.remove(connection)
+
+    def idle(self) -> Optional[_Connection]:
+        """最近使用的可用空闲连接；顺带丢弃已被服务端关闭的连接"""
+        for connection in reversed(list(self.connections)):
+            if connection.in_flight:
+                continue
+            if connection.alive():
+                return connection
+            self.discard(connection)
+            self.stats.evicted += 1
+        return None
+
+    def pipeline(self, depth: int) -> Optional[_Connection]:
+        """未完成请求最少、且已确认 keep-alive 的连接"""
+        candidates = [
+            c for c in self.connections if c.served and c.in_flight < depth and c.alive()
+        ]
+        return min(candidates, key=lambda c: c.in_flight, default=None)
+
+
+# ==============================================================================
+# 连接池
+# ==============================================================================
+
+class ConnectionPool:
+    """按端点复用连接的 HTTP/1.1 连接池"""
+
+    def __init__(
+        self,
+        config: Optional[PoolConfig] = None,
+        ssl_context: Optional[ssl.SSLContext] = None,
+    ):
+        """
+        Args:
+            config: 连接池配置
+            ssl_context: https 端点使用的 TLS 上下文，默认 ssl.create_default_context()
+        """
+        self.config = config or PoolConfig()
+        self._ssl_context = ssl_context
+        self._hosts: Dict[Endpoint, _HostPool] = {}
+        self._changed: Optional[asyncio.Event] = None
+        self._reaper: Optional["asyncio.Task[None]"] = None
+        self._closed = False
+
+    def _total(self) -> int:
+        return sum(len(h.connections) + h.opening for h in self._hosts.values())
+
+    def _notify(self) -> None:
+        if self._changed is not None:
+            self._changed.set()
+            self._changed = None
+
+    async def _wait(self) -> None:
+        if self._changed is None:
+            self._changed = asyncio.Event()
+        await self._changed.wait()
+
+    async def _open(self, host: _HostPool) -> _Connection:
+        scheme, hostname, port = host.endpoint
+        context: Optional[ssl.SSLContext] = None
+        if scheme == "https":
+            if self._ssl_context is None:
+                self._ssl_context = ssl.create_default_context()
+            context = self._ssl_context
+        async with asyncio.timeout(self.config.connect_timeout_seconds):
+            reader, writer = await asyncio.open_connection(hostname, port, ssl=context)
+        host.stats.opened += 1
+        return _Connection(reader, writer)
+
+    def _evict_for_capacity(self) -> bool:
+        """达到全局上限时关闭最久未用的空闲连接，返回是否腾出了名额"""
+        idle = [
+            (connection.last_used, host, connection)
+            for host in self._hosts.values()
+            for connection in host.connections
+            if not connection.in_flight
+        ]
+        if not idle:
+            return False
+        _, host, connection = min(idle, key=lambda item: item[0])
+        host.discard(connection)
+        host.stats.evicted += 1
+        return True
+
+    async def _acquire(self, host: _HostPool, method: str) -> Tuple[_Connection, bool]:
+        """取得一条连接并占用一个请求名额，返回 (连接, 是否为已有连接)"""
+        depth = self.config.pipeline_depth if method in _PIPELINABLE else 1
+        while True:
+            if self._closed:
+                raise RuntimeError("Connection pool is closed")
+            connection = host.idle()
+            if connection is None and depth > 1:
+                connection = host.pipeline(depth)
+                if connection is not None:
+                    host.stats.pipelined += 1
+            if connection is not None:
+                connection.in_flight += 1
+                return connection, True
+            if len(host.connections) + host.opening < self.config.max_per_host and (
+                self._total() < self.config.max_total or self._evict_for_capacity()
+            ):
+                host.opening += 1
+                try:
+                    connection = await self._open(host)
+                finally:
+                    host.opening -= 1
+                    self._notify()
+                connection.in_flight = 1
+                host.connections.append(connection)
+                return connection, False
+            host.stats.waits += 1
+            await self._wait()
+
+    def _release(self, host: _HostPool, connection: _Connection, keep_alive: bool) -> None:
+        connection.in_flight -= 1
+        connection.served += 1
+        connection.last_used = time.monotonic()
+        limit = self.config.max_requests_per_connection
+        if not keep_alive or (limit is not None and connection.served >= limit):
+            connection.reusable = False
+        if not connection.reusable and not connection.in_flight:
+            if connection in host.connections:
+                host.discard(connection)
+        self._notify()
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Mapping[str, str]] = None,
+        body: bytes = b"",
+    ) -> HttpResponse:
+        """
+        发送请求并读取完整响应；超时由调用方（ToolRuntime 的截止时间）控制
+
+        Args:
+            method: HTTP 方法
+            url: http / https URL
+            headers: 附加请求头
+            body: 请求体
+
+        Returns:
+            HttpResponse: 响应
+
+        Raises:
+            ValueError: URL 不合法
+            OSError: 连接失败或连接被关闭（幂等请求已在新连接上重试过一次）
+        """
+        endpoint, target = endpoint_of(url)
+        method = method.upper()
+        host = self._hosts.get(endpoint)
+        if host is None:
+            host = self._hosts[endpoint] = _HostPool(endpoint)
+        self._start_reaper()
+        host.stats.requests += 1
+        for attempt in range(2):
+            connection, reused = await self._acquire(host, method)
+            if reused:
+                host.stats.reused += 1
+            keep_alive = False
+            try:
+                response, keep_alive = await connection.exchange(
+                    method, target, host.host_header, headers or {}, body
+                )
+                return response
+            except (ConnectionError, asyncio.IncompleteReadError):
+                if attempt or not reused or method not in _RETRYABLE:
+                    raise
+                host.stats.retried += 1
+            finally:
+                self._release(host, connection, keep_alive)
+        raise AssertionError("unreachable")
+
+    async def get(self, url: str, headers: Optional[Mapping[str, str]] = None) -> HttpResponse:
+        return await self.request("GET", url, headers)
+
+    async def post(
+        self, url: str, body: bytes, headers: Optional[Mapping[str, str]] = None
+    ) -> HttpResponse:
+        return await self.request("POST", url, headers, body)
+
+    # ------------------------------------------------------------------
+    # 空闲淘汰与统计
+    # ------------------------------------------------------------------
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        """关闭空闲超时或已被服务端关闭的连接，返回关闭的连接数"""
+        now = time.monotonic() if now is None else now
+        evicted = 0
+        for host in self._hosts.values():
+            for connection in list(host.connections):
+                if connection.in_flight:
+                    continue
+                expired = now - connection.last_used >= self.config.idle_timeout_seconds
+                if expired or not connection.alive():
+                    host.discard(connection)
+                    host.stats.evicted += 1
+                    evicted += 1
+        if evicted:
+            self._notify()
+        return evicted
+
+    async def _reap(self) -> None:
+        while True:
+            await asyncio.sleep(self.config.idle_timeout_seconds / 2)
+            self.evict_idle()
+
+    def _start_reaper(self) -> None:
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.get_running_loop().create_task(self._reap())
+
+    def stats(self) -> Dict[str, Any]:
+        """各端点的累计计数与当前连接状态，以及汇总"""
+        hosts: Dict[str, Dict[str, int]] = {}
+        total: Dict[str, int] = {}
+        for (scheme, _, _), host in self._hosts.items():
+            entry = asdict(host.stats)
+            entry["open"] = len(host.connections)
+            entry["idle"] = sum(1 for c in host.connections if not c.in_flight)
+            entry["in_flight"] = sum(c.in_flight for c in host.connections)
+            hosts[f"{scheme}://{host.host_header}"] = entry
+            for key, value in entry.items():
+                total[key] = total.get(key, 0) + value
+        return {"total": total, "hosts": hosts}
+
+    def close(self) -> None:
+        """关闭所有连接并停止空闲淘汰；进行中的请求随即失败"""
+        self._closed = True
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+        for host in self._hosts.values():
+            for connection in list(host.connections):
+                host.discard(connection)
+        self._notify()
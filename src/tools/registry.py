@@ -0,0 +1,124 @@
+"""
+工具发现
+工具以 ToolSpec 声明：名称、版本、导入目标以及权限等级、副作用等元数据。
+ToolRegistry 只登记声明，第一次 get() 时才导入模块并实例化，启动耗时与已安装的工具数量无关。
+
+声明来源：
+- 清单文件（configs/tools.yaml 的 tools 列表）
+- 入口点（默认组 mas.tools）：每个入口点指向一个轻量的清单提供者——ToolSpec 列表、
+  返回该列表的函数，或单个 BaseTool 子类（此时元数据取其类属性，仍在首次 get() 时实例化）
+"""
+import importlib
+import re
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple, Union
+
+from pydantic import BaseModel, Field
+
+from src.core.interfaces import BaseTool
+from src.core.types import PermissionLevel
+
+
+ENTRY_POINT_GROUP = "mas.tools"
+
+
+def version_key(version: str) -> Tuple[int, ...]:
+    """版本排序键：按点分数字比较，非数字部分视为 0（"2.1.0-rc1" → (2, 1, 0, 0)）"""
+    return tuple(int(part) if part.isdigit() else 0 for part in re.split(r"[.\-+]", version))
+
+
+class ToolSpec(BaseModel):
+    """工具声明"""
+    name: str
+    version: str = "1.0.0"
+    target: str                                        # "package.module:ClassName"
+    permission_level: PermissionLevel = PermissionLevel.PUBLIC
+    has_side_effect: bool = False
+    kwargs: Dict[str, Any] = Field(default_factory=dict)   # 实例化参数
+
+    @property
+    def major(self) -> int:
+        return version_key(self.version)[0]
+
+    @classmethod
+    def of(cls, tool: BaseTool) -> "ToolSpec":
+        """描述一个已实例化的工具"""
+        return cls(
+            name=tool.name,
+            version=tool.version,
+            target=f"{type(tool).__module__}:{type(tool).__qualname__}",
+            permission_level=tool.permission_level,
+            has_side_effect=tool.has_side_effect,
+        )
+
+    def load(self) -> BaseTool:
+        """
+        导入目标并实例化
+
+        Raises:
+            ImportError: 模块或属性不存在
+            TypeError: 目标不是 BaseTool 子类或实例
+        """
+        module_name, _, attr = self.target.partition(":")
+        target: Any = importlib.import_module(module_name)
+        for part in attr.split(".") if attr else ():
+            try:
+                target = getattr(target, part)
+            except AttributeError:
+                raise ImportError(f"{self.target}: {module_name} has no attribute {attr}")
+        tool = target(**self.kwargs) if isinstance(target, type) else target
+        if not isinstance(tool, BaseTool):
+            raise TypeError(f"{self.target} is not a BaseTool")
+        return tool
+
+
+def load_manifest(path: Union[str, Path]) -> List[ToolSpec]:
+    """读取清单文件中的 tools 列表；文件不存在时返回空列表"""
+    import yaml
+
+    path = Path(path)
+    if not path.exists():
+        return []
+    # 清单随工具数增长，优先使用 libyaml 的 C 解析器
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    with open(path, "r", encoding="utf-8") as f:
+        data = yaml.load(f, Loader=loader) or {}
+    return [ToolSpec(**item) for item in data.get("tools") or []]
+
+
+def _specs_from(provider: Any, source: str) -> Iterable[ToolSpec]:
+    if isinstance(provider, type) and issubclass(provider, BaseTool):
+        # 类属性形式的元数据（BaseToolImpl 子类）；name / version 为抽象属性的类无法在此读取
+        name, version = getattr(provider, "name", None), getattr(provider, "version", None)
+        if not isinstance(name, str) or not isinstance(version, str):
+            raise TypeError(f"{source}: tool class must declare name and version attributes")
+        yield ToolSpec(
+            name=name,
+            version=version,
+            target=f"{provider.__module__}:{provider.__qualname__}",
+            permission_level=getattr(provider, "permission_level", PermissionLevel.PUBLIC),
+            has_side_effect=bool(getattr(provider, "has_side_effect", False)),
+        )
+        return
+    if callable(provider):
+        provider = provider()
+    for item in provider:
+        yield item if isinstance(item, ToolSpec) else ToolSpec(**item)
+
+
+def discover_entry_points(group: str = ENTRY_POINT_GROUP) -> List[ToolSpec]:
+    """
+    从已安装发行包的入口点收集工具声明
+
+    Args:
+        group: 入口点组名
+
+    Returns:
+        List[ToolSpec]: 工具声明（此时尚未导入任何工具模块）
+    """
+    from importlib.metadata import entry_points
+
+    specs: List[ToolSpec] = []
+    for entry in entry_points(group=group):
+        specs.extend(_specs_from(entry.load(), f"entry point {entry.name}"))
+    return specs
@@ -0,0 +1,343 @@
+"""
+工具运行时
+统一的工具调用入口：输入校验、并发/限流控制、截止时间、对冲请求、调用合并、异常封装、
+耗时统计与 Tracer 记录
+"""
+import asyncio
+import time
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Union
+
+from pydantic import BaseModel, Field
+
+from src.core.interfaces import BaseTool, BaseTracer
+from src.core.protocols import StructuredError, ToolExecutionResult
+from src.core.types import TraceEventType
+from .base_tool import ExecutionLane
+from .batching import BatchCall, BatchingConfig, ToolCallCoalescer
+from .cache import CacheConfig, ToolResultCache
+from .deadline import LatencyTracker, deadline_scope, remaining_ms
+from .lanes import ExecutionLanes, LaneConfig, lane_of
+from .limits import ToolLimiter, ToolLimitsConfig
+from .pool import ConnectionPool, PoolConfig, pool_scope
+from .validator import ToolValidator, ValidatorConfig
+
+
+# ==============================================================================
+# 配置模型
+# ==============================================================================
+
+class HedgingConfig(BaseModel):
+    """对冲请求配置（仅对无副作用的工具生效，需显式开启）"""
+    tools: List[str] = []                            # 开启对冲的工具名
+    quantile: float = Field(default=0.95, gt=0, lt=1)  # 超过该延迟分位数后发出第二次请求
+    min_samples: int = Field(default=20, ge=1)        # 计算分位数所需的最少样本
+
+
+class ToolRuntimeConfig(BaseModel):
+    """工具运行时配置，对应 configs/default.yaml 的 tool_runtime 段"""
+    limits: ToolLimitsConfig = ToolLimitsConfig()
+    hedging: HedgingConfig = HedgingConfig()
+    lanes: LaneConfig = LaneConfig()
+    cache: CacheConfig = CacheConfig()
+    validation: ValidatorConfig = ValidatorConfig()
+    connections: PoolConfig = PoolConfig()
+    batching: BatchingConfig = BatchingConfig()
+
+    @classmethod
+    def from_yaml(cls, path: Union[str, Path]) -> "ToolRuntimeConfig":
+        """从 YAML 文件读取 tool_runtime 段"""
+        import yaml
+
+        with open(path, "r", encoding="utf-8") as f:
+            data = yaml.safe_load(f) or {}
+        return cls(**(data.get("tool_runtime") or {}))
+
+
+# ==============================================================================
+# 工具运行时
+# ==============================================================================
+
+class ToolRuntime:
+    """
+    工具运行时
+    - 调用前按编译后的 input_schema 校验输入，不合法的输入不排队、不执行、不进入缓存
+    - 所有工具调用经过 ToolLimiter 排队，排队时长随 TOOL_CALL_START 事件上报
+    - 超时取 步骤超时 / 工具超时 / 外层剩余截止时间 三者最小值，超时返回可重试的 StructuredError
+    - 对开启对冲的无副作用工具：主请求超过历史 p95 延迟仍未返回时发出第二次请求，取先返回者
+    - 声明 THREAD / PROCESS 通道的工具在线程池 / 常驻进程池中执行，不阻塞事件循环
+    - 无副作用工具的成功结果按 (name, version, 输入哈希) 缓存，相同的并发调用只执行一次
+    - INLINE 通道的工具可通过 connection_pool() 使用运行时共享的网络连接池
+    - 开启调用合并时，支持批量调用的工具的并发调用在短窗口内合并为一次批量执行，
+      整批只占用一个并发名额
+    - 工具抛出的异常统一封装为 StructuredError，不跨层传播
+    """
+
+    def __init__(
+        self,
+        limiter: Optional[ToolLimiter] = None,
+        tracer: Optional[BaseTracer] = None,
+        config: Optional[ToolRuntimeConfig] = None,
+        lanes: Optional[ExecutionLanes] = None,
+        cache: Optional[ToolResultCache] = None,
+        validator: Optional[ToolValidator] = None,
+        connections: Optional[ConnectionPool] = None,
+    ):
+        self.config = config or ToolRuntimeConfig()
+        self.limiter = limiter or ToolLimiter(self.config.limits)
+        self.lanes = lanes or ExecutionLanes(self.config.lanes)
+        self.cache = cache if cache is not None else ToolResultCache(self.config.cache)
+        self.validator = validator or ToolValidator(self.config.validation)
+        self.connections = connections or ConnectionPool(self.config.connections)
+        self.tracer = tracer
+        self.latency = LatencyTracker(min_samples=self.config.hedging.min_samples)
+        self._hedged_tools: Set[str] = set(self.config.hedging.tools)
+        self.coalescer = ToolCallCoalescer(self._attempt_batch, self.config.batching)
+
+    async def warm(self) -> None:
+        """预热进程池"""
+        await self.lanes.warm()
+
+    def shutdown(self, wait: bool = True) -> None:
+        """关闭执行通道与网络连接"""
+        self.lanes.shutdown(wait)
+        self.connections.close()
+
+    async def invoke(
+        self,
+        tool: BaseTool,
+        input_data: Dict[str, Any],
+        trace_id: str = "",
+        step_id: Optional[str] = None,
+        timeout_ms: Optional[int] = None,
+    ) -> ToolExecutionResult:
+        """
+        调用工具
+
+        Args:
+            tool: 目标工具
+            input_data: 工具输入
+            trace_id: 追踪 ID
+            step_id: 所属计划步骤 ID
+            timeout_ms: 步骤级超时覆盖（PlanStep.timeout_ms）
+
+        Returns:
+            ToolExecutionResult: 工具执行结果
+        """
+        budget_ms = self._timeout_budget(tool, timeout_ms)
+        started = time.perf_counter()
+        source = "bypass"
+        invalid = self.validator.check(tool, input_data)
+        if invalid is not None:
+            result = ToolExecutionResult(success=False, error=invalid, latency_ms=0)
+        else:
+            with deadline_scope(budget_ms) as deadline:
+                try:
+                    async with asyncio.timeout_at(deadline):
+                        result, source = await self.cache.call(
+                            tool,
+                            input_data,
+                            lambda: self._dispatch(tool, input_data, trace_id, step_id),
+                        )
+                except TimeoutError:
+                    result = self._timeout_result(tool, budget_ms, time.perf_counter() - started)
+        if source in ("hit", "coalesced"):
+            elapsed_ms = int((time.perf_counter() - started) * 1000)
+            result = result.model_copy(update={"latency_ms": elapsed_ms})
+
+        await self._record(TraceEventType.TOOL_CALL_END, trace_id, {
+            "tool": tool.name,
+            "step_id": step_id,
+            "success": result.success,
+            "latency_ms": result.latency_ms,
+            "error_code": result.error.code if result.error else None,
+            "cache": source,
+        })
+        return result
+
+    async def _dispatch(
+        self,
+        tool: BaseTool,
+        input_data: Dict[str, Any],
+        trace_id: str,
+        step_id: Optional[str],
+    ) -> ToolExecutionResult:
+        if self._should_hedge(tool):
+            return await self._hedged(tool, input_data, trace_id, step_id)
+        if self.coalescer.applies(tool):
+            return await self.coalescer.submit(tool, input_data, trace_id, step_id)
+        return await self._attempt(tool, input_data, trace_id, step_id)
+
+    def _timeout_budget(self, tool: BaseTool, timeout_ms: Optional[int]) -> Optional[float]:
+        """步骤超时、工具超时与外层剩余时间取最小值"""
+        candidates = [t for t in (timeout_ms, tool.timeout_ms, remaining_ms()) if t is not None]
+        return float(min(candidates)) if candidates else None
+
+    def _should_hedge(self, tool: BaseTool) -> bool:
+        return tool.name in self._hedged_tools and not tool.has_side_effect
+
+    async def _attempt(
+        self,
+        tool: BaseTool,
+        input_data: Dict[str, Any],
+        trace_id: str,
+        step_id: Optional[str],
+        hedge: bool = False,
+    ) -> ToolExecutionResult:
+        """在限制内执行一次工具调用"""
+        async with self.limiter.limit(tool) as queue_wait_ms:
+            await self._record(TraceEventType.TOOL_CALL_START, trace_id, {
+                "tool": tool.name,
+                "version": tool.version,
+                "step_id": step_id,
+                "queue_wait_ms": round(queue_wait_ms, 3),
+                "hedge": hedge,
+            })
+            started = time.perf_counter()
+            result = await self._execute(tool, input_data)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+        if result.latency_ms is None:
+            result.latency_ms = int(elapsed_ms)
+        if result.success:
+            self.latency.record(tool.name, elapsed_ms)
+        return result
+
+    async def _attempt_batch(
+        self,
+        tool: BaseTool,
+        calls: List[BatchCall],
+    ) -> List[ToolExecutionResult]:
+        """在限制内将一个批次作为一次工具调用执行"""
+        async with self.limiter.limit(tool) as queue_wait_ms:
+            for call in calls:
+                await self._record(TraceEventType.TOOL_CALL_START, call.trace_id, {
+                    "tool": tool.name,
+                    "version": tool.version,
+                    "step_id": call.step_id,
+                    "queue_wait_ms": round(queue_wait_ms, 3),
+                    "hedge": False,
+                    "batch_size": len(calls),
+                })
+            started = time.perf_counter()
+            results = await self._execute_batch(tool, [call.input_data for call in calls])
+            elapsed_ms = (time.perf_counter() - started) * 1000
+        # 批量耗时不代表单次调用的延迟，不计入对冲使用的延迟分布
+        for result in results:
+            if result.latency_ms is None:
+                result.latency_ms = int(elapsed_ms)
+        return results
+
+    async def _hedged(
+        self,
+        tool: BaseTool,
+        input_data: Dict[str, Any],
+        trace_id: str,
+        step_id: Optional[str],
+    ) -> ToolExecutionResult:
+        """主请求超过 p95 延迟未返回时发出对冲请求，取先完成者并取消另一方"""
+        threshold_ms = self.latency.quantile(tool.name, self.config.hedging.quantile)
+        if threshold_ms is None:
+            return await self._attempt(tool, input_data, trace_id, step_id)
+
+        primary = asyncio.ensure_future(self._attempt(tool, input_data, trace_id, step_id))
+        attempts = {primary}
+        try:
+            done, _ = await asyncio.wait(attempts, timeout=threshold_ms / 1000)
+            if not done:
+                attempts.add(asyncio.ensure_future(
+                    self._attempt(tool, input_data, trace_id, step_id, hedge=True)
+                ))
+                done, _ = await asyncio.wait(attempts, return_when=asyncio.FIRST_COMPLETED)
+            results = [task.result() for task in done]
+            return next((r for r in results if r.success), results[0])
+        finally:
+            losers = [task for task in attempts if not task.done()]
+            for task in losers:
+                task.cancel()
+            if losers:
+                await asyncio.gather(*losers, return_exceptions=True)
+
+    async def _execute(self, tool: BaseTool, input_data: Dict[str, Any]) -> ToolExecutionResult:
+        """按执行通道执行工具并封装异常"""
+        try:
+            if lane_of(tool) == ExecutionLane.INLINE:
+                with pool_scope(self.connections):
+                    return await tool.execute(input_data)
+            return ToolExecutionResult(success=True, output=await self.lanes.run(tool, input_data))
+        except Exception as e:
+            return self._failure(tool, e)
+
+    async def _execute_batch(
+        self,
+        tool: BaseTool,
+        inputs: List[Dict[str, Any]],
+    ) -> List[ToolExecutionResult]:
+        """按执行通道批量执行工具；批量调用抛出异常时整批失败"""
+        try:
+            if lane_of(tool) == ExecutionLane.INLINE:
+                with pool_scope(self.connections):
+                    results = list(await getattr(tool, "execute_batch")(inputs))
+            else:
+                outputs = await self.lanes.run_batch(tool, inputs)
+                results = [ToolExecutionResult(success=True, output=o) for o in outputs]
+            if len(results) != len(inputs):
+                raise ValueError(f"returned {len(results)} results for {len(inputs)} inputs")
+            return results
+        except Exception as e:
+            failure = self._failure(tool, e)
+            return [failure.model_copy() for _ in inputs]
+
+    def _failure(self, tool: BaseTool, error: Exception) -> ToolExecutionResult:
+        """将工具调用中的异常封装为 StructuredError"""
+        if isinstance(error, BrokenProcessPool):
+            self.lanes.reset_process_pool()
+            return ToolExecutionResult(
+                success=False,
+                error=StructuredError(
+                    code="TOOL_WORKER_CRASHED",
+                    message=f"Worker process running tool {tool.name} terminated abruptly",
+                    severity="WARNING",
+                    retryable=True,
+                    suggested_action="RETRY",
+                    metadata={"tool": tool.name},
+                ),
+            )
+        return ToolExecutionResult(
+            success=False,
+            error=StructuredError(
+                code="TOOL_EXCEPTION",
+                message=f"Tool {tool.name} raised {type(error).__name__}: {error}",
+                severity="WARNING",
+                suggested_action="REPLAN",
+                metadata={"tool": tool.name},
+            ),
+        )
+
+    @staticmethod
+    def _timeout_result(
+        tool: BaseTool,
+        budget_ms: Optional[float],
+        elapsed: float,
+    ) -> ToolExecutionResult:
+        return ToolExecutionResult(
+            success=False,
+            latency_ms=int(elapsed * 1000),
+            error=StructuredError(
+                code="TOOL_TIMEOUT",
+                message=f"Tool {tool.name} exceeded its deadline of {budget_ms:.0f} ms",
+                severity="WARNING",
+                retryable=True,
+                suggested_action="RETRY",
+                metadata={"tool": tool.name, "timeout_ms": budget_ms},
+            ),
+        )
+
+    async def _record(
+        self,
+        event_type: TraceEventType,
+        trace_id: str,
+        payload: Dict[str, Any],
+    ) -> None:
+        if self.tracer is not None:
+            await self.tracer.record_event(event_type, payload, trace_id)
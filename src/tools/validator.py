@@ -0,0 +1,421 @@
+"""
+工具输入校验
+- 每个工具的 input_schema（JSON Schema 子集）按 (工具名, version) 编译一次，生成专用的 Python 校验函数，
+  之后每次调用只执行生成的代码，不再解释 schema 字典；工具升级 version 后重新编译
+- 生成代码只在失败分支拼接错误路径，校验通过时不产生额外分配
+- 支持的关键字：type、enum、const、properties、required、additionalProperties、
+  minProperties、maxProperties、items、minItems、maxItems、uniqueItems、minLength、maxLength、
+  pattern、minimum、maximum、exclusiveMinimum、exclusiveMaximum、multipleOf、allOf、anyOf、oneOf、not；
+  title / description / default / examples / format 等注解关键字忽略，
+  $ref 等其余关键字视为 schema 错误，避免静默放过未校验的约束
+- 校验失败与 schema 编译失败均以 StructuredError 返回，不抛出异常
+"""
+import json
+import re
+from typing import Any, Callable, Dict, FrozenSet, Iterator, List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+from src.core.interfaces import BaseTool
+from src.core.protocols import StructuredError
+
+
+Violation = Tuple[str, str]                                    # (路径, 原因)
+CompiledValidator = Callable[[Any, List[Violation], str], None]
+
+
+class ValidatorConfig(BaseModel):
+    """工具输入校验配置，对应 tool_runtime.validation 段"""
+    enabled: bool = True
+    max_errors: int = Field(default=10, ge=1)   # 单次校验返回的错误数上限
+
+
+class SchemaCompileError(ValueError):
+    """input_schema 含有无法编译的内容"""
+
+
+_ANNOTATIONS = frozenset({
+    "$schema", "$id", "$comment", "title", "description", "default", "examples",
+    "format", "readOnly", "writeOnly", "deprecated",
+})
+_KEYWORDS = frozenset({
+    "type", "enum", "const", "properties", "required", "additionalProperties",
+    "minProperties", "maxProperties", "items", "minItems", "maxItems", "uniqueItems",
+    "minLength", "maxLength", "pattern", "minimum", "maximum", "exclusiveMinimum",
+    "exclusiveMaximum", "multipleOf", "allOf", "anyOf", "oneOf", "not",
+})
+
+# JSON 类型到检查表达式；bool 是 int 的子类，需要排除
+_TYPE_CHECKS: Dict[str, str] = {
+    "object": "isinstance({v}, dict)",
+    "array": "isinstance({v}, list)",
+    "string": "isinstance({v}, str)",
+    "boolean": "isinstance({v}, bool)",
+    "null": "{v} is None",
+    "number": "(isinstance({v}, (int, float)) and not isinstance({v}, bool))",
+    "integer": "((isinstance({v}, int) and not isinstance({v}, bool))"
+               " or (isinstance({v}, float) and {v}.is_integer()))",
+}
+
+
+# ==============================================================================
+# 代码生成
+# ==============================================================================
+
+class _CodeGen:
+    """
+    将 schema 编译为 Python 源码
+    每个生成函数签名为 (v, errors, path)：v 为待校验值，errors 收集 (路径, 原因)，
+    path 为 v 的路径字符串；嵌套值的路径以表达式形式携带，仅在追加错误时求值
+    """
+
+    def __init__(self) -> None:
+        self.constants: Dict[str, Any] = {}
+        self.functions: List[str] = []
+        self._counter = 0
+
+    def name(self, prefix: str) -> str:
+        self._counter += 1
+        return f"{prefix}_{self._counter}"
+
+    def constant(self, value: Any, prefix: str = "c") -> str:
+        name = self.name(prefix)
+        self.constants[name] = value
+        return name
+
+    def function(self, schema: Any) -> str:
+        """将 schema 编译为独立函数，返回函数名"""
+        name = self.name("validate")
+        body = list(self.emit(schema, "v", "path", 1))
+        self.functions.append("\n".join(
+            [f"def {name}(v, errors, path):"] + (body or ["    pass"])
+        ))
+        return name
+
+    def emit(self, schema: Any, v: str, path: str, depth: int) -> Iterator[str]:
+        """生成校验 v 的语句；path 为路径表达式"""
+        pad = "    " * depth
+        if schema is True or schema == {}:
+            return
+        if schema is False:
+            yield f"{pad}errors.append(({path}, 'no value is allowed here'))"
+            return
+        if not isinstance(schema, dict):
+            raise SchemaCompileError(f"schema must be an object or boolean, got {schema!r}")
+        unknown = set(schema) - _KEYWORDS - _ANNOTATIONS
+        if unknown:
+            raise SchemaCompileError(f"unsupported keywords {sorted(unknown)}")
+
+        for keyword, word in (("enum", "be one of"), ("const", "equal")):
+            if keyword in schema:
+                allowed = schema["enum"] if keyword == "enum" else [schema["const"]]
+                values = self.constant(self._frozen_values(allowed), keyword)
+                if all(isinstance(value, str) for value in allowed):
+                    # 纯字符串枚举直接做集合查找，无需按 JSON 语义规范化
+                    test = f"(isinstance({v}, str) and {v} in {values}[2])"
+                else:
+                    test = f"_member({v}, {values})"
+                yield f"{pad}if not {test}:"
+                yield f"{pad}    errors.append(({path}, 'must {word} ' + {values}[1]))"
+
+        for keyword in ("allOf", "anyOf", "oneOf"):
+            if keyword in schema:
+                yield from self._combinator(keyword, schema[keyword], v, path, pad)
+        if "not" in schema:
+            inner = self.function(schema["not"])
+            yield f"{pad}if not _fails({inner}, {v}):"
+            yield f"{pad}    errors.append(({path}, 'must not match the negated schema'))"
+
+        types = schema.get("type")
+        if types is None:
+            # 无 type 时各类约束只作用于对应类型的值
+            for kind in ("object", "array", "string", "number"):
+                lines = list(self._typed(kind, schema, v, path, depth + 1))
+                if lines:
+                    yield f"{pad}if {_TYPE_CHECKS[kind].format(v=v)}:"
+                    yield from lines
+            return
+
+        kinds = [types] if isinstance(types, str) else list(types)
+        for kind in kinds:
+            if kind not in _TYPE_CHECKS:
+                raise SchemaCompileError(f"unknown type {kind!r}")
+        keyword = "if"
+        for kind in kinds:
+            yield f"{pad}{keyword} {_TYPE_CHECKS[kind].format(v=v)}:"
+            lines = list(self._typed(kind, schema, v, path, depth + 1))
+            yield from lines or [f"{pad}    pass"]
+            keyword = "elif"
+        expected = " or ".join(kinds)
+        yield f"{pad}else:"
+        yield f"{pad}    errors.append(({path}, 'expected {expected}'))"
+
+    def _combinator(
+        self, keyword: str, branches: Any, v: str, path: str, pad: str
+    ) -> Iterator[str]:
+        if not isinstance(branches, list) or not branches:
+            raise SchemaCompileError(f"{keyword} must be a non-empty list")
+        # 每个分支编译为独立函数，与主函数在同一命名空间中定义
+        names = [self.function(branch) for branch in branches]
+        if keyword == "allOf":
+            for name in names:
+                yield f"{pad}{name}({v}, errors, {path})"
+            return
+        yield f"{pad}_passed = sum(1 for f in ({', '.join(names)},) if not _fails(f, {v}))"
+        if keyword == "anyOf":
+            yield f"{pad}if _passed == 0:"
+            yield f"{pad}    errors.append(({path}, 'must match at least one schema in anyOf'))"
+        else:
+            message = "must match exactly one schema in oneOf, matched "
+            yield f"{pad}if _passed != 1:"
+            yield f"{pad}    errors.append(({path}, {message!r} + str(_passed)))"
+
+    def _typed(self, kind: str, schema: Dict[str, Any], v: str, path: str, depth: int
+               ) -> Iterator[str]:
+        if kind == "object":
+            yield from self._object(schema, v, path, depth)
+        elif kind == "array":
+            yield from self._array(schema, v, path, depth)
+        elif kind == "string":
+            yield from self._string(schema, v, path, depth)
+        elif kind in ("number", "integer"):
+            yield from self._number(schema, v, path, depth)
+
+    def _object(self, schema: Dict[str, Any], v: str, path: str, depth: int) -> Iterator[str]:
+        pad = "    " * depth
+        for key in schema.get("required", []):
+            yield f"{pad}if {key!r} not in {v}:"
+            yield f"{pad}    errors.append(({path}, {f'missing required property {key!r}'!r}))"
+        bounds = (("minProperties", "<", "at least"), ("maxProperties", ">", "at most"))
+        for keyword, op, word in bounds:
+            if keyword in schema:
+                limit = int(schema[keyword])
+                yield f"{pad}if len({v}) {op} {limit}:"
+                yield f"{pad}    errors.append(({path}, 'must have {word} {limit} properties'))"
+
+        properties = schema.get("properties", {})
+        for key, sub in properties.items():
+            lines = list(self.emit(sub, self._child(v), f"{path} + {'.' + key!r}", depth + 1))
+            if lines:
+                yield f"{pad}if {key!r} in {v}:"
+                yield f"{pad}    {self._child(v)} = {v}[{key!r}]"
+                yield from lines
+        extra = schema.get("additionalProperties", True)
+        if extra is True or extra == {}:
+            return
+        known = self.constant(frozenset(properties), "props")
+        key_var, value_var = self.name("k"), self.name("v")
+        # 常见情况下没有额外属性，先用一次集合比较跳过逐键循环
+        yield f"{pad}if not {v}.keys() <= {known}:"
+        yield f"{pad}    for {key_var}, {value_var} in {v}.items():"
+        yield f"{pad}        if {key_var} in {known}:"
+        yield f"{pad}            continue"
+        if extra is False:
+            yield f"{pad}        errors.append(({path}, 'unexpected property ' + repr({key_var})))"
+        else:
+            yield from self.emit(extra, value_var, f"{path} + '.' + str({key_var})", depth + 2)
+
+    def _array(self, schema: Dict[str, Any], v: str, path: str, depth: int) -> Iterator[str]:
+        pad = "    " * depth
+        for keyword, op, word in (("minItems", "<", "at least"), ("maxItems", ">", "at most")):
+            if keyword in schema:
+                limit = int(schema[keyword])
+                yield f"{pad}if len({v}) {op} {limit}:"
+                yield f"{pad}    errors.append(({path}, 'must have {word} {limit} items'))"
+        if schema.get("uniqueItems"):
+            yield f"{pad}if not _unique({v}):"
+            yield f"{pad}    errors.append(({path}, 'items must be unique'))"
+        if "items" in schema:
+            index, item = self.name("i"), self.name("v")
+            item_path = f"{path} + '[' + str({index}) + ']'"
+            lines = list(self.emit(schema["items"], item, item_path, depth + 1))
+            if lines:
+                yield f"{pad}for {index}, {item} in enumerate({v}):"
+                yield from lines
+
+    def _string(self, schema: Dict[str, Any], v: str, path: str, depth: int) -> Iterator[str]:
+        pad = "    " * depth
+        for keyword, op, word in (("minLength", "<", "at least"), ("maxLength", ">", "at most")):
+            if keyword in schema:
+                limit = int(schema[keyword])
+                yield f"{pad}if len({v}) {op} {limit}:"
+                yield f"{pad}    errors.append(({path}, 'must have {word} {limit} characters'))"
+        if "pattern" in schema:
+            try:
+                pattern = self.constant(re.compile(schema["pattern"]).search, "pattern")
+            except re.error as e:
+                raise SchemaCompileError(f"invalid pattern {schema['pattern']!r}: {e}")
+            message = f"must match pattern {schema['pattern']!r}"
+            yield f"{pad}if {pattern}({v}) is None:"
+            yield f"{pad}    errors.append(({path}, {message!r}))"
+
+    def _number(self, schema: Dict[str, Any], v: str, path: str, depth: int) -> Iterator[str]:
+        pad = "    " * depth
+        bounds = (
+            ("minimum", "<", ">="), ("maximum", ">", "<="),
+            ("exclusiveMinimum", "<=", ">"), ("exclusiveMaximum", ">=", "<"),
+        )
+        for keyword, op, wanted in bounds:
+            if keyword in schema:
+                limit = schema[keyword]
+                if isinstance(limit, bool) or not isinstance(limit, (int, float)):
+                    raise SchemaCompileError(f"{keyword} must be a number")
+                yield f"{pad}if {v} {op} {limit!r}:"
+                yield f"{pad}    errors.append(({path}, 'must be {wanted} {limit!r}'))"
+        if "multipleOf" in schema:
+            step = schema["multipleOf"]
+            if isinstance(step, bool) or not isinstance(step, (int, float)) or step <= 0:
+                raise SchemaCompileError("multipleOf must be a positive number")
+            yield f"{pad}if not _multiple({v}, {step!r}):"
+            yield f"{pad}    errors.append(({path}, 'must be a multiple of {step!r}'))"
+
+    @staticmethod
+    def _child(v: str) -> str:
+        return f"{v}_"
+
+    @staticmethod
+    def _frozen_values(values: Any) -> Tuple[FrozenSet[str], str, FrozenSet[Any]]:
+        """(JSON 规范化键集合, 错误信息中的取值列表, 原始字符串取值集合)"""
+        if not isinstance(values, list) or not values:
+            raise SchemaCompileError("enum must be a non-empty list")
+        keys = frozenset(_json_key(value) for value in values)
+        strings = frozenset(value for value in values if isinstance(value, str))
+        return keys, json.dumps(values, ensure_ascii=False, default=str), strings
+
+
+def _json_key(value: Any) -> str:
+    """按 JSON 语义比较的键：1 与 1.0 相等，True 与 1 不相等"""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def _member(value: Any, values: Tuple[FrozenSet[str], str, FrozenSet[Any]]) -> bool:
+    return _json_key(value) in values[0]
+
+
+def _unique(items: List[Any]) -> bool:
+    keys = [_json_key(item) for item in items]
+    return len(set(keys)) == len(keys)
+
+
+def _multiple(value: float, step: float) -> bool:
+    quotient = value / step
+    return abs(quotient - round(quotient)) < 1e-9
+
+
+def _fails(validate: CompiledValidator, value: Any) -> bool:
+    errors: List[Violation] = []
+    validate(value, errors, "")
+    return bool(errors)
+
+
+def compile_schema(schema: Any) -> Tuple[CompiledValidator, str]:
+    """
+    将 JSON Schema 编译为校验函数
+
+    Args:
+        schema: JSON Schema（字典或布尔值）
+
+    Returns:
+        Tuple[CompiledValidator, str]: 校验函数与生成的源码
+
+    Raises:
+        SchemaCompileError: schema 含有不支持或非法的内容
+    """
+    gen = _CodeGen()
+    entry = gen.function(schema)
+    source = "\n\n".join(gen.functions)
+    namespace: Dict[str, Any] = {
+        "_member": _member, "_unique": _unique, "_multiple": _multiple, "_fails": _fails,
+        **gen.constants,
+    }
+    exec(compile(source, "<input_schema>", "exec"), namespace)
+    return namespace[entry], source
+
+
+# ==============================================================================
+# 校验器
+# ==============================================================================
+
+class ToolValidator:
+    """
+    按 (工具名, version) 缓存编译结果的工具输入校验器
+    所有会话共享一个实例；编译失败同样被缓存，每次校验都返回同一个 schema 错误
+    """
+
+    def __init__(self, config: Optional[ValidatorConfig] = None):
+        self.config = config or ValidatorConfig()
+        self._compiled: Dict[Tuple[str, str], Tuple[Optional[CompiledValidator], str]] = {}
+        self.compilations = 0
+
+    def _lookup(self, tool: BaseTool) -> Tuple[Optional[CompiledValidator], str]:
+        key = (tool.name, tool.version)
+        entry = self._compiled.get(key)
+        if entry is None:
+            self.compilations += 1
+            try:
+                validate, _ = compile_schema(tool.input_schema)
+                entry = (validate, "")
+            except (SchemaCompileError, SyntaxError, TypeError, ValueError) as e:
+                entry = (None, str(e))
+            self._compiled[key] = entry
+        return entry
+
+    def validate(self, tool: BaseTool, input_data: Any) -> List[StructuredError]:
+        """
+        校验工具输入
+
+        Args:
+            tool: 目标工具
+            input_data: 工具输入
+
+        Returns:
+            List[StructuredError]: 校验错误，通过时为空列表（至多 max_errors 条）
+        """
+        validate, problem = self._lookup(tool)
+        if validate is None:
+            return [StructuredError(
+                code="TOOL_SCHEMA_INVALID",
+                message=f"Tool {tool.name} {tool.version} has an invalid input_schema: {problem}",
+                severity="CRITICAL",
+                suggested_action="HALT",
+                metadata={"tool": tool.name, "version": tool.version},
+            )]
+        violations: List[Violation] = []
+        validate(input_data, violations, "$")
+        return [
+            StructuredError(
+                code="INVALID_TOOL_INPUT",
+                message=f"Tool {tool.name} input {path}: {reason}",
+                severity="WARNING",
+                suggested_action="REPLAN",
+                metadata={"tool": tool.name, "path": path},
+            )
+            for path, reason in violations[:self.config.max_errors]
+        ]
+
+    def check(self, tool: BaseTool, input_data: Any) -> Optional[StructuredError]:
+        """
+        校验工具输入，返回单个汇总错误
+
+        Returns:
+            Optional[StructuredError]: 首个错误，metadata.violations 含全部错误信息；通过时为 None
+        """
+        if not self.config.enabled:
+            return None
+        errors = self.validate(tool, input_data)
+        if not errors:
+            return None
+        first = errors[0]
+        if len(errors) > 1:
+            first.metadata["violations"] = [e.message for e in errors]
+        return first
+
+    def invalidate(self, tool_name: Optional[str] = None) -> None:
+        """丢弃编译结果：指定工具名时只丢弃该工具的各版本"""
+        if tool_name is None:
+            self._compiled.clear()
+        else:
+            for key in [k for k in self._compiled if k[0] == tool_name]:
+                del self._compiled[key]
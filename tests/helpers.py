@@ -0,0 +1,304 @@
+"""
+测试辅助：可手动推进的时钟、可配置的 BaseTool / BaseAgent 实现，以及本地 HTTP 服务
+"""
+import asyncio
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional, Set, Union
+
+from src.core.interfaces import BaseAgent, BaseTool
+from src.core.models import ExecutionContext, ExecutionPlan, GlobalState, PlanStep, StepContext
+from src.core.protocols import AgentOutput, StructuredError, ToolExecutionResult
+from src.core.types import AgentRole, PermissionLevel
+from src.registry.component_registry import ComponentRegistry
+from src.tools.base_tool import BaseToolImpl, ExecutionLane
+
+
+class FakeClock:
+    """可手动推进的时钟，now 为初始时间（秒）"""
+
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeTool(BaseTool):
+    """
+    可配置延迟、失败次数与元数据的测试工具
+    - delays: 依次使用的执行延迟（秒），用尽后使用最后一个
+    - failures: 前 N 次调用返回可重试失败
+    """
+
+    def __init__(
+        self,
+        name: str = "fake",
+        version: str = "1.0.0",
+        delays: Optional[List[float]] = None,
+        failures: int = 0,
+        timeout_ms: int = 5000,
+        permission_level: PermissionLevel = PermissionLevel.PUBLIC,
+        has_side_effect: bool = False,
+    ):
+        self._name = name
+        self._version = version
+        self._delays = delays or [0.0]
+        self._failures = failures
+        self._timeout_ms = timeout_ms
+        self._permission_level = permission_level
+        self._has_side_effect = has_side_effect
+        self.calls: List[Dict[str, Any]] = []
+        self.running = 0
+        self.peak_running = 0
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def version(self) -> str:
+        return self._version
+
+    @property
+    def input_schema(self) -> Dict[str, Any]:
+        return {"type": "object"}
+
+    @property
+    def output_schema(self) -> Dict[str, Any]:
+        return {"type": "object"}
+
+    @property
+    def timeout_ms(self) -> int:
+        return self._timeout_ms
+
+    @property
+    def permission_level(self) -> PermissionLevel:
+        return self._permission_level
+
+    @property
+    def has_side_effect(self) -> bool:
+        return self._has_side_effect
+
+    async def execute(self, input_data: Dict[str, Any]) -> ToolExecutionResult:
+        index = len(self.calls)
+        self.calls.append(input_data)
+        self.running += 1
+        self.peak_running = max(self.peak_running, self.running)
+        try:
+            await asyncio.sleep(self._delays[min(index, len(self._delays) - 1)])
+        finally:
+            self.running -= 1
+        if index < self._failures:
+            return ToolExecutionResult(
+                success=False,
+                error=StructuredError(
+                    code="FAKE_FAILURE",
+                    message=f"failure #{index + 1}",
+                    severity="WARNING",
+                    retryable=True,
+                    suggested_action="RETRY",
+                ),
+            )
+        return ToolExecutionResult(success=True, output={"echo": input_data, "call": index + 1})
+
+
+class CpuTool(BaseToolImpl):
+    """CPU 密集型测试工具：计算 0..n 的平方和（加上 offset），可声明任意执行通道"""
+    name = "cpu"
+    version = "1.0.0"
+
+    def __init__(self, lane: ExecutionLane = ExecutionLane.PROCESS, offset: int = 0):
+        self.execution_lane = lane
+        self.offset = offset
+
+    def compute(self, input_data: Dict[str, Any]) -> Any:
+        if input_data.get("fail"):
+            raise ValueError("bad input")
+        total = sum(i * i for i in range(input_data["n"])) + self.offset
+        return {"sum": total, "pid": os.getpid()}
+
+
+class BatchTool(BaseToolImpl):
+    """
+    支持批量调用的测试工具：记录每次批量调用的大小
+    INLINE 通道下输入含 fail 的项单独失败；THREAD / PROCESS 通道下整批失败
+    """
+    name = "batch"
+    version = "1.0.0"
+
+    def __init__(self, lane: ExecutionLane = ExecutionLane.INLINE, max_batch_size: int = 8):
+        self.execution_lane = lane
+        self.max_batch_size = max_batch_size
+        self.batches: List[int] = []
+
+    def compute(self, input_data: Dict[str, Any]) -> Any:
+        if input_data.get("fail"):
+            raise ValueError("bad input")
+        return {"echo": input_data}
+
+    def compute_batch(self, inputs: List[Dict[str, Any]]) -> List[Any]:
+        self.batches.append(len(inputs))
+        return [self.compute(input_data) for input_data in inputs]
+
+    async def execute_batch(self, inputs: List[Dict[str, Any]]) -> List[ToolExecutionResult]:
+        self.batches.append(len(inputs))
+        return [await self.execute(input_data) for input_data in inputs]
+
+
+def cpu_worker_components() -> ComponentRegistry:
+    """分布式工作进程的组件工厂：只注册 INLINE 通道的 CpuTool"""
+    components = ComponentRegistry()
+    components.register_tool(CpuTool(ExecutionLane.INLINE))
+    return components
+
+
+AgentBehaviour = Callable[[GlobalState, ExecutionContext, Optional[StepContext]], AgentOutput]
+
+
+class FakeAgent(BaseAgent):
+    """
+    返回预设输出的测试 Agent
+    - outputs: AgentOutput 或按调用上下文生成输出的函数；列表依次使用，用尽后使用最后一个
+    """
+
+    def __init__(
+        self,
+        role: AgentRole,
+        outputs: Optional[List[Union[AgentOutput, AgentBehaviour]]] = None,
+        name: Optional[str] = None,
+        delay: float = 0.0,
+    ):
+        self._role = role
+        self._name = name or role.value.lower()
+        self._outputs = outputs or [AgentOutput(success=True, confidence=1.0, role=role)]
+        self._delay = delay
+        self.calls = 0
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def role(self) -> AgentRole:
+        return self._role
+
+    async def run(
+        self,
+        global_state: GlobalState,
+        execution_context: ExecutionContext,
+        step_context: Optional[StepContext] = None,
+    ) -> AgentOutput:
+        index = min(self.calls, len(self._outputs) - 1)
+        self.calls += 1
+        if self._delay:
+            await asyncio.sleep(self._delay)
+        output = self._outputs[index]
+        if callable(output):
+            return output(global_state, execution_context, step_context)
+        return output
+
+    def validate_output(self, output: AgentOutput) -> bool:
+        return output.role == self._role
+
+
+def planner_for(*steps: PlanStep, goal: str = "test") -> FakeAgent:
+    """构造输出固定计划的 Planner"""
+    plan = ExecutionPlan(goal=goal, steps=list(steps))
+    return FakeAgent(
+        AgentRole.PLANNER,
+        [AgentOutput(success=True, data=plan, confidence=1.0, role=AgentRole.PLANNER)],
+    )
+
+
+class LocalHttpServer:
+    """
+    测试用 HTTP/1.1 服务：支持 keep-alive 与流水线（同一连接上的请求按序处理）
+    - 响应体为 {"method", "path", "body"} 的 JSON
+    - 路径含 delay=<毫秒> 时延迟响应；/close 响应后关闭连接；/chunked 以分块编码响应
+    - 记录建立的连接数与同时处理的请求数峰值
+    """
+
+    def __init__(self) -> None:
+        self.connections = 0
+        self.requests = 0
+        self.active = 0
+        self.max_active = 0
+        self.port = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._writers: List[asyncio.StreamWriter] = []
+        self._handlers: Set["asyncio.Task[None]"] = set()
+
+    async def __aenter__(self) -> "LocalHttpServer":
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        assert self._server is not None
+        self._server.close()
+        for writer in self._writers:
+            writer.close()
+        # 等待处理中的连接退出，避免事件循环结束时取消它们
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        await self._server.wait_closed()
+
+    def url(self, path: str = "/") -> str:
+        return f"http://127.0.0.1:{self.port}{path}"
+
+    def drop_connections(self) -> None:
+        """服务端主动关闭所有连接（模拟 keep-alive 超时）"""
+        for writer in self._writers:
+            writer.close()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        self._writers.append(writer)
+        task = asyncio.current_task()
+        if task is not None:
+            self._handlers.add(task)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                method, target, _ = line.decode().split(" ", 2)
+                headers: Dict[str, str] = {}
+                while (header := await reader.readline()) not in (b"\r\n", b""):
+                    name, _, value = header.decode().partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                self.requests += 1
+                self.active += 1
+                self.max_active = max(self.max_active, self.active)
+                if "delay=" in target:
+                    await asyncio.sleep(int(target.split("delay=")[1].split("&")[0]) / 1000)
+                self.active -= 1
+
+                payload = json.dumps(
+                    {"method": method, "path": target, "body": body.decode()}
+                ).encode()
+                close = target.startswith("/close")
+                head = "HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                if close:
+                    head += "Connection: close\r\n"
+                if target.startswith("/chunked"):
+                    middle = len(payload) // 2
+                    writer.write((head + "Transfer-Encoding: chunked\r\n\r\n").encode())
+                    for part in (payload[:middle], payload[middle:]):
+                        writer.write(f"{len(part):x}\r\n".encode() + part + b"\r\n")
+                    writer.write(b"0\r\n\r\n")
+                else:
+                    writer.write(f"{head}Content-Length: {len(payload)}\r\n\r\n".encode())
+                    writer.write(payload)
+                await writer.drain()
+                if close:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            if task is not None:
+                self._handlers.discard(task)
+
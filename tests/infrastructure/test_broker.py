@@ -0,0 +1,84 @@
+"""
+步骤任务代理单元测试
+测试SQLite代理的租用、续租、重新投递与结果回传
+"""
+import asyncio
+
+import pytest
+
+from src.core.models import PlanStep
+from src.core.protocols import ToolExecutionResult
+from src.infrastructure.broker.base_broker import StepTask
+from src.infrastructure.broker.sqlite_broker import SqliteBroker
+
+
+@pytest.fixture
+def broker(tmp_path):
+    """创建SQLite代理实例"""
+    return SqliteBroker(str(tmp_path / "broker.sqlite3"), max_deliveries=2)
+
+
+def make_task(task_id, tool_name="cpu"):
+    step = PlanStep(id=f"step-{task_id}", description="", tool_name=tool_name, input_schema={})
+    return StepTask(task_id=task_id, step=step, tool_input={"n": 3}, trace_id="t")
+
+
+@pytest.mark.asyncio
+async def test_lease_complete_and_collect(broker):
+    """任务按发布顺序租用，只投递给注册了对应工具的工作进程，完成后可取回结果"""
+    await broker.publish(make_task("a"))
+    await broker.publish(make_task("b", tool_name="search"))
+
+    assert await broker.lease("w1", ["other"], 30) is None
+    task = await broker.lease("w1", ["cpu", "search"], 30)
+    assert task.task_id == "a" and task.delivery == 1 and task.tool_input == {"n": 3}
+
+    assert await broker.complete("a", "w1", ToolExecutionResult(success=True, output=5))
+    results = await broker.results(["a", "b"])
+    assert list(results) == ["a"] and results["a"].output == 5
+
+    await broker.remove(["a"])
+    assert await broker.stats() == {"PENDING": 1, "LEASED": 0, "DONE": 0}
+
+
+@pytest.mark.asyncio
+async def test_expired_lease_is_redelivered(broker):
+    """租约过期后任务重新投递，原工作进程的续租与提交均被拒绝"""
+    await broker.publish(make_task("a"))
+    await broker.lease("w1", ["cpu"], 0.05)
+    assert await broker.lease("w2", ["cpu"], 30) is None
+    await asyncio.sleep(0.06)
+
+    task = await broker.lease("w2", ["cpu"], 30)
+    assert task.task_id == "a" and task.delivery == 2
+    assert not await broker.heartbeat("a", "w1", 30)
+    assert not await broker.complete("a", "w1", ToolExecutionResult(success=True, output=1))
+    assert await broker.heartbeat("a", "w2", 30)
+    assert await broker.complete("a", "w2", ToolExecutionResult(success=True, output=2))
+    assert (await broker.results(["a"]))["a"].output == 2
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_keeps_lease(broker):
+    """续租后任务不会被其他工作进程租用"""
+    await broker.publish(make_task("a"))
+    await broker.lease("w1", ["cpu"], 0.05)
+    assert await broker.heartbeat("a", "w1", 30)
+    await asyncio.sleep(0.06)
+
+    assert await broker.lease("w2", ["cpu"], 30) is None
+
+
+@pytest.mark.asyncio
+async def test_delivery_exhaustion_yields_error_result(broker):
+    """每次投递都未完成时，达到上限后以结构化错误结束"""
+    await broker.publish(make_task("a"))
+    for worker in ("w1", "w2"):
+        assert await broker.lease(worker, ["cpu"], 0.01) is not None
+        await asyncio.sleep(0.02)
+
+    assert await broker.lease("w3", ["cpu"], 30) is None
+    result = (await broker.results(["a"]))["a"]
+    assert not result.success
+    assert result.error.code == "STEP_DELIVERY_EXHAUSTED"
+    assert result.error.metadata["deliveries"] == 2
@@ -0,0 +1,123 @@
+"""
+执行日志单元测试
+测试JSONL执行日志的记录、折叠与归档
+"""
+import asyncio
+import time
+
+import pytest
+
+from src.core.models import GlobalState
+from src.core.types import LifecycleState
+from src.infrastructure.journal import jsonl_journal
+from src.infrastructure.journal.jsonl_journal import JsonlJournal
+
+
+@pytest.fixture
+def journal(tmp_path):
+    """创建执行日志实例"""
+    return JsonlJournal(str(tmp_path / "journal"))
+
+
+def make_state(lifecycle_state, **kwargs):
+    return GlobalState(
+        original_goal="goal", lifecycle_state=lifecycle_state, trace_id="t", **kwargs
+    )
+
+
+@pytest.mark.asyncio
+async def test_load_folds_latest_transition_and_steps(journal):
+    """读取时折叠出最近状态与本轮已完成步骤"""
+    state = make_state(LifecycleState.EXECUTION_PREPARE)
+    execution_id = str(state.execution_id)
+    await journal.record_transition(state, "snap-1", {"exec": "snap-1"}, reset_steps=True)
+    await journal.record_transition(
+        state.model_copy(update={"lifecycle_state": LifecycleState.STEP_EXECUTION}),
+        "snap-1",
+        {"exec": "snap-1"},
+    )
+    await journal.record_step_completed(execution_id, "a", {"value": 1})
+    await journal.record_step_started(execution_id, "b")
+
+    entry = await journal.load(execution_id)
+
+    assert entry.state.lifecycle_state == LifecycleState.STEP_EXECUTION
+    assert entry.snapshot_id == "snap-1"
+    assert entry.completed_steps == {"a": {"value": 1}}
+    assert entry.started_steps == ["b"]
+
+
+@pytest.mark.asyncio
+async def test_reset_clears_previous_round(journal):
+    """新一轮执行开始时清空上一轮的步骤记录"""
+    state = make_state(LifecycleState.STEP_EXECUTION)
+    execution_id = str(state.execution_id)
+    await journal.record_transition(state, None, {})
+    await journal.record_step_completed(execution_id, "a", 1)
+    await journal.record_transition(
+        state.model_copy(update={"lifecycle_state": LifecycleState.EXECUTION_PREPARE}),
+        None,
+        {},
+        reset_steps=True,
+    )
+
+    entry = await journal.load(execution_id)
+    assert entry.completed_steps == {}
+
+
+@pytest.mark.asyncio
+async def test_truncated_tail_is_ignored(journal):
+    """崩溃时写了一半的最后一行被忽略"""
+    state = make_state(LifecycleState.STEP_EXECUTION)
+    execution_id = str(state.execution_id)
+    await journal.record_transition(state, None, {})
+    with open(journal.active_path / f"{execution_id}.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"type": "step_completed", "step_')
+
+    entry = await journal.load(execution_id)
+    assert entry.state.lifecycle_state == LifecycleState.STEP_EXECUTION
+    assert entry.completed_steps == {}
+
+
+@pytest.mark.asyncio
+async def test_finish_removes_from_in_flight(journal):
+    """结束的执行移入 finished/，不再参与恢复"""
+    running = make_state(LifecycleState.PLAN_CHECK)
+    done = make_state(LifecycleState.GLOBAL_REVIEW)
+    await journal.record_transition(running, None, {})
+    await journal.record_transition(done, None, {})
+
+    await journal.finish(str(done.execution_id))
+
+    assert await journal.in_flight() == [str(running.execution_id)]
+    assert await journal.load(str(done.execution_id)) is None
+    assert (journal.finished_path / f"{done.execution_id}.jsonl").exists()
+
+
+@pytest.mark.asyncio
+async def test_writes_do_not_block_event_loop(tmp_path, monkeypatch):
+    """文件写入在线程中执行：慢速 fsync 期间事件循环继续调度，记录顺序不变"""
+    monkeypatch.setattr(jsonl_journal.os, "fsync", lambda fd: time.sleep(0.02))
+    journal = JsonlJournal(str(tmp_path / "journal"), fsync=True)
+    state = make_state(LifecycleState.STEP_EXECUTION)
+    execution_id = str(state.execution_id)
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.005)
+            ticks += 1
+
+    task = asyncio.ensure_future(ticker())
+    try:
+        await journal.record_transition(state, None, {}, reset_steps=True)
+        await asyncio.gather(*(
+            journal.record_step_completed(execution_id, f"s{i}", i) for i in range(3)
+        ))
+    finally:
+        task.cancel()
+
+    assert ticks >= 2
+    entry = await journal.load(execution_id)
+    assert list(entry.completed_steps) == ["s0", "s1", "s2"]
@@ -0,0 +1,112 @@
+"""
+分布式步骤执行集成测试
+引擎经 SQLite 代理发布步骤，由独立工作进程或进程内 StepWorker 执行
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from src.core.models import PlanStep
+from src.core.protocols import ToolExecutionResult
+from src.engine.distributed import DistributedConfig, StepDispatcher, StepWorker
+from src.engine.execution_engine import EngineConfig, EngineServices, ExecutionEngine
+from src.registry.component_registry import ComponentRegistry
+from src.tools.base_tool import ExecutionLane
+from src.tools.deadline import deadline_scope
+from tests.helpers import CpuTool, cpu_worker_components, planner_for
+
+
+def cpu_step(step_id, n, dependencies=None):
+    return PlanStep(
+        id=step_id,
+        description=f"step {step_id}",
+        tool_name="cpu",
+        input_schema={"n": n},
+        dependencies=dependencies or [],
+    )
+
+
+def distributed_engine(config, *steps):
+    """引擎侧组件：注册 CpuTool 以通过存在性与权限校验，实际执行由工作进程完成"""
+    components = ComponentRegistry()
+    components.register_agent(planner_for(*steps))
+    components.register_tool(CpuTool(ExecutionLane.INLINE))
+    engine_config = EngineConfig()
+    services = EngineServices.create(engine_config, components, distributed_config=config)
+    return ExecutionEngine(components, services, engine_config)
+
+
+@pytest.mark.asyncio
+async def test_steps_run_in_worker_process(tmp_path):
+    """步骤在独立的工作进程中执行，结果回传给引擎"""
+    config = DistributedConfig(enabled=True, broker_path=str(tmp_path / "broker.sqlite3"))
+    worker = subprocess.Popen([
+        sys.executable, "-m", "src.engine.distributed",
+        "--broker", config.broker_path,
+        "--factory", "tests.helpers:cpu_worker_components",
+        "--concurrency", "2",
+    ])
+    try:
+        engine = distributed_engine(
+            config, cpu_step("a", 10), cpu_step("b", 20), cpu_step("c", 30, ["a", "b"])
+        )
+        result = await asyncio.wait_for(engine.start("goal"), timeout=30)
+    finally:
+        worker.terminate()
+        worker.wait(timeout=10)
+
+    assert result.success
+    assert result.final_output["c"]["sum"] == sum(i * i for i in range(30))
+    assert {output["pid"] for output in result.final_output.values()} == {worker.pid}
+    assert worker.pid != os.getpid()
+
+
+@pytest.mark.asyncio
+async def test_lost_worker_task_is_redelivered(tmp_path):
+    """工作进程租用任务后失联，租约过期后任务重新投递给其他工作进程"""
+    config = DistributedConfig(
+        enabled=True,
+        broker_path=str(tmp_path / "broker.sqlite3"),
+        lease_seconds=0.2,
+        heartbeat_seconds=0.05,
+        poll_interval_ms=5,
+    )
+    engine = distributed_engine(config, cpu_step("a", 10))
+    broker = engine.services.dispatcher.broker
+    running = asyncio.ensure_future(engine.start("goal"))
+
+    lost = None
+    while lost is None:
+        await asyncio.sleep(0.01)
+        lost = await broker.lease("crashed-worker", ["cpu"], config.lease_seconds)
+
+    stop = asyncio.Event()
+    worker = StepWorker(broker, cpu_worker_components(), config=config)
+    serving = asyncio.ensure_future(worker.run(stop))
+    result = await asyncio.wait_for(running, timeout=10)
+    stop.set()
+    await serving
+
+    assert result.success
+    assert worker.completed == 1
+    assert await broker.stats() == {"PENDING": 0, "LEASED": 0, "DONE": 0}
+    late = ToolExecutionResult(success=True, output="late")
+    assert not await broker.complete(lost.task_id, "crashed-worker", late)
+
+
+@pytest.mark.asyncio
+async def test_remote_wait_respects_outer_deadline(tmp_path):
+    """没有工作进程时，等待时长受外层剩余截止时间限制，而非工具超时 + 排队时长"""
+    config = DistributedConfig(enabled=True, broker_path=str(tmp_path / "broker.sqlite3"))
+    dispatcher = StepDispatcher.create(config)
+    started = time.perf_counter()
+    with deadline_scope(50):
+        result = await dispatcher.invoke(CpuTool(ExecutionLane.INLINE), {"n": 1})
+    elapsed = time.perf_counter() - started
+
+    assert result.error.code == "REMOTE_STEP_TIMEOUT"
+    assert elapsed < 1
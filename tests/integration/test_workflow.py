@@ -0,0 +1,130 @@
+"""
+端到端工作流集成测试
+使用真实的基础设施组件（ConsoleTracer / JsonSnapshotManager / LocalMemory）驱动完整执行流程
+"""
+import asyncio
+
+import pytest
+
+from src.core.models import PlanStep
+from src.core.types import LifecycleState, TraceEventType
+from src.engine.session_runtime import SessionRuntime
+from src.infrastructure.journal.jsonl_journal import JsonlJournal
+from src.infrastructure.memory.local_memory import LocalMemory
+from src.infrastructure.snapshot.json_snapshot import JsonSnapshotManager
+from src.infrastructure.tracer.console_tracer import ConsoleTracer
+from src.registry.component_registry import ComponentRegistry
+from tests.helpers import FakeTool, planner_for
+
+
+def step(step_id, dependencies=None, tool_name="echo"):
+    return PlanStep(
+        id=step_id,
+        description=f"step {step_id}",
+        tool_name=tool_name,
+        input_schema={"id": step_id},
+        dependencies=dependencies or [],
+    )
+
+
+@pytest.fixture
+def components(tmp_path):
+    registry = ComponentRegistry(
+        tracer=ConsoleTracer(),
+        snapshot_manager=JsonSnapshotManager(str(tmp_path / "snapshots")),
+        memory=LocalMemory(),
+    )
+    registry.register_agent(planner_for(step("a"), step("b"), step("c", ["a", "b"])))
+    registry.register_tool(FakeTool(name="echo"))
+    return registry
+
+
+@pytest.mark.asyncio
+async def test_sessions_run_full_lifecycle(components, capsys):
+    """多个会话并发走完完整生命周期，并留下完整的 trace 与快照"""
+    runtime = SessionRuntime(components)
+
+    session_id, result = await runtime.submit("first goal")
+    results = await runtime.run_many(["second goal", "third goal"])
+    capsys.readouterr()
+
+    assert result.success and all(r.success for r in results)
+    assert result.final_output["c"] == {"echo": {"id": "c"}, "call": 3}
+
+    events = await components.tracer.get_trace(result.trace_id)
+    transitions = [
+        e["payload"]["to"] for e in events
+        if e["event_type"] == TraceEventType.STATE_TRANSITION.value
+    ]
+    assert transitions[0] == LifecycleState.INIT.value
+    assert transitions[-1] == LifecycleState.COMPLETED.value
+    assert LifecycleState.STEP_EXECUTION.value in transitions
+
+    snapshots = [e for e in events if e["event_type"] == TraceEventType.SNAPSHOT_CREATED.value]
+    assert {e["payload"]["label"] for e in snapshots} == {"plan", "exec"}
+    assert runtime.stats().completed == 3
+
+
+def durable_components(tmp_path, writer):
+    """模拟进程重启：每次构造新的组件实例，共享同一存储目录"""
+    registry = ComponentRegistry(
+        snapshot_manager=JsonSnapshotManager(str(tmp_path / "snapshots")),
+        journal=JsonlJournal(str(tmp_path / "journal")),
+    )
+    registry.register_agent(planner_for(step("a"), step("b", ["a"], tool_name="writer")))
+    registry.register_tool(FakeTool(name="echo"))
+    registry.register_tool(writer)
+    return registry
+
+
+async def crash_during_step_b(tmp_path, writer):
+    """执行到步骤 b 时中断进程，返回中断前的 echo 工具"""
+    components = durable_components(tmp_path, writer)
+    runtime = SessionRuntime(components)
+    task = asyncio.ensure_future(runtime.submit("goal"))
+    while not writer.calls:
+        await asyncio.sleep(0.005)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    return components.tools.get("echo")
+
+
+@pytest.mark.asyncio
+async def test_resume_continues_without_rerunning_completed_steps(tmp_path):
+    """重启后从日志恢复，已完成步骤不会重新执行"""
+    echo = await crash_during_step_b(tmp_path, FakeTool(name="writer", delays=[10.0]))
+    assert len(echo.calls) == 1
+
+    components = durable_components(tmp_path, FakeTool(name="writer"))
+    runtime = SessionRuntime(components)
+    results = await runtime.resume_all()
+
+    assert len(results) == 1
+    result = next(iter(results.values()))
+    assert result.success
+    assert result.final_output["a"] == {"echo": {"id": "a"}, "call": 1}
+    assert components.tools.get("echo").calls == []
+    assert await components.journal.in_flight() == []
+
+
+@pytest.mark.asyncio
+async def test_interrupted_side_effect_waits_for_human(tmp_path):
+    """中断的有副作用步骤需人工确认后才会重新执行"""
+    await crash_during_step_b(
+        tmp_path, FakeTool(name="writer", delays=[10.0], has_side_effect=True)
+    )
+
+    writer = FakeTool(name="writer", has_side_effect=True)
+    runtime = SessionRuntime(durable_components(tmp_path, writer))
+    (execution_id, result), = (await runtime.resume_all()).items()
+
+    assert result.errors[0].code == "SIDE_EFFECT_UNCONFIRMED"
+    assert result.errors[0].metadata["steps"] == ["b"]
+    engine = runtime.get_session(execution_id)
+    assert engine.is_waiting_human
+    assert writer.calls == []
+
+    await engine.submit_human_feedback("re-run b")
+    assert engine.get_state().lifecycle_state == LifecycleState.COMPLETED
+    assert len(writer.calls) == 1
@@ -0,0 +1,171 @@
+"""
+认知 Agent 层单元测试
+"""
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+
+from src.agents.base_agent import (
+    AgentConfig, BaseAgentImpl, ChatMessage, LLMResponse, PromptCache, PromptCacheConfig,
+    canonical_text,
+)
+from src.core.models import ExecutionContext, GlobalState
+from src.core.protocols import AgentOutput
+from src.core.types import AgentRole, LifecycleState
+from tests.helpers import FakeClock
+
+
+class FakeLLM:
+    """记录请求的模型客户端；回复为最后一条消息的 JSON 包装"""
+
+    def __init__(self, delay=0.0, fail=False):
+        self.requests = []
+        self.delay = delay
+        self.fail = fail
+
+    async def complete(self, request):
+        self.requests.append(request)
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("upstream unavailable")
+        return LLMResponse(content=json.dumps({"echo": request.messages[-1].content}))
+
+
+class EchoPlanner(BaseAgentImpl):
+    """提示为系统说明 + 目标 + 已有错误的测试 Planner"""
+    name = "echo_planner"
+    role = AgentRole.PLANNER
+
+    def build_messages(self, global_state, execution_context, step_context=None):
+        errors = "\n".join(execution_context.errors)
+        return [
+            ChatMessage(role="system", content="You are the planner.  \n"),
+            ChatMessage(role="user", content=f"Goal: {global_state.original_goal}\n{errors}"),
+        ]
+
+    def parse_response(self, response, global_state, execution_context, step_context=None):
+        return AgentOutput(success=True, data=json.loads(response.content), role=self.role)
+
+
+def make_state(goal="ship it", iteration=0, trace_id="t1"):
+    return GlobalState(
+        original_goal=goal,
+        lifecycle_state=LifecycleState.PLAN_GENERATION,
+        iteration_count=iteration,
+        trace_id=trace_id,
+    )
+
+
+# ==============================================================================
+# 提示缓存
+# ==============================================================================
+
+class TestPromptCache:
+    """PromptCache / BaseAgentImpl 测试类"""
+
+    async def test_exact_hits_ignore_run_specific_state(self):
+        """相同提示在重规划与其他执行中命中缓存；规范化后相同的提示视为同一提示"""
+        llm = FakeLLM()
+        agent = EchoPlanner(llm)
+        context = ExecutionContext()
+
+        first = await agent.run(make_state(), context)
+        again = await agent.run(make_state(iteration=2, trace_id="t2"), context)
+        assert first.success and again.data == first.data
+        assert len(llm.requests) == 1
+        assert canonical_text("a  \r\nb\n\n") == canonical_text("a\nb")
+
+        await agent.run(make_state(goal="other"), context)
+        await agent.run(make_state(), ExecutionContext(errors=["a: TOOL_TIMEOUT"]))
+        assert len(llm.requests) == 3
+        assert agent.cache.stats()["hits"] == 1
+
+    async def test_single_flight_and_prefix_sharing(self):
+        """并发的相同调用只请求一次；共享前缀的新提示携带 cached_prefix"""
+        llm = FakeLLM(delay=0.01)
+        cache = PromptCache()
+        planner = EchoPlanner(llm, cache=cache)
+
+        outputs = await asyncio.gather(*(
+            planner.run(make_state(), ExecutionContext()) for _ in range(5)
+        ))
+        assert all(output.success for output in outputs)
+        assert len(llm.requests) == 1 and llm.requests[0].cached_prefix == 0
+
+        await planner.run(make_state(goal="next"), ExecutionContext())
+        assert llm.requests[-1].cached_prefix == 1
+        stats = cache.stats()
+        assert (stats["coalesced"], stats["misses"], stats["prefix_hits"]) == (4, 2, 1)
+
+        # 同一缓存中的其他角色不共享精确匹配条目，但共享消息前缀
+        class EchoCritic(EchoPlanner):
+            name = "echo_critic"
+            role = AgentRole.PLAN_CRITIC
+
+        await EchoCritic(llm, cache=cache).run(make_state(), ExecutionContext())
+        assert len(llm.requests) == 3 and llm.requests[-1].cached_prefix == 2
+
+    async def test_abandoned_flight_is_not_joined(self):
+        """所有等待者取消后，新的相同调用重新请求而不是加入已取消的调用"""
+        llm = FakeLLM(delay=0.05)
+        planner = EchoPlanner(llm)
+        abandoned = asyncio.ensure_future(planner.run(make_state(), ExecutionContext()))
+        await asyncio.sleep(0.01)
+        abandoned.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await abandoned
+
+        output = await planner.run(make_state(), ExecutionContext())
+        assert output.success
+        assert len(llm.requests) == 2 and planner.cache.stats()["coalesced"] == 0
+
+    async def test_ttl_and_size_bounds(self):
+        """条目过期后重新请求；超过条目数上限时淘汰最久未使用的条目"""
+        clock = FakeClock()
+        llm = FakeLLM()
+        cache = PromptCache(PromptCacheConfig(max_entries=2, ttl_seconds=10), clock=clock)
+        agent = EchoPlanner(llm, cache=cache)
+        context = ExecutionContext()
+
+        for goal in ("a", "b", "a", "c"):
+            await agent.run(make_state(goal=goal), context)
+        assert len(llm.requests) == 3 and len(cache) == 2
+        await agent.run(make_state(goal="b"), context)
+        assert len(llm.requests) == 4 and cache.stats()["evictions"] == 2
+
+        clock.now = 11
+        await agent.run(make_state(goal="b"), context)
+        assert len(llm.requests) == 5
+
+        disabled = EchoPlanner(llm, AgentConfig(prompt_cache=PromptCacheConfig(enabled=False)))
+        await disabled.run(make_state(goal="b"), context)
+        assert len(llm.requests) == 6
+
+    async def test_failures_are_not_cached(self):
+        """模型调用失败返回可重试错误；无法解析的回复从缓存中移除"""
+        llm = FakeLLM(fail=True)
+        agent = EchoPlanner(llm)
+        output = await agent.run(make_state(), ExecutionContext())
+        assert not output.success and output.errors[0].code == "LLM_CALL_FAILED"
+        assert output.errors[0].retryable
+
+        class BrokenParser(EchoPlanner):
+            def parse_response(self, response, global_state, execution_context, step_context=None):
+                raise ValueError("not a plan")
+
+        llm.fail = False
+        broken = BrokenParser(llm, cache=agent.cache)
+        output = await broken.run(make_state(), ExecutionContext())
+        assert output.errors[0].code == "INVALID_LLM_RESPONSE"
+        assert len(agent.cache) == 0
+        assert (await agent.run(make_state(), ExecutionContext())).success
+        assert len(llm.requests) == 3
+
+
+def test_agent_config_from_yaml():
+    """default.yaml 的 agents 段可被解析"""
+    config = AgentConfig.from_yaml(Path(__file__).resolve().parents[2] / "configs/default.yaml")
+    assert config.prompt_cache.enabled
+    assert config.temperature == 0.0
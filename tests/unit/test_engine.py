@@ -0,0 +1,1044 @@
+"""
+执行引擎层单元测试
+"""
+import asyncio
+import time
+from contextlib import aclosing
+from pathlib import Path
+
+import pytest
+
+from src.core.models import ExecutionContext, ExecutionPlan, PlanStep
+from src.core.protocols import AgentOutput, EngineResult, StructuredError, ToolExecutionResult
+from src.core.types import AgentRole, LifecycleState, StepStatus
+from src.engine.admission import AdmissionConfig, AdmissionController
+from src.engine.batch_manager import BatchManager
+from src.engine.events import ResultEvent, StepCompletedEvent
+from src.engine.execution_engine import EngineConfig, EngineServices, ExecutionEngine
+from src.engine.plan_diff import apply_plan_diff, diff_plans
+from src.engine.retry import (
+    RetryBudget,
+    RetryBudgetConfig,
+    RetryConfig,
+    RetryPolicy,
+    RetryScheduler,
+)
+from src.engine.session_runtime import FairScheduler, FairSchedulerConfig, SessionRuntime
+from src.registry.component_registry import ComponentRegistry
+from src.tools.limits import ToolLimiter, ToolLimits, ToolLimitsConfig
+from src.tools.batching import BatchingConfig
+from src.tools.deadline import remaining_ms
+from src.tools.runtime import ToolRuntime, ToolRuntimeConfig
+from src.tools.base_tool import ExecutionLane
+from tests.helpers import BatchTool, CpuTool, FakeAgent, FakeTool, planner_for
+
+
+CONFIG_DIR = Path(__file__).resolve().parents[2] / "configs"
+
+
+def make_step(step_id, dependencies=None, tool_name="noop"):
+    """构造测试步骤"""
+    return PlanStep(
+        id=step_id,
+        description=f"step {step_id}",
+        tool_name=tool_name,
+        input_schema={},
+        dependencies=dependencies or [],
+    )
+
+
+def make_plan(steps):
+    return ExecutionPlan(goal="test", steps=steps)
+
+
+def sleeping_runner(delay, started=None, fail=()):
+    """构造按固定延迟完成的步骤执行函数"""
+
+    async def runner(step):
+        if started is not None:
+            started.append(step.id)
+        await asyncio.sleep(delay)
+        if step.id in fail:
+            return ToolExecutionResult(success=False)
+        return ToolExecutionResult(success=True, output=f"out-{step.id}")
+
+    return runner
+
+
+# ==============================================================================
+# BatchManager
+# ==============================================================================
+
+class TestBatchManager:
+    """BatchManager 测试类"""
+
+    def test_validate_detects_cycle(self):
+        """检测依赖环"""
+        plan = make_plan([
+            make_step("a", ["c"]),
+            make_step("b", ["a"]),
+            make_step("c", ["b"]),
+            make_step("d"),
+        ])
+        errors = BatchManager().validate(plan)
+        assert len(errors) == 1
+        assert errors[0].code == "DEPENDENCY_CYCLE"
+        assert errors[0].metadata["steps"] == ["a", "b", "c"]
+
+    def test_validate_detects_unknown_and_duplicate(self):
+        """检测未知依赖与重复 ID"""
+        plan = make_plan([make_step("a"), make_step("a"), make_step("b", ["missing"])])
+        codes = {e.code for e in BatchManager().validate(plan)}
+        assert codes == {"DUPLICATE_STEP_ID", "UNKNOWN_DEPENDENCY"}
+
+    def test_critical_path_priorities(self):
+        """关键路径长度（bottom level）计算"""
+        plan = make_plan([
+            make_step("a"),
+            make_step("b", ["a"]),
+            make_step("c", ["b"]),
+            make_step("x"),
+            make_step("y", ["a", "x"]),
+        ])
+        priorities = BatchManager().critical_path_priorities(plan)
+        assert priorities == {"a": 3.0, "b": 2.0, "c": 1.0, "x": 2.0, "y": 1.0}
+
+    @pytest.mark.asyncio
+    async def test_run_updates_context(self):
+        """执行后更新 active_steps、intermediate_results 与批次 ID"""
+        plan = make_plan([make_step("a"), make_step("b", ["a"])])
+        context = ExecutionContext()
+        batch = await BatchManager().run(plan, sleeping_runner(0), context)
+
+        assert batch.success
+        assert context.current_batch_id == batch.batch_id
+        assert context.active_steps == {"a": StepStatus.COMPLETED, "b": StepStatus.COMPLETED}
+        assert context.intermediate_results == {"a": "out-a", "b": "out-b"}
+
+    @pytest.mark.asyncio
+    async def test_failure_skips_downstream_only(self):
+        """失败步骤的下游被跳过，独立分支继续执行"""
+        plan = make_plan([
+            make_step("a"),
+            make_step("b", ["a"]),
+            make_step("c", ["b"]),
+            make_step("d"),
+        ])
+        context = ExecutionContext()
+        batch = await BatchManager().run(plan, sleeping_runner(0, fail={"a"}), context)
+
+        assert not batch.success
+        assert context.active_steps["a"] == StepStatus.FAILED
+        assert context.active_steps["b"] == StepStatus.SKIPPED
+        assert context.active_steps["c"] == StepStatus.SKIPPED
+        assert context.active_steps["d"] == StepStatus.COMPLETED
+
+    @pytest.mark.asyncio
+    async def test_runner_exception_becomes_structured_error(self):
+        """执行函数抛出的异常被封装为 StructuredError"""
+
+        async def runner(step):
+            raise RuntimeError("boom")
+
+        batch = await BatchManager().run(make_plan([make_step("a")]), runner, ExecutionContext())
+        assert batch.results["a"].error.code == "STEP_EXCEPTION"
+
+    @pytest.mark.asyncio
+    async def test_completed_steps_not_rerun(self):
+        """已完成步骤不会被重复执行"""
+        plan = make_plan([make_step("a"), make_step("b", ["a"])])
+        context = ExecutionContext(active_steps={"a": StepStatus.COMPLETED})
+        started = []
+        await BatchManager().run(plan, sleeping_runner(0, started), context)
+        assert started == ["b"]
+
+    @pytest.mark.asyncio
+    async def test_critical_path_first(self):
+        """并发受限时优先启动关键路径上的步骤"""
+        plan = make_plan(
+            [make_step(f"i{n}") for n in range(4)]
+            + [make_step("c0"), make_step("c1", ["c0"]), make_step("c2", ["c1"])]
+        )
+        started = []
+        manager = BatchManager(max_concurrency=1)
+        await manager.run(plan, sleeping_runner(0, started), ExecutionContext())
+        # c2 与独立步骤的关键路径长度相同，按计划顺序出队
+        assert started[:2] == ["c0", "c1"]
+
+    @pytest.mark.asyncio
+    async def test_concurrency_cap(self):
+        """同时运行的步骤数不超过并发上限"""
+        running = 0
+        peak = 0
+
+        async def runner(step):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.001)
+            running -= 1
+            return ToolExecutionResult(success=True)
+
+        plan = make_plan([make_step(f"s{n}") for n in range(20)])
+        await BatchManager(max_concurrency=3).run(plan, runner, ExecutionContext())
+        assert peak == 3
+
+    @pytest.mark.asyncio
+    async def test_wide_plan_finishes_in_critical_path_time(self):
+        """200 步宽计划的耗时接近关键路径而非步骤总和"""
+        delay = 0.02
+        chain = [make_step("c0")] + [make_step(f"c{n}", [f"c{n - 1}"]) for n in range(1, 5)]
+        wide = [make_step(f"w{n}", ["c0"] if n % 2 else []) for n in range(195)]
+        plan = make_plan(wide + chain)
+
+        started = time.perf_counter()
+        batch = await BatchManager(max_concurrency=256).run(
+            plan, sleeping_runner(delay), ExecutionContext()
+        )
+        elapsed = time.perf_counter() - started
+
+        assert batch.success
+        assert len(batch.results) == 200
+        # 关键路径为 5 步（0.1s），步骤总和为 4s
+        assert elapsed < 5 * delay * 3
+
+
+def timed_reviewer(delay, veto=(), log=None):
+    """构造按固定延迟完成的逐步审查函数"""
+
+    async def reviewer(step, result):
+        await asyncio.sleep(delay)
+        if log is not None:
+            log.append(step.id)
+        if step.id in veto:
+            return StructuredError(code="STEP_REJECTED", message="no", severity="WARNING")
+        return None
+
+    return reviewer
+
+
+class TestStepReview:
+    """逐步审查与推测执行测试类"""
+
+    @pytest.mark.asyncio
+    async def test_review_gates_dependents(self):
+        """无推测时下游在上游审查通过后才启动"""
+        plan = make_plan([make_step("a"), make_step("b", ["a"])])
+        started, reviewed = [], []
+        context = ExecutionContext()
+
+        async def runner(step):
+            started.append((step.id, list(reviewed)))
+            return ToolExecutionResult(success=True, output=step.id)
+
+        reviewer = timed_reviewer(0.01, log=reviewed)
+        batch = await BatchManager().run(plan, runner, context, reviewer)
+
+        assert batch.success
+        assert started == [("a", []), ("b", ["a"])]
+        assert context.active_steps == {"a": StepStatus.COMPLETED, "b": StepStatus.COMPLETED}
+
+    @pytest.mark.asyncio
+    async def test_speculation_overlaps_review(self):
+        """推测模式下长线性计划的审查与执行重叠"""
+        plan = make_plan([make_step(f"s{i}", [f"s{i - 1}"] if i else []) for i in range(5)])
+        manager = BatchManager()
+        reviewer = timed_reviewer(0.03)
+
+        started = time.perf_counter()
+        serial = await manager.run(plan, sleeping_runner(0.01), ExecutionContext(), reviewer)
+        serial_elapsed = time.perf_counter() - started
+        context = ExecutionContext()
+        started = time.perf_counter()
+        batch = await manager.run(
+            plan, sleeping_runner(0.01), context, reviewer, speculate=lambda step: True
+        )
+        speculative_elapsed = time.perf_counter() - started
+
+        assert serial.success and batch.success
+        assert batch.speculative == ["s1", "s2", "s3", "s4"]
+        assert speculative_elapsed < serial_elapsed / 2
+        assert all(status == StepStatus.COMPLETED for status in context.active_steps.values())
+
+    @pytest.mark.asyncio
+    async def test_veto_discards_speculative_results(self):
+        """上游被否决时撤销推测结果并恢复上下文"""
+        plan = make_plan([make_step("a"), make_step("b", ["a"]), make_step("c", ["b"])])
+        context = ExecutionContext(intermediate_results={"b": "stale"})
+
+        batch = await BatchManager().run(
+            plan,
+            sleeping_runner(0.001),
+            context,
+            timed_reviewer(0.03, veto={"a"}),
+            speculate=lambda step: True,
+        )
+
+        assert not batch.success
+        assert batch.results["a"].error.code == "STEP_REJECTED"
+        assert set(batch.discarded) == {"b", "c"}
+        assert set(batch.results) == {"a"}
+        assert context.intermediate_results == {"b": "stale"}
+        assert context.active_steps == {
+            "a": StepStatus.FAILED,
+            "b": StepStatus.SKIPPED,
+            "c": StepStatus.SKIPPED,
+        }
+
+    @pytest.mark.asyncio
+    async def test_non_speculable_steps_wait(self):
+        """不满足推测条件的步骤等待上游确认"""
+        plan = make_plan([make_step("a"), make_step("b", ["a"])])
+        batch = await BatchManager().run(
+            plan,
+            sleeping_runner(0.001),
+            ExecutionContext(),
+            timed_reviewer(0.01),
+            speculate=lambda step: False,
+        )
+        assert batch.success
+        assert batch.speculative == []
+
+    @pytest.mark.asyncio
+    async def test_engine_step_rejection_triggers_replan(self):
+        """引擎逐步审查否决时进入 REPLAN，推测步骤不产生输出"""
+
+        def review(state, context, step):
+            approved = step is None or step.step_id != "a"
+            return AgentOutput(
+                success=approved, confidence=1.0 if approved else 0.1, role=AgentRole.REVIEWER
+            )
+
+        components = make_components(
+            make_step("a"), make_step("b", ["a"]),
+            agents=[FakeAgent(AgentRole.REVIEWER, [review])],
+        )
+        config = EngineConfig(step_review=True, speculative_execution=True, max_iterations=1)
+        engine = ExecutionEngine(components, config=config)
+
+        result = await engine.start("goal")
+
+        assert not result.success
+        assert engine.get_state().iteration_count == 1
+        assert "b" not in engine.get_context().intermediate_results
+
+    @pytest.mark.asyncio
+    async def test_only_accepted_steps_reach_on_accept(self):
+        """被否决的步骤与随之撤销的推测下游不触发 on_accept"""
+        plan = make_plan([make_step("a"), make_step("b", ["a"]), make_step("c")])
+        accepted = []
+
+        async def on_accept(step, result):
+            accepted.append((step.id, result.output))
+
+        async def runner(step):
+            return ToolExecutionResult(success=True, output=step.id)
+
+        batch = await BatchManager().run(
+            plan, runner, ExecutionContext(), timed_reviewer(0.01, veto={"a"}),
+            speculate=lambda step: True, on_accept=on_accept,
+        )
+
+        assert "b" in batch.speculative and "b" in batch.discarded
+        assert accepted == [("c", "c")]
+
+    @pytest.mark.asyncio
+    async def test_journal_skips_vetoed_steps(self):
+        """逐步审查时执行日志只记录审查通过的步骤"""
+
+        class RecordingJournal:
+            def __init__(self):
+                self.completed = []
+
+            async def record_step_started(self, execution_id, step_id):
+                pass
+
+            async def record_step_completed(self, execution_id, step_id, output):
+                self.completed.append(step_id)
+
+            async def record_transition(self, *args, **kwargs):
+                pass
+
+            async def finish(self, execution_id):
+                pass
+
+        def review(state, context, step):
+            vetoed = step is not None and step.step_id == "a"
+            return AgentOutput(
+                success=not vetoed, confidence=0.0 if vetoed else 1.0, role=AgentRole.REVIEWER
+            )
+
+        components = make_components(
+            make_step("a"), make_step("b"), agents=[FakeAgent(AgentRole.REVIEWER, [review])]
+        )
+        components.journal = RecordingJournal()
+        config = EngineConfig(step_review=True, max_iterations=1)
+        engine = ExecutionEngine(components, config=config)
+
+        await engine.start("goal")
+
+        assert components.journal.completed == ["b"]
+
+
+# ==============================================================================
+# RetryScheduler
+# ==============================================================================
+
+def fast_retry_config(max_attempts=3, ratio=1.0, min_per_second=10.0, max_tokens=100):
+    """构造无退避延迟的重试配置"""
+    return RetryConfig(
+        default=RetryPolicy(max_attempts=max_attempts, base_delay_ms=1, jitter="none"),
+        budget=RetryBudgetConfig(
+            ratio=ratio, min_retries_per_second=min_per_second, max_tokens=max_tokens
+        ),
+    )
+
+
+class TestRetryScheduler:
+    """RetryScheduler 测试类"""
+
+    def test_backoff_growth_and_cap(self):
+        """指数退避并受上限约束"""
+        scheduler = RetryScheduler()
+        policy = RetryPolicy(base_delay_ms=100, max_delay_ms=350, multiplier=2, jitter="none")
+        assert [scheduler.backoff_ms(policy, n) for n in (1, 2, 3, 4)] == [100, 200, 350, 350]
+
+        jittered = RetryPolicy(base_delay_ms=100, jitter="full")
+        assert all(0 <= scheduler.backoff_ms(jittered, 3) <= 400 for _ in range(50))
+
+    def test_budget_tracks_traffic_ratio(self):
+        """预算按首次请求流量比例补充"""
+        budget = RetryBudget(RetryBudgetConfig(ratio=0.1, min_retries_per_second=0))
+        for _ in range(20):
+            budget.record_request()
+        assert budget.try_withdraw()
+        assert budget.try_withdraw()
+        assert not budget.try_withdraw()
+
+    @pytest.mark.asyncio
+    async def test_retries_until_success(self):
+        """可重试失败按策略重试直至成功"""
+        tool = FakeTool(failures=2)
+        runtime = ToolRuntime()
+        scheduler = RetryScheduler(fast_retry_config())
+        result = await scheduler.call(tool.name, lambda: runtime.invoke(tool, {}))
+        assert result.success
+        assert len(tool.calls) == 3
+        assert scheduler.retries_scheduled == 2
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_max_attempts(self):
+        """达到最大尝试次数后返回最后一次失败"""
+        tool = FakeTool(failures=10)
+        scheduler = RetryScheduler(fast_retry_config(max_attempts=2))
+        result = await scheduler.call(tool.name, lambda: ToolRuntime().invoke(tool, {}))
+        assert not result.success
+        assert result.error.metadata["attempts"] == 2
+        assert len(tool.calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_non_retryable_not_retried(self):
+        """非可重试或建议动作不是 RETRY 的错误不重试"""
+
+        class ReplanTool(FakeTool):
+            async def execute(self, input_data):
+                self.calls.append(input_data)
+                raise RuntimeError("logic error")
+
+        tool = ReplanTool()
+        scheduler = RetryScheduler(fast_retry_config())
+        result = await scheduler.call(tool.name, lambda: ToolRuntime().invoke(tool, {}))
+        assert result.error.code == "TOOL_EXCEPTION"
+        assert len(tool.calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_budget_prevents_retry_storm(self):
+        """下游持续失败时重试总量受全局预算约束"""
+        tool = FakeTool(failures=10_000)
+        runtime = ToolRuntime()
+        scheduler = RetryScheduler(
+            fast_retry_config(max_attempts=5, ratio=0.1, min_per_second=0, max_tokens=5)
+        )
+        results = await asyncio.gather(*(
+            scheduler.call(tool.name, lambda: runtime.invoke(tool, {})) for _ in range(100)
+        ))
+        assert all(not r.success for r in results)
+        # 100 次首次请求 + 至多 10% 的重试
+        assert len(tool.calls) <= 110
+        assert scheduler.budget_rejections > 0
+        assert any(r.error.metadata.get("retry_budget_exhausted") for r in results)
+
+    @pytest.mark.asyncio
+    async def test_backoff_does_not_hold_concurrency_slot(self):
+        """退避等待期间释放并发槽位，其他调用可立即执行"""
+        flaky = FakeTool(name="shared", failures=1)
+        limiter = ToolLimiter(ToolLimitsConfig(tools={"shared": ToolLimits(max_concurrency=1)}))
+        runtime = ToolRuntime(limiter)
+        config = RetryConfig(default=RetryPolicy(base_delay_ms=200, jitter="none"))
+        scheduler = RetryScheduler(config)
+
+        retried = asyncio.ensure_future(
+            scheduler.call("shared", lambda: runtime.invoke(flaky, {"id": "retried"}))
+        )
+        await asyncio.sleep(0.02)
+        started = time.perf_counter()
+        other = await runtime.invoke(flaky, {"id": "other"})
+        assert other.success
+        assert time.perf_counter() - started < 0.1
+        assert not retried.done()
+        assert (await retried).success
+
+    @pytest.mark.asyncio
+    async def test_cancel_cancels_pending_timer(self):
+        """外层取消时清理等待中的重试定时器"""
+        tool = FakeTool(failures=10)
+        config = RetryConfig(default=RetryPolicy(base_delay_ms=10_000, jitter="none"))
+        scheduler = RetryScheduler(config)
+        task = asyncio.ensure_future(
+            scheduler.call(tool.name, lambda: ToolRuntime().invoke(tool, {}))
+        )
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert len(tool.calls) == 1
+
+
+# ==============================================================================
+# ExecutionEngine
+# ==============================================================================
+
+def make_components(*steps, tools=None, agents=()):
+    """构造带固定计划的共享组件"""
+    components = ComponentRegistry()
+    components.register_agent(planner_for(*steps))
+    for agent in agents:
+        components.register_agent(agent)
+    for tool in tools or [FakeTool(name="noop")]:
+        components.register_tool(tool)
+    return components
+
+
+class TestExecutionEngine:
+    """ExecutionEngine 测试类"""
+
+    @pytest.mark.asyncio
+    async def test_happy_path_completes(self):
+        """计划全部成功时进入 COMPLETED 并返回各步骤输出"""
+        components = make_components(make_step("a"), make_step("b", ["a"]))
+        engine = ExecutionEngine(components)
+
+        result = await engine.start("goal")
+
+        assert result.success
+        assert engine.get_state().lifecycle_state == LifecycleState.COMPLETED
+        assert set(result.final_output) == {"a", "b"}
+        assert engine.get_context().active_steps == {
+            "a": StepStatus.COMPLETED,
+            "b": StepStatus.COMPLETED,
+        }
+
+    @pytest.mark.asyncio
+    async def test_failed_step_replans_until_iteration_limit(self):
+        """步骤失败触发 REPLAN，超过迭代上限后进入 FAILED"""
+        tool = FakeTool(name="noop", failures=100)
+        components = make_components(make_step("a"), tools=[tool])
+        engine = ExecutionEngine(components, config=EngineConfig(max_iterations=2))
+        engine.services.retry_scheduler.config = RetryConfig(default=RetryPolicy(max_attempts=1))
+
+        result = await engine.start("goal")
+
+        assert not result.success
+        assert engine.get_state().lifecycle_state == LifecycleState.FAILED
+        assert engine.get_state().iteration_count == 2
+
+    @pytest.mark.asyncio
+    async def test_global_review_rejection_waits_for_human(self):
+        """全局审查未通过时等待人工，人工确认后继续执行"""
+        reviewer = FakeAgent(AgentRole.REVIEWER, [
+            AgentOutput(success=True, confidence=1.0, role=AgentRole.REVIEWER),
+            AgentOutput(success=False, confidence=0.2, role=AgentRole.REVIEWER),
+            AgentOutput(success=True, confidence=1.0, role=AgentRole.REVIEWER),
+        ])
+        components = make_components(make_step("a"), agents=[reviewer])
+        engine = ExecutionEngine(components)
+
+        result = await engine.start("goal")
+        assert engine.is_waiting_human
+        assert not result.success
+        assert result.errors[-1].code == "WAITING_HUMAN"
+
+        await engine.submit_human_feedback("looks fine")
+        assert engine.get_state().lifecycle_state == LifecycleState.COMPLETED
+
+    @pytest.mark.asyncio
+    async def test_step_timeout_bounds_retries(self):
+        """步骤超时约束包括重试在内的整个步骤，工具调用可见剩余时间"""
+        seen = []
+
+        class DeadlineTool(FakeTool):
+            async def execute(self, input_data):
+                seen.append(remaining_ms())
+                return await super().execute(input_data)
+
+        tool = DeadlineTool(name="noop", delays=[0.04], failures=100)
+        step = make_step("a").model_copy(update={"timeout_ms": 100})
+        engine = ExecutionEngine(make_components(step, tools=[tool]))
+        engine.services.retry_scheduler = RetryScheduler(fast_retry_config(max_attempts=10))
+        engine.initialize("goal")
+
+        started = time.perf_counter()
+        result = await engine._execute_step(step)
+
+        assert time.perf_counter() - started < 0.3
+        assert result.error.code == "STEP_TIMEOUT" and result.error.retryable
+        assert 2 <= len(tool.calls) <= 3
+        assert seen[0] <= 100 and seen[-1] < seen[0]
+
+    @pytest.mark.asyncio
+    async def test_backoff_does_not_hold_gate_slot(self):
+        """每次尝试单独经过闸门，退避等待期间不占用工具槽位"""
+
+        class RecordingGate:
+            def __init__(self):
+                self.tool_entries = 0
+                self.active = 0
+
+            async def run(self, kind, work):
+                self.tool_entries += kind == "tool"
+                self.active += 1
+                try:
+                    return await work()
+                finally:
+                    self.active -= 1
+
+        gate = RecordingGate()
+        tool = FakeTool(name="noop", failures=2)
+        engine = ExecutionEngine(make_components(make_step("a"), tools=[tool]), gate=gate)
+        engine.services.retry_scheduler.config = RetryConfig(
+            default=RetryPolicy(max_attempts=3, base_delay_ms=20, jitter="none"),
+        )
+        task = asyncio.ensure_future(engine.start("goal"))
+        while len(tool.calls) < 1:
+            await asyncio.sleep(0.001)
+        await asyncio.sleep(0.01)
+        assert gate.active == 0   # 处于第一次退避中
+
+        result = await task
+        assert result.success
+        assert gate.tool_entries == 3
+
+    @pytest.mark.asyncio
+    async def test_agent_exception_is_structured(self):
+        """Agent 抛出的异常被封装为 StructuredError，不跨层传播"""
+
+        def explode(state, context, step):
+            raise RuntimeError("boom")
+
+        components = ComponentRegistry()
+        components.register_agent(FakeAgent(AgentRole.PLANNER, [explode]))
+        engine = ExecutionEngine(components)
+
+        result = await engine.start("goal")
+
+        assert engine.get_state().lifecycle_state == LifecycleState.FAILED
+        assert "AGENT_EXCEPTION" in [e.code for e in result.errors]
+
+    @pytest.mark.asyncio
+    async def test_ready_steps_coalesce_into_batches(self):
+        """开启调用合并时，同一批就绪步骤对批量工具的调用合并执行，结果回到各自步骤"""
+        tool = BatchTool(max_batch_size=8)
+        steps = [make_step(f"s{i}", tool_name="batch") for i in range(12)]
+        components = make_components(
+            *steps, make_step("done", ["s0", "s11"]), tools=[tool, FakeTool(name="noop")]
+        )
+        config = EngineConfig(max_step_concurrency=16)
+        services = EngineServices.create(config, components, runtime_config=ToolRuntimeConfig(
+            batching=BatchingConfig(enabled=True, window_ms=5),
+        ))
+        engine = ExecutionEngine(components, services, config)
+
+        result = await engine.start("goal")
+
+        assert result.success
+        assert sorted(tool.batches) == [4, 8]
+        assert set(result.final_output) >= {f"s{i}" for i in range(12)}
+
+
+# ==============================================================================
+# FairScheduler / SessionRuntime
+# ==============================================================================
+
+class TestSessionRuntime:
+    """多会话运行时测试类"""
+
+    @pytest.mark.asyncio
+    async def test_weighted_fair_share_under_contention(self):
+        """争用时各会话按权重比例获得槽位"""
+        scheduler = FairScheduler(FairSchedulerConfig(tool_slots=1))
+        scheduler.register("heavy", weight=3)
+        scheduler.register("light", weight=1)
+        order = []
+
+        def work(session_id):
+            async def run():
+                order.append(session_id)
+                await asyncio.sleep(0.001)
+            return run
+
+        async def session(session_id, count):
+            await asyncio.gather(*(
+                scheduler.run(session_id, "tool", work(session_id)) for _ in range(count)
+            ))
+
+        await asyncio.gather(session("heavy", 40), session("light", 40))
+
+        first = order[:40]
+        assert 27 <= first.count("heavy") <= 33
+        assert scheduler.stats()["tool"] == {"running": 0, "waiting": 0}
+
+    @pytest.mark.asyncio
+    async def test_new_session_is_not_starved(self):
+        """后到的会话不会排在已有会话的全部积压之后"""
+        scheduler = FairScheduler(FairSchedulerConfig(agent_slots=1))
+        order = []
+
+        def work(session_id):
+            async def run():
+                order.append(session_id)
+                await asyncio.sleep(0.001)
+            return run
+
+        backlog = asyncio.gather(*(scheduler.run("old", "agent", work("old")) for _ in range(50)))
+        await asyncio.sleep(0.005)
+        await scheduler.run("new", "agent", work("new"))
+
+        assert order.index("new") < 15
+        await backlog
+
+    @pytest.mark.asyncio
+    async def test_sessions_share_components(self):
+        """所有会话共享同一组组件与服务实例，状态相互隔离"""
+        tool = FakeTool(name="noop")
+        components = make_components(make_step("a"), tools=[tool])
+        runtime = SessionRuntime(components)
+
+        first = runtime.create_session("s1")
+        second = runtime.create_session("s2")
+        e1, e2 = runtime.get_session(first), runtime.get_session(second)
+        assert e1.components is e2.components is components
+        assert e1.services is e2.services
+
+        results = await asyncio.gather(e1.start("one"), e2.start("two"))
+        assert all(r.success for r in results)
+        assert e1.get_state().execution_id != e2.get_state().execution_id
+        assert len(tool.calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_run_many_releases_sessions(self):
+        """批量执行后释放会话并统计吞吐"""
+        components = make_components(make_step("a"), make_step("b"))
+        runtime = SessionRuntime(components)
+
+        results = await runtime.run_many([f"goal-{i}" for i in range(100)])
+
+        assert all(r.success for r in results)
+        stats = runtime.stats()
+        assert stats.active == 0
+        assert stats.completed == 100
+        assert stats.sessions_per_second > 0
+
+    @pytest.mark.asyncio
+    async def test_failed_resume_releases_session(self, monkeypatch):
+        """resume 抛出异常时返回失败结果并释放会话与调度登记"""
+
+        async def explode(self, execution_id):
+            raise RuntimeError("journal unreadable")
+
+        monkeypatch.setattr(ExecutionEngine, "resume", explode)
+        runtime = SessionRuntime(make_components(make_step("a")))
+
+        result = await runtime.resume("exec-1")
+
+        assert not result.success
+        assert result.errors[0].code == "SESSION_EXCEPTION"
+        assert runtime.stats().active == 0
+        assert "exec-1" not in runtime.scheduler._weights
+
+
+# ==============================================================================
+# 增量重规划
+# ==============================================================================
+
+class CountingCpuTool(CpuTool):
+    """记录每个输入被执行次数的 CpuTool"""
+    name = "noop"
+
+    def __init__(self):
+        super().__init__(ExecutionLane.INLINE)
+        self.executed = []
+
+    def compute(self, input_data):
+        self.executed.append(input_data.get("id"))
+        return super().compute(input_data)
+
+
+class TestIncrementalReplan:
+    """增量重规划测试类"""
+
+    def test_diff_invalidates_only_downstream(self):
+        """变更只影响自身及下游"""
+        old = make_plan([make_step("a"), make_step("b", ["a"]), make_step("c"), make_step("d")])
+        changed_b = make_step("b", ["a"])
+        changed_b.input_schema = {"fixed": True}
+        new = make_plan([
+            make_step("a"), changed_b, make_step("c"), make_step("e", ["b"]), make_step("f"),
+        ])
+
+        diff = diff_plans(old, new)
+
+        assert diff.changed == ["b"]
+        assert diff.added == ["e", "f"]
+        assert diff.removed == ["d"]
+        assert diff.invalidated == {"b", "e", "f"}
+        assert diff.unchanged == ["a", "c"]
+
+    def test_apply_keeps_completed_unchanged_steps(self):
+        """未变更的已完成步骤保留输出，其余置为 PENDING 并清除输出"""
+        old = make_plan([make_step("a"), make_step("b", ["a"]), make_step("c", ["b"])])
+        new = make_plan([make_step("a"), make_step("b", ["a"], tool_name="other"),
+                         make_step("c", ["b"])])
+        context = ExecutionContext(
+            current_plan=old,
+            active_steps={
+                "a": StepStatus.COMPLETED, "b": StepStatus.FAILED, "c": StepStatus.SKIPPED,
+            },
+            intermediate_results={"a": 1, "b": None, "_goal": "kept"},
+        )
+
+        reused = apply_plan_diff(context, new, diff_plans(old, new))
+
+        assert reused == ["a"]
+        assert context.intermediate_results == {"a": 1, "_goal": "kept"}
+        assert context.active_steps == {
+            "a": StepStatus.COMPLETED, "b": StepStatus.PENDING, "c": StepStatus.PENDING,
+        }
+
+    @pytest.mark.asyncio
+    async def test_local_fix_does_not_rerun_good_steps(self):
+        """100 步计划中修复一个失败步骤，重规划后只重新执行该步骤"""
+
+        def plan_steps(broken):
+            steps = []
+            for i in range(100):
+                step = make_step(f"s{i}")
+                step.input_schema = {"id": f"s{i}", "n": i, "fail": broken and i == 42}
+                steps.append(step)
+            return ExecutionPlan(goal="test", steps=steps)
+
+        planner = FakeAgent(AgentRole.PLANNER, [
+            AgentOutput(success=True, data=plan_steps(True), role=AgentRole.PLANNER),
+            AgentOutput(success=True, data=plan_steps(False), role=AgentRole.PLANNER),
+        ])
+        tool = CountingCpuTool()
+        components = ComponentRegistry()
+        components.register_agent(planner)
+        components.register_tool(tool)
+        engine = ExecutionEngine(components)
+
+        result = await engine.start("goal")
+
+        assert result.success
+        assert engine.get_state().iteration_count == 1
+        assert len(tool.executed) == 101
+        assert tool.executed[100:] == ["s42"]
+        assert len(result.final_output) == 100
+
+
+# ==============================================================================
+# 准入控制
+# ==============================================================================
+
+def ok_work(delay=0.0, running=None):
+    """构造返回成功结果的执行工作，可记录同时运行的数量"""
+
+    async def work():
+        if running is not None:
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+        await asyncio.sleep(delay)
+        if running is not None:
+            running["now"] -= 1
+        return EngineResult(success=True, final_output=None, trace_id="t")
+
+    return work
+
+
+class TestAdmissionController:
+    """准入控制测试类"""
+
+    @pytest.mark.asyncio
+    async def test_queue_full_rejects_with_retry_after(self):
+        """队列已满时立即拒绝，结果带 retry_after_ms 提示"""
+        controller = AdmissionController(AdmissionConfig(
+            enabled=True, max_concurrent=1, initial_limit=1, max_queue=0, adaptive=False,
+        ))
+
+        results = await asyncio.gather(*(controller.run(ok_work(0.02), "t") for _ in range(3)))
+
+        assert [r.success for r in results] == [True, False, False]
+        error = results[1].errors[0]
+        assert error.code == "ADMISSION_REJECTED"
+        assert error.retryable and error.suggested_action == "RETRY"
+        assert error.metadata["reason"] == "queue_full"
+        assert error.metadata["retry_after_ms"] >= 1
+        assert controller.stats()["rejected"] == {"queue_full": 2, "queue_timeout": 0}
+
+    @pytest.mark.asyncio
+    async def test_queue_bounds_concurrency_and_times_out(self):
+        """排队请求按限额依次放行，排队超时的请求被拒绝"""
+        controller = AdmissionController(AdmissionConfig(
+            enabled=True, max_concurrent=2, initial_limit=2, max_queue=10,
+            queue_timeout_ms=50, adaptive=False,
+        ))
+        running = {"now": 0, "peak": 0}
+
+        results = await asyncio.gather(
+            *(controller.run(ok_work(0.03, running), "t") for _ in range(8))
+        )
+
+        assert running["peak"] == 2
+        assert sum(r.success for r in results) == 4
+        assert all(r.errors[0].metadata["reason"] == "queue_timeout"
+                   for r in results if not r.success)
+        assert controller.stats()["in_flight"] == 0
+        assert controller.stats()["queued"] == 0
+
+    @pytest.mark.asyncio
+    async def test_abandoned_waiters_leave_the_queue(self):
+        """排队超时或被取消的请求立即让出队列位置，不导致后续请求以 queue_full 被拒绝"""
+        controller = AdmissionController(AdmissionConfig(
+            enabled=True, max_concurrent=1, initial_limit=1, max_queue=2,
+            queue_timeout_ms=20, adaptive=False,
+        ))
+        long_running = asyncio.ensure_future(controller.run(ok_work(0.2), "t"))
+        await asyncio.sleep(0)
+
+        timed_out = await asyncio.gather(*(controller.run(ok_work(), "t") for _ in range(2)))
+        assert [r.errors[0].metadata["reason"] for r in timed_out] == ["queue_timeout"] * 2
+        assert controller.stats()["queued"] == 0
+
+        cancelled = asyncio.ensure_future(controller.run(ok_work(), "t"))
+        await asyncio.sleep(0.005)
+        cancelled.cancel()
+        await asyncio.gather(cancelled, return_exceptions=True)
+
+        assert controller.stats()["queued"] == 0
+
+        controller.config.queue_timeout_ms = 1000
+        results = await asyncio.gather(
+            long_running, *(controller.run(ok_work(), "t") for _ in range(2))
+        )
+        assert all(r.success for r in results)
+        assert controller.stats()["rejected"] == {"queue_full": 0, "queue_timeout": 2}
+
+    def test_aimd_adapts_limit_to_latency(self):
+        """耗时正常且限额用满时加性增长，耗时明显上升时乘性收缩且每个周期只收缩一次"""
+        now = [100.0]
+        controller = AdmissionController(
+            AdmissionConfig(enabled=True, max_concurrent=64, initial_limit=10),
+            clock=lambda: now[0],
+        )
+        for _ in range(50):
+            controller._observe(0.1, saturated=True)
+        grown = controller.limit
+        assert 13 < grown < 15
+
+        controller._observe(1.0, saturated=True)
+        controller._observe(1.0, saturated=True)
+        assert controller.limit == pytest.approx(grown * 0.9)
+        now[0] += 2.0
+        controller._observe(1.0, saturated=True)
+        assert controller.limit == pytest.approx(grown * 0.81)
+
+    @pytest.mark.asyncio
+    async def test_engine_start_is_admission_controlled(self):
+        """开启准入控制后 engine.start 被拒绝时直接返回错误，不进入状态机"""
+        config = EngineConfig()
+        components = make_components(
+            make_step("a"), tools=[FakeTool(name="noop", delays=[0.02])]
+        )
+        services = EngineServices.create(
+            config, components, admission_config=AdmissionConfig.from_yaml(
+                CONFIG_DIR / "default.yaml"
+            ).model_copy(update={"max_concurrent": 1, "max_queue": 0, "adaptive": False}),
+        )
+        runtime = SessionRuntime(components, config, services)
+
+        results = await runtime.run_many(["one", "two", "three"])
+
+        assert [r.success for r in results] == [True, False, False]
+        assert results[1].errors[0].code == "ADMISSION_REJECTED"
+        assert runtime.stats().active == 0
+
+
+# ==============================================================================
+# 流式执行
+# ==============================================================================
+
+class TestStartStream:
+    """流式执行 API 测试类"""
+
+    @pytest.mark.asyncio
+    async def test_events_arrive_in_order(self):
+        """依次产出状态转移、步骤完成与审查结论，最后产出最终结果"""
+        reviewer = FakeAgent(AgentRole.REVIEWER)
+        components = make_components(make_step("a"), make_step("b", ["a"]), agents=[reviewer])
+        engine = ExecutionEngine(components, config=EngineConfig(step_review=True))
+
+        events = [event async for event in engine.start_stream("goal")]
+
+        types = [event.type for event in events]
+        assert events[0].type == "state_transition" and events[0].from_state is None
+        assert isinstance(events[-1], ResultEvent) and events[-1].result.success
+        assert types.count("result") == 1
+        steps = [e.step_id for e in events if isinstance(e, StepCompletedEvent)]
+        assert steps == ["a", "b"]
+        verdicts = [(e.scope, e.step_id) for e in events if e.type == "review_verdict"]
+        assert verdicts == [("STEP", "a"), ("STEP", "b"), ("BATCH", None), ("GLOBAL", None)]
+        completed = [e for e in events if e.type == "state_transition"][-1]
+        assert completed.to_state == LifecycleState.COMPLETED
+        assert types.index("step_completed") < types.index("review_verdict")
+
+    @pytest.mark.asyncio
+    async def test_slow_consumer_pauses_engine(self):
+        """缓冲区已满时引擎暂停，不会在消费者之前跑完执行"""
+        tool = FakeTool(name="noop")
+        components = make_components(*(make_step(f"s{i}") for i in range(5)), tools=[tool])
+        engine = ExecutionEngine(components)
+
+        stream = engine.start_stream("goal", buffer=1)
+        first = await stream.__anext__()
+        await asyncio.sleep(0.05)
+
+        assert first.to_state == LifecycleState.INIT
+        assert len(tool.calls) == 0
+        events = [first] + [event async for event in stream]
+        assert events[-1].result.success
+        assert len(tool.calls) == 5
+
+    @pytest.mark.asyncio
+    async def test_closing_stream_cancels_execution(self):
+        """消费者提前结束迭代时取消执行"""
+        tool = FakeTool(name="noop", delays=[0.01])
+        steps = [make_step(f"s{i}", [f"s{i - 1}"] if i else []) for i in range(20)]
+        engine = ExecutionEngine(make_components(*steps, tools=[tool]))
+
+        async with aclosing(engine.start_stream("goal")) as stream:
+            async for event in stream:
+                if isinstance(event, StepCompletedEvent):
+                    break
+        await asyncio.sleep(0.05)
+
+        assert not engine.is_finished
+        assert len(tool.calls) < 3
@@ -0,0 +1,461 @@
+"""
+策略层单元测试
+"""
+import asyncio
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+from src.core.models import ExecutionContext, GlobalState
+from src.core.protocols import AgentOutput
+from src.core.types import AgentRole, LifecycleState, PermissionLevel, RiskLevel
+from src.engine.config_manager import ConfigManager
+from src.engine.execution_engine import APPROVED_RULES_KEY, EngineServices, ExecutionEngine
+from src.infrastructure.tracer.console_tracer import ConsoleTracer
+from src.policy.base_policy import DefaultPolicy
+from src.policy.permission import PermissionConfig, PermissionSystem
+from src.policy.risk_control import RiskConfig, RiskController, SlidingWindowCounter
+from src.policy.rules import PolicyFacts, PolicyRuleError, RuleEngine
+from tests.helpers import FakeAgent, FakeClock, FakeTool
+from tests.unit.test_engine import make_components, make_step
+
+
+CONFIG_DIR = Path(__file__).resolve().parents[2] / "configs"
+
+
+def make_facts(state=LifecycleState.REPLAN, event=None, proposed=None, output=None, **fields):
+    fields.setdefault("original_goal", "goal")
+    return PolicyFacts(
+        GlobalState(lifecycle_state=state, trace_id="t", **fields),
+        ExecutionContext(),
+        output,
+        None,
+        event,
+        proposed,
+    )
+
+
+def deny(reason, **extra):
+    return {"allow": False, "reason": reason, **extra}
+
+
+# ==============================================================================
+# 规则引擎
+# ==============================================================================
+
+class TestRuleEngine:
+    """规则引擎测试类"""
+
+    def test_index_by_state_and_event(self):
+        """只有状态与事件匹配的规则参与求值；限定事件的规则在事件未知时不生效"""
+        engine = RuleEngine([
+            {"id": "replan", "states": ["REPLAN"], "decision": deny("replan")},
+            {"id": "on_ready", "events": ["REPLAN_READY"], "priority": 10,
+             "decision": deny("ready")},
+            {"id": "init", "states": ["INIT"], "decision": deny("init")},
+        ])
+
+        assert engine.evaluate(make_facts(event="REPLAN_READY")).reason == "ready"
+        assert engine.evaluate(make_facts()).reason == "replan"
+        assert engine.evaluate(make_facts(LifecycleState.PLAN_CHECK)) is None
+
+    def test_priority_and_conditions(self):
+        """按优先级求值，支持组合条件、fn 与正则"""
+        engine = RuleEngine([
+            {"id": "low", "when": {"field": "state.iteration_count", "op": ">=", "value": 1},
+             "decision": deny("low")},
+            {"id": "high", "priority": 10, "when": {"any": [
+                {"field": "output.confidence", "op": "<", "value": 0.5},
+                {"all": [
+                    {"field": "state.original_goal", "op": "matches", "value": "^go"},
+                    {"not": {"field": "output.success", "op": "==", "value": True}},
+                ]},
+            ]}, "decision": deny("high", risk_level="HIGH")},
+        ])
+        confident = AgentOutput(success=True, confidence=0.9, role=AgentRole.REVIEWER)
+        doubtful = AgentOutput(success=True, confidence=0.1, role=AgentRole.REVIEWER)
+
+        assert engine.evaluate(make_facts(output=doubtful)).risk_level == RiskLevel.HIGH
+        assert engine.evaluate(make_facts(output=confident, iteration_count=1)).reason == "low"
+        assert engine.evaluate(make_facts(output=confident)) is None
+        failed = AgentOutput(success=False, confidence=0.9, role=AgentRole.REVIEWER)
+        assert engine.evaluate(make_facts(output=failed)).reason == "high"
+
+    def test_decisions_are_memoized_on_referenced_fields(self):
+        """相关字段相同的求值命中缓存，未被规则引用的字段不影响缓存键"""
+        engine = RuleEngine([
+            {"id": "limit", "when": [{"field": "state.iteration_count", "op": ">=", "value": 2}],
+             "decision": deny("limit")},
+        ])
+
+        first = engine.evaluate(make_facts(iteration_count=2))
+        second = engine.evaluate(make_facts(iteration_count=2, original_goal="other goal"))
+        engine.evaluate(make_facts(iteration_count=0))
+
+        assert first is second
+        assert engine.evaluations == 2
+        assert engine.memo_hits == 1
+
+    def test_invalid_rules_report_all_errors(self):
+        """加载时校验规则并一次性报告全部错误"""
+        with pytest.raises(PolicyRuleError) as info:
+            RuleEngine([
+                {"id": "a", "when": {"field": "nowhere.x"}},
+                {"id": "b", "events": ["NOT_AN_EVENT"]},
+                {"id": "c", "states": ["NOT_A_STATE"]},
+                {"id": "d", "when": {"field": "state.x", "op": "~"}},
+                {"id": "d"},
+            ])
+
+        assert [e.split(":")[0] for e in info.value.errors] == ["a", "b", "c", "d", "d"]
+
+    def test_default_rules_load(self):
+        """默认规则文件可编译"""
+        policy = DefaultPolicy.from_config(CONFIG_DIR)
+
+        assert "low_confidence_completion" in {rule.id for rule in policy.rules.rules}
+
+
+# ==============================================================================
+# 权限矩阵
+# ==============================================================================
+
+class TestPermissionSystem:
+    """权限系统测试类"""
+
+    def test_level_defaults_and_tool_overrides(self):
+        """未覆盖的工具按权限等级取默认列，覆盖项可放宽或收紧"""
+        internal = FakeTool(name="internal", permission_level=PermissionLevel.INTERNAL)
+        admin = FakeTool(name="admin", permission_level=PermissionLevel.ADMIN)
+        public = FakeTool(name="public")
+        unregistered = FakeTool(name="late", permission_level=PermissionLevel.INTERNAL)
+        system = PermissionSystem(PermissionConfig(tools={
+            "admin": {"allow": ["REVIEWER"]},
+            "public": {"deny": ["PLANNER"]},
+        }), tools=[internal, admin, public])
+
+        assert system.check(AgentRole.STEP_EXECUTOR, internal)
+        assert not system.check(AgentRole.PLANNER, internal)
+        assert system.check(AgentRole.REVIEWER, admin)
+        assert not system.check(AgentRole.STEP_EXECUTOR, admin)
+        assert not system.check(AgentRole.PLANNER, public)
+        assert system.check(AgentRole.REVIEWER, public)
+        assert system.check(AgentRole.STEP_EXECUTOR, unregistered)
+        assert system.stats()["denied"] == {
+            "PLANNER:internal": 1, "STEP_EXECUTOR:admin": 1, "PLANNER:public": 1,
+        }
+        assert system.stats()["denied_total"] == 3
+
+    def test_deny_only_override_keeps_declared_level(self):
+        """只含 deny 的覆盖项以工具声明的等级为基准，与编译时是否提供该工具无关"""
+        shell = FakeTool(name="shell", permission_level=PermissionLevel.ADMIN)
+        config = PermissionConfig(tools={"shell": {"deny": ["PLANNER"]}})
+
+        for system in (PermissionSystem(config), PermissionSystem(config, tools=[shell])):
+            assert not system.check(AgentRole.STEP_EXECUTOR, shell)
+            assert not system.check(AgentRole.PLANNER, shell)
+        public = FakeTool(name="shell")
+        assert PermissionSystem(config).check(AgentRole.REVIEWER, public)
+        assert not PermissionSystem(config).check(AgentRole.PLANNER, public)
+
+    def test_reload_swaps_matrix(self, tmp_path):
+        """配置文件变化后重建矩阵，已取得的旧矩阵引用保持不变"""
+        path = tmp_path / "permissions.yaml"
+        path.write_text("tools: {}\n", encoding="utf-8")
+        tool = FakeTool(name="t")
+        system = PermissionSystem(tools=[tool], path=path)
+        old = system.matrix
+
+        assert not system.reload_if_changed()
+        path.write_text("tools:\n  t: {deny: [STEP_EXECUTOR]}\n", encoding="utf-8")
+        mtime = path.stat().st_mtime + 1
+        os.utime(path, (mtime, mtime))
+
+        assert system.reload_if_changed()
+        assert system.matrix is not old
+        assert old.allows(AgentRole.STEP_EXECUTOR, tool)
+        assert not system.check(AgentRole.STEP_EXECUTOR, tool)
+
+    def test_invalid_reload_keeps_previous_matrix(self):
+        """编译失败时保留旧矩阵"""
+        system = PermissionSystem()
+        old = system.matrix
+
+        with pytest.raises(ValueError):
+            system.reload(PermissionConfig(tools={"t": {"allow": ["NOBODY"]}}))
+
+        assert system.matrix is old
+
+
+# ==============================================================================
+# 风险控制
+# ==============================================================================
+
+class TestRiskControl:
+    """风险控制测试类"""
+
+    def test_sliding_window_expires_buckets(self):
+        """过期的桶在访问时清零，跨越整个窗口时全部清空"""
+        clock = FakeClock(1000.0)
+        counter = SlidingWindowCounter(window_seconds=30, bucket_seconds=10, clock=clock)
+        counter.add()
+        clock.now += 10
+        counter.add(2)
+        clock.now += 10
+
+        assert counter.total() == 3
+        clock.now += 10
+        assert counter.total() == 2
+        clock.now += 100
+        assert counter.total() == 0
+
+    def test_consecutive_failures_and_window(self):
+        """连续失败在成功后归零，窗口失败数随时间过期"""
+        clock = FakeClock(1000.0)
+        risk = RiskController(RiskConfig(
+            max_consecutive_failures=2, max_window_failures=3, window_seconds=60,
+        ), clock)
+        risk.record_step("t", "a", False)
+        risk.record_step("t", "a", True)
+        risk.record_step("t", "a", False)
+
+        assert risk.assess("t").level == RiskLevel.LOW
+        risk.record_step("t", "b", False)
+        assert risk.assess("t").level == RiskLevel.HIGH
+        assert risk.requires_human(risk.assess("t").level)
+
+        risk.acknowledge("t")
+        risk.record_step("t", "b", False)
+        assert risk.assess("t").level == RiskLevel.LOW
+        assert risk.assess("other").level == RiskLevel.LOW
+
+    def test_tool_failure_rate_and_confidence(self):
+        """工具失败率跨执行累积；置信度按指数平滑评估"""
+        risk = RiskController(RiskConfig(
+            tool_min_calls=2, tool_failure_rate=0.5, max_consecutive_failures=5,
+            min_confidence=0.6, confidence_smoothing=0.5, tool_risk={"web": RiskLevel.HIGH},
+        ), FakeClock(1000.0))
+        risk.record_step("t1", "flaky", False)
+        risk.record_step("t2", "flaky", True)
+
+        assert risk.tool_level("flaky") == RiskLevel.MEDIUM
+        assert risk.assess("t2").reasons == ["Risky data source flaky"]
+        assert risk.tool_level("web") == RiskLevel.HIGH
+
+        risk.record_confidence("t3", 0.9)
+        risk.record_confidence("t3", 0.2)
+        assert risk.assess("t3").level == RiskLevel.MEDIUM
+        risk.record_confidence("t3", 0.9)
+        assert risk.assess("t3").level == RiskLevel.LOW
+        assert risk.stats()["tools"]["flaky"] == {"calls": 2, "failures": 1}
+
+
+# ==============================================================================
+# 引擎集成
+# ==============================================================================
+
+class TestDefaultPolicy:
+    """默认策略测试类"""
+
+    @pytest.mark.asyncio
+    async def test_engine_passes_event_and_proposed_state(self):
+        """引擎向策略提供触发事件与候选状态，规则可据此要求人工确认"""
+        reviewer = FakeAgent(AgentRole.REVIEWER, [
+            AgentOutput(success=True, confidence=0.75, role=AgentRole.REVIEWER)
+        ])
+        components = make_components(make_step("a"), agents=[reviewer])
+        components.set_policy(DefaultPolicy.from_config(CONFIG_DIR))
+        engine = ExecutionEngine(components)
+
+        result = await engine.start("goal")
+
+        assert engine.is_waiting_human
+        assert any(e.message == "Global review confidence below 0.8" for e in result.errors)
+
+    @pytest.mark.asyncio
+    async def test_human_approval_is_not_asked_again(self):
+        """人工确认后触发等待的规则不再生效，执行得以完成"""
+        reviewer = FakeAgent(AgentRole.REVIEWER, [
+            AgentOutput(success=True, confidence=0.75, role=AgentRole.REVIEWER)
+        ])
+        components = make_components(make_step("a"), agents=[reviewer])
+        components.set_policy(DefaultPolicy.from_config(CONFIG_DIR))
+        engine = ExecutionEngine(components)
+
+        await engine.start("goal")
+        assert engine.is_waiting_human
+
+        await engine.submit_human_feedback("confidence is fine")
+        assert engine.get_state().lifecycle_state == LifecycleState.COMPLETED
+        assert engine.get_context().intermediate_results[APPROVED_RULES_KEY] == [
+            "low_confidence_completion"
+        ]
+
+    @pytest.mark.asyncio
+    async def test_approval_covers_only_its_own_rule(self):
+        """确认权限拒绝后的重规划不会跳过之后的低置信度完成确认"""
+
+        class DenyFirstCall(DefaultPolicy):
+            denied = False
+
+            def check_tool_permission(self, agent_role, tool):
+                if self.denied:
+                    return True
+                self.denied = True
+                return False
+
+        reviewer = FakeAgent(AgentRole.REVIEWER, [
+            AgentOutput(success=True, confidence=0.75, role=AgentRole.REVIEWER)
+        ])
+        components = make_components(make_step("a"), agents=[reviewer])
+        components.set_policy(DenyFirstCall.from_config(CONFIG_DIR))
+        engine = ExecutionEngine(components)
+
+        result = await engine.start("goal")
+        assert engine.is_waiting_human
+        assert result.errors[-2].message == "Tool permission was denied; replanning would not help"
+
+        await engine.submit_human_feedback("replan it")
+        assert engine.is_waiting_human
+        assert engine.result().errors[-2].message == "Global review confidence below 0.8"
+
+        await engine.submit_human_feedback("confidence is fine")
+        assert engine.get_state().lifecycle_state == LifecycleState.COMPLETED
+        assert engine.get_context().intermediate_results[APPROVED_RULES_KEY] == [
+            "permission_denied_requires_human", "low_confidence_completion",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_permission_denial_is_not_replanned(self):
+        """权限被拒绝的步骤不再进入重规划"""
+
+        class DenyAll(DefaultPolicy):
+            def check_tool_permission(self, agent_role, tool):
+                return False
+
+        components = make_components(make_step("a"), tools=[FakeTool(name="noop")])
+        components.set_policy(DenyAll.from_config(CONFIG_DIR))
+        engine = ExecutionEngine(components)
+
+        await engine.start("goal")
+
+        assert engine.is_waiting_human
+        assert engine.get_state().iteration_count == 0
+
+    @pytest.mark.asyncio
+    async def test_admin_tool_is_denied_by_default(self):
+        """默认权限配置下 ADMIN 工具不对步骤执行器开放"""
+        tool = FakeTool(name="noop", permission_level=PermissionLevel.ADMIN)
+        components = make_components(make_step("a"), tools=[tool])
+        policy = DefaultPolicy.from_config(CONFIG_DIR, [tool])
+        components.set_policy(policy)
+        engine = ExecutionEngine(components)
+
+        result = await engine.start("goal")
+
+        assert tool.calls == []
+        assert engine.is_waiting_human
+        assert any(e.code == "POLICY_DENIED" for e in result.errors)
+        assert policy.permissions.stats()["denied"] == {"STEP_EXECUTOR:noop": 1}
+
+    @pytest.mark.asyncio
+    async def test_consecutive_failures_require_human(self):
+        """连续失败达到阈值后风险控制拒绝继续并要求人工介入"""
+        tool = FakeTool(name="noop", failures=100)
+        components = make_components(make_step("a"), tools=[tool])
+        policy = DefaultPolicy.from_config(CONFIG_DIR, [tool])
+        components.set_policy(policy)
+        engine = ExecutionEngine(components)
+
+        result = await engine.start("goal")
+
+        assert engine.is_waiting_human
+        assert result.errors[0].message == "3 consecutive step failures"
+
+
+# ==============================================================================
+# 配置热更新
+# ==============================================================================
+
+def write_config(directory, name, text):
+    path = directory / name
+    path.write_text(text, encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.fixture
+def config_dir(tmp_path):
+    shutil.copytree(CONFIG_DIR, tmp_path, dirs_exist_ok=True)
+    return tmp_path
+
+
+class TestConfigManager:
+    """配置管理器测试类"""
+
+    @pytest.mark.asyncio
+    async def test_version_and_env_override(self, config_dir, monkeypatch):
+        """环境变量覆盖文件；内容未变时不发布新版本，内容变化时版本随之变化"""
+        monkeypatch.setenv("MAS_ENGINE__MAX_ITERATIONS", "7")
+        manager = ConfigManager(config_dir)
+        version = manager.version
+
+        assert manager.current.settings.engine.max_iterations == 7
+        assert manager.current.settings.engine.max_step_concurrency == 8
+        write_config(config_dir, "permissions.yaml", (config_dir / "permissions.yaml").read_text())
+        assert not await manager.reload_if_changed()
+        write_config(config_dir, "permissions.yaml", "tools:\n  t: {deny: [PLANNER]}\n")
+        assert await manager.reload_if_changed()
+        assert manager.version != version
+        assert "t" in manager.current.permissions.tools
+
+    @pytest.mark.asyncio
+    async def test_invalid_change_keeps_current(self, config_dir):
+        """校验失败时保留当前配置并记录错误，修正后恢复发布"""
+        manager = ConfigManager(config_dir)
+        snapshot = manager.current
+
+        write_config(config_dir, "policies.yaml", "rules:\n  - {id: x, states: [NOWHERE]}\n")
+        assert not await manager.reload_if_changed()
+        assert manager.current is snapshot
+        assert manager.last_error.code == "CONFIG_INVALID"
+        assert not await manager.reload_if_changed()
+
+        write_config(config_dir, "policies.yaml", "rules: []\n")
+        assert await manager.reload_if_changed()
+        assert manager.last_error is None
+        assert manager.current.rules.rules == ()
+
+    @pytest.mark.asyncio
+    async def test_running_engine_picks_up_policy_change(self, config_dir):
+        """执行进行中发布的新规则在后续转移中生效，追踪事件带有当时的配置版本"""
+        manager = ConfigManager(config_dir)
+        old_version = manager.version
+        policy = DefaultPolicy()
+        manager.bind_policy(policy)
+        components = make_components(make_step("a"), tools=[FakeTool(name="noop", delays=[0.2])])
+        components.set_policy(policy)
+        components.tracer = ConsoleTracer()
+        engine = ExecutionEngine(
+            components, EngineServices.create(components=components, config_source=manager)
+        )
+
+        run = asyncio.ensure_future(engine.start("goal"))
+        await asyncio.sleep(0.05)
+        write_config(config_dir, "policies.yaml", """rules:
+  - id: hold_before_review
+    states: [GLOBAL_REVIEW]
+    decision: {allow: false, require_human_approval: true, reason: "hold"}
+""")
+        assert await manager.reload_if_changed()
+        result = await run
+
+        assert engine.is_waiting_human
+        assert result.errors[0].message == "hold"
+        trace = await components.tracer.get_trace(result.trace_id)
+        versions = [e["payload"]["config_version"] for e in trace if "execution_id" in e["payload"]]
+        assert versions[0] == old_version
+        assert versions[-1] == manager.version != old_version
+
@@ -0,0 +1,151 @@
+"""
+StateMachine 单元测试
+"""
+import pytest
+
+from src.core.models import ExecutionContext, GlobalState
+from src.core.protocols import AgentOutput, StructuredError
+from src.core.types import AgentRole, LifecycleState, StepStatus
+from src.engine.state_machine import (
+    GuardContext,
+    StateMachine,
+    StateMachineValidationError,
+    Transition,
+    TriggerEvent,
+    build_default_state_machine,
+)
+
+
+S = LifecycleState
+T = TriggerEvent
+
+
+def make_context(
+    agent_output=None,
+    active_steps=None,
+    iteration_count=0,
+    state=S.INIT,
+):
+    """构造 Guard 求值上下文"""
+    global_state = GlobalState(
+        original_goal="test",
+        lifecycle_state=state,
+        iteration_count=iteration_count,
+        trace_id="trace-sm",
+    )
+    execution_context = ExecutionContext(active_steps=active_steps or {})
+    return GuardContext(global_state, execution_context, agent_output)
+
+
+def review(success=True, confidence=0.9, errors=None):
+    """构造评审输出"""
+    return AgentOutput(
+        success=success,
+        confidence=confidence,
+        errors=errors or [],
+        role=AgentRole.REVIEWER,
+    )
+
+
+@pytest.fixture
+def machine():
+    return build_default_state_machine(confidence_threshold=0.7, max_iterations=3)
+
+
+def test_default_machine_happy_path(machine):
+    """默认转移表支持 INIT → COMPLETED 主流程"""
+    ok = make_context(agent_output=review())
+    path = [
+        (S.INIT, T.START, S.CONTEXT_BUILD),
+        (S.CONTEXT_BUILD, T.CONTEXT_READY, S.PLAN_GENERATION),
+        (S.PLAN_GENERATION, T.PLAN_READY, S.PLAN_CHECK),
+        (S.PLAN_CHECK, T.PLAN_REVIEWED, S.EXECUTION_PREPARE),
+        (S.EXECUTION_PREPARE, T.EXECUTION_READY, S.STEP_EXECUTION),
+        (S.STEP_EXECUTION, T.BATCH_COMPLETED, S.STEP_REVIEW),
+        (S.STEP_REVIEW, T.STEP_REVIEWED, S.GLOBAL_REVIEW),
+        (S.GLOBAL_REVIEW, T.GLOBAL_REVIEWED, S.COMPLETED),
+    ]
+    for source, trigger, target in path:
+        assert machine.resolve(source, trigger, ok) == target
+
+
+def test_low_confidence_plan_triggers_replan(machine):
+    """计划评分低于阈值触发 REPLAN"""
+    context = make_context(agent_output=review(confidence=0.3))
+    assert machine.resolve(S.PLAN_CHECK, T.PLAN_REVIEWED, context) == S.REPLAN
+
+
+def test_step_review_guards_in_priority_order(machine):
+    """STEP_REVIEW 的 Guard 按优先级求值"""
+    critical = StructuredError(code="E", message="boom", severity="CRITICAL")
+    context = make_context(agent_output=review(errors=[critical]))
+    assert machine.resolve(S.STEP_REVIEW, T.STEP_REVIEWED, context) == S.ROLLBACK
+
+    context = make_context(agent_output=review(), active_steps={"s2": StepStatus.PENDING})
+    assert machine.resolve(S.STEP_REVIEW, T.STEP_REVIEWED, context) == S.STEP_EXECUTION
+
+    context = make_context(agent_output=review(success=False))
+    assert machine.resolve(S.STEP_REVIEW, T.STEP_REVIEWED, context) == S.REPLAN
+
+
+def test_replan_iteration_limit(machine):
+    """迭代次数超限后 REPLAN 进入 FAILED"""
+    assert machine.resolve(S.REPLAN, T.REPLAN_READY, make_context(iteration_count=1)) == (
+        S.PLAN_GENERATION
+    )
+    assert machine.resolve(S.REPLAN, T.REPLAN_READY, make_context(iteration_count=3)) == S.FAILED
+
+
+def test_unknown_trigger_returns_none(machine):
+    """未定义的 (state, trigger) 返回 None"""
+    assert machine.resolve(S.INIT, T.PLAN_READY, make_context()) is None
+    assert machine.resolve(S.COMPLETED, T.FATAL_ERROR, make_context()) is None
+
+
+def test_terminal_states_and_edges(machine):
+    """终端状态与边查询"""
+    assert machine.is_terminal(S.COMPLETED)
+    assert machine.is_terminal(S.FAILED)
+    assert not machine.is_terminal(S.STEP_REVIEW)
+    assert machine.can_transition(S.ROLLBACK, S.REPLAN)
+    assert not machine.can_transition(S.INIT, S.COMPLETED)
+    assert T.FATAL_ERROR in machine.triggers_for(S.WAIT_HUMAN)
+
+
+def test_rejects_unreachable_state():
+    """不可达状态在构造时被拒绝"""
+    with pytest.raises(StateMachineValidationError) as exc_info:
+        StateMachine([
+            Transition(S.INIT, T.START, S.COMPLETED),
+            Transition(S.REPLAN, T.REPLAN_READY, S.FAILED),
+        ])
+    assert any("REPLAN is unreachable" in e for e in exc_info.value.errors)
+
+
+def test_rejects_conflicting_transitions():
+    """同优先级歧义与被遮蔽的转移在构造时被拒绝"""
+    with pytest.raises(StateMachineValidationError) as exc_info:
+        StateMachine([
+            Transition(S.INIT, T.START, S.COMPLETED),
+            Transition(S.INIT, T.START, S.FAILED),
+        ])
+    assert any("conflicting" in e for e in exc_info.value.errors)
+
+    with pytest.raises(StateMachineValidationError) as exc_info:
+        StateMachine([
+            Transition(S.INIT, T.START, S.COMPLETED, None, 10),
+            Transition(S.INIT, T.START, S.FAILED, lambda ctx: True, 0),
+        ])
+    assert any("shadowed" in e for e in exc_info.value.errors)
+
+
+def test_rejects_terminal_outgoing_and_dead_end():
+    """终端状态出边与非终端死胡同被拒绝"""
+    with pytest.raises(StateMachineValidationError) as exc_info:
+        StateMachine([
+            Transition(S.INIT, T.START, S.CONTEXT_BUILD),
+            Transition(S.COMPLETED, T.START, S.INIT),
+        ])
+    errors = exc_info.value.errors
+    assert any("terminal state COMPLETED" in e for e in errors)
+    assert any("CONTEXT_BUILD has no outgoing" in e for e in errors)
@@ -0,0 +1,1126 @@
+"""
+工具运行层单元测试
+"""
+import asyncio
+import math
+import operator
+import os
+import random
+import sys
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+from src.core.protocols import ToolExecutionResult
+from src.core.types import PermissionLevel, TraceEventType
+from src.registry.tool_registry import ToolRegistry
+from src.infrastructure.tracer.console_tracer import ConsoleTracer
+from src.tools.base_tool import BaseToolImpl, ExecutionLane
+from src.tools.batching import BatchingConfig
+from src.tools.builtin import calculator_tool
+from src.tools.builtin.calculator_tool import CalculatorTool, ExpressionCompiler, ExpressionError
+from src.tools.builtin.search_tool import (
+    SearchIndex, SearchIndexError, SearchTool, build_index, tokenize,
+)
+from src.tools.cache import CacheConfig, ToolResultCache
+from src.tools.deadline import LatencyTracker, deadline_scope, remaining_ms
+from src.tools.limits import TokenBucket, ToolLimiter, ToolLimits, ToolLimitsConfig
+from src.tools.lanes import ExecutionLanes, LaneConfig
+from src.tools.pool import ConnectionPool, PoolConfig, connection_pool
+from src.tools.registry import ToolSpec
+from src.tools.runtime import HedgingConfig, ToolRuntime, ToolRuntimeConfig
+from src.tools.validator import ToolValidator, compile_schema
+from tests.helpers import BatchTool, CpuTool, FakeClock, FakeTool, LocalHttpServer
+
+
+CONFIG_DIR = Path(__file__).resolve().parents[2] / "configs"
+
+
+# ==============================================================================
+# TokenBucket
+# ==============================================================================
+
+class TestTokenBucket:
+    """TokenBucket 测试类"""
+
+    def test_burst_then_wait(self):
+        """桶满时允许突发，之后按速率计算等待时长"""
+        clock = FakeClock()
+        bucket = TokenBucket(rate=10, capacity=2, clock=clock)
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == 0
+        assert bucket.reserve() == pytest.approx(0.1)
+        assert bucket.reserve() == pytest.approx(0.2)
+
+        clock.now = 1.0
+        assert bucket.tokens == pytest.approx(2)
+
+    def test_try_acquire_does_not_overdraw(self):
+        """非阻塞获取不透支"""
+        clock = FakeClock()
+        bucket = TokenBucket(rate=1, capacity=1, clock=clock)
+        assert bucket.try_acquire()
+        assert not bucket.try_acquire()
+        assert bucket.tokens == pytest.approx(0)
+
+    @pytest.mark.asyncio
+    async def test_cancel_refunds_tokens(self):
+        """等待中被取消时退还令牌"""
+        bucket = TokenBucket(rate=1, capacity=1)
+        await bucket.acquire()
+        task = asyncio.ensure_future(bucket.acquire())
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert bucket.tokens > -0.5
+
+
+# ==============================================================================
+# ToolLimiter / ToolRuntime
+# ==============================================================================
+
+class TestToolLimiter:
+    """ToolLimiter 测试类"""
+
+    def test_tool_override_merges_default(self):
+        """工具级配置仅覆盖显式设置的字段"""
+        config = ToolLimitsConfig(
+            default=ToolLimits(max_concurrency=16, rate_per_second=100),
+            tools={"search": ToolLimits(max_concurrency=2)},
+        )
+        limits = config.for_tool("search")
+        assert limits.max_concurrency == 2
+        assert limits.rate_per_second == 100
+        assert config.for_tool("other").max_concurrency == 16
+
+    def test_load_default_yaml(self):
+        """configs/default.yaml 可解析为限制配置"""
+        config = ToolLimitsConfig.from_yaml(CONFIG_DIR / "default.yaml")
+        assert config.permission_levels[PermissionLevel.ADMIN] >= 1
+        assert config.for_tool("search").rate_per_second is not None
+
+    @pytest.mark.asyncio
+    async def test_per_tool_concurrency(self):
+        """单个工具的并发不超过配置上限"""
+        tool = FakeTool(delays=[0.005])
+        limiter = ToolLimiter(ToolLimitsConfig(tools={"fake": ToolLimits(max_concurrency=2)}))
+        runtime = ToolRuntime(limiter)
+        results = await asyncio.gather(*(runtime.invoke(tool, {"i": i}) for i in range(10)))
+        assert all(r.success for r in results)
+        assert tool.peak_running == 2
+
+    @pytest.mark.asyncio
+    async def test_permission_level_concurrency(self):
+        """同一权限等级的工具共享并发上限"""
+        tools = [
+            FakeTool(name=f"admin{n}", delays=[0.005], permission_level=PermissionLevel.ADMIN)
+            for n in range(3)
+        ]
+        limiter = ToolLimiter(ToolLimitsConfig(permission_levels={PermissionLevel.ADMIN: 1}))
+        runtime = ToolRuntime(limiter)
+        running = 0
+        peak = 0
+
+        async def call(tool):
+            nonlocal running, peak
+            async with limiter.limit(tool):
+                running += 1
+                peak = max(peak, running)
+                await asyncio.sleep(0.002)
+                running -= 1
+
+        await asyncio.gather(*(call(t) for t in tools for _ in range(2)))
+        assert peak == 1
+        assert limiter.stats()["admin0"] == {"in_flight": 0, "waiting": 0}
+
+    @pytest.mark.asyncio
+    async def test_queue_wait_reported_to_tracer(self):
+        """排队时长通过 TOOL_CALL_START 事件上报"""
+        tracer = ConsoleTracer()
+        tool = FakeTool(delays=[0.01])
+        limiter = ToolLimiter(ToolLimitsConfig(tools={"fake": ToolLimits(max_concurrency=1)}))
+        runtime = ToolRuntime(limiter, tracer)
+        await asyncio.gather(*(runtime.invoke(tool, {}, trace_id="t") for _ in range(2)))
+
+        events = await tracer.get_trace("t")
+        waits = [
+            e["payload"]["queue_wait_ms"]
+            for e in events if e["event_type"] == TraceEventType.TOOL_CALL_START.value
+        ]
+        assert len(waits) == 2
+        assert max(waits) >= 5
+
+    @pytest.mark.asyncio
+    async def test_exception_wrapped(self):
+        """工具异常被封装为 StructuredError"""
+
+        class BrokenTool(FakeTool):
+            async def execute(self, input_data):
+                raise RuntimeError("broken")
+
+        result = await ToolRuntime().invoke(BrokenTool(), {})
+        assert not result.success
+        assert result.error.code == "TOOL_EXCEPTION"
+        assert result.latency_ms is not None
+
+
+# ==============================================================================
+# 截止时间与对冲请求
+# ==============================================================================
+
+class TestDeadlineAndHedging:
+    """截止时间传播与对冲请求测试类"""
+
+    def test_latency_tracker_quantile(self):
+        """样本不足时不给出分位数"""
+        tracker = LatencyTracker(min_samples=10)
+        for value in range(1, 10):
+            tracker.record("t", float(value))
+        assert tracker.quantile("t", 0.95) is None
+        for value in range(10, 101):
+            tracker.record("t", float(value))
+        assert tracker.quantile("t", 0.95) == 96.0
+
+    @pytest.mark.asyncio
+    async def test_nested_deadline_takes_earliest(self):
+        """嵌套截止时间取较早者"""
+        assert remaining_ms() is None
+        with deadline_scope(50):
+            with deadline_scope(10_000):
+                assert remaining_ms() <= 50
+        assert remaining_ms() is None
+
+    @pytest.mark.asyncio
+    async def test_hung_tool_times_out_with_retryable_error(self):
+        """挂起的工具按工具超时返回可重试错误"""
+        tool = FakeTool(delays=[10], timeout_ms=20)
+        result = await ToolRuntime().invoke(tool, {})
+        assert not result.success
+        assert result.error.code == "TOOL_TIMEOUT"
+        assert result.error.retryable
+        assert result.error.suggested_action == "RETRY"
+        assert tool.running == 0
+
+    @pytest.mark.asyncio
+    async def test_step_timeout_and_outer_deadline(self):
+        """步骤超时与外层截止时间都会收紧预算"""
+        tool = FakeTool(delays=[10], timeout_ms=5000)
+        result = await ToolRuntime().invoke(tool, {}, timeout_ms=20)
+        assert result.error.metadata["timeout_ms"] == 20
+
+        with deadline_scope(20):
+            result = await ToolRuntime().invoke(tool, {})
+        assert result.error.code == "TOOL_TIMEOUT"
+        assert result.error.metadata["timeout_ms"] <= 20
+
+    @pytest.mark.asyncio
+    async def test_timeout_includes_queue_wait(self):
+        """排队时间计入截止时间"""
+        tool = FakeTool(delays=[0.2], timeout_ms=5000)
+        limiter = ToolLimiter(ToolLimitsConfig(tools={"fake": ToolLimits(max_concurrency=1)}))
+        runtime = ToolRuntime(limiter)
+        first = asyncio.ensure_future(runtime.invoke(tool, {}))
+        await asyncio.sleep(0)
+        second = await runtime.invoke(tool, {}, timeout_ms=20)
+        assert second.error.code == "TOOL_TIMEOUT"
+        assert len(tool.calls) == 1
+        assert (await first).success
+
+    @pytest.mark.asyncio
+    async def test_hedged_request_cuts_tail_latency(self):
+        """慢请求超过 p95 后发出对冲请求，取先返回者"""
+        tool = FakeTool(name="flaky", delays=[0.002] * 20 + [1.0, 0.002])
+        config = ToolRuntimeConfig(hedging=HedgingConfig(tools=["flaky"], min_samples=20))
+        runtime = ToolRuntime(config=config)
+        for _ in range(20):
+            await runtime.invoke(tool, {})
+
+        started = asyncio.get_running_loop().time()
+        result = await runtime.invoke(tool, {})
+        elapsed = asyncio.get_running_loop().time() - started
+
+        assert result.success
+        assert result.output["call"] == 22
+        assert elapsed < 0.5
+        assert tool.running == 0
+
+    @pytest.mark.asyncio
+    async def test_no_hedging_for_side_effect_tools(self):
+        """有副作用的工具不会被对冲"""
+        tool = FakeTool(name="writer", delays=[0.001] * 20 + [0.05], has_side_effect=True)
+        config = ToolRuntimeConfig(hedging=HedgingConfig(tools=["writer"], min_samples=5))
+        runtime = ToolRuntime(config=config)
+        for _ in range(21):
+            await runtime.invoke(tool, {})
+        assert len(tool.calls) == 21
+
+    def test_load_runtime_config(self):
+        """configs/default.yaml 可解析为运行时配置"""
+        config = ToolRuntimeConfig.from_yaml(CONFIG_DIR / "default.yaml")
+        assert config.hedging.quantile == 0.95
+        assert config.limits.default.max_concurrency == 16
+
+
+# ==============================================================================
+# 执行通道
+# ==============================================================================
+
+@pytest.fixture(scope="module")
+def process_lanes():
+    """模块内共享的常驻进程池"""
+    lanes = ExecutionLanes(LaneConfig(process_workers=2))
+    yield lanes
+    lanes.shutdown()
+
+
+class TestExecutionLanes:
+    """执行通道测试类"""
+
+    @pytest.mark.asyncio
+    async def test_inline_execute_wraps_exceptions(self):
+        """直接调用 execute() 时在当前线程计算并封装异常"""
+        tool = CpuTool(ExecutionLane.INLINE)
+        assert (await tool.execute({"n": 4})).output["sum"] == 14
+        failed = await tool.execute({"fail": True})
+        assert not failed.success
+        assert failed.error.code == "TOOL_EXCEPTION"
+
+    @pytest.mark.asyncio
+    async def test_thread_lane_keeps_event_loop_responsive(self):
+        """THREAD 通道的计算不阻塞事件循环"""
+        runtime = ToolRuntime()
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.001)
+                ticks += 1
+
+        ticking = asyncio.ensure_future(ticker())
+        result = await runtime.invoke(CpuTool(ExecutionLane.THREAD), {"n": 2_000_000})
+        ticking.cancel()
+        runtime.shutdown()
+
+        assert result.success
+        assert ticks > 5
+
+    @pytest.mark.asyncio
+    async def test_process_lane_runs_in_worker(self, process_lanes):
+        """PROCESS 通道在工作进程中执行，并记录端到端耗时"""
+        runtime = ToolRuntime(lanes=process_lanes)
+        await runtime.warm()
+
+        results = await asyncio.gather(*(
+            runtime.invoke(CpuTool(), {"n": 10}) for _ in range(4)
+        ))
+
+        assert all(r.success and r.output["sum"] == 285 for r in results)
+        assert all(r.output["pid"] != os.getpid() for r in results)
+        assert all(r.latency_ms is not None for r in results)
+
+    @pytest.mark.asyncio
+    async def test_process_lane_exception_is_structured(self, process_lanes):
+        """工作进程中的异常封装为 StructuredError"""
+        runtime = ToolRuntime(lanes=process_lanes)
+        result = await runtime.invoke(CpuTool(), {"fail": True})
+        assert not result.success
+        assert result.error.code == "TOOL_EXCEPTION"
+        assert "bad input" in result.error.message
+
+    @pytest.mark.asyncio
+    async def test_process_lane_keeps_instances_apart(self, process_lanes):
+        """同名同版本但配置不同的实例在工作进程中各自缓存，互不替代"""
+        plain, shifted = CpuTool(), CpuTool(offset=1000)
+
+        for _ in range(3):
+            outputs = [await process_lanes.run(tool, {"n": 10}) for tool in (plain, shifted)]
+            assert [output["sum"] for output in outputs] == [285, 1285]
+        assert process_lanes._payload(CpuTool())[0] == process_lanes._payload(plain)[0]
+
+
+# ==============================================================================
+# 结果缓存
+# ==============================================================================
+
+def cached_runtime(clock=None, **config):
+    cache = ToolResultCache(CacheConfig(enabled=True, **config), clock or FakeClock())
+    return ToolRuntime(cache=cache), cache
+
+
+class TestToolResultCache:
+    """工具结果缓存测试类"""
+
+    @pytest.mark.asyncio
+    async def test_repeated_call_is_served_from_cache(self):
+        """相同输入（键顺序不同）命中缓存，不再调用工具"""
+        runtime, cache = cached_runtime()
+        tool = FakeTool(name="search")
+
+        first = await runtime.invoke(tool, {"q": "x", "k": 3})
+        second = await runtime.invoke(tool, {"k": 3, "q": "x"})
+
+        assert second.output == first.output
+        assert len(tool.calls) == 1
+        assert cache.stats()["hit_rate"] == 0.5
+
+    @pytest.mark.asyncio
+    async def test_side_effect_tools_and_failures_are_not_cached(self):
+        """有副作用的工具与失败结果不进入缓存"""
+        runtime, cache = cached_runtime()
+        writer = FakeTool(name="writer", has_side_effect=True)
+        flaky = FakeTool(name="flaky", failures=1)
+
+        await runtime.invoke(writer, {})
+        await runtime.invoke(writer, {})
+        assert not (await runtime.invoke(flaky, {})).success
+        assert (await runtime.invoke(flaky, {})).success
+
+        assert len(writer.calls) == 2
+        assert len(flaky.calls) == 2
+        assert len(cache) == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_calls_are_coalesced(self):
+        """并发的相同调用只执行一次"""
+        runtime, cache = cached_runtime()
+        tool = FakeTool(name="search", delays=[0.02])
+
+        results = await asyncio.gather(*(runtime.invoke(tool, {"q": "x"}) for _ in range(10)))
+
+        assert len(tool.calls) == 1
+        assert all(r.output == results[0].output for r in results)
+        assert cache.stats()["coalesced"] == 9
+
+    @pytest.mark.asyncio
+    async def test_ttl_and_lru_eviction(self):
+        """过期条目失效，超过上限时淘汰最久未使用的条目"""
+        clock = FakeClock()
+        runtime, cache = cached_runtime(clock, ttl_seconds=10, max_entries=2)
+        tool = FakeTool(name="search")
+
+        for q in ("a", "b"):
+            await runtime.invoke(tool, {"q": q})
+        await runtime.invoke(tool, {"q": "a"})      # a 变为最近使用
+        await runtime.invoke(tool, {"q": "c"})      # 淘汰 b
+        assert cache.evictions == 1
+        await runtime.invoke(tool, {"q": "a"})
+        assert len(tool.calls) == 3
+
+        clock.now = 11
+        await runtime.invoke(tool, {"q": "a"})
+        assert len(tool.calls) == 4
+
+    @pytest.mark.asyncio
+    async def test_versions_are_cached_independently(self):
+        """同名工具的多个版本交替调用时各自命中自己的条目，不互相清除"""
+        runtime, cache = cached_runtime()
+        old = FakeTool(name="search", version="1.0.0")
+        new = FakeTool(name="search", version="1.1.0")
+
+        for _ in range(3):
+            await runtime.invoke(old, {"q": "x"})
+            await runtime.invoke(new, {"q": "x"})
+
+        assert len(old.calls) == 1
+        assert len(new.calls) == 1
+        assert len(cache) == 2 and cache.hits == 4
+
+        cache.invalidate("search")
+        assert len(cache) == 0
+
+
+# ==============================================================================
+# 输入校验
+# ==============================================================================
+
+class SchemaTool(FakeTool):
+    """带自定义 input_schema 的测试工具"""
+
+    def __init__(self, schema, **kwargs):
+        super().__init__(**kwargs)
+        self.schema = schema
+
+    @property
+    def input_schema(self):
+        return self.schema
+
+
+QUERY_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "query": {"type": "string", "minLength": 1},
+        "limit": {"type": "integer", "minimum": 1, "maximum": 50},
+        "filters": {"type": "array", "items": {"enum": ["news", "docs"]}, "uniqueItems": True},
+        "cursor": {"anyOf": [{"type": "null"}, {"type": "string", "pattern": "^c\\d+$"}]},
+    },
+    "required": ["query"],
+    "additionalProperties": False,
+}
+
+
+def violations(schema, value):
+    validate, _ = compile_schema(schema)
+    errors = []
+    validate(value, errors, "$")
+    return errors
+
+
+class TestToolValidator:
+    """工具输入校验测试类"""
+
+    def test_compiled_schema_reports_paths(self):
+        """生成的校验函数报告每个违规值的路径"""
+        assert violations(QUERY_SCHEMA, {"query": "q", "limit": 5, "cursor": "c12"}) == []
+        assert violations(QUERY_SCHEMA, {
+            "limit": True, "filters": ["news", "news", "blogs"], "cursor": "x", "page": 2,
+        }) == [
+            ("$", "missing required property 'query'"),
+            ("$.limit", "expected integer"),
+            ("$.filters", "items must be unique"),
+            ("$.filters[2]", 'must be one of ["news", "docs"]'),
+            ("$.cursor", "must match at least one schema in anyOf"),
+            ("$", "unexpected property 'page'"),
+        ]
+        assert violations({"type": ["number", "null"], "exclusiveMinimum": 0}, 0) == [
+            ("$", "must be > 0")
+        ]
+        assert violations({"oneOf": [{"type": "integer"}, {"type": "number"}]}, 2.5) == []
+        assert violations({"not": {"const": 1}}, 1.0) == [
+            ("$", "must not match the negated schema")
+        ]
+
+    def test_compiled_once_per_tool_version(self):
+        """按 (工具名, version) 缓存编译结果；schema 错误以 StructuredError 返回"""
+        validator = ToolValidator()
+        tool = SchemaTool(QUERY_SCHEMA, name="search")
+
+        for _ in range(3):
+            validator.validate(tool, {"query": "q"})
+        validator.validate(SchemaTool(QUERY_SCHEMA, name="search", version="2.0.0"), {})
+        broken = validator.validate(SchemaTool({"$ref": "#/defs/x"}, name="broken"), {})
+
+        assert validator.compilations == 3
+        assert broken[0].code == "TOOL_SCHEMA_INVALID"
+        assert "$ref" in broken[0].message
+
+    @pytest.mark.asyncio
+    async def test_runtime_rejects_invalid_input(self):
+        """不合法的输入不执行工具，返回 INVALID_TOOL_INPUT 并列出全部违规"""
+        runtime = ToolRuntime()
+        tool = SchemaTool(QUERY_SCHEMA, name="search")
+
+        result = await runtime.invoke(tool, {"query": "", "limit": 0})
+        assert not result.success
+        assert result.error.code == "INVALID_TOOL_INPUT"
+        assert result.error.suggested_action == "REPLAN"
+        assert len(result.error.metadata["violations"]) == 2
+        assert tool.calls == []
+
+        assert (await runtime.invoke(tool, {"query": "q"})).success
+        assert len(tool.calls) == 1
+
+
+# ==============================================================================
+# 工具注册中心
+# ==============================================================================
+
+LAZY_MODULE = """
+from src.core.types import PermissionLevel
+from src.tools.base_tool import BaseToolImpl
+
+
+class Echo(BaseToolImpl):
+    name = "echo"
+    version = "1.0.0"
+
+    def __init__(self, version="1.0.0"):
+        self.version = version
+
+    def compute(self, input_data):
+        return input_data
+
+
+class Admin(BaseToolImpl):
+    name = "admin"
+    version = "1.0.0"
+    permission_level = PermissionLevel.ADMIN
+    has_side_effect = True
+"""
+
+
+@pytest.fixture
+def lazy_manifest(tmp_path, monkeypatch):
+    (tmp_path / "lazy_tools_mod.py").write_text(LAZY_MODULE, encoding="utf-8")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, "lazy_tools_mod", raising=False)
+    manifest = tmp_path / "tools.yaml"
+    manifest.write_text("""tools:
+  - {name: echo, version: 1.0.0, target: "lazy_tools_mod:Echo"}
+  - {name: echo, version: 1.4.0, target: "lazy_tools_mod:Echo", kwargs: {version: 1.4.0}}
+  - {name: echo, version: 2.0.0, target: "lazy_tools_mod:Echo", kwargs: {version: 2.0.0}}
+  - {name: admin, version: 1.0.0, target: "lazy_tools_mod:Admin"}
+  - {name: ghost, version: 1.0.0, target: "lazy_tools_mod:Ghost"}
+""", encoding="utf-8")
+    return manifest
+
+
+class TestToolRegistry:
+    """工具注册中心测试类"""
+
+    def test_discovery_does_not_import_tools(self, lazy_manifest):
+        """登记声明与按索引查询都不导入工具模块，首次 get() 时才导入"""
+        registry = ToolRegistry()
+
+        assert registry.discover(lazy_manifest, entry_point_group=None) == 5
+        assert registry.list_tools()["echo"] == "2.0.0"
+        assert registry.exists("ghost")
+        assert "lazy_tools_mod" not in sys.modules
+
+        tool = registry.get("echo")
+        assert "lazy_tools_mod" in sys.modules
+        assert tool.version == "2.0.0"
+        assert registry.get("echo") is tool
+        assert not registry.is_loaded("echo", "1")
+
+    def test_versions_and_indexes(self, lazy_manifest):
+        """多个版本并存，可按精确版本或主版本获取；二级索引按条件取交集"""
+        registry = ToolRegistry()
+        registry.discover(lazy_manifest, entry_point_group=None)
+        registry.register(FakeTool(name="noop", version="1.2.0"))
+
+        assert registry.versions("echo") == ["1.0.0", "1.4.0", "2.0.0"]
+        assert registry.get("echo", "1").version == "1.4.0"
+        assert registry.get("echo", "1.0.0").version == "1.0.0"
+        assert registry.get("echo", "3") is None
+        assert [(s.name, s.version) for s in registry.find(major=1, has_side_effect=False)] == [
+            ("admin", "1.0.0"), ("echo", "1.0.0"), ("echo", "1.4.0"), ("ghost", "1.0.0"),
+            ("noop", "1.2.0"),
+        ]
+
+        # 清单未声明的元数据在导入后以实例属性为准
+        assert registry.find(permission_level=PermissionLevel.ADMIN) == []
+        registry.get("admin")
+        assert [s.name for s in registry.find(permission_level=PermissionLevel.ADMIN)] == [
+            "admin"
+        ]
+        assert registry.find(has_side_effect=True)[0].name == "admin"
+
+    def test_load_failure_is_reported(self, lazy_manifest):
+        """导入失败或声明与实例不符时返回 None，并以 StructuredError 记录原因"""
+        registry = ToolRegistry()
+        registry.discover(lazy_manifest, entry_point_group=None)
+        registry.register_spec(ToolSpec(name="liar", target="lazy_tools_mod:Echo"))
+
+        assert registry.get("ghost") is None
+        assert registry.get("liar") is None
+        assert registry.load_errors[("ghost", "1.0.0")].code == "TOOL_LOAD_FAILED"
+        assert "declared as liar" in registry.load_errors[("liar", "1.0.0")].message
+
+    def test_entry_points(self, lazy_manifest, monkeypatch):
+        """入口点可指向工具类或返回声明列表的函数"""
+        import importlib.metadata
+
+        class Entry:
+            def __init__(self, name, value):
+                self.name, self.value = name, value
+
+            def load(self):
+                return self.value
+
+        providers = [
+            Entry("admin", __import__("lazy_tools_mod").Admin),
+            Entry("bundle", lambda: [{"name": "echo", "target": "lazy_tools_mod:Echo"}]),
+        ]
+        monkeypatch.setattr(importlib.metadata, "entry_points", lambda group: providers)
+        registry = ToolRegistry()
+
+        assert registry.discover() == 2
+        assert registry.spec("admin").permission_level == PermissionLevel.ADMIN
+        assert registry.get("echo").name == "echo"
+
+
+# ==============================================================================
+# 本地检索
+# ==============================================================================
+
+DOCUMENTS = [
+    {"id": "tracing", "title": "Distributed tracing", "text": "Trace spans across services."},
+    {"id": "retry", "title": "Retry policy", "text": "Exponential backoff with jitter for retry."},
+    {"id": "cache", "title": "Result cache", "text": "Cache tool results; retry on cache miss."},
+    {"id": "zh", "title": "检索", "text": "本地全文检索工具"},
+]
+
+
+def brute_force(counts, query, top_k, k1=1.2, b=0.75):
+    """逐篇文档计算 BM25，作为剪枝查询的参照；counts 为每篇文档的词频"""
+    import array
+
+    avgdl = sum(sum(c.values()) for c in counts) / len(counts)
+    df = Counter(term for c in counts for term in c)
+    scored = []
+    for number, c in enumerate(counts):
+        norm = array.array("f", [k1 * (1 - b + b * sum(c.values()) / avgdl)])[0]
+        score = 0.0
+        for term in dict.fromkeys(tokenize(query)):
+            if c[term]:
+                idf = math.log(1 + (len(counts) - df[term] + 0.5) / (df[term] + 0.5))
+                score += idf * (k1 + 1) * c[term] / (c[term] + norm)
+        if score > 0:
+            scored.append((number, score))
+    return sorted(scored, key=lambda item: (-item[1], item[0]))[:top_k]
+
+
+class TestSearchTool:
+    """本地 BM25 检索测试类"""
+
+    def test_index_roundtrip(self, tmp_path):
+        """构建、打开、查询并读回原始文档"""
+        path = tmp_path / "search.idx"
+        assert build_index(DOCUMENTS, path) == 4
+
+        with SearchIndex(path) as index:
+            assert index.num_docs == 4
+            assert index.document_frequency("retry") == 2
+            hits = index.search("retry backoff", top_k=2)
+            assert [index.document(n)["id"] for n, _ in hits] == ["retry", "cache"]
+            assert hits[0][1] > hits[1][1]
+            assert index.document(hits[0][0]) == DOCUMENTS[1]
+            assert [n for n, _ in index.search("检索")] == [3]
+            assert index.search("unknown words") == []
+
+        (tmp_path / "bad.idx").write_bytes(b"not an index" * 20)
+        with pytest.raises(SearchIndexError):
+            SearchIndex(tmp_path / "bad.idx")
+
+    def test_pruned_search_is_exact(self, tmp_path):
+        """MaxScore 剪枝与块跳过不改变结果：与逐篇打分的 top-k 完全一致"""
+        rng = random.Random(5)
+        words = [f"w{i}" for i in range(200)]
+        weights = [1 / (rank + 1) for rank in range(200)]
+        documents = [
+            {"text": " ".join(rng.choices(words, weights, k=rng.randint(3, 40)))}
+            for _ in range(1500)
+        ]
+        build_index(documents, tmp_path / "zipf.idx", block_size=16)
+        counts = [Counter(tokenize(f"\n{document['text']}")) for document in documents]
+
+        with SearchIndex(tmp_path / "zipf.idx") as index:
+            for _ in range(50):
+                query = " ".join(rng.sample(words, rng.randint(1, 5)))
+                top_k = rng.choice([1, 5, 20])
+                expected = brute_force(counts, query, top_k)
+                hits = index.search(query, top_k)
+                assert [n for n, _ in hits] == [n for n, _ in expected], query
+                assert [s for _, s in hits] == pytest.approx([s for _, s in expected])
+
+    async def test_tool_through_runtime(self, tmp_path):
+        """工具在线程通道中执行，输入经 input_schema 校验"""
+        build_index(DOCUMENTS, tmp_path / "search.idx")
+        tool = SearchTool(tmp_path / "search.idx", snippet_chars=10)
+        runtime = ToolRuntime()
+        try:
+            result = await runtime.invoke(tool, {"query": "distributed tracing", "top_k": 1})
+            assert result.success
+            assert result.output["results"] == [{
+                "id": "tracing", "title": "Distributed tracing",
+                "snippet": "Trace span", "score": result.output["results"][0]["score"],
+            }]
+            invalid = await runtime.invoke(tool, {"query": ""})
+            assert invalid.error.code == "INVALID_TOOL_INPUT"
+        finally:
+            runtime.shutdown()
+            tool.close()
+
+
+# ==============================================================================
+# 计算器
+# ==============================================================================
+
+class StubArray:
+    """
+    逐元素运算的最小数组实现，用于在未安装 NumPy 时检查批量模式的 AST 改写
+    与 NumPy 数组一样不支持真值判断，改写后的代码不得依赖 Python 的 and / or / 链式比较
+    """
+
+    def __init__(self, values):
+        self.values = list(values)
+
+    def __bool__(self):
+        raise TypeError("truth value of an array is ambiguous")
+
+    def __len__(self):
+        return len(self.values)
+
+
+def _lift(function):
+    """把标量函数提升为对 StubArray 逐元素求值，标量参数广播到每一行"""
+
+    def lifted(*args):
+        rows = max((len(a) for a in args if isinstance(a, StubArray)), default=None)
+        if rows is None:
+            return function(*args)
+        columns = [a.values if isinstance(a, StubArray) else [a] * rows for a in args]
+        return StubArray(function(*row) for row in zip(*columns))
+
+    return lifted
+
+
+for _name, _op in {
+    "add": operator.add, "sub": operator.sub, "mul": operator.mul,
+    "truediv": operator.truediv, "floordiv": operator.floordiv, "mod": operator.mod,
+}.items():
+    setattr(StubArray, f"__{_name}__", _lift(_op))
+    setattr(StubArray, f"__r{_name}__", _lift(lambda a, b, op=_op: op(b, a)))
+for _name in ("eq", "ne", "lt", "le", "gt", "ge"):
+    setattr(StubArray, f"__{_name}__", _lift(getattr(operator, _name)))
+StubArray.__neg__ = _lift(operator.neg)
+StubArray.__pos__ = _lift(operator.pos)
+StubArray.__hash__ = None
+
+
+def stub_vector_namespace():
+    """与 _vector_functions() 同名的逐元素实现，基于标量函数"""
+    namespace = {name: _lift(function) for name, function in calculator_tool.FUNCTIONS.items()}
+    namespace.update({
+        "_pow": _lift(calculator_tool._pow),
+        "_not": _lift(operator.not_),
+        "_and": _lift(lambda *values: all(values)),
+        "_where": _lift(lambda test, body, orelse: body if test else orelse),
+        "__builtins__": {},
+        **calculator_tool.CONSTANTS,
+    })
+    return namespace
+
+
+class TestCalculatorTool:
+    """安全计算器测试类"""
+
+    def test_compiled_expressions_are_cached(self):
+        """同一源文本只编译一次，超过上限时淘汰最久未用的表达式"""
+        compiler = ExpressionCompiler(max_entries=2)
+        expression = compiler.compile("a * x ** 2 + (b if x > 0 else -b)")
+
+        assert expression.variables == {"a", "b", "x"}
+        assert expression.evaluate({"a": 2, "b": 1, "x": 3}) == 19
+        assert expression.evaluate({"a": 2, "b": 1, "x": -1}) == 1
+        assert compiler.compile("a * x ** 2 + (b if x > 0 else -b)") is expression
+        compiler.compile("sqrt(x)")
+        compiler.compile("round(pi, 2)")
+        assert compiler.compile("round(pi, 2)").evaluate() == 3.14
+        assert (compiler.hits, compiler.misses, len(compiler)) == (2, 3, 2)
+
+        with pytest.raises(ExpressionError, match="unbound variables: b"):
+            expression.evaluate({"a": 1, "x": 1})
+
+    @pytest.mark.parametrize("source", [
+        "__import__('os')",
+        "x.__class__",
+        "(1).real",
+        "[x][0]",
+        "'a' * 3",
+        "open('f')",
+        "sqrt",
+        "lambda: 1",
+        "_pow(2, 3)",
+        "x := 1",
+        "1 << 9999",
+    ])
+    def test_rejects_unsafe_expressions(self, source):
+        """白名单以外的语法在编译时拒绝"""
+        with pytest.raises(ExpressionError):
+            ExpressionCompiler().compile(source)
+
+    def test_runaway_arithmetic_is_bounded(self):
+        """幂运算与 round() 的规模在执行时检查"""
+        compiler = ExpressionCompiler()
+        with pytest.raises(OverflowError):
+            compiler.compile("9 ** 9 ** 9").evaluate()
+        with pytest.raises(OverflowError):
+            compiler.compile("round(7, -10 ** 9)").evaluate()
+        with pytest.raises(ExpressionError):
+            ExpressionCompiler(max_length=10).compile("1 + 2 + 3 + 4")
+
+    @pytest.mark.parametrize(
+        "source", ["-" * 900 + "1", "1" + "+1" * 499], ids=["unary_chain", "addition_chain"]
+    )
+    def test_deep_nesting_is_rejected(self, source):
+        """嵌套过深的表达式按不合法输入拒绝，而不是以 RecursionError 中断"""
+        with pytest.raises(ExpressionError, match="nested too deeply"):
+            ExpressionCompiler().compile(source)
+
+    def test_powers_stay_real(self, monkeypatch):
+        """负数的非整数次幂与 math.pow 一样抛出 ValueError，逐行批量求值时该行为 nan"""
+        expression = ExpressionCompiler().compile("x ** 0.5")
+        assert expression.evaluate({"x": 4}) == 2.0
+        with pytest.raises(ValueError, match="math domain error"):
+            expression.evaluate({"x": -8})
+
+        monkeypatch.setattr(calculator_tool, "HAS_NUMPY", False)
+        results = expression.evaluate_batch({"x": [4, -8]})
+        assert results[0] == 2.0 and math.isnan(results[1])
+
+    @pytest.mark.parametrize("source", [
+        "max(x, 0) ** 2 + (1 if 0 < x < 2 and not y else 0) + k * log(abs(x) + 1)",
+        "x <= y < k or not (x == 0 or y != 0)",
+        "-x // k % 3 + (min(x, y, 1) if x > y else round(y * pi, 1))",
+        "(x if x >= 0 else -x) ** 0.5 + sqrt(k) * atan2(y, 1)",
+        "(x and 5) + (y or k * 3) + (x and y and k or -1)",
+    ])
+    def test_vector_rewrite_matches_scalar(self, source):
+        """批量模式改写后的代码在逐元素数组上的结果与逐行标量求值一致（不依赖 NumPy）"""
+        xs, ys = [-1.5, 0.0, 0.5, 1.0, 3.0], [0.0, 1.0, 0.0, 2.0, -1.0]
+        code, _ = calculator_tool._compile(source, vector=True)
+        namespace = {**stub_vector_namespace(), "x": StubArray(xs), "y": StubArray(ys), "k": 2}
+
+        vector = eval(code, namespace)
+        expression = ExpressionCompiler().compile(source)
+        expected = [float(expression.evaluate({"x": x, "y": y, "k": 2})) for x, y in zip(xs, ys)]
+        assert [float(value) for value in vector.values] == pytest.approx(expected)
+
+    @pytest.mark.parametrize("vectorized", [True, False])
+    def test_batch_matches_scalar(self, vectorized, monkeypatch):
+        """批量求值与逐行求值结果一致；无效行为 inf / nan"""
+        if vectorized:
+            pytest.importorskip("numpy")
+        else:
+            monkeypatch.setattr(calculator_tool, "HAS_NUMPY", False)
+        expression = ExpressionCompiler().compile(
+            "max(x, 0) ** 2 + (1 if 0 < x < 2 and not y else 0) + k * log(abs(x) + 1)"
+        )
+        xs, ys = [-1.5, 0.5, 1.0, 3.0], [0, 0, 1, 0]
+
+        results = expression.evaluate_batch({"x": xs, "y": ys}, {"k": 2})
+        expected = [expression.evaluate({"x": x, "y": y, "k": 2}) for x, y in zip(xs, ys)]
+        assert results == pytest.approx(expected)
+
+        divided = ExpressionCompiler().compile("1 / x").evaluate_batch({"x": [0, 4]})
+        assert not math.isfinite(divided[0]) and divided[1] == 0.25
+        with pytest.raises(ExpressionError):
+            expression.evaluate_batch({"x": [1, 2], "y": [0]}, {"k": 1})
+
+    async def test_tool_through_runtime(self):
+        """工具输出 result 或 batch 模式下的 results"""
+        runtime = ToolRuntime()
+        tool = CalculatorTool()
+        assert tool.execution_lane == ExecutionLane.THREAD
+        try:
+            result = await runtime.invoke(
+                tool, {"expression": "2 * (x + 1)", "variables": {"x": 4}}
+            )
+            assert result.output == {"result": 10}
+            batch = await runtime.invoke(
+                tool, {"expression": "2 * (x + 1)", "batch": {"x": [0, 1, 2]}}
+            )
+            assert batch.output == {"results": [2.0, 4.0, 6.0]}
+            assert tool.compiler.hits == 1
+            rejected = await runtime.invoke(tool, {"expression": "x.__class__", "variables": {}})
+            assert rejected.error.code == "TOOL_EXCEPTION"
+            invalid = await runtime.invoke(tool, {"expression": "1", "variables": {"x": "1"}})
+            assert invalid.error.code == "INVALID_TOOL_INPUT"
+        finally:
+            runtime.shutdown()
+
+
+# ==============================================================================
+# 网络连接池
+# ==============================================================================
+
+class TestConnectionPool:
+    """连接池测试类（本地 HTTP 服务）"""
+
+    async def test_keep_alive_reuse(self):
+        """顺序请求复用同一连接；分块响应与请求体正确收发"""
+        pool = ConnectionPool()
+        async with LocalHttpServer() as server:
+            try:
+                for i in range(5):
+                    response = await pool.get(server.url(f"/items?page={i}"))
+                    assert response.json()["path"] == f"/items?page={i}"
+                posted = await pool.post(server.url("/chunked"), b'{"q": 1}')
+                assert posted.json() == {"method": "POST", "path": "/chunked", "body": '{"q": 1}'}
+
+                assert server.connections == 1
+                stats = pool.stats()["hosts"][f"http://127.0.0.1:{server.port}"]
+                assert (stats["requests"], stats["opened"], stats["reused"]) == (6, 1, 5)
+                assert (stats["open"], stats["idle"], stats["in_flight"]) == (1, 1, 0)
+            finally:
+                pool.close()
+
+    async def test_per_host_limit_and_pipelining(self):
+        """连接数达到上限后排队；开启流水线时 GET 在已有连接上连续发送"""
+        async with LocalHttpServer() as server:
+            pool = ConnectionPool(PoolConfig(max_per_host=2))
+            try:
+                await asyncio.gather(*(pool.get(server.url("/?delay=10")) for _ in range(8)))
+                assert server.connections == 2
+                assert server.max_active == 2
+                assert pool.stats()["total"]["waits"] > 0
+            finally:
+                pool.close()
+
+            pipelined = ConnectionPool(PoolConfig(max_per_host=1, pipeline_depth=4))
+            try:
+                await pipelined.get(server.url("/warm"))
+                responses = await asyncio.gather(
+                    *(pipelined.get(server.url(f"/p{i}?delay=5")) for i in range(8))
+                )
+                assert [r.json()["path"] for r in responses] == [
+                    f"/p{i}?delay=5" for i in range(8)
+                ]
+                total = pipelined.stats()["total"]
+                assert total["opened"] == 1 and total["pipelined"] > 0
+                assert server.connections == 3
+            finally:
+                pipelined.close()
+
+    async def test_idle_eviction_and_stale_retry(self):
+        """空闲超时的连接被淘汰；服务端关闭的连接不再复用，幂等请求在新连接上重试"""
+        async with LocalHttpServer() as server:
+            pool = ConnectionPool(PoolConfig(idle_timeout_seconds=0.05))
+            try:
+                await pool.get(server.url("/"))
+                await asyncio.sleep(0.1)
+                assert pool.stats()["total"]["open"] == 0
+                assert pool.stats()["total"]["evicted"] == 1
+
+                await pool.get(server.url("/close"))
+                await pool.get(server.url("/"))
+                assert server.connections == 3
+
+                # 服务端在取用前关闭连接：取用时丢弃或发送失败后重试，请求都能成功
+                server.drop_connections()
+                assert (await pool.get(server.url("/after"))).status == 200
+                assert server.connections == 4
+            finally:
+                pool.close()
+
+    async def test_tools_share_runtime_pool(self):
+        """INLINE 工具在 ToolRuntime 中通过 connection_pool() 共享连接"""
+
+        class FetchTool(BaseToolImpl):
+            name = "fetch"
+            version = "1.0.0"
+
+            async def execute(self, input_data):
+                response = await connection_pool().get(input_data["url"])
+                return ToolExecutionResult(success=True, output=response.json())
+
+        with pytest.raises(RuntimeError):
+            connection_pool()
+        async with LocalHttpServer() as server:
+            runtime = ToolRuntime(config=ToolRuntimeConfig(cache=CacheConfig(enabled=False)))
+            try:
+                results = await asyncio.gather(*(
+                    runtime.invoke(FetchTool(), {"url": server.url(f"/{i}")}) for i in range(3)
+                ))
+                assert all(result.success for result in results)
+                await runtime.invoke(FetchTool(), {"url": server.url("/again")})
+                assert runtime.connections.stats()["total"]["reused"] >= 1
+                assert server.connections <= 3
+            finally:
+                runtime.shutdown()
+
+
+
+# ==============================================================================
+# 调用合并
+# ==============================================================================
+
+def batching_runtime(window_ms=5.0, **config):
+    return ToolRuntime(config=ToolRuntimeConfig(
+        cache=CacheConfig(enabled=False),
+        batching=BatchingConfig(enabled=True, window_ms=window_ms, **config),
+    ))
+
+
+class StallingBatchTool(BatchTool):
+    """批量调用在 stall 为 True 时挂起，或按 delay 延迟返回"""
+    timeout_ms = 50
+
+    def __init__(self):
+        super().__init__()
+        self.stall = True
+        self.delay = 0.0
+        self.cancelled = 0
+
+    async def execute_batch(self, inputs):
+        try:
+            while self.stall:
+                await asyncio.sleep(0.01)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        await asyncio.sleep(self.delay)
+        return await super().execute_batch(inputs)
+
+
+class TestToolBatching:
+    """调用合并测试类"""
+
+    async def test_concurrent_calls_coalesce(self):
+        """并发调用按批量上限合并，结果按调用方返回；不合法的输入与失败项单独返回"""
+        tool = BatchTool(max_batch_size=8)
+        tool.input_schema = {"type": "object", "properties": {"n": {"type": "integer"}}}
+        runtime = batching_runtime()
+        inputs = [{"n": i} for i in range(19)] + [{"n": "x"}, {"n": 19, "fail": True}]
+
+        results = await asyncio.gather(*(runtime.invoke(tool, data) for data in inputs))
+
+        assert sorted(tool.batches) == [4, 8, 8]
+        assert [r.output["echo"] for r in results[:19]] == inputs[:19]
+        assert results[19].error.code == "INVALID_TOOL_INPUT"
+        assert results[20].error.code == "TOOL_EXCEPTION"
+        assert runtime.coalescer.stats()["calls"] == 20
+
+        await runtime.invoke(tool, {"n": 0})
+        assert tool.batches[-1] == 1
+        plain = ToolRuntime(config=ToolRuntimeConfig(cache=CacheConfig(enabled=False)))
+        await asyncio.gather(*(plain.invoke(tool, {"n": i}) for i in range(3)))
+        assert len(tool.batches) == 4
+
+    async def test_executor_lane_batch_and_abandoned_calls(self):
+        """THREAD 通道整批执行 compute_batch()；发出前超时的调用不进入批次"""
+        tool = BatchTool(ExecutionLane.THREAD, max_batch_size=16)
+        runtime = batching_runtime(window_ms=50, max_batch_size=4)
+        try:
+            results = await asyncio.gather(
+                *(runtime.invoke(tool, {"n": i}) for i in range(4)),
+                runtime.invoke(tool, {"n": 4}, timeout_ms=10),
+            )
+            assert tool.batches == [4]
+            assert all(r.success for r in results[:4])
+            assert results[4].error.code == "TOOL_TIMEOUT"
+
+            failed = await asyncio.gather(
+                runtime.invoke(tool, {"n": 5}), runtime.invoke(tool, {"n": 6, "fail": True})
+            )
+            assert tool.batches == [4, 2]
+            assert [r.error.code for r in failed] == ["TOOL_EXCEPTION"] * 2
+        finally:
+            runtime.shutdown()
+
+    async def test_stalled_batch_releases_its_slot(self):
+        """挂起的批次在全部调用方超时后被取消并释放并发槽位；批次以最晚的调用方截止时间为限"""
+        tool = StallingBatchTool()
+        runtime = ToolRuntime(config=ToolRuntimeConfig(
+            cache=CacheConfig(enabled=False),
+            limits=ToolLimitsConfig(tools={"batch": ToolLimits(max_concurrency=1)}),
+            batching=BatchingConfig(enabled=True, window_ms=1),
+        ))
+
+        stalled = await asyncio.gather(*(runtime.invoke(tool, {"n": i}) for i in range(2)))
+        assert [r.error.code for r in stalled] == ["TOOL_TIMEOUT"] * 2
+        await asyncio.sleep(0)
+        assert tool.cancelled == 1 and not runtime.coalescer._running
+
+        tool.stall, tool.delay = False, 0.025
+        early, late = await asyncio.gather(
+            runtime.invoke(tool, {"n": 0}, timeout_ms=10),
+            runtime.invoke(tool, {"n": 1}),
+        )
+        assert early.error.code == "TOOL_TIMEOUT"
+        assert late.success and late.output == {"echo": {"n": 1}}
+        assert tool.batches == [2]